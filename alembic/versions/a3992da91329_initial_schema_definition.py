@@ -40,6 +40,17 @@ def upgrade() -> None:
     sa.Column('is_system', sa.Boolean(), nullable=True, server_default=sa.text('false')),
     sa.PrimaryKeyConstraint('id')
     )
+    op.create_table('bastions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False, unique=True),
+    sa.Column('host', sa.String(), nullable=False),
+    sa.Column('port', sa.Integer(), nullable=False, server_default='22'),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('max_channels', sa.Integer(), nullable=False, server_default='10'),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
     op.create_table('devices',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('hostname', sa.String(), nullable=False, unique=True),
@@ -55,6 +66,7 @@ def upgrade() -> None:
     sa.Column('last_seen', sa.DateTime(timezone=True), nullable=True),
     sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), onupdate=sa.text('now()'), nullable=True),
     sa.Column('updated_by', sa.String(), nullable=True),
+    sa.Column('bastion_id', sa.Integer(), sa.ForeignKey('bastions.id', ondelete='SET NULL'), nullable=True),
     sa.PrimaryKeyConstraint('id'),
     sa.UniqueConstraint('ip_address')
     )
@@ -72,6 +84,7 @@ def upgrade() -> None:
     sa.Column('name', sa.String(), nullable=False),
     sa.Column('type', sa.String(), nullable=True),
     sa.Column('description', sa.String(), nullable=True),  # Added for tag description
+    sa.Column('bastion_id', sa.Integer(), sa.ForeignKey('bastions.id', ondelete='SET NULL'), nullable=True),
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_tags_name'), 'tags', ['name'], unique=True)
@@ -82,22 +95,32 @@ def upgrade() -> None:
     sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
     sa.PrimaryKeyConstraint('credential_id', 'tag_id')
     )
+    # Configuration text, stored once per distinct content
+    op.create_table('config_blobs',
+    sa.Column('data_hash', sa.Text(), nullable=False),  # SHA-256 hex of config_data
+    sa.Column('config_data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('data_hash')
+    )
+    # Full-text search GIN index
+    op.create_index('idx_config_blobs_fts',
+        'config_blobs',
+        [sa.text("to_tsvector('english', config_data)")],
+        postgresql_using='gin'
+    )
     op.create_table('device_configurations',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('device_id', sa.Integer(), nullable=False),
-    sa.Column('config_data', sa.Text(), nullable=False),
     sa.Column('retrieved_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
     sa.Column('config_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
-    sa.Column('data_hash', sa.Text(), nullable=False),  # SHA-256 hex of config_data
+    sa.Column('data_hash', sa.Text(), nullable=False),  # config_blobs row holding the text, unless stored as a delta
+    sa.Column('delta_base_id', sa.Integer(), nullable=True),  # Newer snapshot the delta applies to
+    sa.Column('delta', sa.Text(), nullable=True),  # Reverse line delta (JSON), see services.config_history
     sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['delta_base_id'], ['device_configurations.id']),
     sa.PrimaryKeyConstraint('id')
     )
-    # Full-text search GIN index
-    op.create_index('idx_device_configurations_fts',
-        'device_configurations',
-        [sa.text("to_tsvector('english', config_data)")],
-        postgresql_using='gin'
-    )
+    op.create_index('ix_device_configurations_data_hash', 'device_configurations', ['data_hash'])
     op.create_table('device_tag_association',
     sa.Column('device_id', sa.Integer(), nullable=False),
     sa.Column('tag_id', sa.Integer(), nullable=False),
@@ -120,6 +143,7 @@ def upgrade() -> None:
     sa.Column('interval_seconds', sa.Integer(), nullable=True),
     sa.Column('cron_string', sa.String(), nullable=True),
     sa.Column('device_id', sa.Integer(), nullable=True),
+    sa.Column('profile_next_run', sa.Boolean(), nullable=False, server_default=sa.sql.expression.false()),
     sa.PrimaryKeyConstraint('id'),
     sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='SET NULL'),
     )
@@ -177,12 +201,53 @@ def upgrade() -> None:
     op.create_index('idx_job_results_job_type', 'job_results', ['job_type'])
     op.create_index('idx_job_results_status', 'job_results', ['status'])
     op.create_index('idx_job_results_result_time', 'job_results', ['result_time'])
+    op.create_table('job_profiles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('job_id', sa.Integer(), sa.ForeignKey('jobs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('run_started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('device_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stats_text', sa.Text(), nullable=False),
+        sa.Column('allocations_text', sa.Text(), nullable=True),
+        sa.Column('pstats_data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_job_profiles_job_id', 'job_profiles', ['job_id'])
+    op.create_table('device_transport_profiles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('device_id', sa.Integer(), sa.ForeignKey('devices.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('kex', sa.String(length=100), nullable=True),
+        sa.Column('cipher', sa.String(length=100), nullable=True),
+        sa.Column('mac', sa.String(length=100), nullable=True),
+        sa.Column('host_key_type', sa.String(length=100), nullable=True),
+        sa.Column('legacy_required', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('enable_required', sa.Boolean(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_device_transport_profiles_device_id', 'device_transport_profiles', ['device_id'], unique=True)
+    op.create_table('device_credential_status',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('device_id', sa.Integer(), sa.ForeignKey('devices.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('credential_id', sa.Integer(), sa.ForeignKey('credentials.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('last_success', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_failure', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('consecutive_failures', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.UniqueConstraint('device_id', 'credential_id', name='uq_device_credential_status'),
+    )
+    op.create_index('ix_device_credential_status_device_id', 'device_credential_status', ['device_id'])
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index('ix_device_credential_status_device_id', table_name='device_credential_status')
+    op.drop_table('device_credential_status')
+    op.drop_index('ix_device_transport_profiles_device_id', table_name='device_transport_profiles')
+    op.drop_table('device_transport_profiles')
+    op.drop_index('ix_job_profiles_job_id', table_name='job_profiles')
+    op.drop_table('job_profiles')
     op.drop_index('idx_job_results_device_id', table_name='job_results')
     op.drop_index('idx_job_results_job_id', table_name='job_results')
     op.drop_index('idx_job_results_job_type', table_name='job_results')
@@ -203,7 +268,10 @@ def downgrade() -> None:
     op.drop_index('ix_jobs_device_id', table_name='jobs')
     op.drop_table('jobs')
     op.drop_table('device_tag_association')
+    op.drop_index('ix_device_configurations_data_hash', table_name='device_configurations')
     op.drop_table('device_configurations')
+    op.drop_index('idx_config_blobs_fts', table_name='config_blobs')
+    op.drop_table('config_blobs')
     op.drop_table('credential_tag_association')
     op.drop_index(op.f('ix_tags_name'), table_name='tags')
     op.drop_table('tags')
@@ -212,6 +280,7 @@ def downgrade() -> None:
     op.drop_index(op.f('ix_devices_hostname'), table_name='devices')
     op.drop_table('devices')
     op.execute("DROP TYPE IF EXISTS device_source;")
+    op.drop_table('bastions')
     op.drop_table('credentials')
     op.drop_table('users')
     # ### end Alembic commands ###
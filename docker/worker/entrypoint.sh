@@ -18,6 +18,11 @@ until poetry run python -c "import psycopg2; conn=psycopg2.connect(host='postgre
 done
 echo "Postgres is up - continuing"
 
+# Per-process metric files shared by the worker and its forked work horses
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/netraven-metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 echo "Starting RQ worker..."
 # exec poetry run rq worker --url redis://redis:6379/0 
 exec poetry run python -m netraven.worker.worker_runner
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from netraven.config.loader import load_config
 import time
@@ -8,9 +8,10 @@ from redis import Redis
 from rq import Worker
 from rq_scheduler import Scheduler
 from datetime import datetime, timezone
+from netraven.utils import metrics
 
 # Import routers
-from .routers import devices, jobs, users, auth_router, tags, credentials, backups, logs, scheduler, job_results_router, configs  # Import the new logs router, the new scheduler router, the new job results router, and the new configs router
+from .routers import devices, jobs, users, auth_router, tags, credentials, bastions, backups, logs, scheduler, job_results_router, configs  # Import the new logs router, the new scheduler router, the new job results router, and the new configs router
 
 # Load configuration
 config = load_config()
@@ -56,6 +57,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record request latency per route template (not raw path, to bound label cardinality)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=getattr(route, "path", "<unmatched>"),
+            status=str(status),
+        ).observe(time.perf_counter() - start)
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
 @app.get("/health", status_code=200)  # Remove /api prefix
 def health_check():
     """Health check endpoint."""
@@ -125,6 +149,7 @@ app.include_router(auth_router.router)
 app.include_router(users.router)
 app.include_router(tags.router)
 app.include_router(credentials.router)
+app.include_router(bastions.router)
 app.include_router(devices.router)
 app.include_router(jobs.router)
 app.include_router(backups.router)  # Include the backups router
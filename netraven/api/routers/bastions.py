@@ -0,0 +1,138 @@
+"""Bastion management router for SSH jump hosts.
+
+This module provides API endpoints for managing bastions (SSH jump hosts).
+Devices that are not directly reachable are attached to a bastion, either
+directly (``bastion_id`` on the device) or through one of their tags, and the
+worker connects to them through the bastion.
+
+Bastion passwords are encrypted before storing and never returned.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+
+from netraven.api import schemas
+from netraven.api.dependencies import get_db_session, get_current_active_user, require_admin_role
+from netraven.db import models
+
+router = APIRouter(
+    prefix="/bastions",
+    tags=["Bastions"],
+    dependencies=[Depends(get_current_active_user)] # Apply auth to all bastion routes
+)
+
+@router.post("/", response_model=schemas.bastion.Bastion, status_code=status.HTTP_201_CREATED)
+def create_bastion(
+    bastion: schemas.bastion.BastionCreate,
+    db: Session = Depends(get_db_session),
+):
+    """Create a new bastion.
+
+    Password will be encrypted before storing.
+    """
+    existing = db.query(models.Bastion).filter(models.Bastion.name == bastion.name).first()
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bastion with name '{bastion.name}' already exists"
+        )
+
+    db_bastion = models.Bastion.create_with_encrypted_password(**bastion.model_dump())
+    db.add(db_bastion)
+    db.commit()
+    db.refresh(db_bastion)
+    return db_bastion
+
+@router.get("/", response_model=schemas.bastion.PaginatedBastionResponse)
+def list_bastions(
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(20, ge=1, le=100, description="Items per page"),
+    name: Optional[str] = None,
+    db: Session = Depends(get_db_session)
+):
+    """
+    Retrieve a list of bastions with pagination and filtering (passwords are not returned).
+
+    - **page**: Page number (starts at 1)
+    - **size**: Number of items per page
+    - **name**: Filter by name (partial match)
+    """
+    query = db.query(models.Bastion)
+    if name:
+        query = query.filter(models.Bastion.name.ilike(f"%{name}%"))
+
+    total = query.count()
+    pages = (total + size - 1) // size
+    offset = (page - 1) * size
+    bastions = query.order_by(models.Bastion.id).offset(offset).limit(size).all()
+
+    return {
+        "items": bastions,
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": pages
+    }
+
+@router.get("/{bastion_id}", response_model=schemas.bastion.Bastion)
+def get_bastion(
+    bastion_id: int,
+    db: Session = Depends(get_db_session)
+):
+    """Retrieve a specific bastion by ID (password is not returned)."""
+    db_bastion = db.query(models.Bastion).filter(models.Bastion.id == bastion_id).first()
+    if db_bastion is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bastion not found")
+    return db_bastion
+
+@router.put("/{bastion_id}", response_model=schemas.bastion.Bastion)
+def update_bastion(
+    bastion_id: int,
+    bastion: schemas.bastion.BastionUpdate,
+    db: Session = Depends(get_db_session)
+):
+    """Update a bastion.
+
+    If password is provided, it will be re-encrypted.
+    """
+    db_bastion = db.query(models.Bastion).filter(models.Bastion.id == bastion_id).first()
+    if db_bastion is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bastion not found")
+
+    update_data = bastion.model_dump(exclude_unset=True)
+
+    if "name" in update_data and update_data["name"] != db_bastion.name:
+        existing = db.query(models.Bastion).filter(models.Bastion.name == update_data["name"]).first()
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Bastion with name '{update_data['name']}' already exists"
+            )
+
+    for key, value in update_data.items():
+        if key == "password":
+            if value:
+                from netraven.services.crypto import encrypt_password
+                db_bastion.password = encrypt_password(value)
+        else:
+            setattr(db_bastion, key, value)
+
+    db.commit()
+    db.refresh(db_bastion)
+    return db_bastion
+
+@router.delete("/{bastion_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_bastion(
+    bastion_id: int,
+    db: Session = Depends(get_db_session),
+    _: models.User = Depends(require_admin_role) # Protect deletion
+):
+    """Delete a bastion. Devices and tags using it fall back to direct connections."""
+    db_bastion = db.query(models.Bastion).filter(models.Bastion.id == bastion_id).first()
+    if db_bastion is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bastion not found")
+
+    db.delete(db_bastion)
+    db.commit()
+    return None
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from netraven.config.loader import load_config
 from netraven.db.session import get_db
+from netraven.services import config_history
 from typing import List, Dict, Any
 import difflib
 
@@ -10,21 +12,31 @@ router = APIRouter(
     tags=["Configs"]
 )
 
+# Set on search responses when older snapshots may be stored as deltas and were not searched
+SEARCH_SCOPE_HEADER = "X-NetRaven-Search-Scope"
+
 @router.get("/search", summary="Full-text search device configurations")
 def search_configs(
+    response: Response,
     q: str = Query(..., description="Search query for configuration text"),
     db: Session = Depends(get_db)
 ) -> List[Dict[str, Any]]:
     """
     Search device configuration snapshots using Postgres full-text search.
     Returns a list of matching snapshots with metadata and highlighted snippets.
+    Only snapshots stored in full are searched, not those kept as deltas; with
+    ``worker.delta_history`` enabled the response carries
+    ``X-NetRaven-Search-Scope: full-snapshots`` to say so.
     """
+    if config_history.get_delta_settings(load_config())["enabled"]:
+        response.headers[SEARCH_SCOPE_HEADER] = "full-snapshots"
     sql = text("""
-        SELECT id, device_id, config_data, config_metadata, retrieved_at,
-               ts_headline('english', config_data, plainto_tsquery('english', :q)) AS snippet
-        FROM device_configurations
-        WHERE to_tsvector('english', config_data) @@ plainto_tsquery('english', :q)
-        ORDER BY retrieved_at DESC
+        SELECT c.id, c.device_id, c.config_metadata, c.retrieved_at,
+               ts_headline('english', b.config_data, plainto_tsquery('english', :q)) AS snippet
+        FROM device_configurations c
+        JOIN config_blobs b ON b.data_hash = c.data_hash
+        WHERE to_tsvector('english', b.config_data) @@ plainto_tsquery('english', :q)
+        ORDER BY c.retrieved_at DESC
         LIMIT 50
     """)
     results = db.execute(sql, {"q": q}).fetchall()
@@ -77,10 +89,11 @@ def list_configs(
     List all configuration snapshots, optionally filtered by device_id, paginated.
     """
     sql = text("""
-        SELECT id, device_id, retrieved_at, config_metadata, config_data
-        FROM device_configurations
-        WHERE (:device_id IS NULL OR device_id = :device_id)
-        ORDER BY retrieved_at DESC
+        SELECT c.id, c.device_id, c.retrieved_at, c.config_metadata, b.config_data
+        FROM device_configurations c
+        LEFT JOIN config_blobs b ON b.data_hash = c.data_hash
+        WHERE (:device_id IS NULL OR c.device_id = :device_id)
+        ORDER BY c.retrieved_at DESC
         OFFSET :start LIMIT :limit
     """)
     results = db.execute(sql, {"device_id": device_id, "start": start, "limit": limit}).fetchall()
@@ -90,7 +103,7 @@ def list_configs(
             "device_id": row.device_id,
             "retrieved_at": row.retrieved_at,
             "config_metadata": row.config_metadata,
-            "config_data": row.config_data
+            "config_data": config_history.snapshot_text(db, row)
         }
         for row in results
     ]
@@ -104,9 +117,10 @@ def get_config_snapshot(
     Retrieve a specific configuration snapshot (raw config and metadata).
     """
     sql = text("""
-        SELECT id, device_id, config_data, config_metadata, retrieved_at
-        FROM device_configurations
-        WHERE id = :config_id
+        SELECT c.id, c.device_id, b.config_data, c.config_metadata, c.retrieved_at
+        FROM device_configurations c
+        LEFT JOIN config_blobs b ON b.data_hash = c.data_hash
+        WHERE c.id = :config_id
         LIMIT 1
     """)
     row = db.execute(sql, {"config_id": config_id}).fetchone()
@@ -117,7 +131,7 @@ def get_config_snapshot(
         "device_id": row.device_id,
         "retrieved_at": row.retrieved_at,
         "config_metadata": row.config_metadata,
-        "config_data": row.config_data
+        "config_data": config_history.snapshot_text(db, row)
     }
 
 @router.get("/diff", summary="Get unified diff between two config snapshots")
@@ -128,16 +142,24 @@ def diff_config_snapshots(
 ) -> Dict[str, Any]:
     """
     Return a unified diff between two config snapshots' config_data fields.
+    Returns 409 if a snapshot's text can't be read (its blob is missing).
     """
     sql = text("""
-        SELECT id, config_data FROM device_configurations WHERE id = :id
+        SELECT c.id, b.config_data
+        FROM device_configurations c
+        LEFT JOIN config_blobs b ON b.data_hash = c.data_hash
+        WHERE c.id = :id
     """)
     row_a = db.execute(sql, {"id": config_id_a}).fetchone()
     row_b = db.execute(sql, {"id": config_id_b}).fetchone()
     if not row_a or not row_b:
         raise HTTPException(status_code=404, detail="One or both config snapshots not found")
-    a_lines = row_a.config_data.splitlines(keepends=True)
-    b_lines = row_b.config_data.splitlines(keepends=True)
+    text_a = config_history.snapshot_text(db, row_a)
+    text_b = config_history.snapshot_text(db, row_b)
+    if text_a is None or text_b is None:
+        raise HTTPException(status_code=409, detail="Config text of one or both snapshots is not available")
+    a_lines = text_a.splitlines(keepends=True)
+    b_lines = text_b.splitlines(keepends=True)
     diff = list(difflib.unified_diff(
         a_lines, b_lines,
         fromfile=f"config_{row_a.id}",
@@ -172,15 +194,12 @@ def delete_config_snapshot(
     """
     Delete a specific configuration snapshot by ID.
     """
-    sql = text("""
-        DELETE FROM device_configurations WHERE id = :config_id RETURNING id
-    """)
-    result = db.execute(sql, {"config_id": config_id})
+    # Rebases deltas made against this snapshot and drops its text unless shared
+    deleted = config_history.delete_snapshot(db, config_id)
     db.commit()
-    row = result.fetchone()
-    if not row:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Config snapshot not found")
-    return {"deleted_id": row.id}
+    return {"deleted_id": config_id}
 
 @router.post("/{config_id}/restore", summary="Restore a config snapshot (mark as restored)")
 def restore_config_snapshot(
@@ -192,8 +211,10 @@ def restore_config_snapshot(
     For now, just log/return the action (actual device push is out of scope).
     """
     sql = text("""
-        SELECT id, device_id, config_data, config_metadata, retrieved_at
-        FROM device_configurations WHERE id = :config_id
+        SELECT c.id, c.device_id, b.config_data, c.config_metadata, c.retrieved_at
+        FROM device_configurations c
+        LEFT JOIN config_blobs b ON b.data_hash = c.data_hash
+        WHERE c.id = :config_id
     """)
     row = db.execute(sql, {"config_id": config_id}).fetchone()
     if not row:
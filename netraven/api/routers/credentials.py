@@ -18,6 +18,7 @@ from netraven.api import schemas
 from netraven.api.dependencies import get_db_session, get_current_active_user, require_admin_role
 from netraven.db import models
 from netraven.api import auth # Import auth utils for hashing
+from netraven.services import credential_index
 
 router = APIRouter(
     prefix="/credentials",
@@ -59,6 +60,7 @@ def create_credential(
 
     db.add(db_credential)
     db.commit()
+    credential_index.bump_version()
     db.refresh(db_credential)
     
     # Eager load tags for response
@@ -169,6 +171,7 @@ def update_credential(
             db_credential.tags = tags
 
     db.commit()
+    credential_index.bump_version()
     db.refresh(db_credential)
     return db_credential
 
@@ -192,4 +195,5 @@ def delete_credential(
 
     db.delete(db_credential)
     db.commit()
+    credential_index.bump_version()
     return None 
\ No newline at end of file
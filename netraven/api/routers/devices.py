@@ -36,6 +36,7 @@ from netraven.api import schemas # Import schemas module
 from netraven.api.dependencies import get_db_session, get_current_active_user, require_admin_role # Import dependencies
 from netraven.db import models # Import DB models
 from netraven.services.device_credential import get_matching_credentials_for_device
+from netraven.services import credential_index
 from netraven.db.models import Job, Log
 from netraven.utils.unified_logger import get_unified_logger
 from netraven.utils.log_level_utils import log_level_to_status
@@ -72,6 +73,19 @@ def get_tags_by_ids(db: Session, tag_ids: List[int]) -> List[models.Tag]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tag(s) not found: {missing_ids}")
     return tags
 
+def check_bastion_exists(db: Session, bastion_id: Optional[int]) -> None:
+    """Make sure a referenced bastion exists (used in create/update).
+
+    Args:
+        db (Session): Database session for executing queries
+        bastion_id (Optional[int]): Bastion ID from the request, None to detach the bastion
+
+    Raises:
+        HTTPException (404): If no bastion exists with the given ID
+    """
+    if bastion_id is not None and db.get(models.Bastion, bastion_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Bastion not found: {bastion_id}")
+
 @router.post("/", response_model=schemas.device.Device, status_code=status.HTTP_201_CREATED)
 def create_device(
     device: schemas.device.DeviceCreate,
@@ -92,6 +106,7 @@ def create_device(
     Raises:
         HTTPException (400): If the hostname or IP address is already registered to another device
         HTTPException (404): If any of the specified tag IDs don't exist in the database
+        HTTPException (404): If the specified bastion doesn't exist
         
     Notes:
         - Automatically adds the default tag to the device if it exists
@@ -114,6 +129,17 @@ def create_device(
         )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=msg)
 
+    try:
+        check_bastion_exists(db, device.bastion_id)
+    except HTTPException as e:
+        logger.log(
+            f"Device creation failed: {e.detail} (request: {request.url if request else 'N/A'})",
+            level="WARNING",
+            destinations=["stdout", "file", "db"],
+            source="devices_router",
+        )
+        raise
+
     # Create a dict with device data and explicitly convert IP to string
     device_data = device.model_dump(exclude={'tags'})
     device_data['ip_address'] = str(device_data['ip_address'])
@@ -149,6 +175,7 @@ def create_device(
 
     db.add(db_device)
     db.commit()
+    credential_index.bump_version()
     logger.log(
         f"Device created successful [{db_device.hostname}] ...",
         level="INFO",
@@ -173,6 +200,7 @@ def create_device(
         if default_tag not in db_device.tags:
             db_device.tags.append(default_tag)
             db.commit()
+            credential_index.bump_version()
             db.refresh(db_device)
             matching_credentials = get_matching_credentials_for_device(db, db_device.id)
         if not matching_credentials:
@@ -277,6 +305,8 @@ def bulk_import_devices(
         except Exception as e:
             db.rollback()
             results["errors"].append({"row": idx+1, "error": str(e)})
+    if results["success"]:
+        credential_index.bump_version()
     logger.log(f"Bulk import completed: {len(results['success'])} success, {len(results['errors'])} errors, {len(results['duplicates'])} duplicates", level="INFO", destinations=["stdout", "file", "db"], source="devices_router")
     return {
         "success_count": len(results["success"]),
@@ -385,6 +415,10 @@ def list_devices(
     # Map device_id -> log
     latest_log_map = {log.device_id: log for log in latest_logs}
 
+    # Matching credential counts for the whole page: from the credential index,
+    # or one aggregate query if the index is unavailable
+    credential_counts = credential_index.count_matching_credentials(db, device_ids)
+
     # Enhance with credential counts and reachability status
     device_list = []
     for device in devices:
@@ -395,9 +429,7 @@ def list_devices(
         }
         # Add tags relationship
         device_dict["tags"] = device.tags
-        # Get matching credential count using the service function
-        matching_credentials = get_matching_credentials_for_device(db, device.id)
-        device_dict["matching_credentials_count"] = len(matching_credentials)
+        device_dict["matching_credentials_count"] = credential_counts.get(device.id, 0)
         # Add reachability status fields
         log = latest_log_map.get(device.id)
         if log:
@@ -467,6 +499,7 @@ def update_device(
         HTTPException (400): If attempting to change hostname to one that already exists
         HTTPException (400): If attempting to change IP address to one that already exists
         HTTPException (404): If any of the specified tag IDs don't exist in the database
+        HTTPException (404): If the specified bastion doesn't exist
         
     Notes:
         - Only fields explicitly set in the request body will be updated
@@ -510,6 +543,18 @@ def update_device(
             )
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=msg)
 
+    if 'bastion_id' in update_data:
+        try:
+            check_bastion_exists(db, update_data['bastion_id'])
+        except HTTPException as e:
+            logger.log(
+                f"Device update failed: {e.detail} (request: {request.url if request else 'N/A'})",
+                level="WARNING",
+                destinations=["stdout", "file", "db"],
+                source="devices_router",
+            )
+            raise
+
     # Convert IP address to string if present
     if 'ip_address' in update_data:
         update_data['ip_address'] = str(update_data['ip_address'])
@@ -555,6 +600,7 @@ def update_device(
             db_device.tags = tags
 
     db.commit()
+    credential_index.bump_version()
     db.refresh(db_device)
     return db_device
 
@@ -587,6 +633,7 @@ def delete_device(
     
     db.delete(db_device)
     db.commit()
+    credential_index.bump_version()
     return None
 
 @router.get("/{device_id}/credentials", response_model=List[schemas.credential.Credential])
@@ -616,6 +663,16 @@ def get_device_credentials(
     if device is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Device not found")
     
-    # Get matching credentials using the service function
-    credentials = get_matching_credentials_for_device(db, device_id)
-    return credentials
+    # Matching credential IDs come from the credential index; the rows are
+    # loaded for their current usage stats
+    credential_ids = credential_index.get_matching_credential_ids(db, device_id)
+    if not credential_ids:
+        return []
+    credentials = {
+        credential.id: credential
+        for credential in db.query(models.Credential)
+        .options(selectinload(models.Credential.tags))
+        .filter(models.Credential.id.in_(credential_ids))
+        .all()
+    }
+    return [credentials[credential_id] for credential_id in credential_ids if credential_id in credentials]
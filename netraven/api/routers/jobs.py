@@ -22,7 +22,8 @@ from netraven.api.dependencies import get_db_session, get_current_active_user, r
 from netraven.db import models
 from netraven.db.models import Job, Device, Log
 from netraven.api.schemas.job import (
-    ScheduledJobSummary, RecentJobExecution, JobTypeSummary, JobDashboardStatus, RQQueueStatus, WorkerStatus
+    ScheduledJobSummary, RecentJobExecution, JobTypeSummary, JobDashboardStatus, RQQueueStatus, WorkerStatus,
+    JobProfileSummary
 )
 from netraven.api.schemas.tag import Tag as TagSchema
 
@@ -454,6 +455,116 @@ def delete_job(
     db.commit()
     return None
 
+# --- Job Profiling Endpoints ---
+
+PROFILE_DOWNLOAD_FORMATS = {
+    # format: (JobProfile attribute, media type, file extension)
+    "pstats": ("pstats_data", "application/octet-stream", "pstats"),
+    "stats": ("stats_text", "text/plain", "txt"),
+    "allocations": ("allocations_text", "text/plain", "txt"),
+}
+
+@router.post("/{job_id}/profile", response_model=schemas.job.Job)
+def profile_next_job_run(
+    job_id: int,
+    db: Session = Depends(get_db_session)
+):
+    """Request profiling of the job's next run.
+
+    Sets the job's profile_next_run flag. The worker runs the next execution
+    under cProfile (all dispatcher threads) and tracemalloc, stores the result
+    as a profile artifact and clears the flag.
+
+    Args:
+        job_id: ID of the job to profile
+        db: Database session
+
+    Returns:
+        Updated job object
+
+    Raises:
+        HTTPException (404): If the job with the specified ID is not found
+    """
+    db_job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if db_job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    db_job.profile_next_run = True
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+@router.get("/{job_id}/profiles", response_model=List[JobProfileSummary])
+def list_job_profiles(
+    job_id: int,
+    db: Session = Depends(get_db_session)
+):
+    """List profiling artifacts captured for a job, newest first.
+
+    Args:
+        job_id: ID of the job
+        db: Database session
+
+    Returns:
+        List of profile artifact summaries
+
+    Raises:
+        HTTPException (404): If the job with the specified ID is not found
+    """
+    if db.query(models.Job.id).filter(models.Job.id == job_id).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return (
+        db.query(models.JobProfile)
+        .filter(models.JobProfile.job_id == job_id)
+        .order_by(models.JobProfile.created_at.desc())
+        .all()
+    )
+
+@router.get("/{job_id}/profiles/{profile_id}/download")
+def download_job_profile(
+    job_id: int,
+    profile_id: int,
+    format: str = Query("pstats", description="pstats (raw, for pstats/snakeviz), stats (text report) or allocations (tracemalloc top)"),
+    db: Session = Depends(get_db_session)
+):
+    """Download a profiling artifact.
+
+    Args:
+        job_id: ID of the job
+        profile_id: ID of the profile artifact
+        format: Which part of the artifact to download
+        db: Database session
+
+    Returns:
+        The artifact as a file download
+
+    Raises:
+        HTTPException (400): If the format is unknown
+        HTTPException (404): If the artifact (or the requested part) is not found
+    """
+    if format not in PROFILE_DOWNLOAD_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown format. Use one of: {', '.join(PROFILE_DOWNLOAD_FORMATS)}"
+        )
+    job_profile = (
+        db.query(models.JobProfile)
+        .filter(models.JobProfile.id == profile_id, models.JobProfile.job_id == job_id)
+        .first()
+    )
+    if job_profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    attribute, media_type, extension = PROFILE_DOWNLOAD_FORMATS[format]
+    content = getattr(job_profile, attribute)
+    if content is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile has no {format} data")
+    filename = f"job-{job_id}-profile-{profile_id}-{format}.{extension}"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # --- Job Execution Endpoint (Moved from placeholder) ---
 
 from rq import Queue
@@ -17,6 +17,7 @@ from sqlalchemy import and_
 from netraven.api import schemas
 from netraven.api.dependencies import get_db_session, get_current_active_user, require_admin_role
 from netraven.db import models
+from netraven.services import credential_index
 
 router = APIRouter(
     prefix="/tags",
@@ -44,10 +45,13 @@ def create_tag(
         
     Raises:
         HTTPException (400): If the tag name already exists
+        HTTPException (404): If the specified bastion doesn't exist
     """
     existing_tag = db.query(models.Tag).filter(models.Tag.name == tag.name).first()
     if existing_tag:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tag name already exists")
+    if tag.bastion_id is not None and db.get(models.Bastion, tag.bastion_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bastion not found")
 
     db_tag = models.Tag(**tag.model_dump())
     db.add(db_tag)
@@ -157,6 +161,7 @@ def update_tag(
     Raises:
         HTTPException (404): If the tag with the specified ID is not found
         HTTPException (400): If the new tag name already exists
+        HTTPException (404): If the specified bastion doesn't exist
     """
     db_tag = db.query(models.Tag).filter(models.Tag.id == tag_id).first()
     if db_tag is None:
@@ -168,6 +173,8 @@ def update_tag(
     if 'name' in update_data and update_data['name'] != db_tag.name:
         if db.query(models.Tag).filter(models.Tag.name == update_data['name']).first():
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tag name already exists")
+    if update_data.get('bastion_id') is not None and db.get(models.Bastion, update_data['bastion_id']) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bastion not found")
 
     for key, value in update_data.items():
         setattr(db_tag, key, value)
@@ -208,4 +215,6 @@ def delete_tag(
 
     db.delete(db_tag)
     db.commit()
+    # Deleting a tag drops its device and credential associations
+    credential_index.bump_version()
     return None 
\ No newline at end of file
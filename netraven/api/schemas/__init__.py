@@ -7,6 +7,7 @@ and documentation for the API endpoints.
 Each module corresponds to a specific resource or domain within the application:
 - device: Network device schemas
 - credential: Authentication credential schemas
+- bastion: SSH jump host schemas
 - job: Job execution schemas
 - tag: Tag/categorization schemas
 - user: User account schemas
@@ -22,4 +23,5 @@ from . import log
 from . import token
 from . import tag
 from . import credential
+from . import bastion
 from . import base
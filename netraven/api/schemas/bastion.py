@@ -0,0 +1,162 @@
+"""Bastion schemas for the NetRaven API.
+
+This module defines Pydantic models for bastion (SSH jump host) API operations.
+Bastions are attached to devices or tags; the worker connects to such devices
+through a channel opened on the bastion's SSH transport.
+"""
+
+from .base import BaseSchema, BaseSchemaWithId, create_paginated_response
+from typing import Optional
+from pydantic import Field, field_validator
+
+# --- Bastion Schemas ---
+
+class BastionBase(BaseSchema):
+    """Base schema for bastion data shared by multiple bastion schemas.
+
+    The password is handled in the create/update schemas only and is never
+    returned in responses.
+
+    Attributes:
+        name: Unique name of the bastion
+        host: Hostname or IP address of the bastion
+        port: SSH port of the bastion
+        username: Username for bastion authentication
+        max_channels: Device sessions allowed through the bastion at once
+        description: Optional description
+    """
+    name: str = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        example="dc1-jump",
+        description="Unique name of the bastion"
+    )
+    host: str = Field(
+        ...,
+        min_length=1,
+        max_length=255,
+        example="10.0.0.5",
+        description="Hostname or IP address of the bastion"
+    )
+    port: int = Field(
+        22,
+        ge=1,
+        le=65535,
+        example=22,
+        description="SSH port of the bastion"
+    )
+    username: str = Field(
+        ...,
+        min_length=1,
+        max_length=255,
+        example="netraven",
+        description="Username for authentication to the bastion"
+    )
+    max_channels: int = Field(
+        10,
+        ge=1,
+        le=1000,
+        example=10,
+        description="Maximum number of device sessions tunnelled through the bastion at the same time"
+    )
+    description: Optional[str] = Field(
+        None,
+        max_length=500,
+        example="Jump host for the DC1 management network",
+        description="Optional description of the bastion"
+    )
+
+class BastionCreate(BastionBase):
+    """Schema for creating a new bastion.
+
+    Attributes:
+        password: Password for bastion authentication
+    """
+    password: str = Field(
+        ...,
+        min_length=1,
+        max_length=255,
+        example="secureP@ssw0rd",
+        description="Password for authentication (will be stored securely)"
+    )
+
+    @field_validator('password')
+    @classmethod
+    def validate_password(cls, v):
+        """Validate password is not empty.
+
+        Args:
+            v: The password value to validate
+
+        Returns:
+            The validated password
+
+        Raises:
+            ValueError: If the password is empty or contains only whitespace
+        """
+        if not v.strip():
+            raise ValueError("Password cannot be empty")
+        return v
+
+class BastionUpdate(BaseSchema):
+    """Schema for updating an existing bastion.
+
+    All fields are optional since updates may modify only a subset of
+    bastion properties.
+
+    Attributes:
+        name: Optional updated name
+        host: Optional updated host
+        port: Optional updated SSH port
+        username: Optional updated username
+        password: Optional updated password
+        max_channels: Optional updated channel limit
+        description: Optional updated description
+    """
+    name: Optional[str] = Field(None, min_length=1, max_length=100, example="dc1-jump")
+    host: Optional[str] = Field(None, min_length=1, max_length=255, example="10.0.0.5")
+    port: Optional[int] = Field(None, ge=1, le=65535, example=22)
+    username: Optional[str] = Field(None, min_length=1, max_length=255, example="netraven")
+    password: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=255,
+        example="newSecureP@ssw0rd",
+        description="Password for authentication (will be stored securely)"
+    )
+    max_channels: Optional[int] = Field(None, ge=1, le=1000, example=10)
+    description: Optional[str] = Field(None, max_length=500)
+
+    @field_validator('password')
+    @classmethod
+    def validate_password(cls, v):
+        """Validate password is not empty if provided in an update.
+
+        Args:
+            v: The password value to validate
+
+        Returns:
+            The validated password
+
+        Raises:
+            ValueError: If the password is empty or contains only whitespace
+        """
+        if v is not None and not v.strip():
+            raise ValueError("Password cannot be empty")
+        return v
+
+# Response model, excludes password
+class Bastion(BastionBase, BaseSchemaWithId):
+    """Complete bastion schema used for responses.
+
+    Does NOT include the password field, as passwords should never be
+    returned in responses.
+
+    Attributes:
+        id: Primary key identifier for the bastion
+    """
+    pass
+
+# Paginated response model
+PaginatedBastionResponse = create_paginated_response(Bastion)
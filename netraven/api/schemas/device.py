@@ -33,6 +33,7 @@ class DeviceBase(BaseSchema):
         model: Optional model of the device
         source: Source of the device information (local or imported)
         notes: Optional additional notes about the device
+        bastion_id: Optional bastion (jump host) used to reach the device
     """
     hostname: str = Field(
         ..., 
@@ -91,6 +92,11 @@ class DeviceBase(BaseSchema):
         description="Additional notes about the device (supports markdown)",
         example="This device is in the main rack.\n\n*Check quarterly*."
     )
+    bastion_id: Optional[int] = Field(
+        None,
+        example=1,
+        description="ID of the bastion (jump host) used to reach the device. Overrides the bastion of its tags."
+    )
 
     @field_validator('hostname')
     @classmethod
@@ -169,6 +175,7 @@ class DeviceUpdate(BaseSchema):
         description: Optional updated description
         port: Optional updated SSH port
         tags: Optional updated list of tag IDs
+        bastion_id: Optional updated bastion ID
     """
     hostname: Optional[str] = Field(
         None,
@@ -209,6 +216,11 @@ class DeviceUpdate(BaseSchema):
         description="List of tag IDs to associate with the device",
         example=[1, 2]
     )
+    bastion_id: Optional[int] = Field(
+        None,
+        example=1,
+        description="ID of the bastion (jump host) used to reach the device"
+    )
     
     @field_validator('hostname')
     @classmethod
@@ -172,6 +172,7 @@ class JobUpdate(BaseSchema):
         scheduled_for: Optional updated scheduled time
         tags: Optional updated list of tag IDs
         device_id: Optional updated device ID
+        profile_next_run: Optional flag to profile the job's next run
     """
     name: Optional[str] = Field(
         None,
@@ -226,6 +227,11 @@ class JobUpdate(BaseSchema):
         description="ID of a single device to target with this job. Mutually exclusive with tags.",
         example=42
     )
+    profile_next_run: Optional[bool] = Field(
+        None,
+        description="Run the next execution of this job under the profiler",
+        example=True
+    )
 
     @model_validator(mode='after')
     def validate_targeting_fields(self):
@@ -252,6 +258,7 @@ class Job(JobBase, BaseSchemaWithId):
         tags: List of Tag objects associated with this job
         device_id: ID of the single device targeted by this job (if any)
         is_system_job: Whether the job is a system job (not user-editable/deletable)
+        profile_next_run: Whether the next run will be profiled
     """
     status: str = Field(
         ...,
@@ -278,10 +285,27 @@ class Job(JobBase, BaseSchemaWithId):
         description="Whether the job is a system job (not user-editable/deletable)",
         example=False
     )
+    profile_next_run: bool = Field(
+        False,
+        description="Whether the next run of this job will be profiled",
+        example=False
+    )
 
 # Paginated response model
 PaginatedJobResponse = create_paginated_response(Job)
 
+class JobProfileSummary(BaseSchemaWithId):
+    """Metadata of a profiling artifact captured for one job run.
+
+    The pstats data and reports are downloaded separately via
+    /jobs/{job_id}/profiles/{profile_id}/download.
+    """
+    job_id: int
+    run_started_at: datetime
+    duration_seconds: float
+    device_count: int
+    created_at: datetime
+
 # --- NetRaven Job Dashboard Schemas ---
 
 class QueueJobDetail(BaseSchema):
@@ -22,6 +22,7 @@ class TagBase(BaseSchema):
         name: Name of the tag
         type: Optional categorization of the tag (e.g., 'location', 'role')
         description: Optional description for the tag
+        bastion_id: Optional bastion (jump host) for devices with this tag
     """
     name: str = Field(
         ...,
@@ -43,6 +44,11 @@ class TagBase(BaseSchema):
         example="Used for core network devices",
         description="Optional description for the tag."
     )
+    bastion_id: Optional[int] = Field(
+        None,
+        example=1,
+        description="ID of the bastion (jump host) used to reach devices with this tag."
+    )
     
     @field_validator('name')
     @classmethod
@@ -83,6 +89,7 @@ class TagUpdate(BaseSchema):
         name: Optional updated tag name
         type: Optional updated tag type
         description: Optional updated tag description
+        bastion_id: Optional updated bastion ID
     """
     name: Optional[str] = Field(
         None,
@@ -104,6 +111,11 @@ class TagUpdate(BaseSchema):
         example="Used for core network devices",
         description="Optional description for the tag."
     )
+    bastion_id: Optional[int] = Field(
+        None,
+        example=1,
+        description="ID of the bastion (jump host) used to reach devices with this tag."
+    )
     
     @field_validator('name')
     @classmethod
@@ -28,6 +28,7 @@ try:
     from netraven.db.models.credential import Credential
     from netraven.api.auth import get_password_hash
     from netraven.db.models.job import Job
+    from netraven.services import credential_index
 except ImportError as e:
     logger.log(
         f"Failed to import required modules: {e}",
@@ -399,6 +400,9 @@ def init_database():
         # Create system reachability job
         create_system_reachability_job(db)
         
+        # Tag associations changed outside the API; invalidate the API's credential index
+        credential_index.bump_version()
+        
         logger.log("Database initialization completed successfully", level="INFO", destinations=["stdout"], source="db_init_data")
         return 0
     except Exception as e:
@@ -20,10 +20,15 @@ from netraven.db.models.tag import Tag, device_tag_association, credential_tag_a
 #from netraven.db.models.job_log import JobLog, LogLevel  # Deprecated
 #from netraven.db.models.connection_log import ConnectionLog  # Deprecated
 from netraven.db.models.device_config import DeviceConfiguration
+from netraven.db.models.config_blob import ConfigBlob
 from netraven.db.models.credential import Credential
 from netraven.db.models.system_setting import SystemSetting
 from netraven.db.models.user import User
 from netraven.db.models.job_result import JobResult
+from netraven.db.models.job_profile import JobProfile
+from netraven.db.models.device_transport_profile import DeviceTransportProfile
+from netraven.db.models.bastion import Bastion
+from netraven.db.models.device_credential_status import DeviceCredentialStatus
 
 # These are all exported for convenience when importing from netraven.db.models
 __all__ = [
@@ -39,8 +44,13 @@ __all__ = [
     "job_tags_association",
     # "JobLog",  # Deprecated
     "DeviceConfiguration",
+    "ConfigBlob",
     "Credential",
     "SystemSetting",
     "User",
-    "JobResult"
+    "JobResult",
+    "JobProfile",
+    "DeviceTransportProfile",
+    "Bastion",
+    "DeviceCredentialStatus"
 ] 
\ No newline at end of file
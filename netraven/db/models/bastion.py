@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Integer, String
+
+from netraven.db.base import Base
+from netraven.services.crypto import encrypt_password, decrypt_password
+
+class Bastion(Base):
+    """An SSH jump host used to reach devices that aren't directly reachable.
+
+    A bastion is attached to a device (``Device.bastion_id``) or to a tag
+    (``Tag.bastion_id``); a device's own bastion takes precedence over its
+    tags'. The worker keeps one SSH transport per bastion for a job run and
+    opens a ``direct-tcpip`` channel through it for every device session,
+    with at most ``max_channels`` channels open at a time.
+
+    Security Note:
+        Passwords are stored encrypted in the database.
+
+    Attributes:
+        id: Primary key identifier
+        name: Unique display name of the bastion
+        host: Address of the bastion
+        port: SSH port of the bastion
+        username: Username for bastion authentication
+        password: Encrypted password for bastion authentication
+        max_channels: Device sessions allowed through the bastion at once
+        description: Optional description
+    """
+    __tablename__ = "bastions"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    host = Column(String, nullable=False)
+    port = Column(Integer, nullable=False, default=22)
+    username = Column(String, nullable=False)
+    password = Column(String, nullable=False)  # Stores encrypted password
+    max_channels = Column(Integer, nullable=False, default=10)
+    description = Column(String, nullable=True)
+
+    @property
+    def get_password(self):
+        """Get the decrypted password for the bastion connection."""
+        return decrypt_password(self.password)
+
+    @classmethod
+    def create_with_encrypted_password(cls, password, **kwargs):
+        """Create a new bastion with an encrypted password.
+
+        Args:
+            password: The plaintext password to encrypt
+            **kwargs: Additional fields for the bastion
+
+        Returns:
+            Bastion: A new unsaved Bastion object
+        """
+        return cls(password=encrypt_password(password), **kwargs)
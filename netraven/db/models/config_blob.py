@@ -0,0 +1,116 @@
+import hashlib
+from typing import Iterable, Optional
+
+from sqlalchemy import Column, Text, DateTime, delete, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from netraven.db.base import Base
+
+class ConfigBlob(Base):
+    """Configuration text, stored once per distinct content.
+
+    Snapshots (``DeviceConfiguration``) reference their text by ``data_hash``,
+    so identical configurations, whether from many devices or from one
+    device over time, share one row.
+
+    Attributes:
+        data_hash: SHA-256 hex of config_data (primary key)
+        config_data: The configuration text
+        created_at: When the content was first stored
+    """
+    __tablename__ = "config_blobs"
+
+    data_hash = Column(Text, primary_key=True)
+    config_data = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+def hash_config(config_data: str) -> str:
+    """SHA-256 hex of a configuration text, as used for ``data_hash``."""
+    return hashlib.sha256(config_data.encode("utf-8")).hexdigest()
+
+
+def delete_unreferenced_blobs(session: Session, data_hashes: Optional[Iterable[str]] = None) -> int:
+    """Delete blobs no snapshot stored in full references any more (only among ``data_hashes`` if given).
+
+    On PostgreSQL the candidate blobs are locked first. A backup storing a
+    snapshot that uses one of them holds the row lock from its upsert (see
+    :func:`_insert_missing`) until it commits, so the reference check below
+    runs after that snapshot is visible and the blob is kept.
+
+    Returns:
+        Number of blobs deleted
+    """
+    from netraven.db.models.device_config import DeviceConfiguration
+
+    if data_hashes is not None:
+        data_hashes = list(data_hashes)
+    if session.get_bind().dialect.name == "postgresql":
+        candidates = select(ConfigBlob.data_hash).with_for_update()
+        if data_hashes is not None:
+            candidates = candidates.where(ConfigBlob.data_hash.in_(data_hashes))
+        session.execute(candidates)
+    referenced = select(DeviceConfiguration.id).where(
+        DeviceConfiguration.data_hash == ConfigBlob.data_hash,
+        DeviceConfiguration.delta.is_(None),
+    ).exists()
+    stmt = delete(ConfigBlob).where(~referenced)
+    if data_hashes is not None:
+        stmt = stmt.where(ConfigBlob.data_hash.in_(data_hashes))
+    return session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def _insert_missing(dialect_name: str):
+    """INSERT into config_blobs that keeps hashes already stored.
+
+    On PostgreSQL an existing row gets a no-op update rather than being
+    skipped, which locks it until the transaction ends: a concurrent
+    :func:`delete_unreferenced_blobs` can't drop a blob the snapshot being
+    stored is about to reference. (SQLite serialises writers anyway.)
+    """
+    table = ConfigBlob.__table__
+    if dialect_name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=["data_hash"])
+    return postgresql.insert(table).on_conflict_do_update(
+        index_elements=["data_hash"],
+        set_={"created_at": table.c.created_at},
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def store_pending_config_blobs(session, flush_context, instances):
+    """Store the text of new snapshots in config_blobs before they are inserted.
+
+    ``DeviceConfiguration(config_data=...)`` only keeps the text on the
+    instance; here it is written with an insert that keeps hashes already
+    present, so concurrent workers storing the same content don't conflict.
+    """
+    from netraven.db.models.device_config import DeviceConfiguration
+
+    blobs = {}
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, DeviceConfiguration) and obj.pending_config_data is not None:
+            if not obj.data_hash:
+                obj.data_hash = hash_config(obj.pending_config_data)
+            blobs.setdefault(obj.data_hash, obj.pending_config_data)
+    if not blobs:
+        return
+    connection = session.connection()
+    connection.execute(
+        _insert_missing(connection.dialect.name),
+        [{"data_hash": data_hash, "config_data": config_data} for data_hash, config_data in blobs.items()],
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def release_pending_config_data(session, flush_context):
+    """Drop the text kept on flushed snapshots; ``config_data`` reads the blob from now on."""
+    from netraven.db.models.device_config import DeviceConfiguration
+
+    new = set(session.new)
+    for obj in list(new) + list(session.dirty):
+        if isinstance(obj, DeviceConfiguration) and obj.__dict__.pop("_config_data", None) is not None:
+            if obj not in new:
+                # The text changed, so the blob loaded before may not be its blob any more
+                session.expire(obj, ["blob"])
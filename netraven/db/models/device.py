@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, func
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, func
 from sqlalchemy.orm import relationship
 import enum
 
@@ -31,6 +31,7 @@ class Device(Base):
         last_seen: Timestamp of last successful connection to the device
         last_updated: Timestamp of the last update to the device information
         updated_by: Identifier of the user who last updated the device information
+        bastion_id: Jump host used to reach the device (overrides its tags' bastion)
         tags: Related Tag objects via many-to-many relationship
         configurations: Related DeviceConfiguration objects
         # connection_logs: Related ConnectionLog objects
@@ -51,6 +52,7 @@ class Device(Base):
     last_seen = Column(DateTime(timezone=True), onupdate=func.now())
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     updated_by = Column(String, nullable=True)
+    bastion_id = Column(Integer, ForeignKey("bastions.id", ondelete="SET NULL"), nullable=True)
 
     tags = relationship(
         "Tag",
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, func, inspect
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import object_session, relationship
+
+from netraven.db.models.config_blob import ConfigBlob, hash_config
 
 from netraven.db.base import Base
 
@@ -11,22 +13,69 @@ class DeviceConfiguration(Base):
     represents a point-in-time snapshot of a device's configuration, enabling
     configuration tracking, comparison, and restoration capabilities.
     
+    The configuration text itself lives in ``config_blobs``, shared by all
+    snapshots with the same ``data_hash``. ``config_data`` reads it through
+    the ``blob`` relationship; setting it (or passing it to the constructor)
+    stores the text in ``config_blobs`` on the next flush.
+    
+    With delta history enabled, older snapshots are stored as a reverse line
+    delta against a newer one instead (see
+    :mod:`netraven.services.config_history`); their blob is dropped unless
+    shared, and ``config_data`` reconstructs the text.
+    
     Attributes:
         id: Primary key identifier for the configuration
         device_id: Foreign key reference to the associated Device
-        config_data: The actual device configuration text
-        data_hash: SHA-256 hex of config_data
+        config_data: The actual device configuration text (from the blob)
+        data_hash: SHA-256 hex of config_data, the ConfigBlob holding it when stored in full
+        delta_base_id: Newer snapshot this one is a delta against (None if stored in full)
+        delta: Reverse line delta from the base snapshot's text to this one's
         retrieved_at: Timestamp when the configuration was captured
         config_metadata: JSON metadata about the configuration (commit hash, job ID, etc.)
         device: Relationship to the parent Device
+        blob: Relationship to the ConfigBlob holding the text
+        delta_base: Relationship to the snapshot ``delta`` applies to
     """
     __tablename__ = "device_configurations"
 
     id = Column(Integer, primary_key=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
-    config_data = Column(Text, nullable=False) # Stores the actual configuration text
-    data_hash = Column(Text, nullable=False)  # SHA-256 hex of config_data
+    data_hash = Column(Text, nullable=False, index=True)  # SHA-256 hex of config_data
+    delta_base_id = Column(Integer, ForeignKey("device_configurations.id"), nullable=True)
+    delta = Column(Text, nullable=True)
     retrieved_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     config_metadata = Column(JSONB) # Renamed from 'metadata'. For storing commit hash, job ID, etc.
 
-    device = relationship("Device", back_populates="configurations")
\ No newline at end of file
+    device = relationship("Device", back_populates="configurations")
+    # No foreign key: snapshots stored as deltas keep their content hash after the blob is dropped
+    blob = relationship(
+        ConfigBlob,
+        primaryjoin="foreign(DeviceConfiguration.data_hash) == ConfigBlob.data_hash",
+        viewonly=True,
+    )
+    delta_base = relationship("DeviceConfiguration", remote_side=[id])
+
+    @property
+    def pending_config_data(self):
+        """Text set on this instance and not yet read back from its blob."""
+        return self.__dict__.get("_config_data")
+
+    @property
+    def config_data(self):
+        pending = self.pending_config_data
+        if pending is not None:
+            return pending
+        if self.blob is not None:
+            return self.blob.config_data
+        if self.delta is not None:
+            from netraven.services.config_history import get_config_text
+
+            return get_config_text(object_session(self), self.id)
+        return None
+
+    @config_data.setter
+    def config_data(self, value):
+        self.__dict__["_config_data"] = value
+        if inspect(self).persistent:
+            # Changing a stored snapshot's text points it at another blob
+            self.data_hash = hash_config(value)
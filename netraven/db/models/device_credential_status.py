@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import relationship
+from netraven.db.base import Base
+
+class DeviceCredentialStatus(Base):
+    """Outcome of the last logins to a device with one credential.
+
+    Recorded by the worker through ``record_credential_attempt`` whenever a
+    session authenticates or is refused. The credential resolver uses it to
+    try the device's last working credential first and to demote credentials
+    that recently failed on the device.
+
+    Attributes:
+        id: Primary key identifier
+        device_id: Device the login was made to
+        credential_id: Credential used for the login
+        last_success: When the credential last authenticated on the device
+        last_failure: When the credential was last refused by the device
+        consecutive_failures: Refusals since the last successful login
+        updated_at: When the status was last recorded
+    """
+    __tablename__ = "device_credential_status"
+    __table_args__ = (UniqueConstraint("device_id", "credential_id", name="uq_device_credential_status"),)
+
+    id = Column(Integer, primary_key=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
+    credential_id = Column(Integer, ForeignKey("credentials.id", ondelete="CASCADE"), nullable=False)
+    last_success = Column(DateTime(timezone=True), nullable=True)
+    last_failure = Column(DateTime(timezone=True), nullable=True)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    device = relationship("Device")
+    credential = relationship("Credential")
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy.orm import relationship
+from netraven.db.base import Base
+
+class DeviceTransportProfile(Base):
+    """SSH transport parameters last negotiated with a device.
+
+    Recorded by the worker after a successful login and offered first on the
+    next connection (see ``netraven.worker.transport_profiles``), so devices
+    that only speak older algorithms don't repeat a failing modern handshake.
+
+    Attributes:
+        id: Primary key identifier for the profile
+        device_id: Device the profile belongs to (one profile per device)
+        kex: Negotiated key exchange algorithm
+        cipher: Negotiated encryption algorithm (client to server)
+        mac: Negotiated MAC algorithm (client to server)
+        host_key_type: Type of the device's host key
+        legacy_required: Whether the negotiated KEX or MAC is a legacy (SHA-1/MD5) algorithm
+        enable_required: Whether the login landed outside enable mode
+        updated_at: When the profile was last recorded
+    """
+    __tablename__ = "device_transport_profiles"
+
+    id = Column(Integer, primary_key=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    kex = Column(String(100), nullable=True)
+    cipher = Column(String(100), nullable=True)
+    mac = Column(String(100), nullable=True)
+    host_key_type = Column(String(100), nullable=True)
+    legacy_required = Column(Boolean, nullable=False, default=False)
+    enable_required = Column(Boolean, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    device = relationship("Device")
@@ -29,6 +29,7 @@ class Job(Base):
         interval_seconds: For interval jobs, seconds between runs
         cron_string: For cron jobs, the cron expression defining the schedule
         device_id: Optional single device targeted by this job
+        profile_next_run: Run the next execution under the profiler (cleared by the runner)
         logs: Related JobLog entries
         connection_logs: Related ConnectionLog entries
         tags: Tags associated with this job (for targeting devices)
@@ -49,6 +50,7 @@ class Job(Base):
     interval_seconds = Column(Integer)
     cron_string = Column(String)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="SET NULL"), nullable=True)
+    profile_next_run = Column(Boolean, nullable=False, default=False)
 
     # logs and connection_logs relationships removed; use unified Log model
     tags = relationship(
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, DateTime, Float, ForeignKey, LargeBinary, Text, func
+from sqlalchemy.orm import relationship
+from netraven.db.base import Base
+
+class JobProfile(Base):
+    """Profiling artifact captured for a single run of a job.
+
+    Created when a job runs with ``Job.profile_next_run`` set. Holds the merged
+    cProfile stats of the runner and all dispatcher threads plus the top
+    tracemalloc allocations.
+
+    Attributes:
+        id: Primary key identifier for the artifact
+        job_id: Job the profiled run belongs to
+        run_started_at: Start time of the profiled run
+        duration_seconds: Wall time of the profiled run
+        device_count: Number of devices dispatched in the run
+        stats_text: Top functions by cumulative time (pstats text report)
+        allocations_text: Top allocation sites from tracemalloc
+        pstats_data: Raw marshalled pstats data (loadable with ``pstats.Stats``)
+        created_at: When the artifact was stored
+    """
+    __tablename__ = "job_profiles"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    run_started_at = Column(DateTime(timezone=True), nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    device_count = Column(Integer, nullable=False, default=0)
+    stats_text = Column(Text, nullable=False)
+    allocations_text = Column(Text, nullable=True)
+    pstats_data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    job = relationship("Job", backref="profiles")
@@ -47,6 +47,7 @@ class Tag(Base):
         name: Unique name of the tag (used for display and reference)
         type: Optional category for the tag (e.g., 'location', 'role', 'custom')
         description: Optional description for the tag
+        bastion_id: Jump host used to reach the tag's devices
         devices: Relationship to associated Device objects
         credentials: Relationship to associated Credential objects 
         jobs: Relationship to associated Job objects
@@ -57,6 +58,7 @@ class Tag(Base):
     name = Column(String, nullable=False, unique=True)
     type = Column(String)  # E.g., 'location', 'role', 'custom'
     description = Column(String, nullable=True)
+    bastion_id = Column(Integer, ForeignKey("bastions.id", ondelete="SET NULL"), nullable=True)
 
     devices = relationship(
         "Device",
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from netraven.config.loader import load_config
+from netraven.utils.metrics import instrument_engine
 # import os # No longer needed directly for db_url
 
 # Load configuration using the central loader
@@ -14,6 +15,7 @@ print(f"[DB SESSION] Database session configured: {db_url}")
 
 # echo=True is useful for dev to see SQL statements
 engine = create_engine(db_url, echo=config.get('logging', {}).get('level') == 'DEBUG') 
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 def get_db():
@@ -1,6 +1,7 @@
 from netraven.utils.unified_logger import get_unified_logger
 from netraven.db.session import get_db
 from netraven.db.models import Device, DeviceConfiguration
+from netraven.db.models.config_blob import delete_unreferenced_blobs
 from sqlalchemy.orm import Session
 from sqlalchemy import asc
 import os
@@ -61,6 +62,7 @@ def prune_old_device_configs(retain_count: int = 10):
         devices = db.query(Device).all()
         logger.log(f"[Retention] Starting config prune for {len(devices)} devices (retain_count={retain_count})", level="INFO", destinations=["stdout", "file", "db"], source="prune_old_device_configs")
         total_deleted = 0
+        blobs_deleted = 0
         for device in devices:
             configs = (
                 db.query(DeviceConfiguration)
@@ -73,10 +75,13 @@ def prune_old_device_configs(retain_count: int = 10):
                 deleted_ids = [c.id for c in to_delete]
                 for config in to_delete:
                     db.delete(config)
+                db.flush()
+                # Drop the texts no remaining snapshot shares
+                blobs_deleted += delete_unreferenced_blobs(db, {c.data_hash for c in to_delete})
                 db.commit()
                 logger.log(f"[Retention] Pruned {len(to_delete)} configs for device {device.hostname} (IDs: {deleted_ids})", level="INFO", destinations=["stdout", "file", "db"], source="prune_old_device_configs")
                 total_deleted += len(to_delete)
-        logger.log(f"[Retention] Config prune complete. Total configs deleted: {total_deleted}", level="INFO", destinations=["stdout", "file", "db"], source="prune_old_device_configs")
+        logger.log(f"[Retention] Config prune complete. Total configs deleted: {total_deleted}, config blobs deleted: {blobs_deleted}", level="INFO", destinations=["stdout", "file", "db"], source="prune_old_device_configs")
     except Exception as e:
         logger.log(f"[Retention] Error during config prune: {e}", level="ERROR", destinations=["stdout", "file", "db"], source="prune_old_device_configs", extra={"error": str(e)})
         db.rollback()
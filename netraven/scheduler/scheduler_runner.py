@@ -7,6 +7,7 @@ from rq_scheduler import Scheduler
 from netraven.config.loader import load_config
 from netraven.scheduler.job_registration import sync_jobs_from_db, schedule_retention_job
 from netraven.utils.unified_logger import get_unified_logger
+from netraven.utils import metrics
 
 class UnifiedLoggerHandler(logging.Handler):
     def emit(self, record):
@@ -64,6 +65,15 @@ if __name__ == "__main__":
         retention_interval = retention_cfg.get("interval_seconds", 86400)
         retain_count = retention_cfg.get("retain_count", 10)
         schedule_retention_job(scheduler, interval_seconds=retention_interval, retain_count=retain_count)
+        # Expose scheduler metrics, including RQ queue depth and lag
+        metrics_port = full_config.get("metrics", {}).get("scheduler_port")
+        if metrics.start_metrics_server(metrics_port, collectors=[metrics.RQQueueCollector(redis_conn)]):
+            logger.log(
+                f"Metrics exporter listening on port {metrics_port}",
+                level="INFO",
+                destinations=["stdout", "file", "db"],
+                source="scheduler_runner",
+            )
     except Exception as e:
         logger.log(
             f"Failed to connect to Redis or initialize scheduler: {e}",
@@ -0,0 +1,230 @@
+"""Delta-compressed configuration snapshot history.
+
+With ``worker.delta_history.enabled`` the config backup job keeps only a
+device's newest snapshot in full. When a new snapshot is stored, the
+previous one is rewritten as a reverse line delta against it
+(``delta`` and ``delta_base_id`` on ``DeviceConfiguration``) and its blob is
+dropped unless other snapshots share it. Reading an older version means
+starting from the nearest snapshot stored in full and applying deltas
+towards the past.
+
+To bound that walk, a snapshot stays in full (a keyframe) when the
+``keyframe_interval - 1`` snapshots before it are already deltas, so no
+version is more than ``keyframe_interval - 1`` deltas away from full text.
+Reconstructed texts are kept in a per-process LRU cache keyed by snapshot
+ID; a snapshot's text never changes, only how it is stored.
+
+A delta is a JSON list of operations applied to the base (newer) text's
+lines: ``[start, end]`` copies ``base_lines[start:end]`` and a string is
+inserted as is.
+"""
+
+import difflib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from netraven.db.models.config_blob import ConfigBlob, delete_unreferenced_blobs
+from netraven.db.models.device_config import DeviceConfiguration
+
+DEFAULT_KEYFRAME_INTERVAL = 20
+CACHE_SIZE = 256  # reconstructed texts kept per process
+
+_cache: "OrderedDict[int, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_delta_settings(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Delta history settings from ``worker.delta_history`` with defaults applied."""
+    worker_cfg = (config or {}).get("worker") or {}
+    delta_cfg = worker_cfg.get("delta_history") or {}
+    return {
+        "enabled": str(delta_cfg.get("enabled", False)).lower() in ("1", "true", "yes", "on"),
+        "keyframe_interval": max(1, int(delta_cfg.get("keyframe_interval") or DEFAULT_KEYFRAME_INTERVAL)),
+    }
+
+
+def make_delta(base_text: str, target_text: str) -> str:
+    """Encode ``target_text`` as line operations on ``base_text``."""
+    base_lines = base_text.splitlines(keepends=True)
+    target_lines = target_text.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(target_lines[j1:j2]))
+    return json.dumps(ops, separators=(",", ":"))
+
+
+def apply_delta(base_text: str, delta: str) -> str:
+    """Rebuild the text a delta from :func:`make_delta` was made for."""
+    base_lines = base_text.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def _cache_get(snapshot_id: int) -> Optional[str]:
+    with _cache_lock:
+        text = _cache.get(snapshot_id)
+        if text is not None:
+            _cache.move_to_end(snapshot_id)
+        return text
+
+
+def _cache_put(snapshot_id: int, text: str) -> None:
+    with _cache_lock:
+        _cache[snapshot_id] = text
+        _cache.move_to_end(snapshot_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Drop all cached texts of this process (tests)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_config_text(db: Session, snapshot_id: int) -> Optional[str]:
+    """Text of a snapshot, reconstructed from its delta chain if needed.
+
+    Returns None if the snapshot doesn't exist.
+    """
+    chain = []  # (snapshot_id, delta) from the requested snapshot towards full text
+    current = snapshot_id
+    text = None
+    while current is not None:
+        text = _cache_get(current)
+        if text is not None:
+            break
+        row = db.execute(
+            select(DeviceConfiguration.delta, DeviceConfiguration.delta_base_id, ConfigBlob.config_data)
+            .outerjoin(ConfigBlob, ConfigBlob.data_hash == DeviceConfiguration.data_hash)
+            .where(DeviceConfiguration.id == current)
+        ).first()
+        if row is None:
+            return None
+        if row.config_data is not None:
+            # Stored in full, or a delta whose content another snapshot keeps in full
+            text = row.config_data
+            _cache_put(current, text)
+            break
+        if row.delta is None:
+            return None
+        if any(chain_id == current for chain_id, _ in chain):
+            raise ValueError(f"Delta chain of config snapshot {snapshot_id} loops at {current}")
+        chain.append((current, row.delta))
+        current = row.delta_base_id
+    if text is None:
+        return None
+    for chain_id, delta in reversed(chain):
+        text = apply_delta(text, delta)
+        _cache_put(chain_id, text)
+    return text
+
+
+def snapshot_text(db: Session, row: Any) -> Optional[str]:
+    """``config_data`` of a snapshot row selected with its blob (LEFT JOIN).
+
+    Rows stored as deltas have no blob text and are reconstructed.
+    """
+    if row.config_data is not None:
+        return row.config_data
+    return get_config_text(db, row.id)
+
+
+def _is_keyframe(db: Session, snapshot: DeviceConfiguration, keyframe_interval: int) -> bool:
+    """Whether ``snapshot`` must stay in full to bound the chains behind it."""
+    if keyframe_interval <= 1:
+        return True
+    older = db.execute(
+        select(DeviceConfiguration.delta)
+        .where(
+            DeviceConfiguration.device_id == snapshot.device_id,
+            DeviceConfiguration.retrieved_at < snapshot.retrieved_at,
+        )
+        .order_by(DeviceConfiguration.retrieved_at.desc())
+        .limit(keyframe_interval - 1)
+    ).all()
+    return len(older) == keyframe_interval - 1 and all(row.delta is not None for row in older)
+
+
+def encode_as_delta(
+    db: Session,
+    previous: DeviceConfiguration,
+    newer: DeviceConfiguration,
+    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+) -> bool:
+    """Store ``previous`` as a reverse delta against ``newer`` and commit.
+
+    ``previous`` stays in full if it is already a delta, is a keyframe, or
+    shares its blob with another full snapshot (dropping its reference would
+    save nothing). Nothing is encoded if either text can't be read, e.g. a
+    blob dropped by a concurrent prune.
+
+    Returns:
+        True if ``previous`` was rewritten as a delta
+    """
+    if previous.delta is not None or _is_keyframe(db, previous, keyframe_interval):
+        return False
+    shared = db.execute(
+        select(DeviceConfiguration.id).where(
+            DeviceConfiguration.data_hash == previous.data_hash,
+            DeviceConfiguration.id != previous.id,
+            DeviceConfiguration.delta.is_(None),
+        ).limit(1)
+    ).first()
+    if shared is not None:
+        return False
+    previous_text, newer_text = previous.config_data, newer.config_data
+    if previous_text is None or newer_text is None:
+        return False
+    previous.delta = make_delta(newer_text, previous_text)
+    previous.delta_base_id = newer.id
+    db.flush()
+    delete_unreferenced_blobs(db, [previous.data_hash])
+    db.commit()
+    _cache_put(previous.id, previous_text)
+    return True
+
+
+def delete_snapshot(db: Session, snapshot_id: int) -> Optional[str]:
+    """Delete a snapshot, rebasing the deltas made against it.
+
+    Snapshots based on the deleted one are re-encoded against its own base,
+    or stored in full if it had none. Its blob is dropped unless shared. The
+    caller commits.
+
+    Returns:
+        The deleted snapshot's ``data_hash``, or None if it doesn't exist
+    """
+    snapshot = db.get(DeviceConfiguration, snapshot_id)
+    if snapshot is None:
+        return None
+    dependents = db.query(DeviceConfiguration).filter(DeviceConfiguration.delta_base_id == snapshot_id).all()
+    for dependent in dependents:
+        text = get_config_text(db, dependent.id)
+        if snapshot.delta_base_id is not None:
+            dependent.delta = make_delta(get_config_text(db, snapshot.delta_base_id), text)
+            dependent.delta_base_id = snapshot.delta_base_id
+        else:
+            dependent.delta = None
+            dependent.delta_base_id = None
+            dependent.config_data = text
+    db.flush()
+    data_hash = snapshot.data_hash
+    db.delete(snapshot)
+    db.flush()
+    delete_unreferenced_blobs(db, [data_hash])
+    return data_hash
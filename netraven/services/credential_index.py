@@ -0,0 +1,197 @@
+"""In-process index of the tag-based credential matching rule.
+
+A credential matches a device when they share at least one tag. Instead of
+evaluating that with joins for every device row, the API keeps an index of
+the association tables in memory: tag ID -> credential IDs sorted by
+priority, and device ID -> tag IDs. Lookups such as "credentials for device
+X" and "counts for devices X..Y" are answered from it without queries.
+
+The index is shared by all API processes through a version counter in Redis
+(``netraven:credential_index:version``). The credentials, tags and devices
+routers call :func:`bump_version` after every committed mutation; the next
+lookup in any process sees the new version and rebuilds its index. Writers
+outside the API (database initialisation, seed and load-test scripts) bump it
+as well; for any other direct database change an index is also rebuilt once
+it is ``MAX_AGE`` seconds old. If Redis is unreachable the index can't be known to be current, so lookups fall back
+to the queries of :mod:`netraven.services.device_credential` (a single
+aggregate query for counts).
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from netraven.config.loader import load_config
+from netraven.db import models
+from netraven.db.models.tag import credential_tag_association, device_tag_association
+from netraven.services.device_credential import (
+    count_matching_credentials_for_devices,
+    get_matching_credentials_for_device,
+)
+from netraven.utils.unified_logger import get_unified_logger
+
+logger = get_unified_logger()
+
+VERSION_KEY = "netraven:credential_index:version"
+REDIS_RETRY_AFTER = 30  # seconds to use the fallback queries after Redis failed
+MAX_AGE = 300  # seconds before an index is rebuilt even without a version bump
+
+
+class CredentialIndex:
+    """Snapshot of the device/tag/credential associations.
+
+    Args:
+        priorities: Priority per credential ID
+        credential_tags: ``(credential_id, tag_id)`` association rows
+        device_tags: ``(device_id, tag_id)`` association rows
+    """
+
+    def __init__(
+        self,
+        priorities: Dict[int, Optional[int]],
+        credential_tags: Iterable[Tuple[int, int]],
+        device_tags: Iterable[Tuple[int, int]],
+    ):
+        self._priorities = priorities
+        by_tag: Dict[int, List[int]] = {}
+        for credential_id, tag_id in credential_tags:
+            if credential_id in priorities:
+                by_tag.setdefault(tag_id, []).append(credential_id)
+        for credential_ids in by_tag.values():
+            credential_ids.sort(key=self._order)
+        self._tag_credentials = by_tag
+        device_tag_ids: Dict[int, List[int]] = {}
+        for device_id, tag_id in device_tags:
+            device_tag_ids.setdefault(device_id, []).append(tag_id)
+        self._device_tags = device_tag_ids
+
+    def _order(self, credential_id: int):
+        """Sort key matching ``ORDER BY priority`` (NULL priorities last), then ID."""
+        priority = self._priorities.get(credential_id)
+        return (priority is None, priority or 0, credential_id)
+
+    def credential_ids_for_device(self, device_id: int) -> List[int]:
+        """IDs of the credentials matching a device, ordered by priority."""
+        tag_ids = self._device_tags.get(device_id)
+        if not tag_ids:
+            return []
+        if len(tag_ids) == 1:
+            return list(self._tag_credentials.get(tag_ids[0], ()))
+        matching = set()
+        for tag_id in tag_ids:
+            matching.update(self._tag_credentials.get(tag_id, ()))
+        return sorted(matching, key=self._order)
+
+    def count_for_devices(self, device_ids: Iterable[int]) -> Dict[int, int]:
+        """Number of matching credentials per device ID."""
+        counts = {}
+        for device_id in device_ids:
+            tag_ids = self._device_tags.get(device_id) or ()
+            if len(tag_ids) == 1:
+                counts[device_id] = len(self._tag_credentials.get(tag_ids[0], ()))
+            else:
+                matching = set()
+                for tag_id in tag_ids:
+                    matching.update(self._tag_credentials.get(tag_id, ()))
+                counts[device_id] = len(matching)
+        return counts
+
+
+def build_index(db: Session) -> CredentialIndex:
+    """Load the association tables and credential priorities into a new index."""
+    priorities = dict(db.execute(select(models.Credential.id, models.Credential.priority)).all())
+    credential_tags = db.execute(
+        select(credential_tag_association.c.credential_id, credential_tag_association.c.tag_id)
+    ).all()
+    device_tags = db.execute(
+        select(device_tag_association.c.device_id, device_tag_association.c.tag_id)
+    ).all()
+    return CredentialIndex(priorities, credential_tags, device_tags)
+
+
+_lock = threading.Lock()
+_index: Optional[CredentialIndex] = None
+_index_version: Optional[int] = None
+_index_built_at = 0.0
+_redis = None
+_redis_down_until = 0.0
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        from redis import Redis
+
+        config = load_config()
+        redis_url = config.get('scheduler', {}).get('redis_url', 'redis://localhost:6379/0')
+        _redis = Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+    return _redis
+
+
+def _current_version() -> Optional[int]:
+    """The shared index version, or None if Redis can't be reached."""
+    global _redis_down_until
+    if time.monotonic() < _redis_down_until:
+        return None
+    try:
+        return int(_get_redis().get(VERSION_KEY) or 0)
+    except Exception as e:
+        _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        logger.log(f"Credential index version unavailable: {e}", level="WARNING", destinations=["stdout", "file"], source="credential_index")
+        return None
+
+
+def bump_version() -> None:
+    """Invalidate the index in every process; call after committing a mutation."""
+    global _index
+    with _lock:
+        _index = None
+    try:
+        _get_redis().incr(VERSION_KEY)
+    except Exception as e:
+        logger.log(f"Could not bump credential index version: {e}", level="WARNING", destinations=["stdout", "file"], source="credential_index")
+
+
+def get_index(db: Session) -> Optional[CredentialIndex]:
+    """The current index, rebuilt from ``db`` if another process invalidated it
+    or it is older than ``MAX_AGE``.
+
+    Returns None if the shared version can't be read.
+    """
+    global _index, _index_version, _index_built_at
+    version = _current_version()
+    if version is None:
+        return None
+    with _lock:
+        now = time.monotonic()
+        if _index is not None and version == _index_version and now - _index_built_at < MAX_AGE:
+            return _index
+        index = build_index(db)
+        _index, _index_version, _index_built_at = index, version, now
+        return index
+
+
+def get_matching_credential_ids(db: Session, device_id: int) -> List[int]:
+    """IDs of the credentials matching a device, ordered by priority."""
+    index = get_index(db)
+    if index is None:
+        return [credential.id for credential in get_matching_credentials_for_device(db, device_id)]
+    return index.credential_ids_for_device(device_id)
+
+
+def count_matching_credentials(db: Session, device_ids: Iterable[int]) -> Dict[int, int]:
+    """Number of matching credentials for each of the given devices."""
+    index = get_index(db)
+    if index is None:
+        return count_matching_credentials_for_devices(db, device_ids)
+    return index.count_for_devices(device_ids)
+
+
+def reset() -> None:
+    """Drop the index of this process (tests)."""
+    global _index, _index_version, _index_built_at, _redis_down_until
+    with _lock:
+        _index, _index_version, _index_built_at, _redis_down_until = None, None, 0.0, 0.0
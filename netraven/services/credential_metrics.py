@@ -2,14 +2,39 @@
 
 This module provides functions for updating credential usage statistics
 including last used timestamps and success rates.
+
+Credential attempts made during a job are not written one by one: the
+worker threads append them to an in-memory buffer with
+record_credential_attempt(), and flush_credential_attempts() applies the
+whole buffer with two statements, at the end of the job or when
+FLUSH_INTERVAL has passed. Interval flushes happen on whichever worker
+thread records the attempt, so they use a session of their own rather than
+the job's. Only one job runs per RQ work horse, so the buffer lives in a
+module global.
 """
 
-from datetime import datetime
-from typing import Optional
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, Float, Integer, case, column, func, update, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-import threading, os
 
 from netraven.db import models
+from netraven.db.session import SessionLocal
+
+log = logging.getLogger(__name__)
+
+# Weight of the previous success rate in the moving average
+SUCCESS_RATE_DECAY = 0.9
+# Seconds after which a recorded attempt triggers a flush
+FLUSH_INTERVAL = 30.0
+
+_lock = threading.Lock()
+_pending: List[Tuple[int, int, bool, datetime]] = []  # (device_id, credential_id, success, attempted_at)
+_last_flush = time.monotonic()
 
 
 def update_credential_success(db: Session, credential_id: int) -> None:
@@ -75,46 +100,171 @@ def record_credential_attempt(
 ) -> None:
     """Record a credential usage attempt for auditing and analytics.
     
-    This can be extended to store detailed attempt information in a separate table
-    if that level of tracking is desired.
+    The attempt is buffered in memory; see flush_credential_attempts(). If
+    FLUSH_INTERVAL has passed since the last flush, the buffer is flushed
+    right away in a dedicated session: ``db`` is usually the job's session,
+    shared with other threads, and must not be committed from here.
     
     Args:
-        db: Database session
+        db: Database session (not used; kept for callers)
         device_id: ID of the device
         credential_id: ID of the credential used
         job_id: Optional job ID
         success: Whether the connection succeeded
         error: Optional error message
     """
-    print(f"[DEBUG REAL] record_credential_attempt called: pid={os.getpid()} thread={threading.current_thread().name} device_id={device_id} credential_id={credential_id} job_id={job_id} success={success} error={error}")
+    global _last_flush
+    if not credential_id:
+        return
+    with _lock:
+        _pending.append((device_id, credential_id, bool(success), datetime.now(timezone.utc)))
+        due = time.monotonic() - _last_flush >= FLUSH_INTERVAL
+        if due:
+            # Claim the flush so other threads don't start one too
+            _last_flush = time.monotonic()
+    
+    log.info(
+        f"[Job: {job_id}] Credential attempt: credential {credential_id} on device {device_id} - "
+        f"{'SUCCESS' if success else 'FAILURE'}{f' ({error})' if error and not success else ''}"
+    )
+    if due:
+        flush_db = SessionLocal()
+        try:
+            flush_credential_attempts(flush_db, job_id)
+        finally:
+            flush_db.close()
+
+
+def fold_success_rate(outcomes: Sequence[bool]) -> Tuple[float, float, float]:
+    """Fold consecutive outcomes of a credential into one success rate update.
+    
+    Applying the outcomes one by one as update_credential_success() and
+    update_credential_failure() do turns a success rate ``r`` into
+    ``r * decay + gain``, or into ``initial`` if the rate was NULL.
     
-    # This is a placeholder for more sophisticated tracking if needed
-    if success:
-        update_credential_success(db, credential_id)
-    else:
-        update_credential_failure(db, credential_id)
+    Args:
+        outcomes: Outcomes in the order they happened (True = success)
         
-    # Log the attempt
-    device_name = "Unknown"
-    credential_name = "Unknown"
+    Returns:
+        Tuple of (decay, gain, initial)
+    """
+    decay, gain = 1.0, 0.0
+    for success in outcomes:
+        decay *= SUCCESS_RATE_DECAY
+        gain = gain * SUCCESS_RATE_DECAY + (1 - SUCCESS_RATE_DECAY) * float(success)
+    # A NULL rate is set outright by the first outcome
+    initial = float(outcomes[0])
+    for success in outcomes[1:]:
+        initial = initial * SUCCESS_RATE_DECAY + (1 - SUCCESS_RATE_DECAY) * float(success)
+    return decay, gain, initial
+
+
+def build_credential_update(attempts: Sequence[Tuple[int, int, bool, datetime]]):
+    """One ``UPDATE credentials ... FROM (VALUES ...)`` applying buffered attempts.
     
-    try:
-        device = db.query(models.Device).filter(models.Device.id == device_id).first()
-        if device:
-            device_name = device.hostname
-            
-        credential = db.query(models.Credential).filter(models.Credential.id == credential_id).first()
-        if credential:
-            credential_name = credential.username
-            
-        # Could add a dedicated log entry or database record here
-        # For now, just use standard logging
-        import logging
-        log = logging.getLogger(__name__)
-        log.info(
-            f"[Job: {job_id}] Credential attempt: {credential_name} on {device_name} - "
-            f"{'SUCCESS' if success else 'FAILURE'}"
+    The moving average is computed in SQL from the stored success rate, so
+    concurrent workers don't overwrite each other's updates.
+    """
+    outcomes: Dict[int, List[bool]] = {}
+    last_used: Dict[int, datetime] = {}
+    for _, credential_id, success, attempted_at in attempts:
+        outcomes.setdefault(credential_id, []).append(success)
+        last_used[credential_id] = max(attempted_at, last_used.get(credential_id, attempted_at))
+    rows = [(credential_id, *fold_success_rate(results), last_used[credential_id]) for credential_id, results in sorted(outcomes.items())]
+    attempt_values = values(
+        column("id", Integer),
+        column("decay", Float),
+        column("gain", Float),
+        column("initial", Float),
+        column("last_used", DateTime(timezone=True)),
+        name="attempts",
+    ).data(rows)
+    credential = models.Credential
+    return (
+        update(credential)
+        .where(credential.id == attempt_values.c.id)
+        .values(
+            success_rate=case(
+                (credential.success_rate.is_(None), attempt_values.c.initial),
+                else_=credential.success_rate * attempt_values.c.decay + attempt_values.c.gain,
+            ),
+            last_used=attempt_values.c.last_used,
         )
+    )
+
+
+def build_status_upsert(attempts: Sequence[Tuple[int, int, bool, datetime]]):
+    """One ``INSERT ... ON CONFLICT DO UPDATE`` of the device credential statuses."""
+    statuses: Dict[Tuple[int, int], Dict] = {}
+    for device_id, credential_id, success, attempted_at in attempts:
+        if not device_id:
+            continue
+        status = statuses.setdefault(
+            (device_id, credential_id),
+            {"device_id": device_id, "credential_id": credential_id, "last_success": None, "last_failure": None, "consecutive_failures": 0},
+        )
+        if success:
+            status["last_success"] = attempted_at
+            status["consecutive_failures"] = 0
+        else:
+            status["last_failure"] = attempted_at
+            status["consecutive_failures"] += 1
+    if not statuses:
+        return None
+    table = models.DeviceCredentialStatus.__table__
+    stmt = insert(table).values(list(statuses.values()))
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        constraint="uq_device_credential_status",
+        set_={
+            "last_success": func.coalesce(excluded.last_success, table.c.last_success),
+            "last_failure": func.coalesce(excluded.last_failure, table.c.last_failure),
+            # A success in this batch resets the count; failures after it are counted
+            "consecutive_failures": case(
+                (excluded.last_success.is_not(None), excluded.consecutive_failures),
+                else_=table.c.consecutive_failures + excluded.consecutive_failures,
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def flush_credential_attempts(db: Session, job_id: Optional[int] = None) -> int:
+    """Apply the buffered credential attempts to the database.
+    
+    Credential success rates and ``last_used`` are updated with one
+    statement, device credential statuses with another, then committed. On
+    error the attempts are dropped (the metrics are advisory) and the
+    session is rolled back.
+    
+    Args:
+        db: Database session
+        job_id: Optional job ID for logging
+        
+    Returns:
+        Number of attempts applied
+    """
+    global _last_flush
+    with _lock:
+        attempts = list(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not attempts or db is None:
+        return 0
+    try:
+        db.execute(build_credential_update(attempts))
+        status_upsert = build_status_upsert(attempts)
+        if status_upsert is not None:
+            db.execute(status_upsert)
+        db.commit()
     except Exception as e:
-        # Don't let logging failures impact operations
-        pass 
\ No newline at end of file
+        db.rollback()
+        log.error(f"[Job: {job_id}] Failed to flush {len(attempts)} credential attempt(s): {e}")
+        return 0
+    return len(attempts)
+
+
+def discard_pending_attempts() -> None:
+    """Drop buffered attempts without applying them (tests)."""
+    with _lock:
+        _pending.clear()
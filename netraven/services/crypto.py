@@ -2,11 +2,23 @@
 
 This module provides functions for encrypting and decrypting sensitive
 information, particularly for credential passwords.
+
+Deriving the Fernet key runs PBKDF2 with 100,000 iterations, so derived keys
+are cached per process, keyed by master key and salt; every credential
+decrypt after the first costs only the Fernet operation.
+
+Key rotation: set the new master key as ``security.encryption_key`` and list
+the old ones in ``security.previous_encryption_keys`` (or the comma-separated
+``NETRAVEN_PREVIOUS_ENCRYPTION_KEYS``). Passwords are then encrypted with the
+new key and decrypted with whichever key matches, and
+``scripts/rotate_encryption_key.py`` re-encrypts the stored passwords with the
+new key so the old ones can be removed.
 """
 
 import os
 import base64
-from cryptography.fernet import Fernet
+from functools import lru_cache
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
@@ -18,9 +30,25 @@ SECRET_KEY = config.get('security', {}).get('encryption_key', os.environ.get('NE
 # Salt should be stored securely
 SALT = config.get('security', {}).get('encryption_salt', os.environ.get('NETRAVEN_ENCRYPTION_SALT', b'netraven_salt'))
 
+# Master keys replaced by SECRET_KEY that may still have encrypted stored passwords
+PREVIOUS_KEYS = config.get('security', {}).get('previous_encryption_keys', os.environ.get('NETRAVEN_PREVIOUS_ENCRYPTION_KEYS'))
+
+@lru_cache(maxsize=16)
+def _derive_key(master_key, salt):
+    """PBKDF2 key derivation, cached per (master key, salt)."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(master_key))
+
 def get_encryption_key(master_key=None):
     """Derive an encryption key from the master key.
     
+    The derivation is cached, so it runs once per master key and salt per process.
+    
     Args:
         master_key: The master key to derive from (defaults to SECRET_KEY)
         
@@ -43,15 +71,27 @@ def get_encryption_key(master_key=None):
         salt = salt.encode()
     
     # Use PBKDF2 to derive a secure key from the master key
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-    )
+    return _derive_key(master_key, salt)
+
+def get_previous_keys():
+    """Previous master keys, from a list or a comma-separated string.
+    
+    Returns:
+        list: Previous master keys, most recent first
+    """
+    keys = PREVIOUS_KEYS or []
+    if isinstance(keys, str):
+        keys = keys.split(',')
+    return [str(key).strip() for key in keys if key and str(key).strip()]
+
+def get_fernet():
+    """Cipher that encrypts with the current key and decrypts with any configured key.
     
-    key = base64.urlsafe_b64encode(kdf.derive(master_key))
-    return key
+    Returns:
+        MultiFernet: Current key first, then the previous keys
+    """
+    keys = [get_encryption_key()] + [get_encryption_key(key) for key in get_previous_keys()]
+    return MultiFernet([Fernet(key) for key in keys])
 
 def encrypt_password(password):
     """Encrypt a password for secure storage.
@@ -69,11 +109,8 @@ def encrypt_password(password):
     if isinstance(password, str):
         password = password.encode()
         
-    # Get encryption key
-    key = get_encryption_key()
-    
-    # Create cipher and encrypt
-    f = Fernet(key)
+    # Create cipher (current key) and encrypt
+    f = get_fernet()
     encrypted = f.encrypt(password)
     
     # Return as string for storage
@@ -95,12 +132,29 @@ def decrypt_password(encrypted_password):
     if isinstance(encrypted_password, str):
         encrypted_password = encrypted_password.encode()
         
-    # Get encryption key
-    key = get_encryption_key()
-    
-    # Create cipher and decrypt
-    f = Fernet(key)
+    # Create cipher (any configured key) and decrypt
+    f = get_fernet()
     decrypted = f.decrypt(encrypted_password)
     
     # Return as string
-    return decrypted.decode() 
\ No newline at end of file
+    return decrypted.decode()
+
+def rotate_password(encrypted_password):
+    """Re-encrypt a stored password with the current key.
+    
+    Args:
+        encrypted_password: The encrypted password from the database
+        
+    Returns:
+        str: The password encrypted with the current key
+        
+    Raises:
+        cryptography.fernet.InvalidToken: If no configured key decrypts it
+    """
+    if not encrypted_password:
+        raise ValueError("Encrypted password cannot be empty")
+    
+    if isinstance(encrypted_password, str):
+        encrypted_password = encrypted_password.encode()
+    
+    return get_fernet().rotate(encrypted_password).decode() 
\ No newline at end of file
@@ -9,10 +9,15 @@ should be used for a particular device, allowing for flexible credential managem
 across the network infrastructure.
 """
 
-from typing import List
+from typing import Dict, Iterable, List
+from sqlalchemy import distinct, func, select
 from sqlalchemy.orm import Session, selectinload
 
 from netraven.db import models
+from netraven.db.models.tag import credential_tag_association, device_tag_association
+
+# Maximum IDs per IN (...) list when matching many devices at once
+MATCH_CHUNK_SIZE = 5000
 
 def get_matching_credentials_for_device(db: Session, device_id: int) -> List[models.Credential]:
     """
@@ -53,4 +58,112 @@ def get_matching_credentials_for_device(db: Session, device_id: int) -> List[mod
         .all()
     )
     
-    return matching_credentials 
\ No newline at end of file
+    return matching_credentials 
+
+
+def _priority_order(credential: models.Credential):
+    """Sort key matching ``ORDER BY priority`` (NULL priorities last), then ID."""
+    return (credential.priority is None, credential.priority or 0, credential.id)
+
+
+def get_matching_credentials_for_devices(db: Session, device_ids: Iterable[int]) -> Dict[int, List[models.Credential]]:
+    """
+    Get the matching credentials of many devices at once, each list ordered by priority.
+    
+    Same matching rule as get_matching_credentials_for_device(), but set-based:
+    one statement maps devices to credentials through the tag association
+    tables and one loads the matched credentials (per chunk of IDs), instead
+    of two queries per device. Credentials shared by many devices are the
+    same objects in every list.
+    
+    Args:
+        db: Database session
+        device_ids: IDs of the devices to find credentials for
+        
+    Returns:
+        Dict mapping every requested device ID to its matching credentials
+        ordered by priority (empty list if none match)
+    """
+    device_ids = list(dict.fromkeys(device_id for device_id in device_ids if device_id))
+    matches: Dict[int, List[models.Credential]] = {device_id: [] for device_id in device_ids}
+    
+    # Device -> credential pairs sharing at least one tag
+    pairs = set()
+    for start in range(0, len(device_ids), MATCH_CHUNK_SIZE):
+        chunk = device_ids[start:start + MATCH_CHUNK_SIZE]
+        pairs.update(
+            db.execute(
+                select(device_tag_association.c.device_id, credential_tag_association.c.credential_id)
+                .join(credential_tag_association, credential_tag_association.c.tag_id == device_tag_association.c.tag_id)
+                .where(device_tag_association.c.device_id.in_(chunk))
+                .distinct()
+            ).all()
+        )
+    
+    # Each matched credential is loaded once
+    credential_ids = sorted({credential_id for _, credential_id in pairs})
+    credentials: Dict[int, models.Credential] = {}
+    for start in range(0, len(credential_ids), MATCH_CHUNK_SIZE):
+        chunk = credential_ids[start:start + MATCH_CHUNK_SIZE]
+        for credential in db.query(models.Credential).filter(models.Credential.id.in_(chunk)).all():
+            credentials[credential.id] = credential
+    
+    for device_id, credential_id in pairs:
+        if credential_id in credentials:
+            matches[device_id].append(credentials[credential_id])
+    for matching in matches.values():
+        matching.sort(key=_priority_order)
+    return matches
+
+
+def get_device_credential_statuses(db: Session, device_ids: Iterable[int]) -> Dict[int, Dict[int, models.DeviceCredentialStatus]]:
+    """
+    Get the recorded login outcomes of many devices at once.
+    
+    Args:
+        db: Database session
+        device_ids: IDs of the devices
+        
+    Returns:
+        Dict mapping device ID -> credential ID -> DeviceCredentialStatus
+        (devices without recorded logins are left out)
+    """
+    device_ids = list(dict.fromkeys(device_id for device_id in device_ids if device_id))
+    statuses: Dict[int, Dict[int, models.DeviceCredentialStatus]] = {}
+    for start in range(0, len(device_ids), MATCH_CHUNK_SIZE):
+        chunk = device_ids[start:start + MATCH_CHUNK_SIZE]
+        for status in db.query(models.DeviceCredentialStatus).filter(models.DeviceCredentialStatus.device_id.in_(chunk)).all():
+            statuses.setdefault(status.device_id, {})[status.credential_id] = status
+    return statuses
+
+
+def count_matching_credentials_for_devices(db: Session, device_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Count the matching credentials of many devices with one aggregate query.
+    
+    Same matching rule as get_matching_credentials_for_device(), evaluated
+    with a GROUP BY over the tag association tables (one statement per chunk
+    of IDs) without loading any credential.
+    
+    Args:
+        db: Database session
+        device_ids: IDs of the devices to count credentials for
+        
+    Returns:
+        Dict mapping every requested device ID to its number of matching credentials
+    """
+    device_ids = list(dict.fromkeys(device_id for device_id in device_ids if device_id))
+    counts: Dict[int, int] = {device_id: 0 for device_id in device_ids}
+    for start in range(0, len(device_ids), MATCH_CHUNK_SIZE):
+        chunk = device_ids[start:start + MATCH_CHUNK_SIZE]
+        rows = db.execute(
+            select(
+                device_tag_association.c.device_id,
+                func.count(distinct(credential_tag_association.c.credential_id)),
+            )
+            .join(credential_tag_association, credential_tag_association.c.tag_id == device_tag_association.c.tag_id)
+            .where(device_tag_association.c.device_id.in_(chunk))
+            .group_by(device_tag_association.c.device_id)
+        ).all()
+        counts.update(rows)
+    return counts
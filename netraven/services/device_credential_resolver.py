@@ -7,45 +7,80 @@ before attempting connections.
 
 The resolver implements the core functionality of:
 1. Finding credentials that match a device's tags
-2. Selecting the highest priority credential
+2. Selecting the highest priority credential (in batches, the device's last
+   working credential goes first and credentials that recently failed on the
+   device go last)
 3. Attaching credential properties to device objects
-4. Handling batches of devices for bulk resolution
+4. Handling batches of devices for bulk resolution (set-based: the matching
+   credentials of all devices are loaded at once, each selected credential is
+   decrypted once and ``last_used`` is updated in one statement)
 
 This is a critical component for the tag-based credential system, enabling
 the flexible credential management approach used throughout NetRaven.
 """
 
-from typing import List, Any, Optional
+from typing import Dict, List, Any, Iterable, Optional
 import logging
-from datetime import datetime
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import NoInspectionAvailable
+from sqlalchemy.orm import Session, selectinload
 
 from netraven.db import models
-from netraven.services.device_credential import get_matching_credentials_for_device
+from netraven.services.device_credential import (
+    MATCH_CHUNK_SIZE,
+    get_device_credential_statuses,
+    get_matching_credentials_for_device,
+    get_matching_credentials_for_devices,
+)
 from netraven.services.credential_utils import get_device_password
 from netraven.utils.unified_logger import get_unified_logger
 
 # Setup unified logger
 logger = get_unified_logger()
 
+# Relationships copied onto DeviceWithCredentials even if not loaded yet
+COPIED_RELATIONSHIPS = ("tags",)
+
+# How long a credential refused by a device is tried after the others
+FAILURE_DEMOTION_WINDOW = timedelta(hours=24)
+
+
+def _unloaded_relationships(device: Any) -> set:
+    """Names of ORM relationships of ``device`` that are not loaded (empty for non-ORM objects)."""
+    try:
+        state = sa_inspect(device)
+    except NoInspectionAvailable:
+        return set()
+    mapper = getattr(state, 'mapper', None)
+    if mapper is None:
+        return set()
+    return {rel.key for rel in mapper.relationships if rel.key in state.unloaded and rel.key not in COPIED_RELATIONSHIPS}
+
+
 class DeviceWithCredentials:
     """Wrapper for a device object that includes credential attributes."""
     
-    def __init__(self, device: Any, username: str, password: str):
+    def __init__(self, device: Any, username: str, password: str, credential_id: Optional[int] = None):
         """Initialize with a device and credential attributes.
         
         Args:
             device: The original device object
             username: Username for device authentication
             password: Password for device authentication
+            credential_id: ID of the credential the username and password come from
         """
         self.original_device = device
         self._username = username
         self._password = password
+        self.credential_id = credential_id
         
-        # Copy all attributes from the original device
+        # Copy all attributes from the original device. Unloaded relationships
+        # (config snapshots, logs, job results) are skipped: copying them would
+        # load every row of them, with a query per device.
+        skipped = _unloaded_relationships(device)
         for attr_name in dir(device):
-            if not attr_name.startswith('_') and attr_name not in ['username', 'password']:
+            if not attr_name.startswith('_') and attr_name not in ['username', 'password', 'credential_id'] and attr_name not in skipped:
                 if hasattr(device, attr_name) and not callable(getattr(device, attr_name)):
                     setattr(self, attr_name, getattr(device, attr_name))
     
@@ -144,10 +179,74 @@ def resolve_device_credential(
     return DeviceWithCredentials(
         device=device,
         username=selected_credential.username,
-        password=get_device_password(selected_credential)  # Always use decrypted password
+        password=get_device_password(selected_credential),  # Always use decrypted password
+        credential_id=selected_credential.id
     )
 
 
+def _has_credentials(device: Any) -> bool:
+    return bool(getattr(device, 'username', None) and getattr(device, 'password', None))
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def order_by_device_history(
+    credentials: List[models.Credential],
+    statuses: Dict[int, Any],
+    now: Optional[datetime] = None
+) -> List[models.Credential]:
+    """Reorder a device's priority-ordered credentials by its login history.
+    
+    The credential that last authenticated on the device (and hasn't failed
+    since) goes first; credentials that failed on the device within
+    FAILURE_DEMOTION_WINDOW and haven't worked since go last. Otherwise the
+    priority order is kept.
+    
+    Args:
+        credentials: Matching credentials ordered by priority
+        statuses: DeviceCredentialStatus of the device per credential ID
+        now: Current time (defaults to now)
+    """
+    if not statuses:
+        return credentials
+    now = now or datetime.now(timezone.utc)
+    last_good_id = None
+    last_good_at = None
+    demoted = set()
+    for credential_id, status in statuses.items():
+        last_success = _as_utc(status.last_success)
+        last_failure = _as_utc(status.last_failure)
+        if last_success and (last_failure is None or last_failure < last_success):
+            if last_good_at is None or last_success > last_good_at:
+                last_good_id, last_good_at = credential_id, last_success
+        elif last_failure and now - last_failure < FAILURE_DEMOTION_WINDOW:
+            demoted.add(credential_id)
+    return sorted(
+        credentials,
+        key=lambda credential: 0 if credential.id == last_good_id else 2 if credential.id in demoted else 1
+    )
+
+
+def _preload_devices(db: Session, devices: List[Any]) -> None:
+    """Load the (possibly expired) columns and tags of ORM devices in one query per chunk.
+
+    Otherwise wrapping each device in DeviceWithCredentials refreshes it and
+    loads its tags with separate queries.
+    """
+    # Take IDs from the identity key; reading device.id would refresh an expired device
+    device_ids = [
+        sa_inspect(device).identity[0] for device in devices
+        if isinstance(device, models.Device) and sa_inspect(device).identity
+    ]
+    for start in range(0, len(device_ids), MATCH_CHUNK_SIZE):
+        chunk = device_ids[start:start + MATCH_CHUNK_SIZE]
+        db.query(models.Device).options(selectinload(models.Device.tags)).filter(models.Device.id.in_(chunk)).all()
+
+
 def resolve_device_credentials_batch(
     devices: List[Any], 
     db: Session, 
@@ -156,6 +255,14 @@ def resolve_device_credentials_batch(
 ) -> List[Any]:
     """Resolve credentials for a batch of devices.
     
+    Applies the same rules as resolve_device_credential() to every device,
+    except that the matching credentials are reordered by the device's login
+    history (see order_by_device_history()). Resolution is set-based: the matching credentials of all devices come from
+    get_matching_credentials_for_devices(), the devices and their tags are
+    loaded with one query, each selected credential is decrypted once, and the
+    ``last_used`` timestamps of all selected credentials are updated with one
+    statement and one commit.
+    
     Args:
         devices: List of device objects requiring credentials
         db: Database session
@@ -166,23 +273,64 @@ def resolve_device_credentials_batch(
         List of devices with resolved credentials, excluding devices for which
         credentials could not be resolved
     """
+    _preload_devices(db, devices)
+    to_resolve = [
+        getattr(device, 'id', 0) for device in devices
+        if not (skip_if_has_credentials and _has_credentials(device))
+    ]
+    matches = get_matching_credentials_for_devices(db, to_resolve) if to_resolve else {}
+    statuses = get_device_credential_statuses(db, to_resolve) if to_resolve else {}
+    
+    passwords = {}  # credential ID -> decrypted password (or None if it can't be decrypted)
+    selected_ids = set()
     resolved_devices = []
     
     for device in devices:
-        try:
-            print(f"About to call [resolve_device_credential]...")
-            #device_name = getattr(device, 'hostname', 'unknown')
-            #logger.log(f"About to call [resolve_device_credential] for device {device_name}", level="DEBUG", destinations=["stdout", "file", "db"], job_id=job_id, device_id=getattr(device, 'id', None), source="device_credential_resolver", log_type="system")
-            resolved_device = resolve_device_credential(
-                device, db, job_id, skip_if_has_credentials
-            )
-            resolved_devices.append(resolved_device)
-        except ValueError as e:
-            device_id = getattr(device, 'id', 0)
-            device_name = getattr(device, 'hostname', f"Device_{device_id}")
-            logger.log(f"[Job: {job_id}] Could not resolve credentials for device {device_name}: {e}", level="ERROR", destinations=["stdout", "file", "db"], job_id=job_id, device_id=device_id, source="device_credential_resolver", log_type="job")
-            # Skip this device
+        device_id = getattr(device, 'id', 0)
+        device_name = getattr(device, 'hostname', f"Device_{device_id}")
+        has_credentials = _has_credentials(device)
+        
+        if has_credentials and skip_if_has_credentials:
+            resolved_devices.append(device)
+            continue
+        
+        matching_credentials = matches.get(device_id) or []
+        if not matching_credentials:
+            if has_credentials:
+                logger.log(f"[Job: {job_id}] No matching credentials for device {device_name}, using existing credentials", level="INFO", destinations=["stdout", "file", "db"], job_id=job_id, device_id=device_id, source="device_credential_resolver", log_type="job")
+                resolved_devices.append(device)
+            else:
+                logger.log(f"[Job: {job_id}] Could not resolve credentials for device {device_name}: No matching credentials found for device {device_name} (ID: {device_id})", level="ERROR", destinations=["stdout", "file", "db"], job_id=job_id, device_id=device_id, source="device_credential_resolver", log_type="job")
+            continue
+        
+        # Last working credential first, else the highest priority one
+        selected_credential = order_by_device_history(matching_credentials, statuses.get(device_id))[0]
+        if selected_credential.id not in passwords:
+            try:
+                passwords[selected_credential.id] = get_device_password(selected_credential)
+            except Exception as e:
+                passwords[selected_credential.id] = None
+                logger.log(f"[Job: {job_id}] Failed to decrypt credential ID {selected_credential.id}: {e}", level="ERROR", destinations=["stdout", "file", "db"], job_id=job_id, source="device_credential_resolver", log_type="job")
+        password = passwords[selected_credential.id]
+        if password is None:
+            logger.log(f"[Job: {job_id}] Could not resolve credentials for device {device_name}: credential ID {selected_credential.id} could not be decrypted", level="ERROR", destinations=["stdout", "file", "db"], job_id=job_id, device_id=device_id, source="device_credential_resolver", log_type="job")
+            continue
+        
+        logger.log(f"[Job: {job_id}] Selected credential ID {selected_credential.id} (priority {selected_credential.priority}) for device {device_name}", level="DEBUG", destinations=["stdout", "file"], job_id=job_id, device_id=device_id, source="device_credential_resolver")
+        selected_ids.add(selected_credential.id)
+        resolved_devices.append(DeviceWithCredentials(
+            device=device,
+            username=selected_credential.username,
+            password=password,
+            credential_id=selected_credential.id
+        ))
     
+    if to_resolve:
+        logger.log(
+            f"[Job: {job_id}] Resolved credentials for {len(resolved_devices)} of {len(devices)} device(s) using {len(selected_ids)} distinct credential(s)",
+            level="INFO", destinations=["stdout", "file", "db"], job_id=job_id, source="device_credential_resolver", log_type="job"
+        )
+    track_credential_selections(db, selected_ids, job_id)
     return resolved_devices
 
 
@@ -228,4 +376,33 @@ def track_credential_selection(
     #     job_id=job_id,
     #     selected_at=datetime.utcnow()
     # ))
-    # db.commit()
\ No newline at end of file
+    # db.commit()
+
+
+def track_credential_selections(
+    db: Session,
+    credential_ids: Iterable[int],
+    job_id: Optional[int] = None
+) -> None:
+    """Update the ``last_used`` timestamp of many selected credentials at once.
+    
+    Bulk counterpart of track_credential_selection(): one UPDATE and one commit
+    for the whole batch.
+    
+    Args:
+        db: Database session
+        credential_ids: IDs of the selected credentials
+        job_id: Optional job ID for context
+    """
+    credential_ids = sorted(set(credential_ids))
+    if not credential_ids:
+        return
+    try:
+        db.query(models.Credential).filter(models.Credential.id.in_(credential_ids)).update(
+            {models.Credential.last_used: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.log(f"[Job: {job_id}] Failed to update last_used timestamp for credentials {credential_ids}: {e}", level="ERROR", destinations=["stdout", "file", "db"], job_id=job_id, source="device_credential_resolver", log_type="job")
+        # Don't raise - this is non-critical functionality
@@ -0,0 +1,223 @@
+"""
+Prometheus metrics for NetRaven (API, worker and scheduler).
+
+All metrics are defined here so every process exposes the same names. The API
+serves them from ``/metrics``; the worker and scheduler start an embedded
+exporter with :func:`start_metrics_server`.
+
+RQ forks a work horse per job, so metrics written in the horse would be lost
+with a plain in-process registry. When ``PROMETHEUS_MULTIPROC_DIR`` is set
+(the worker entrypoint does this) prometheus_client writes every sample to
+per-process files in that directory and the exporter aggregates them with a
+``MultiProcessCollector``. Gauges use the ``livesum`` mode so samples from
+exited horses disappear once :func:`mark_process_dead` is called.
+
+prometheus_client is optional: without it every metric is a no-op and the
+exporters are not started.
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Tuple
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+        CONTENT_TYPE_LATEST, generate_latest, start_http_server,
+    )
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    CollectorRegistry = Counter = Gauge = Histogram = GaugeMetricFamily = None
+    multiprocess = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+RQ_QUEUE_NAMES = ("default", "high", "low")
+
+# Device sessions range from sub-second simulator runs to multi-minute config pulls
+SESSION_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+
+def _metric(metric_cls, *args, **kwargs):
+    if metric_cls is None:
+        return _NoopMetric()
+    return metric_cls(*args, **kwargs)
+
+
+HTTP_REQUEST_SECONDS = _metric(
+    Histogram, "netraven_http_request_duration_seconds",
+    "API request latency by route template", ["method", "route", "status"],
+)
+DB_POOL_CHECKOUTS = _metric(
+    Counter, "netraven_db_pool_checkouts_total",
+    "Connections checked out of the SQLAlchemy pool",
+)
+DB_POOL_CHECKOUT_WAIT_SECONDS = _metric(
+    Histogram, "netraven_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = _metric(
+    Gauge, "netraven_db_pool_checked_out",
+    "Connections currently checked out of the SQLAlchemy pool", multiprocess_mode="livesum",
+)
+DEVICE_SESSION_SECONDS = _metric(
+    Histogram, "netraven_device_session_duration_seconds",
+    "Duration of a device job handler run", ["device_type", "job_type", "success"],
+    buckets=SESSION_BUCKETS,
+)
+TASK_RETRIES = _metric(
+    Counter, "netraven_task_retries_total",
+    "Device task retries by error category", ["category"],
+)
+CIRCUIT_BREAKER_CIRCUITS = _metric(
+    Gauge, "netraven_circuit_breaker_circuits",
+    "Device circuits by circuit-breaker state", ["state"], multiprocess_mode="livesum",
+)
+LOG_WRITES_IN_PROGRESS = _metric(
+    Gauge, "netraven_log_writes_in_progress",
+    "Log records currently being written, by destination", ["destination"], multiprocess_mode="livesum",
+)
+
+
+def multiprocess_enabled() -> bool:
+    """Return True when samples are aggregated across processes."""
+    return CollectorRegistry is not None and bool(os.environ.get(MULTIPROC_ENV))
+
+
+def get_registry():
+    """Registry to expose: a MultiProcessCollector registry in multiprocess mode, else the default."""
+    if CollectorRegistry is None:
+        return None
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_latest(registry=None) -> Tuple[bytes, str]:
+    """Render the exposition payload and its content type for an HTTP response."""
+    if CollectorRegistry is None:
+        return b"# prometheus_client is not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(registry or get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: Optional[Any], collectors: Iterable[Any] = ()) -> bool:
+    """Start the embedded HTTP exporter used by the worker and scheduler.
+
+    Args:
+        port: Port to listen on; falsy disables the exporter. Strings (env
+              overrides) are coerced to int.
+        collectors: Extra collectors (e.g. :class:`RQQueueCollector`) to register
+
+    Returns:
+        bool: True if the exporter was started
+    """
+    if CollectorRegistry is None or not port:
+        return False
+    registry = get_registry()
+    for collector in collectors:
+        registry.register(collector)
+    start_http_server(int(port), registry=registry)
+    return True
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop live gauge samples of an exited process (multiprocess mode only)."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+
+def instrument_engine(engine) -> None:
+    """Record pool checkouts, checkout wait time and checked-out connections for an engine.
+
+    SQLAlchemy has no "before checkout" event, so the wait is measured by
+    wrapping the pool's ``_do_get`` on this engine's pool instance. The
+    checked-out gauge is only moved with ``inc``/``dec`` from the pool events;
+    a detached connection never checks in, so detaching counts as a return.
+    """
+    if CollectorRegistry is None:
+        return
+    from sqlalchemy import event
+
+    pool = engine.pool
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+    @event.listens_for(pool, "detach")
+    def _on_detach(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+    do_get = getattr(pool, "_do_get", None)
+    if do_get is None:
+        return
+
+    def _timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    pool._do_get = _timed_do_get
+
+
+class RQQueueCollector:
+    """Scrape-time collector reporting RQ queue length and lag.
+
+    Lag is the age of the oldest job still waiting in each queue, i.e. how far
+    behind the workers are.
+    """
+
+    def __init__(self, redis_conn, queue_names: Iterable[str] = RQ_QUEUE_NAMES):
+        self.redis_conn = redis_conn
+        self.queue_names = list(queue_names)
+
+    def collect(self):
+        from rq import Queue
+
+        length = GaugeMetricFamily("netraven_rq_queue_jobs", "Jobs waiting in the RQ queue", labels=["queue"])
+        lag = GaugeMetricFamily("netraven_rq_queue_lag_seconds", "Age of the oldest job waiting in the RQ queue", labels=["queue"])
+        now = datetime.now(timezone.utc)
+        for name in self.queue_names:
+            try:
+                queue = Queue(name, connection=self.redis_conn)
+                length.add_metric([name], queue.count)
+                oldest = queue.get_jobs(offset=0, length=1)
+                enqueued_at = oldest[0].enqueued_at if oldest else None
+            except Exception:
+                continue
+            if enqueued_at is not None and enqueued_at.tzinfo is None:
+                enqueued_at = enqueued_at.replace(tzinfo=timezone.utc)
+            lag.add_metric([name], (now - enqueued_at).total_seconds() if enqueued_at else 0.0)
+        yield length
+        yield lag
@@ -0,0 +1,282 @@
+"""
+Lightweight tracing for job runs.
+
+``run_job`` opens the root span. Nested spans are created by the dispatcher,
+``task_with_retry`` (one per device, plus one per attempt), ``handle_device``,
+the job handler, the drivers and every timing stage (``timings.stage``), so a
+single trace shows which devices and stages made up a slow job's critical path.
+
+The current span is held in a ``ContextVar``. Worker threads don't inherit
+context, so the dispatcher submits tasks through :func:`bind_context`.
+
+Exporters (``tracing`` config section):
+
+- ``json`` (default): one JSON line per finished span, appended to
+  ``<path>/<trace_id>.jsonl``. ``scripts/show_trace.py`` renders a file as a
+  tree with the critical path marked.
+- ``otlp``: spans are mirrored to an OpenTelemetry SDK tracer and sent to
+  ``otlp_endpoint`` (requires ``opentelemetry-sdk`` and
+  ``opentelemetry-exporter-otlp-proto-http``; falls back to ``json`` if they
+  are missing).
+
+Example config::
+
+    tracing:
+      enabled: true
+      exporter: json
+      path: /data/traces
+
+When tracing is disabled every call here is a cheap no-op.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+except ImportError:
+    otel_trace = None
+
+DEFAULT_TRACE_PATH = "/data/traces"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("netraven_span", default=None)
+_settings: Optional[Dict[str, Any]] = None
+_exporter = None
+_otel_provider = None
+_otel_tracer = None
+_configure_lock = threading.Lock()
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self.thread = threading.current_thread().name
+        self._start = time.perf_counter()
+        self._token = None
+        self._otel = None
+
+        if _otel_tracer is not None:
+            context = otel_trace.set_span_in_context(parent._otel) if parent and parent._otel else None
+            otel_attributes = {k: v for k, v in self.attributes.items() if v is not None}
+            self._otel = _otel_tracer.start_span(name, context=context, attributes=otel_attributes)
+            span_context = self._otel.get_span_context()
+            self.trace_id = format(span_context.trace_id, "032x")
+            self.span_id = format(span_context.span_id, "016x")
+        else:
+            self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+            self.span_id = uuid.uuid4().hex[:16]
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+        if self._otel is not None and value is not None:
+            self._otel.set_attribute(key, value)
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+        if self._otel is not None:
+            self._otel.record_exception(exc)
+            self._otel.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(exc)))
+
+    def end(self) -> None:
+        """Finish the span, restore its parent as current and export it."""
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        if self._otel is not None:
+            self._otel.end()
+        if _exporter is not None:
+            _exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start_time, tz=timezone.utc).isoformat(),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonFileExporter:
+    """Append finished spans as JSON lines to one file per trace."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def trace_file(self, trace_id: str) -> str:
+        return os.path.join(self.path, f"{trace_id}.jsonl")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        try:
+            with self._lock, open(self.trace_file(span.trace_id), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"[TRACING ERROR] Failed to write span to {self.path}: {e}")
+
+
+def configure(config: Optional[Dict[str, Any]] = None) -> None:
+    """(Re)configure tracing from the ``tracing`` section of the app config.
+
+    Called lazily with the loaded app config on first use; tests and tools can
+    call it directly with their own config.
+    """
+    global _settings, _exporter, _otel_provider, _otel_tracer
+    if config is None:
+        from netraven.config.loader import load_config
+        config = load_config()
+    settings = dict(config.get("tracing", {}) or {})
+    # Env overrides (NETRAVEN_TRACING__ENABLED) arrive as strings
+    settings["enabled"] = str(settings.get("enabled", False)).lower() in ("1", "true", "yes", "on")
+
+    with _configure_lock:
+        if _otel_provider is not None:
+            _otel_provider.shutdown()
+        _exporter = None
+        _otel_provider = None
+        _otel_tracer = None
+        if settings["enabled"]:
+            exporter = settings.get("exporter", "json")
+            if exporter == "otlp" and otel_trace is not None:
+                resource = Resource.create({"service.name": settings.get("service_name", "netraven-worker")})
+                _otel_provider = TracerProvider(resource=resource)
+                otlp_kwargs = {"endpoint": settings["otlp_endpoint"]} if settings.get("otlp_endpoint") else {}
+                _otel_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(**otlp_kwargs)))
+                _otel_tracer = _otel_provider.get_tracer("netraven")
+            else:
+                if exporter == "otlp":
+                    print("[TRACING WARNING] opentelemetry is not installed; using the JSON file exporter")
+                try:
+                    _exporter = JsonFileExporter(settings.get("path", DEFAULT_TRACE_PATH))
+                except OSError as e:
+                    print(f"[TRACING ERROR] Cannot create trace directory, tracing disabled: {e}")
+                    settings["enabled"] = False
+        _settings = settings
+
+
+def is_enabled() -> bool:
+    if _settings is None:
+        configure()
+    return _settings["enabled"]
+
+
+def flush() -> None:
+    """Flush buffered spans (OTLP). Call before a forked RQ work horse exits."""
+    if _otel_provider is not None:
+        _otel_provider.force_flush()
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Start a span as a child of the current one and make it current.
+
+    The caller must call ``span.end()`` in the same context. Prefer
+    :func:`span` unless the span can't be expressed as a ``with`` block.
+    """
+    if not is_enabled():
+        return NOOP_SPAN
+    new_span = Span(name, parent=_current_span.get(), attributes=attributes)
+    new_span._token = _current_span.set(new_span)
+    return new_span
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """Context manager for a span; exceptions are recorded on it and re-raised."""
+    current = start_span(name, attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_exception(e)
+        raise
+    finally:
+        current.end()
+
+
+def traced(name: str) -> Callable:
+    """Decorator running every call of a function inside a span."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """Return the active span (a no-op span when there is none)."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def set_attributes(attributes: Dict[str, Any]) -> None:
+    """Set attributes on the active span."""
+    current_span().set_attributes(attributes)
+
+
+def bind_context(func: Callable) -> Callable:
+    """Bind ``func`` to a copy of the current context so a pool thread continues this trace."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def device_attributes(device: Any) -> Dict[str, Any]:
+    """Standard span attributes for a device."""
+    return {
+        "device.id": getattr(device, "id", None),
+        "device.hostname": getattr(device, "hostname", None),
+        "device.type": getattr(device, "device_type", None),
+    }
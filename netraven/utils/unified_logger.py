@@ -26,6 +26,7 @@ try:
 except ImportError:
     Redis = None
 from netraven.db.log_utils import save_log
+from netraven.utils import metrics
 
 class UnifiedLogger:
     """
@@ -182,6 +183,8 @@ class UnifiedLogger:
 
         errors = []
         for dest in destinations:
+            in_progress = metrics.LOG_WRITES_IN_PROGRESS.labels(destination=dest)
+            in_progress.inc()
             try:
                 if dest == "file" and self.file_logger:
                     self._log_to_file(record)
@@ -193,6 +196,8 @@ class UnifiedLogger:
                     self._log_to_db(record, is_connection_log=is_connection_log)
             except Exception as e:
                 errors.append((dest, str(e), traceback.format_exc()))
+            finally:
+                in_progress.dec()
 
         # Fallback: If all destinations failed, print to stdout
         if errors and len(errors) == len(destinations):
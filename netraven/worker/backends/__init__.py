@@ -7,4 +7,200 @@ interacting with devices, such as SSH, API, or other connectivity methods.
 The backends are designed to be interchangeable, allowing the system to use
 different communication methods based on device requirements while providing
 a consistent interface to the rest of the application.
+
+The active driver is selected with the ``worker.driver`` configuration key
+(defaults to ``netmiko``) and resolved with :func:`get_driver`. Every driver
+module exposes the same ``run_command(device, job_id, command, config)``
+contract, so job handlers never need to know which backend is in use.
+
+Handlers that need several commands from one device use :func:`open_session`
+instead. Drivers with persistent sessions (netmiko, paramiko, asyncssh)
+provide their own ``open_session``. For the others, :class:`CommandSession` turns each ``send``
+into a ``run_command`` call, so handlers can use the session API with any
+backend.
+
+Devices tagged with one of ``worker.session_broker.tags`` get their sessions
+from the optional session broker process instead
+(:mod:`netraven.worker.session_broker`), which keeps logins open between runs.
+
+``run_commands(device, commands, config)`` (netmiko, paramiko and asyncssh drivers)
+runs a list of commands over one session and returns a per-command result
+map built by :func:`run_session_commands`.
 """
+
+import importlib
+import socket
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Default driver used when the configuration does not specify one
+DEFAULT_DRIVER = "netmiko"
+
+# Mapping of driver names (as used in config) to their implementing modules.
+# Modules are imported lazily so optional backends don't add import cost.
+DRIVER_MODULES = {
+    "netmiko": "netraven.worker.backends.netmiko_driver",
+    "paramiko": "netraven.worker.backends.paramiko_driver",
+    "asyncssh": "netraven.worker.backends.asyncssh_driver",
+    "simulated": "netraven.worker.backends.simulated_driver",
+    "replay": "netraven.worker.backends.replay_driver",
+}
+
+
+def get_driver_name(config: Optional[Dict[str, Any]] = None) -> str:
+    """Return the configured driver name, falling back to the default.
+
+    Args:
+        config: Application configuration dictionary (``worker.driver`` is read)
+
+    Returns:
+        str: Lower-cased driver name
+    """
+    if config and isinstance(config.get("worker"), dict):
+        name = config["worker"].get("driver")
+        if name:
+            return str(name).lower()
+    return DEFAULT_DRIVER
+
+
+def get_driver(config: Optional[Dict[str, Any]] = None) -> ModuleType:
+    """Resolve the backend driver module selected in the configuration.
+
+    Args:
+        config: Application configuration dictionary
+
+    Returns:
+        ModuleType: The driver module exposing ``run_command``
+
+    Raises:
+        ValueError: If the configured driver name is not registered
+    """
+    name = get_driver_name(config)
+    module_path = DRIVER_MODULES.get(name)
+    if module_path is None:
+        raise ValueError(f"Unknown worker driver '{name}'. Available drivers: {sorted(DRIVER_MODULES)}")
+    return importlib.import_module(module_path)
+
+
+def connect_socket(host: str, port: int, timeout: float, bastion: Optional[Dict[str, Any]] = None) -> socket.socket:
+    """Open the TCP connection to a device for an SSH driver.
+
+    Drivers open the socket themselves and hand it to the SSH library
+    (``sock=``) so TCP connect time can be measured separately from the SSH
+    handshake.
+
+    Args:
+        host: Device address
+        port: SSH port
+        timeout: Connection timeout in seconds
+        bastion: The device's bastion (``device.bastion``); when set, a
+            ``direct-tcpip`` channel through the bastion is returned instead
+            (see :mod:`netraven.worker.backends.bastion`)
+
+    Returns:
+        socket.socket: Connected socket (or socket-like bastion channel)
+
+    Raises:
+        OSError: If the connection fails or times out
+    """
+    if bastion:
+        from netraven.worker.backends.bastion import open_channel
+        return open_channel(bastion, host, port, timeout)
+    return socket.create_connection((host, port), timeout=timeout)
+
+
+class CommandSession:
+    """Session API for drivers without persistent sessions.
+
+    Every :meth:`send` is a separate ``run_command`` call on the wrapped driver.
+    """
+
+    def __init__(
+        self,
+        run_command: Callable,
+        device: Any,
+        job_id: Optional[int] = None,
+        config: Optional[Dict[str, Any]] = None,
+    ):
+        self._run_command = run_command
+        self.device = device
+        self.job_id = job_id
+        self.config = config
+
+    def send(self, command: Optional[str] = None) -> str:
+        return self._run_command(self.device, self.job_id, command=command, config=self.config)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "CommandSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_session(device: Any, job_id: Optional[int] = None, config: Optional[Dict[str, Any]] = None):
+    """Open a session to a device with the configured driver.
+
+    Use it as a context manager; the session is closed when the block exits::
+
+        with open_session(device, job_id, config) as session:
+            session.send("show version")
+            session.send()  # running-config
+
+    Args:
+        device: Device object with connection attributes
+        job_id: Job ID for correlation in logs
+        config: Application configuration dictionary
+
+    Returns:
+        An open session exposing ``send(command=None)`` and ``close()``. It is
+        leased from the session broker when the device opted in and the
+        broker is running.
+    """
+    from netraven.worker import session_broker
+    if session_broker.uses_broker(device, config):
+        brokered = session_broker.open_broker_session(device, job_id, config)
+        if brokered is not None:
+            return brokered
+    driver = get_driver(config)
+    driver_open_session = getattr(driver, "open_session", None)
+    if driver_open_session is not None:
+        return driver_open_session(device, job_id=job_id, config=config)
+    return CommandSession(driver.run_command, device, job_id=job_id, config=config)
+
+
+def run_session_commands(session: Any, commands: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Run commands in order over an open session and collect per-command results.
+
+    A command that returns no output (``ValueError``) is recorded and the
+    batch continues. Any other error may leave the session unusable, so the
+    remaining commands are not sent and are reported as skipped.
+
+    Args:
+        session: Open session exposing ``send(command)``
+        commands: Commands to run; duplicates run once
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Ordered ``{command: {"output", "error",
+        "elapsed"}}``. ``output`` is None and ``error`` is set for failed or
+        skipped commands. ``elapsed`` is in seconds.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    aborted: Optional[str] = None
+    for command in dict.fromkeys(commands):
+        if aborted is not None:
+            results[command] = {"output": None, "error": f"Skipped after earlier failure: {aborted}", "elapsed": 0.0}
+            continue
+        start = time.perf_counter()
+        try:
+            output = session.send(command)
+            results[command] = {"output": output, "error": None, "elapsed": time.perf_counter() - start}
+        except ValueError as e:
+            results[command] = {"output": None, "error": str(e), "elapsed": time.perf_counter() - start}
+        except Exception as e:
+            results[command] = {"output": None, "error": f"{type(e).__name__}: {e}", "elapsed": time.perf_counter() - start}
+            aborted = f"'{command}' failed"
+    return results
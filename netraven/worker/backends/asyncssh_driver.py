@@ -0,0 +1,504 @@
+"""AsyncSSH-based backend driver for SSH device communication.
+
+This module implements the standard driver contract with asyncssh, so device
+sessions are coroutines rather than threads. A single event loop can hold
+thousands of concurrent sessions at a fraction of the memory of the
+thread-per-session netmiko and paramiko drivers.
+
+The session workflow mirrors the netmiko driver:
+
+1. TCP connect, SSH handshake and login (legacy KEX/MAC algorithms from the
+   ``ssh:`` config section are offered per connection, in addition to the
+   asyncssh defaults)
+2. Interactive shell with a PTY; the prompt is learnt from the login banner
+3. ``enable`` whenever the shell is at a ``>`` prompt (as Netmiko does),
+   except on platforms whose operational prompt ends in ``>``
+4. Paging disabled once (``enable_paging`` command for the device type)
+5. Each command is read until the device prompt returns, then the echo and
+   trailing prompt are stripped
+
+Failures are raised as the same Netmiko exceptions the netmiko driver
+produces (timeouts, authentication, connection errors), so error
+classification, retries and circuit breaking behave the same.
+
+Synchronous callers (the dispatcher's thread pool) use :func:`run_command`,
+:func:`open_session` and :func:`run_commands`, which run the coroutines on one
+shared event loop thread per process. :func:`open_session` returns the same
+session API as the other drivers, so a config backup with capability
+detection logs in once. Code that is already async can call
+:func:`async_run_command`, :func:`async_open_session` or :func:`run_many`
+directly.
+
+Requires the optional ``asyncssh`` package (``poetry install -E asyncssh``).
+Select it with ``worker.driver: asyncssh``.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+from netmiko.exceptions import (
+    ConnectionException,
+    NetmikoAuthenticationException,
+    NetmikoTimeoutException,
+    ReadTimeout,
+)
+
+from netraven.services.credential_utils import get_device_password
+from netraven.worker import timings
+from netraven.worker.backends import run_session_commands
+from netraven.worker.backends.prompt_reader import TAIL_BYTES
+from netraven.worker.backends.ssh_compat import get_legacy_algorithms
+from netraven.worker.device_capabilities import get_command
+from netraven.utils import tracing
+
+log = logging.getLogger(__name__)
+
+# Define standard command to run (matches the netmiko driver default)
+COMMAND_SHOW_RUN = "show running-config"
+
+# Default timeout values if not specified in config
+DEFAULT_CONN_TIMEOUT = 60  # seconds
+DEFAULT_COMMAND_TIMEOUT = 120  # seconds
+READ_CHUNK_SIZE = 65536
+
+# Terminal size requested for the PTY (wide, so output lines aren't wrapped)
+TERM_SIZE = (511, 24)
+
+# Platforms whose normal (privileged) prompt ends in ">", so it never means "needs enable"
+EXEC_PROMPT_DEVICE_TYPES = {"juniper_junos", "juniper", "paloalto_panos"}
+
+# A CLI prompt on its own line: "router>", "router#", "admin@mx1> "
+PROMPT_PATTERN = re.compile(r"^[^\s>#][^\r\n]{0,80}?[>#]$")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def _require_asyncssh() -> None:
+    if asyncssh is None:
+        raise ImportError("The asyncssh driver requires the 'asyncssh' package (poetry install -E asyncssh)")
+
+
+def get_algorithm_options(config: Optional[Dict] = None) -> Dict[str, str]:
+    """Return asyncssh ``connect()`` algorithm options for the ``ssh:`` config section.
+
+    Legacy algorithms are appended to asyncssh's defaults ("+" prefix) for
+    this connection only; nothing global is patched.
+    """
+    legacy = get_legacy_algorithms(config)
+    if legacy is None:
+        return {}
+    kex_list, mac_list = legacy
+    return {"kex_algs": "+" + ",".join(kex_list), "mac_algs": "+" + ",".join(mac_list)}
+
+
+async def _connect_socket(host: str, port: int) -> socket.socket:
+    """Open a non-blocking TCP connection on the running loop."""
+    loop = asyncio.get_running_loop()
+    family, sock_type, proto, _, address = (await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM))[0]
+    sock = socket.socket(family, sock_type, proto)
+    sock.setblocking(False)
+    try:
+        await loop.sock_connect(sock, address)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+class AsyncSSHSession:
+    """An interactive asyncssh shell session that can run several commands.
+
+    Args:
+        device: Device object (``ip_address``, ``username``, password, ``device_type``)
+        job_id: Job ID for correlation in logs
+        config: Configuration dictionary (``worker`` timeouts, ``ssh`` options)
+        timer: StageTimer to record stages into. Timers are thread-local and
+            the session runs on the loop thread, so the synchronous wrappers
+            pass the calling thread's timer explicitly.
+    """
+
+    def __init__(
+        self,
+        device: Any,
+        job_id: Optional[int] = None,
+        config: Optional[Dict] = None,
+        timer: Optional[timings.StageTimer] = None
+    ):
+        self.device = device
+        self.job_id = job_id
+        self.config = config
+        self.timer = timer
+        self.conn_timeout = DEFAULT_CONN_TIMEOUT
+        self.command_timeout = DEFAULT_COMMAND_TIMEOUT
+        if config and 'worker' in config:
+            self.conn_timeout = float(config['worker'].get('connection_timeout', DEFAULT_CONN_TIMEOUT))
+            self.command_timeout = float(config['worker'].get('command_timeout', DEFAULT_COMMAND_TIMEOUT))
+        self.device_type = getattr(device, 'device_type', None) or "default"
+        self.prompt: Optional[str] = None
+        self._conn = None
+        self._process = None
+        self._device_id = getattr(device, 'id', 0)
+        self._device_name = getattr(device, 'hostname', f"Device_{self._device_id}")
+        self._host = getattr(device, 'ip_address', None)
+        self._port = getattr(device, 'port', None) or 22
+
+    def _stage(self, name: str):
+        return self.timer.stage(name) if self.timer is not None else nullcontext()
+
+    async def open(self) -> "AsyncSSHSession":
+        """Connect, log in, open the shell, enter enable mode and disable paging.
+
+        Raises:
+            NetmikoTimeoutException: If the TCP connection or login times out
+            NetmikoAuthenticationException: If authentication fails
+            ConnectionException: For other SSH negotiation errors, or if the
+                device is reached through a bastion (not supported by this driver)
+        """
+        _require_asyncssh()
+        if getattr(self.device, 'bastion', None):
+            raise ConnectionException(
+                f"{self._device_name} is reached through a bastion, which the asyncssh driver does not support; use the netmiko or paramiko driver"
+            )
+        job_id = self.job_id
+        start_time = time.time()
+        sock = None
+        log.info(f"[Job: {job_id}] Connecting to device {self._device_name} ({self._host}) with {self.conn_timeout}s timeout using asyncssh")
+        try:
+            with self._stage("tcp_connect"):
+                sock = await asyncio.wait_for(_connect_socket(self._host, self._port), self.conn_timeout)
+            with self._stage("ssh_handshake_auth"):
+                self._conn = await asyncio.wait_for(
+                    asyncssh.connect(
+                        sock=sock,
+                        username=self.device.username,
+                        password=get_device_password(self.device),
+                        known_hosts=None,
+                        client_keys=None,
+                        agent_path=None,
+                        **get_algorithm_options(self.config),
+                    ),
+                    self.conn_timeout,
+                )
+                self._process = await self._conn.create_process(
+                    term_type="vt100", term_size=TERM_SIZE, encoding="utf-8", errors="replace"
+                )
+                # Like Netmiko, send a newline so devices without a login banner prompt too
+                await self._send_line("")
+                await self._read_until(self._at_prompt, self.conn_timeout)
+
+            if self.prompt.endswith(">") and self.device_type not in EXEC_PROMPT_DEVICE_TYPES:
+                with self._stage("enable"):
+                    await self._enable()
+
+            paging_command = get_command(self.device_type, "enable_paging")
+            with self._stage("paging"):
+                await self._send_line(paging_command)
+                await self._read_until(self._at_prompt, self.command_timeout, echo=paging_command)
+            return self
+
+        except (asyncio.TimeoutError, OSError) as e:
+            await self._abort(sock)
+            log.warning(f"[Job: {job_id}] Timeout connecting to {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            raise NetmikoTimeoutException(
+                f"Connection to device timed out: {self._host}:{self._port} ({type(e).__name__}: {e})"
+            ) from e
+        except Exception as e:
+            await self._abort(sock)
+            log.warning(f"[Job: {job_id}] {type(e).__name__} connecting to {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            if asyncssh is not None and isinstance(e, asyncssh.PermissionDenied):
+                raise NetmikoAuthenticationException(f"Authentication to device failed: {self._host}:{self._port} ({e})") from e
+            if asyncssh is not None and isinstance(e, asyncssh.Error):
+                raise ConnectionException(f"SSH session to {self._host}:{self._port} failed: {e}") from e
+            raise
+
+    async def _abort(self, sock: Optional[socket.socket]) -> None:
+        """Clean up after a failed open."""
+        if self._conn is None and sock is not None:
+            # SSH setup failed after the TCP connect; asyncssh never took ownership
+            sock.close()
+        await self.close()
+
+    async def _enable(self) -> None:
+        await self._send_line("enable")
+        output = await self._read_until(
+            lambda tail: "assword" in tail.rsplit("\n", 1)[-1] or self._at_prompt(tail),
+            self.command_timeout,
+            echo="enable",
+        )
+        if not self._at_prompt(output):
+            # Same as Netmiko's default: no enable secret is configured per device
+            await self._send_line("")
+            await self._read_until(self._at_prompt, self.command_timeout)
+        if not self.prompt.endswith("#"):
+            log.error(f"[Job: {self.job_id}] Failed to set enable mode for {self._device_name}")
+
+    async def _send_line(self, line: str) -> None:
+        self._process.stdin.write(line + "\n")
+
+    def _at_prompt(self, buffer: str, echo: Optional[str] = None) -> bool:
+        """Whether the buffer ends at a prompt (after the command echo, if given)."""
+        if echo is not None and echo not in buffer:
+            return False
+        last_line = buffer.rsplit("\n", 1)[-1].strip()
+        if self.prompt is not None:
+            base = self.prompt[:-1]
+            if last_line in (base + ">", base + "#"):
+                self.prompt = last_line
+                return True
+            return False
+        if PROMPT_PATTERN.match(last_line):
+            self.prompt = last_line
+            return True
+        return False
+
+    async def _read_until(self, done, timeout: float, echo: Optional[str] = None) -> str:
+        """Read shell output until ``done(tail)`` is true or the timeout expires.
+
+        Like :class:`~netraven.worker.backends.prompt_reader.PromptReader`,
+        chunks are collected in a list and only the last ``TAIL_BYTES``
+        characters are checked, so large outputs aren't rescanned per chunk.
+        With ``echo``, ``done`` is only checked once the command echo has
+        been seen.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        chunks: List[str] = []
+        tail = ""
+        echo_seen = echo is None
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise ReadTimeout(f"Pattern not detected on {self._device_name} within {timeout}s")
+            try:
+                chunk = await asyncio.wait_for(self._process.stdout.read(READ_CHUNK_SIZE), remaining)
+            except asyncio.TimeoutError:
+                raise ReadTimeout(f"Pattern not detected on {self._device_name} within {timeout}s") from None
+            if not chunk:
+                raise ConnectionException(f"Session to {self._device_name} closed by the device")
+            chunks.append(chunk)
+            window = tail + chunk
+            tail = window[-TAIL_BYTES:]
+            if not echo_seen:
+                echo_seen = echo in window
+                if not echo_seen:
+                    continue
+            if done(tail):
+                return "".join(chunks)
+
+    async def send(self, command: Optional[str] = None) -> str:
+        """Run a command and return its output without the echo and trailing prompt.
+
+        Raises:
+            ReadTimeout: If the prompt does not return within the command timeout
+            ValueError: If the command returns no output
+        """
+        if command is None:
+            command = COMMAND_SHOW_RUN
+        if self._process is None:
+            raise RuntimeError(f"Session to {self._device_name} is not open")
+        start_time = time.time()
+        log.debug(f"[Job: {self.job_id}] Executing '{command}' on {self._device_name}")
+        with self._stage("command"):
+            await self._send_line(command)
+            raw = await self._read_until(self._at_prompt, self.command_timeout, echo=command)
+        lines = raw.replace("\r\n", "\n").replace("\r", "").split("\n")
+        # Drop everything up to the echoed command line, and the final prompt line
+        for index, line in enumerate(lines):
+            if command in line:
+                lines = lines[index + 1:]
+                break
+        output = "\n".join(lines[:-1]).strip("\n")
+        if self.timer is not None:
+            self.timer.add_count("bytes_received", len(raw))
+        if not output.strip():
+            raise ValueError(f"Received no output for command '{command}' from {self._host}")
+        log.info(f"[Job: {self.job_id}] Successfully executed command on {self._device_name} in {time.time() - start_time:.2f}s")
+        return output
+
+    async def close(self) -> None:
+        """Close the shell and the SSH connection (safe to call more than once)."""
+        conn, self._conn, self._process = self._conn, None, None
+        if conn is None:
+            return
+        try:
+            conn.close()
+            await conn.wait_closed()
+            log.debug(f"[Job: {self.job_id}] Closed connection to {self._device_name}")
+        except Exception as e:
+            log.warning(f"[Job: {self.job_id}] Error during connection cleanup for {self._device_name}: {e}")
+
+    async def __aenter__(self) -> "AsyncSSHSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+
+async def async_open_session(
+    device: Any,
+    job_id: Optional[int] = None,
+    config: Optional[Dict] = None,
+    timer: Optional[timings.StageTimer] = None
+) -> AsyncSSHSession:
+    """Open a session; use with ``async with`` so it is closed afterwards."""
+    return await AsyncSSHSession(device, job_id=job_id, config=config, timer=timer).open()
+
+
+async def async_run_command(
+    device: Any,
+    job_id: Optional[int] = None,
+    command: Optional[str] = None,
+    config: Optional[Dict] = None,
+    timer: Optional[timings.StageTimer] = None
+) -> str:
+    """Coroutine version of :func:`run_command`."""
+    async with await async_open_session(device, job_id=job_id, config=config, timer=timer) as session:
+        return await session.send(command)
+
+
+async def run_many(
+    devices: List[Any],
+    command: Optional[str] = None,
+    config: Optional[Dict] = None,
+    concurrency: int = 500
+) -> List[Any]:
+    """Run one command on many devices concurrently in the current event loop.
+
+    Returns:
+        List with each device's output, or the exception it raised, in device order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(device):
+        async with semaphore:
+            return await async_run_command(device, command=command, config=config)
+
+    return await asyncio.gather(*(one(device) for device in devices), return_exceptions=True)
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared driver event loop, starting its thread on first use.
+
+    The loop is per process: an RQ work horse forked from a worker that
+    already started one gets a fresh loop.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="asyncssh-driver-loop", daemon=True).start()
+            _loop, _loop_pid = loop, os.getpid()
+        return _loop
+
+
+def _run_on_loop(coro):
+    """Run a coroutine on the shared driver loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+class BlockingAsyncSSHSession:
+    """Blocking session API over an :class:`AsyncSSHSession` on the shared loop.
+
+    Exposes ``send``/``close`` like the netmiko and paramiko sessions, so it
+    works with :func:`netraven.worker.backends.run_session_commands` and the
+    job handlers.
+    """
+
+    def __init__(self, session: AsyncSSHSession):
+        self.session = session
+
+    def send(self, command: Optional[str] = None) -> str:
+        return _run_on_loop(self.session.send(command))
+
+    def close(self) -> None:
+        _run_on_loop(self.session.close())
+
+    def __enter__(self) -> "BlockingAsyncSSHSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_session(
+    device: Any,
+    job_id: Optional[int] = None,
+    config: Optional[Dict] = None
+) -> BlockingAsyncSSHSession:
+    """Open an authenticated session to a device for running several commands.
+
+    Stages are recorded into the calling thread's timer.
+
+    Example:
+        >>> with open_session(device, job_id, config) as session:
+        ...     version = session.send("show version")
+        ...     running = session.send()
+
+    Returns:
+        BlockingAsyncSSHSession: The open session; closed when the ``with`` block exits
+    """
+    _require_asyncssh()
+    session = AsyncSSHSession(device, job_id=job_id, config=config, timer=timings.current_timer())
+    _run_on_loop(session.open())
+    return BlockingAsyncSSHSession(session)
+
+
+@tracing.traced("driver.asyncssh.run_command")
+def run_command(
+    device: Any,
+    job_id: Optional[int] = None,
+    command: Optional[str] = None,
+    config: Optional[Dict] = None
+) -> str:
+    """Connect to a device with asyncssh and execute a command.
+
+    Blocks the calling thread while the session runs on the shared event loop.
+
+    Args:
+        device (Any): Device object (see ``netmiko_driver.run_command``)
+        job_id (Optional[int]): Job ID for correlation in logs
+        command (Optional[str]): Command to execute ('show running-config' by default)
+        config (Optional[Dict]): Configuration dictionary (``worker`` timeouts, ``ssh`` options)
+
+    Returns:
+        str: The command output, without the echo and trailing prompt
+
+    Raises:
+        NetmikoTimeoutException: If the connection times out
+        NetmikoAuthenticationException: If authentication fails
+        ReadTimeout: If the command output doesn't end at a prompt in time
+        ValueError: If the command returns no output
+    """
+    _require_asyncssh()
+    return _run_on_loop(async_run_command(device, job_id=job_id, command=command, config=config, timer=timings.current_timer()))
+
+
+@tracing.traced("driver.asyncssh.run_commands")
+def run_commands(
+    device: Any,
+    commands: List[str],
+    config: Optional[Dict] = None,
+    job_id: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Run several commands on a device over a single asyncssh session.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Ordered ``{command: {"output", "error", "elapsed"}}``
+        (see :func:`netraven.worker.backends.run_session_commands`)
+    """
+    with open_session(device, job_id=job_id, config=config) as session:
+        return run_session_commands(session, commands)
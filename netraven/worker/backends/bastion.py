@@ -0,0 +1,178 @@
+"""SSH jump host (bastion) tunnels for the SSH drivers.
+
+Devices that are only reachable through a bastion have one attached, either
+directly (``Device.bastion_id``) or through one of their tags; the device's
+own bastion wins, then the tag with the lowest ID. Before dispatch the runner
+calls :func:`attach_bastions`, which loads the bastions of all job devices in
+one query and sets ``device.bastion`` to a plain dict (decrypted password
+included) on the worker's device copies.
+
+:func:`~netraven.worker.backends.connect_socket` then asks :func:`open_channel`
+for a ``direct-tcpip`` channel to the device instead of opening a TCP socket.
+All sessions through a bastion share one SSH transport (one TCP connection
+and one login), and at most ``max_channels`` channels are open at a time;
+further sessions wait for a free channel up to the connection timeout.
+
+Only one job runs per RQ work horse, so the transports live in a module
+global; the runner closes them with :func:`close_all` when the job ends.
+"""
+
+import socket
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import paramiko
+from sqlalchemy.orm import Session
+
+from netraven.db.models import Bastion
+from netraven.utils.unified_logger import get_unified_logger
+
+logger = get_unified_logger()
+
+# Fields copied from the Bastion row onto the worker's device copies
+BASTION_FIELDS = ("id", "name", "host", "port", "username", "max_channels")
+
+_lock = threading.Lock()
+_tunnels: Dict[int, "BastionTunnel"] = {}
+
+
+def resolve_bastion_id(device: Any) -> Optional[int]:
+    """Bastion a device connects through: its own, else that of its lowest-ID tag."""
+    bastion_id = getattr(device, "bastion_id", None)
+    if bastion_id:
+        return bastion_id
+    tags = sorted(getattr(device, "tags", None) or [], key=lambda tag: getattr(tag, "id", 0) or 0)
+    for tag in tags:
+        if getattr(tag, "bastion_id", None):
+            return tag.bastion_id
+    return None
+
+
+def attach_bastions(devices: Iterable[Any], db: Session) -> int:
+    """Set ``device.bastion`` on each device that connects through a bastion.
+
+    Devices without a bastion get ``device.bastion = None``.
+
+    Returns:
+        Number of devices that connect through a bastion
+    """
+    bastion_ids = [(device, resolve_bastion_id(device)) for device in devices]
+    wanted = {bastion_id for _, bastion_id in bastion_ids if bastion_id}
+    bastions = {}
+    if wanted:
+        for row in db.query(Bastion).filter(Bastion.id.in_(wanted)).all():
+            bastion = {field: getattr(row, field) for field in BASTION_FIELDS}
+            bastion["password"] = row.get_password
+            bastions[row.id] = bastion
+    count = 0
+    for device, bastion_id in bastion_ids:
+        device.bastion = bastions.get(bastion_id)
+        if device.bastion is not None:
+            count += 1
+    return count
+
+
+class BastionChannel:
+    """A ``direct-tcpip`` channel that frees its bastion slot when closed.
+
+    Behaves like the underlying :class:`paramiko.Channel`, so it can be passed
+    as ``sock`` to Paramiko and Netmiko.
+    """
+
+    def __init__(self, channel: paramiko.Channel, slots: threading.BoundedSemaphore):
+        self._channel = channel
+        self._slots = slots
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+    def close(self) -> None:
+        try:
+            self._channel.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._slots.release()
+
+
+class BastionTunnel:
+    """One SSH transport to a bastion, shared by all device sessions through it.
+
+    Args:
+        bastion: Bastion settings as set by :func:`attach_bastions`
+    """
+
+    def __init__(self, bastion: Dict[str, Any]):
+        self.bastion = bastion
+        self.name = bastion.get("name") or bastion["host"]
+        self.max_channels = int(bastion.get("max_channels") or 1)
+        self._slots = threading.BoundedSemaphore(self.max_channels)
+        self._connect_lock = threading.Lock()
+        self._transport: Optional[paramiko.Transport] = None
+
+    def _get_transport(self, timeout: float) -> paramiko.Transport:
+        """The bastion transport, (re)connecting if it isn't active."""
+        with self._connect_lock:
+            if self._transport is not None and self._transport.is_active():
+                return self._transport
+            self._close_transport()
+            sock = socket.create_connection((self.bastion["host"], self.bastion.get("port") or 22), timeout=timeout)
+            transport = paramiko.Transport(sock)
+            try:
+                transport.start_client(timeout=timeout)
+                transport.auth_password(self.bastion["username"], self.bastion["password"])
+            except Exception:
+                transport.close()
+                raise
+            transport.set_keepalive(30)
+            self._transport = transport
+            logger.log(f"Connected to bastion {self.name}", level="INFO", destinations=["stdout", "file"], source="bastion")
+            return transport
+
+    def open_channel(self, host: str, port: int, timeout: float) -> BastionChannel:
+        """Open a ``direct-tcpip`` channel to ``host:port`` through the bastion.
+
+        Raises:
+            socket.timeout: If no channel becomes free within the timeout
+            ConnectionError: If the bastion login or the channel open fails
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise socket.timeout(f"All {self.max_channels} channels of bastion {self.name} are in use")
+        try:
+            transport = self._get_transport(timeout)
+            channel = transport.open_channel("direct-tcpip", (host, port), ("127.0.0.1", 0), timeout=timeout)
+        except paramiko.SSHException as e:
+            self._slots.release()
+            raise ConnectionError(f"Bastion {self.name} could not open a channel to {host}:{port}: {e}") from e
+        except BaseException:
+            self._slots.release()
+            raise
+        return BastionChannel(channel, self._slots)
+
+    def _close_transport(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def close(self) -> None:
+        with self._connect_lock:
+            self._close_transport()
+
+
+def open_channel(bastion: Dict[str, Any], host: str, port: int, timeout: float) -> BastionChannel:
+    """Open a channel to a device through a bastion, reusing the bastion's transport."""
+    with _lock:
+        tunnel = _tunnels.get(bastion["id"])
+        if tunnel is None:
+            tunnel = _tunnels[bastion["id"]] = BastionTunnel(bastion)
+    return tunnel.open_channel(host, port, timeout)
+
+
+def close_all() -> None:
+    """Close all bastion transports (open channels are closed with them)."""
+    with _lock:
+        tunnels = list(_tunnels.values())
+        _tunnels.clear()
+    for tunnel in tunnels:
+        tunnel.close()
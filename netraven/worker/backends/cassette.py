@@ -0,0 +1,151 @@
+"""Session cassettes: recorded device interactions for offline replay.
+
+A cassette directory holds one JSON Lines file per recorded device
+(``<hostname>.jsonl``). Each line is one interaction captured from a real
+driver call:
+
+    {"version": 1, "hostname": "core-sw1", "device_type": "cisco_ios",
+     "command": "show running-config", "output": "...",
+     "connect_seconds": 1.83, "command_seconds": 4.12,
+     "error": null, "error_type": null, "recorded_at": "2024-05-01T10:00:00Z"}
+
+Outputs and error messages are passed through :func:`netraven.worker.redactor.redact`
+before being written, and device addresses and credentials are never stored,
+so cassettes can be shared and committed alongside bug reports.
+
+Recording is enabled per worker with the ``worker.cassette`` config section:
+
+    worker:
+      cassette:
+        record: true
+        path: /data/cassettes
+
+Cassettes are replayed with the ``replay`` backend driver
+(see :mod:`netraven.worker.backends.replay_driver`).
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from netraven.utils.unified_logger import get_unified_logger
+from netraven.worker import redactor
+
+logger = get_unified_logger()
+
+CASSETTE_VERSION = 1
+CASSETTE_SUFFIX = ".jsonl"
+DEFAULT_CASSETTE_PATH = "/data/cassettes"
+
+_write_lock = threading.Lock()
+
+
+def get_cassette_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    """Return the ``worker.cassette`` config section with defaults applied."""
+    settings = {"record": False, "path": DEFAULT_CASSETTE_PATH}
+    if config and isinstance(config.get("worker"), dict):
+        cassette_cfg = config["worker"].get("cassette")
+        if isinstance(cassette_cfg, dict):
+            settings.update({k: v for k, v in cassette_cfg.items() if v is not None})
+    # Environment overrides arrive as strings
+    if isinstance(settings["record"], str):
+        settings["record"] = settings["record"].strip().lower() in ("1", "true", "yes", "on")
+    return settings
+
+
+def recording_enabled(config: Optional[Dict] = None) -> bool:
+    """Check whether interactions should be recorded to cassettes."""
+    return bool(get_cassette_settings(config)["record"])
+
+
+def cassette_file(path: str, hostname: str) -> str:
+    """Return the cassette file path for a hostname (sanitised for the filesystem)."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", hostname or "unknown")
+    return os.path.join(path, f"{safe_name}{CASSETTE_SUFFIX}")
+
+
+def record_interaction(
+    device: Any,
+    command: str,
+    output: Optional[str],
+    connect_seconds: float,
+    command_seconds: float,
+    config: Optional[Dict] = None,
+    error: Optional[BaseException] = None,
+) -> None:
+    """Append one redacted interaction to the device's cassette.
+
+    Args:
+        device: Device object the command was run against
+        command: The command that was sent
+        output: Raw command output (None if the call failed)
+        connect_seconds: Time spent establishing the session
+        command_seconds: Time spent executing the command
+        config: Application configuration (cassette path and redaction patterns)
+        error: Exception raised by the driver, if any
+    """
+    settings = get_cassette_settings(config)
+    hostname = getattr(device, "hostname", None) or f"Device_{getattr(device, 'id', 'unknown')}"
+    entry = {
+        "version": CASSETTE_VERSION,
+        "hostname": hostname,
+        "device_type": getattr(device, "device_type", None),
+        "command": command,
+        "output": redactor.redact(output, config) if output is not None else None,
+        "connect_seconds": round(connect_seconds, 4),
+        "command_seconds": round(command_seconds, 4),
+        "error": redactor.redact(str(error), config) if error is not None else None,
+        "error_type": type(error).__name__ if error is not None else None,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+    }
+    line = json.dumps(entry) + "\n"
+    try:
+        os.makedirs(settings["path"], exist_ok=True)
+        with _write_lock:
+            with open(cassette_file(settings["path"], hostname), "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        # Recording is diagnostic only; never fail the device session over it
+        logger.log(
+            f"Failed to record cassette for {hostname}: {e}",
+            level="WARNING",
+            destinations=["stdout", "file"],
+            device_id=getattr(device, "id", None),
+            source="cassette",
+        )
+
+
+def load_cassette(file_path: str) -> List[Dict[str, Any]]:
+    """Load all interactions from a cassette file.
+
+    Raises:
+        ValueError: If the file was written by a newer cassette version
+    """
+    interactions = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get("version", CASSETTE_VERSION) > CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version {entry.get('version')} in {file_path}")
+            interactions.append(entry)
+    return interactions
+
+
+def load_cassette_dir(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Load every cassette in a directory, keyed by recorded hostname."""
+    cassettes: Dict[str, List[Dict[str, Any]]] = {}
+    if not os.path.isdir(path):
+        return cassettes
+    for name in sorted(os.listdir(path)):
+        if not name.endswith(CASSETTE_SUFFIX):
+            continue
+        interactions = load_cassette(os.path.join(path, name))
+        if interactions:
+            cassettes[interactions[0]["hostname"]] = interactions
+    return cassettes
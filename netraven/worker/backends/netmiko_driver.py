@@ -13,19 +13,33 @@ Key features:
 - Comprehensive timeout handling for both connection and command execution
 - Detailed error reporting with specific exception types
 - Connection lifecycle management with proper cleanup
+- Reusable sessions (open_session) so several commands share one login
+- Per-device transport profiles: the SSH algorithms negotiated last time are offered first
 - Configurable timeouts through configuration parameters
 
 The module is designed to be robust in the face of network connectivity issues,
 providing appropriate error handling and logging throughout the connection process.
 """
 
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List, Tuple
+import functools
 import time
+import socket
 from netmiko import ConnectHandler
 from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
 from netraven.utils.unified_logger import get_unified_logger
 from netraven.services.credential_utils import get_device_password
-from netraven.worker.backends.ssh_compat import enable_legacy_kex
+from paramiko.ssh_exception import SSHException
+from netraven.worker.backends.ssh_compat import (
+    get_legacy_algorithms,
+    is_negotiation_failure,
+    negotiated_profile,
+    transport_factory,
+    transport_preferences,
+)
+from netraven.worker.backends import cassette, connect_socket, run_session_commands
+from netraven.worker import timings, transport_profiles
+from netraven.utils import tracing
 
 # Configure logging
 logger = get_unified_logger()
@@ -37,6 +51,289 @@ COMMAND_SHOW_RUN = "show running-config"
 DEFAULT_CONN_TIMEOUT = 60  # seconds
 DEFAULT_COMMAND_TIMEOUT = 120  # seconds
 
+def _get_timeouts(config: Optional[Dict]) -> Tuple[Any, Any]:
+    """Return (connection_timeout, command_timeout) from config or the defaults."""
+    conn_timeout = DEFAULT_CONN_TIMEOUT
+    command_timeout = DEFAULT_COMMAND_TIMEOUT
+    if config and 'worker' in config:
+        if 'connection_timeout' in config['worker']:
+            conn_timeout = config['worker']['connection_timeout']
+        if 'command_timeout' in config['worker']:
+            command_timeout = config['worker']['command_timeout']
+    return conn_timeout, command_timeout
+
+
+def _offer_on_transport(connection: Any, preferences: Dict[str, Tuple[str, ...]]) -> None:
+    """Make an unopened Netmiko connection build its Paramiko transport with ``preferences``."""
+    build_ssh_client = connection._build_ssh_client
+
+    def build_with_preferences():
+        client = build_ssh_client()
+        client.connect = functools.partial(client.connect, transport_factory=transport_factory(preferences))
+        return client
+    connection._build_ssh_client = build_with_preferences
+
+
+class NetmikoSession:
+    """An authenticated Netmiko session that can run several commands.
+
+    The TCP connect, SSH handshake/login and enable mode happen once in
+    :meth:`open`; every :meth:`send` then reuses the connection, so a job that
+    needs several commands from a device (capability detection plus the
+    backup, for example) pays for the session setup only once. Use
+    :func:`open_session` rather than creating sessions directly.
+
+    Connection failures are logged by :meth:`open` and re-raised unchanged
+    (NetmikoTimeoutException, NetmikoAuthenticationException, ...), so callers
+    handle them exactly like :func:`run_command` failures.
+    """
+
+    def __init__(self, device: Any, job_id: Optional[int] = None, config: Optional[Dict] = None):
+        self.device = device
+        self.job_id = job_id
+        self.config = config
+        self.connection = None
+        self._sock = None
+        self.connect_elapsed = 0.0
+        self.conn_timeout, self.command_timeout = _get_timeouts(config)
+        self._device_id = getattr(device, 'id', None)
+        self._device_name = getattr(device, 'hostname', f"Device_{self._device_id}")
+        self._device_ip = getattr(device, 'ip_address', 'Unknown')
+        self._record = cassette.recording_enabled(config)
+        self._commands_sent = 0
+
+    def _log(self, message: str, level: str = "INFO") -> None:
+        logger.log(
+            message,
+            level=level,
+            destinations=["stdout", "db", "file"],
+            job_id=self.job_id,
+            device_id=self._device_id,
+            source="netmiko_driver",
+            log_type="job"
+        )
+
+    def open(self) -> "NetmikoSession":
+        """Connect, authenticate and enter enable mode.
+
+        Raises:
+            NetmikoTimeoutException: If the TCP connection or SSH setup times out
+            NetmikoAuthenticationException: If authentication fails
+            Exception: For other connection errors
+        """
+        device = self.device
+        job_id = self.job_id
+        config = self.config
+        device_id = self._device_id
+        device_name = self._device_name
+        device_username = getattr(device, 'username', 'Unknown')
+
+        self._log(f"Connecting to device {device_name} ({self._device_ip}), username: {device_username}, with {self.conn_timeout}s timeout")
+
+        # Legacy SSH KEX/MACs are offered on this connection's transport only
+        legacy = get_legacy_algorithms(config)
+        if legacy:
+            self._log(f"[Job: {job_id}] Offering legacy SSH algorithms to {device_name} (ssh.allow_legacy_kex)", level="DEBUG")
+
+        # Build connection details
+        connection_details = {
+            "device_type": device.device_type,
+            "host": device.ip_address,
+            "port": getattr(device, 'port', None) or 22,
+            "username": device.username,
+            "password": get_device_password(device),
+            "timeout": self.conn_timeout,
+            # Add other potential Netmiko arguments as needed
+            "session_log": None  # We handle logging separately
+        }
+        # Offer only what this device negotiated last time (per connection)
+        full_offer = transport_preferences(legacy=legacy)
+        preferences = transport_preferences(transport_profiles.get_profile(device_id), legacy)
+
+        self._sock = None
+        start_time = time.time()
+        try:
+            self._log(f"[Job: {job_id}] Opening connection to {device_name}")
+            try:
+                self._connect(connection_details, preferences)
+            except SSHException as ssh_err:
+                if preferences == full_offer or not is_negotiation_failure(ssh_err):
+                    raise
+                # The device changed its SSH settings; forget the profile and offer everything
+                self._log(f"[Job: {job_id}] {device_name} rejected its stored SSH transport profile ({ssh_err}), retrying with all algorithms", level="WARNING")
+                transport_profiles.discard_profile(device_id)
+                self._connect(connection_details, full_offer)
+            negotiated = self._negotiated_profile()
+
+            with timings.stage("enable"):
+                enable_required = not self.connection.check_enable_mode()
+                if enable_required:
+                    self._log(f"[Job: {job_id}] Netmiko setting exec mode {device_name}")
+                    try:
+                        self.connection.enable()
+                    except ValueError as err:
+                        self._log(f"[ERROR] Failed to set enable mode for {device_name} '{err}'", level="ERROR")
+            negotiated["enable_required"] = enable_required
+            transport_profiles.record_profile(device_id, negotiated)
+            self.connect_elapsed = time.time() - start_time
+            return self
+
+        except Exception as e:
+            self.connect_elapsed = time.time() - start_time
+            if isinstance(e, (NetmikoTimeoutException, NetmikoAuthenticationException)):
+                # These specific exceptions are caught and handled upstream
+                self._log(f"[Job: {job_id}] {type(e).__name__} connecting to {device_name} after {self.connect_elapsed:.2f}s: {e}", level="WARNING")
+            else:
+                self._log(f"[Job: {job_id}] Error connecting to {device_name} after {self.connect_elapsed:.2f}s: {e}", level="ERROR")
+            self._close_unowned_socket()
+            self.close()
+            raise
+
+    def _connect(self, connection_details: Dict, preferences: Optional[Dict[str, Tuple[str, ...]]]) -> None:
+        """Open the TCP connection and run the SSH handshake and login.
+
+        ``preferences`` (see
+        :func:`~netraven.worker.backends.ssh_compat.transport_preferences`)
+        is set on the transport Netmiko's SSH client builds for this
+        connection, so no other connection sees it.
+        """
+        # Open the TCP connection ourselves so it is timed separately from SSH setup.
+        # Socket errors are reported the same way Netmiko reports them.
+        self._close_unowned_socket()
+        try:
+            with timings.stage("tcp_connect"):
+                self._sock = connect_socket(
+                    connection_details["host"],
+                    connection_details["port"],
+                    self.conn_timeout,
+                    bastion=getattr(self.device, 'bastion', None),
+                )
+        except (socket.timeout, OSError) as sock_err:
+            raise NetmikoTimeoutException(
+                f"TCP connection to device failed: {connection_details['host']}:{connection_details['port']} ({sock_err})"
+            ) from sock_err
+        connection_details["sock"] = self._sock
+
+        connection = ConnectHandler(**connection_details, auto_connect=False)
+        if preferences:
+            _offer_on_transport(connection, preferences)
+        with timings.stage("ssh_handshake_auth"):
+            try:
+                connection._open()
+            except Exception:
+                connection.disconnect()
+                raise
+        self.connection = connection
+
+    def _negotiated_profile(self) -> Dict[str, Any]:
+        """Algorithms negotiated by the SSH connection (empty for non-SSH device types)."""
+        client = getattr(self.connection, 'remote_conn_pre', None)
+        transport = client.get_transport() if hasattr(client, 'get_transport') else None
+        return negotiated_profile(transport) if transport is not None else {}
+
+    def _close_unowned_socket(self) -> None:
+        """Close our TCP socket if SSH setup failed before Netmiko took ownership of it."""
+        if self.connection is None and self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def send(self, command: Optional[str] = None) -> str:
+        """Run a command on the open session and return its output.
+
+        Args:
+            command (Optional[str]): Command to execute. Defaults to
+                                   'show running-config'.
+
+        Raises:
+            ValueError: If the command returns no output
+            Exception: For command execution errors
+        """
+        if command is None:
+            command = COMMAND_SHOW_RUN
+        if self.connection is None:
+            raise RuntimeError(f"Session to {self._device_name} is not open")
+        job_id = self.job_id
+        device_name = self._device_name
+        # The session setup is attributed to the first command in cassettes
+        connect_seconds = self.connect_elapsed if self._commands_sent == 0 else 0.0
+        self._commands_sent += 1
+        start_time = time.time()
+        try:
+            self._log(f"[Job: {job_id}] Executing '{command}' on {device_name}")
+
+            # Send command and wait for output
+            with timings.stage("command"):
+                output = self.connection.send_command(
+                    command,
+                    read_timeout=self.command_timeout
+                )
+            if output:
+                timings.add_count("bytes_received", len(output))
+
+            # Validate output
+            if output is None:
+                self._log(f"[Job: {job_id}] No output received for command '{command}' from {device_name} ({self._device_ip})", level="ERROR")
+                raise ValueError(f"Received no output for command '{command}' from {self._device_ip}")
+
+            elapsed = time.time() - start_time
+            if self._record:
+                cassette.record_interaction(self.device, command, output, connect_seconds, elapsed, self.config)
+            self._log(f"[Job: {job_id}] Successfully executed command '{command}' on {device_name} in {elapsed:.2f}s")
+            return output
+
+        except Exception as e:
+            elapsed = time.time() - start_time
+            if self._record:
+                cassette.record_interaction(self.device, command, None, connect_seconds, elapsed, self.config, error=e)
+            self._log(f"[Job: {job_id}] Error running command '{command}' on {device_name} after {elapsed:.2f}s: {e}", level="ERROR")
+            raise
+
+    def close(self) -> None:
+        """Disconnect the session (safe to call more than once)."""
+        connection, self.connection = self.connection, None
+        if connection is None:
+            return
+        try:
+            connection.disconnect()
+            self._log(f"[Job: {self.job_id}] Disconnected from {self._device_name}", level="DEBUG")
+        except Exception as e:
+            self._log(f"[Job: {self.job_id}] Error during disconnect from {self._device_name}: {e}", level="WARNING")
+
+    def __enter__(self) -> "NetmikoSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+@tracing.traced("driver.netmiko.open_session")
+def open_session(
+    device: Any,
+    job_id: Optional[int] = None,
+    config: Optional[Dict] = None
+) -> NetmikoSession:
+    """Open an authenticated session to a device for running several commands.
+
+    Example:
+        >>> with open_session(device, job_id, config) as session:
+        ...     version = session.send("show version")
+        ...     running = session.send()
+
+    Args:
+        device (Any): Device object (see :func:`run_command`)
+        job_id (Optional[int]): Job ID for correlation in logs
+        config (Optional[Dict]): Configuration dictionary (timeouts, ssh options)
+
+    Returns:
+        NetmikoSession: The open session; disconnected when the ``with`` block exits
+    """
+    return NetmikoSession(device, job_id=job_id, config=config).open()
+
+
+@tracing.traced("driver.netmiko.run_command")
 def run_command(
     device: Any, 
     job_id: Optional[int] = None,
@@ -50,7 +347,7 @@ def run_command(
     the command output. It handles connection establishment, command execution,
     error handling, and clean disconnection.
     
-    The function follows a structured workflow:
+    The function is a single-command :class:`NetmikoSession`:
     1. Prepares connection parameters from device attributes
     2. Establishes SSH connection with appropriate timeout
     3. Executes the requested command with configurable timeout
@@ -58,6 +355,9 @@ def run_command(
     5. Cleans up the connection in all cases (success or failure)
     6. Returns the command output or raises appropriate exceptions
     
+    Jobs that need more than one command from a device should use
+    :func:`open_session` instead, to avoid a new handshake per command.
+    
     All errors are captured and translated into specific exception types
     that allow higher-level components to implement appropriate retry logic.
     
@@ -100,205 +400,49 @@ def run_command(
         source="netmiko_driver",
         log_type="job"
     )
-    device_id = getattr(device, 'id', None)
-    device_name = getattr(device, 'hostname', f"Device_{device_id}")
-    device_ip = getattr(device, 'ip_address', 'Unknown')
-    device_username = getattr(device, 'username', 'Unknown')
-    
     # Set default command if none provided
     if command is None:
         command = COMMAND_SHOW_RUN
-    
-    # Get timeout values from config or use defaults
-    conn_timeout = DEFAULT_CONN_TIMEOUT
-    command_timeout = DEFAULT_COMMAND_TIMEOUT
-    
-    if config and 'worker' in config:
-        if 'connection_timeout' in config['worker']:
-            conn_timeout = config['worker']['connection_timeout']
-        if 'command_timeout' in config['worker']:
-            command_timeout = config['worker']['command_timeout']
-    
-    comm_msg = f"Connecting to device {device_name} ({device_ip}), username: {device_username}, with {conn_timeout}s timeout"
-    logger.log(
-        comm_msg,
-        level="INFO",
-        destinations=["stdout", "file", "db"],
-        job_id=job_id,
-        device_id=device_id,
-        source="netmiko_driver",
-        log_type="job"
-    )    
 
-    # --- DEBUG: Log credential info before connection ---
-    # WARNING: This log is for debugging only. Remove after troubleshooting!
-    #debug_password = get_device_password(device)
-    logger.log(
-        f"[INFO] Connect to device '{device_name}, with username='{device_username}', for ' (job_id={job_id})",
-        level="INFO",
-        destinations=["stdout", "file", "db"],
-        job_id=job_id,
-        device_id=device_id,
-        source="netmiko_driver",
-        log_type="job"
-    )
+    session = NetmikoSession(device, job_id=job_id, config=config)
+    try:
+        session.open()
+    except Exception as e:
+        if session._record:
+            cassette.record_interaction(device, command, None, session.connect_elapsed, 0.0, config, error=e)
+        raise
+    with session:
+        return session.send(command)
 
-    # Legacy SSH KEX/MAC patching (global for all SSH jobs)
-    allow_legacy = False
-    kex_list = None
-    mac_list = None
-    if config and isinstance(config, dict):
-        allow_legacy = (
-            config.get('allow_legacy_ssh_kex') or
-            (config.get('ssh', {}).get('allow_legacy_kex') if isinstance(config.get('ssh'), dict) else False)
-        )
-        if allow_legacy:
-            ssh_cfg = config.get('ssh', {}) if isinstance(config.get('ssh'), dict) else {}
-            kex_list = ssh_cfg.get('legacy_kex')
-            mac_list = ssh_cfg.get('legacy_macs')
-    if allow_legacy:
-        enable_legacy_kex(kex_list=kex_list, mac_list=mac_list, logger=logger, job_id=job_id, device_id=device_id)
-        logger.log(
-            f"Legacy SSH security algorithms have been enabled! See NetRaven docs for details.",
-            level="WARNING",
-            destinations=["stdout", "db", "file"],
-            job_id=job_id,
-            device_id=device_id,
-            source="netmiko_driver",
-            log_type="job"
-        )
+@tracing.traced("driver.netmiko.run_commands")
+def run_commands(
+    device: Any,
+    commands: List[str],
+    config: Optional[Dict] = None,
+    job_id: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Run several commands on a device over a single Netmiko session.
 
-    # Build connection details
-    connection_details = {
-        "device_type": device.device_type,
-        "host": device.ip_address,
-        "username": device.username,
-        "password": get_device_password(device),
-        "timeout": conn_timeout,
-        # Add other potential Netmiko arguments as needed
-        "session_log": None  # We handle logging separately
-    }
-
-    connection = None
-    start_time = time.time()
-    
-    try:
-        # Attempt to establish connection
-        logger.log(
-            f"[Job: {job_id}] Opening connection to {device_name}",
-            level="INFO",
-            destinations=["stdout", "db", "file"],
-            job_id=job_id,
-            device_id=device_id,
-            source="netmiko_driver",
-            log_type="job"
-        )
-        connection = ConnectHandler(**connection_details)
+    Netmiko disables paging once during session preparation, so every command
+    after the login runs unpaged on the same connection.
 
-        if not connection.check_enable_mode():
-            logger.log(f"[Job: {job_id}] Netmiko setting exec mode {device_name}",level="INFO",destinations=["stdout", "db", "file"],job_id=job_id,device_id=device_id,source="netmiko_driver",log_type="job")
-            try:
-                connection.enable()
-            except ValueError as err:
-                logger.log(f"[ERROR] Failed to set enable mode for {device_name} '{err}'",level="ERROR",destinations=["stdout", "db", "file"],job_id=job_id,device_id=device_id,source="netmiko_driver",log_type="job")
-        
-        
-        # Execute command with timeout
-        logger.log(
-            f"[Job: {job_id}] Executing '{command}' on {device_name}",
-            level="INFO",
-            destinations=["stdout", "db", "file"],
-            job_id=job_id,
-            device_id=device_id,
-            source="netmiko_driver",
-            log_type="job"
-        )
+    Args:
+        device (Any): Device object (see :func:`run_command`)
+        commands (List[str]): Commands to run, in order
+        config (Optional[Dict]): Configuration dictionary (timeouts, ssh options)
+        job_id (Optional[int]): Job ID for correlation in logs
 
-        # Send command and wait for output
-        output = connection.send_command(
-            command, 
-            read_timeout=command_timeout
-        )
-        
-        # Validate output
-        if output is None:
-            logger.log(
-                f"[Job: {job_id}] No output received for command '{command}' from {device_name} ({device_ip})",
-                level="ERROR",
-                destinations=["stdout", "db", "file"],
-                job_id=job_id,
-                device_id=device_id,
-                source="netmiko_driver",
-                log_type="job"
-            )
-            raise ValueError(f"Received no output for command '{command}' from {device_ip}")
-        
-        # Log success
-        elapsed = time.time() - start_time
-        logger.log(
-            f"[Job: {job_id}] Successfully executed command '{command}' on {device_name} in {elapsed:.2f}s",
-            level="INFO",
-            destinations=["stdout", "db", "file"],
-            job_id=job_id,
-            device_id=device_id,
-            source="netmiko_driver",
-            log_type="job"
-        )
-        
-        return output
-        
-    except (NetmikoTimeoutException, NetmikoAuthenticationException) as e:
-        # These specific exceptions are caught and handled upstream
-        elapsed = time.time() - start_time
-        logger.log(
-            f"[Job: {job_id}] {type(e).__name__} connecting to {device_name} after {elapsed:.2f}s: {e}",
-            level="WARNING",
-            destinations=["stdout", "db", "file"],
-            job_id=job_id,
-            device_id=device_id,
-            source="netmiko_driver",
-            log_type="job"
-        )
-        raise
-        
-    except Exception as e:
-        # Catch broader exceptions during connection or command execution
-        elapsed = time.time() - start_time
-        logger.log(
-            f"[Job: {job_id}] Error connecting to {device_name} or running command '{command}' after {elapsed:.2f}s: {e}",
-            level="ERROR",
-            destinations=["stdout", "db", "file"],
-            job_id=job_id,
-            device_id=device_id,
-            source="netmiko_driver",
-            log_type="job"
-        )
-        raise
-        
-    finally:
-        # Always disconnect cleanly
-        if connection:
-            try:
-                connection.disconnect()
-                logger.log(
-                    f"[Job: {job_id}] Disconnected from {device_name}",
-                    level="DEBUG",
-                    destinations=["stdout", "db", "file"],
-                    job_id=job_id,
-                    device_id=device_id,
-                    source="netmiko_driver",
-                    log_type="job"
-                )
-            except Exception as e:
-                logger.log(
-                    f"[Job: {job_id}] Error during disconnect from {device_name}: {e}",
-                    level="WARNING",
-                    destinations=["stdout", "db", "file"],
-                    job_id=job_id,
-                    device_id=device_id,
-                    source="netmiko_driver",
-                    log_type="job"
-                )
+    Returns:
+        Dict[str, Dict[str, Any]]: Ordered ``{command: {"output", "error", "elapsed"}}``
+        (see :func:`netraven.worker.backends.run_session_commands`)
+
+    Raises:
+        NetmikoTimeoutException: If the connection times out
+        NetmikoAuthenticationException: If authentication fails
+        Exception: For other connection errors (command errors are returned per command)
+    """
+    with open_session(device, job_id=job_id, config=config) as session:
+        return run_session_commands(session, commands)
 
 # Example Usage (requires a mock device object)
 # class MockDevice:
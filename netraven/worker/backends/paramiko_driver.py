@@ -15,6 +15,9 @@ Key features:
 - Connection lifecycle management with proper cleanup
 - Support for both password and key-based authentication
 - Configurable buffer sizes and read timeouts
+- Prompt-driven reads that return as soon as the device prompt appears
+- Multi-command sessions (open_session, run_commands) with paging disabled once
+- Per-device transport profiles: the SSH algorithms negotiated last time are offered first
 
 This module is particularly useful for devices with non-standard SSH implementations
 or when specific SSH channel parameters need to be customized beyond what Netmiko offers.
@@ -24,7 +27,20 @@ import time
 import socket
 import logging
 import paramiko
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List, Tuple
+
+from netraven.worker.backends import connect_socket, run_session_commands
+from netraven.worker.backends.prompt_reader import PromptReader
+from netraven.worker.backends.ssh_compat import (
+    apply_transport_preferences,
+    get_legacy_algorithms,
+    is_negotiation_failure,
+    negotiated_profile,
+    transport_preferences,
+)
+from netraven.worker.device_capabilities import get_command
+from netraven.worker import timings, transport_profiles
+from netraven.utils import tracing
 
 log = logging.getLogger(__name__)
 
@@ -33,6 +49,245 @@ DEFAULT_CONN_TIMEOUT = 60  # seconds
 DEFAULT_COMMAND_TIMEOUT = 120  # seconds
 DEFAULT_BUFFER_SIZE = 65535
 
+# Define standard command to run
+COMMAND_SHOW_RUN = "show running-config"
+
+
+def _get_settings(config: Optional[Dict]) -> Tuple[Any, Any, int]:
+    """Return (connection_timeout, command_timeout, buffer_size) from config or the defaults."""
+    conn_timeout = DEFAULT_CONN_TIMEOUT
+    command_timeout = DEFAULT_COMMAND_TIMEOUT
+    buffer_size = DEFAULT_BUFFER_SIZE
+    if config and 'worker' in config:
+        if 'connection_timeout' in config['worker']:
+            conn_timeout = config['worker']['connection_timeout']
+        if 'command_timeout' in config['worker']:
+            command_timeout = config['worker']['command_timeout']
+        if 'buffer_size' in config['worker']:
+            buffer_size = int(config['worker']['buffer_size'])
+    return conn_timeout, command_timeout, buffer_size
+
+
+class ParamikoSession:
+    """An interactive Paramiko shell that can run several commands.
+
+    :meth:`open` connects, authenticates and opens the shell channel. With
+    ``disable_paging`` it then sends the device type's paging command once
+    (``enable_paging`` in ``device_capabilities``), so output from later
+    commands is not interrupted by ``--More--`` prompts. Each :meth:`send`
+    writes one command and reads with a :class:`PromptReader` until the
+    device type's prompt returns (pager prompts that still appear are
+    answered by the reader).
+    """
+
+    def __init__(
+        self,
+        device: Any,
+        job_id: Optional[int] = None,
+        config: Optional[Dict] = None,
+        disable_paging: bool = True
+    ):
+        self.device = device
+        self.job_id = job_id
+        self.config = config
+        self.disable_paging = disable_paging
+        self.conn_timeout, self.command_timeout, self.buffer_size = _get_settings(config)
+        self.transport = None
+        self.channel = None
+        self._reader = None
+        self._sock = None
+        self._device_id = getattr(device, 'id', 0)
+        self._device_name = getattr(device, 'hostname', f"Device_{self._device_id}")
+        self._device_ip = getattr(device, 'ip_address', 'Unknown')
+
+    def open(self) -> "ParamikoSession":
+        """Connect, authenticate, open the shell and (optionally) disable paging.
+
+        Raises:
+            paramiko.AuthenticationException: If authentication fails
+            paramiko.SSHException: For SSH protocol errors
+            socket.timeout / socket.error: For network errors and timeouts
+        """
+        job_id = self.job_id
+        device = self.device
+        log.info(f"[Job: {job_id}] Connecting to device {self._device_name} ({self._device_ip}) with {self.conn_timeout}s timeout using Paramiko")
+
+        profile = transport_profiles.get_profile(self._device_id)
+        legacy = get_legacy_algorithms(self.config)
+        if legacy:
+            log.debug(f"[Job: {job_id}] Offering legacy SSH algorithms to {self._device_name} (ssh.allow_legacy_kex)")
+        full_offer = transport_preferences(legacy=legacy)
+        preferences = transport_preferences(profile, legacy)
+        start_time = time.time()
+        try:
+            try:
+                self._connect(preferences)
+            except paramiko.SSHException as e:
+                if preferences == full_offer or not is_negotiation_failure(e):
+                    raise
+                log.warning(f"[Job: {job_id}] {self._device_name} rejected its stored SSH transport profile ({e}), retrying with all algorithms")
+                transport_profiles.discard_profile(self._device_id)
+                self.close()
+                self._connect(full_offer)
+            negotiated = negotiated_profile(self.transport)
+            # This driver never enters enable mode; keep what the Netmiko driver learned
+            negotiated["enable_required"] = (profile or {}).get("enable_required")
+            transport_profiles.record_profile(self._device_id, negotiated)
+
+            log.debug(f"[Job: {job_id}] Connected to {self._device_name}, opening channel")
+            self.channel = self.transport.open_session(timeout=self.conn_timeout)
+            self.channel.get_pty()
+            self.channel.invoke_shell()
+            self._reader = PromptReader(
+                self.channel, getattr(device, 'device_type', None), self.command_timeout, self.buffer_size
+            )
+
+            if self.disable_paging:
+                paging_command = get_command(getattr(device, 'device_type', None) or "default", "enable_paging")
+                with timings.stage("paging"):
+                    self._send_and_read(paging_command)
+            return self
+
+        except paramiko.AuthenticationException as e:
+            log.warning(f"[Job: {job_id}] Authentication failed for {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            self.close()
+            raise
+
+        except (socket.timeout, socket.error, paramiko.SSHException) as e:
+            log.warning(f"[Job: {job_id}] {type(e).__name__} connecting to {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            self.close()
+            raise
+
+        except Exception as e:
+            log.error(f"[Job: {job_id}] Error connecting to {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            self.close()
+            raise
+
+    def _connect(self, preferences: Optional[Dict[str, Tuple[str, ...]]]) -> None:
+        """Open the TCP connection, then run the SSH handshake and login over it.
+
+        The transport is driven directly rather than through
+        ``SSHClient.connect`` so that the key exchange and the login are
+        timed as separate stages. Host keys are accepted as they come, as
+        ``AutoAddPolicy`` did. ``preferences`` (see
+        :func:`~netraven.worker.backends.ssh_compat.transport_preferences`)
+        is the algorithm offer set on this transport only.
+        """
+        device = self.device
+        # Open the TCP connection first so it is timed separately from SSH setup
+        port = getattr(device, 'port', None) or 22
+        with timings.stage("tcp_connect"):
+            self._sock = connect_socket(device.ip_address, port, self.conn_timeout, bastion=getattr(device, 'bastion', None))
+
+        self.transport = apply_transport_preferences(paramiko.Transport(self._sock), preferences)
+        with timings.stage("ssh_handshake"):
+            self.transport.start_client(timeout=self.conn_timeout)
+        with timings.stage("auth"):
+            self.transport.auth_password(device.username, device.password)
+
+    def _send_and_read(self, command: str, sink=None) -> Optional[str]:
+        """Send a command line and collect output until the prompt returns."""
+        self.channel.send(command + '\n')
+        return self._reader.read_until_prompt(echo=command, sink=sink)
+
+    def send(self, command: Optional[str] = None) -> str:
+        """Run a command on the open shell and return its raw output.
+
+        Args:
+            command (Optional[str]): Command to execute. Defaults to
+                                   "show running-config".
+
+        Raises:
+            socket.timeout: If the prompt does not return within the command timeout
+            ValueError: If the command returns no output
+        """
+        return self._run(command)
+
+    def send_to(self, sink, command: Optional[str] = None) -> None:
+        """Run a command and stream its raw output into ``sink`` as it arrives.
+
+        Args:
+            sink: :class:`~netraven.worker.config_stream.StreamingConfigBuffer`
+                receiving the output chunks, so it is never held as one string
+            command (Optional[str]): Command to execute. Defaults to
+                                   "show running-config".
+        """
+        self._run(command, sink)
+
+    def _run(self, command: Optional[str], sink=None) -> Optional[str]:
+        if command is None:
+            command = COMMAND_SHOW_RUN
+        if self.channel is None:
+            raise RuntimeError(f"Session to {self._device_name} is not open")
+        job_id = self.job_id
+        start_time = time.time()
+        try:
+            log.debug(f"[Job: {job_id}] Executing '{command}' on {self._device_name}")
+            received_before = sink.raw_size if sink is not None else 0
+            with timings.stage("command"):
+                output = self._send_and_read(command, sink)
+            received = len(output) if sink is None else sink.raw_size - received_before
+            timings.add_count("bytes_received", received)
+
+            # Validate output
+            empty = received == 0 if sink is not None else not output.strip()
+            if empty:
+                raise ValueError(f"Received no output for command '{command}' from {self._device_ip}")
+
+            log.info(f"[Job: {job_id}] Successfully executed command on {self._device_name} in {time.time() - start_time:.2f}s")
+            return output
+
+        except (socket.timeout, socket.error, paramiko.SSHException) as e:
+            log.warning(f"[Job: {job_id}] {type(e).__name__} running '{command}' on {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            raise
+
+        except Exception as e:
+            log.error(f"[Job: {job_id}] Error running command '{command}' on {self._device_name} after {time.time() - start_time:.2f}s: {e}")
+            raise
+
+    def close(self) -> None:
+        """Close the shell, transport and socket (safe to call more than once)."""
+        transport, sock = self.transport, self._sock
+        self.transport = self.channel = self._sock = None
+        if transport is None:
+            return
+        # Always clean up SSH resources
+        try:
+            transport.close()
+            if sock is not None:
+                # Paramiko doesn't close a caller-supplied socket if setup failed
+                sock.close()
+            log.debug(f"[Job: {self.job_id}] Closed connection to {self._device_name}")
+        except Exception as e:
+            log.warning(f"[Job: {self.job_id}] Error during connection cleanup for {self._device_name}: {e}")
+
+    def __enter__(self) -> "ParamikoSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+@tracing.traced("driver.paramiko.open_session")
+def open_session(
+    device: Any,
+    job_id: Optional[int] = None,
+    config: Optional[Dict] = None
+) -> ParamikoSession:
+    """Open a Paramiko shell session with paging disabled, for several commands.
+
+    Args:
+        device (Any): Device object (see :func:`run_command`)
+        job_id (Optional[int]): Job ID for correlation in logs
+        config (Optional[Dict]): Configuration dictionary (timeouts, buffer size)
+
+    Returns:
+        ParamikoSession: The open session; closed when the ``with`` block exits
+    """
+    return ParamikoSession(device, job_id=job_id, config=config).open()
+
+
+@tracing.traced("driver.paramiko.run_command")
 def run_command(
     device: Any, 
     job_id: Optional[int] = None,
@@ -54,6 +309,10 @@ def run_command(
     6. Ensures proper cleanup of SSH resources in all scenarios
     7. Returns the command output or raises appropriate exceptions
     
+    Unlike :func:`open_session` and :func:`run_commands`, the single-command
+    path does not send a paging command first; pager prompts in the output
+    are answered as they appear.
+    
     All SSH-related errors are captured and translated into specific exception types
     that facilitate appropriate error handling and retry logic at higher levels.
     
@@ -70,7 +329,7 @@ def run_command(
         config (Optional[Dict]): Configuration dictionary with options:
                                - worker.connection_timeout: SSH connection timeout (seconds)
                                - worker.command_timeout: Command execution timeout (seconds)
-                               - worker.buffer_size: Size of buffer for reading output
+                               - worker.buffer_size: Maximum bytes per channel read
 
     Returns:
         str: The command output text from the network device.
@@ -88,103 +347,34 @@ def run_command(
         compared to the Netmiko driver, which can be beneficial for devices
         with non-standard SSH implementations or when special handling is required.
     """
-    # Extract device information for logging
-    device_id = getattr(device, 'id', 0)
-    device_name = getattr(device, 'hostname', f"Device_{device_id}")
-    device_ip = getattr(device, 'ip_address', 'Unknown')
-
-    # Set default command if none provided
-    if command is None:
-        command = "show running-config"
-    
-    # Get timeout values from config or use defaults
-    conn_timeout = DEFAULT_CONN_TIMEOUT
-    command_timeout = DEFAULT_COMMAND_TIMEOUT
-    buffer_size = DEFAULT_BUFFER_SIZE
-    
-    if config and 'worker' in config:
-        if 'connection_timeout' in config['worker']:
-            conn_timeout = config['worker']['connection_timeout']
-        if 'command_timeout' in config['worker']:
-            command_timeout = config['worker']['command_timeout']
-        if 'buffer_size' in config['worker']:
-            buffer_size = config['worker']['buffer_size']
-    
-    log.info(f"[Job: {job_id}] Connecting to device {device_name} ({device_ip}) with {conn_timeout}s timeout using Paramiko")
-    
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    start_time = time.time()
-    
-    try:
-        # Establish SSH connection
-        client.connect(
-            hostname=device.ip_address,
-            username=device.username,
-            password=device.password,
-            timeout=conn_timeout,
-            allow_agent=False,
-            look_for_keys=False
-        )
-        
-        log.debug(f"[Job: {job_id}] Connected to {device_name}, opening channel")
-        
-        # Open SSH channel and execute command
-        channel = client.invoke_shell()
-        channel.settimeout(command_timeout)
-        
-        log.debug(f"[Job: {job_id}] Executing '{command}' on {device_name}")
-        channel.send(command + '\n')
-        
-        # Collect output with timeout control
-        output = ""
-        while True:
-            # Check if data is available within timeout
-            if channel.recv_ready():
-                chunk = channel.recv(buffer_size).decode('utf-8', errors='replace')
-                output += chunk
-                
-                # Check for command completion indicators
-                if output.strip().endswith('#') or output.strip().endswith('>'):
-                    break
-            else:
-                # Wait briefly before checking again
-                time.sleep(0.1)
-                
-                # Check for timeout
-                elapsed = time.time() - start_time
-                if elapsed > command_timeout:
-                    raise socket.timeout(f"Command execution timed out after {elapsed:.2f}s")
-        
-        # Validate output
-        if not output.strip():
-            raise ValueError(f"Received no output for command '{command}' from {device_ip}")
-        
-        # Log success
-        elapsed = time.time() - start_time
-        log.info(f"[Job: {job_id}] Successfully executed command on {device_name} in {elapsed:.2f}s")
-        
-        return output
-        
-    except paramiko.AuthenticationException as e:
-        elapsed = time.time() - start_time
-        log.warning(f"[Job: {job_id}] Authentication failed for {device_name} after {elapsed:.2f}s: {e}")
-        raise
-        
-    except (socket.timeout, socket.error, paramiko.SSHException) as e:
-        elapsed = time.time() - start_time
-        log.warning(f"[Job: {job_id}] {type(e).__name__} connecting to {device_name} after {elapsed:.2f}s: {e}")
-        raise
-        
-    except Exception as e:
-        elapsed = time.time() - start_time
-        log.error(f"[Job: {job_id}] Error connecting to {device_name} or running command '{command}' after {elapsed:.2f}s: {e}")
-        raise
-        
-    finally:
-        # Always clean up SSH resources
-        try:
-            client.close()
-            log.debug(f"[Job: {job_id}] Closed connection to {device_name}")
-        except Exception as e:
-            log.warning(f"[Job: {job_id}] Error during connection cleanup for {device_name}: {e}") 
\ No newline at end of file
+    with ParamikoSession(device, job_id=job_id, config=config, disable_paging=False).open() as session:
+        return session.send(command)
+
+
+@tracing.traced("driver.paramiko.run_commands")
+def run_commands(
+    device: Any,
+    commands: List[str],
+    config: Optional[Dict] = None,
+    job_id: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Run several commands on a device over a single Paramiko shell.
+
+    Paging is disabled once when the session opens.
+
+    Args:
+        device (Any): Device object (see :func:`run_command`)
+        commands (List[str]): Commands to run, in order
+        config (Optional[Dict]): Configuration dictionary (timeouts, buffer size)
+        job_id (Optional[int]): Job ID for correlation in logs
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Ordered ``{command: {"output", "error", "elapsed"}}``
+        (see :func:`netraven.worker.backends.run_session_commands`)
+
+    Raises:
+        paramiko.AuthenticationException: If authentication fails
+        socket.timeout / socket.error / paramiko.SSHException: If the session can't be opened
+    """
+    with open_session(device, job_id=job_id, config=config) as session:
+        return run_session_commands(session, commands)
@@ -0,0 +1,130 @@
+"""Prompt-driven reading of interactive SSH shell output.
+
+:class:`PromptReader` reads a shell channel until the device prompt returns,
+instead of polling and waiting for a timeout to decide the output is
+complete. Each ``recv`` blocks until data arrives (bounded by the command
+timeout), so the read returns as soon as the prompt is seen.
+
+- Prompts are matched with a compiled pattern per device type against the
+  last line of output only, and only after the command echo has been seen,
+  so a prompt still buffered from an earlier read doesn't end the read early.
+- ``--More--`` style pager prompts are answered with a space, and the pager
+  text plus the device's erase sequence are removed from the result.
+- Chunks are collected as bytes in a list and decoded once at the end, so
+  large outputs are not rebuilt with every chunk, and multi-byte characters
+  split across chunks decode correctly. With a ``sink`` (a
+  :class:`~netraven.worker.config_stream.StreamingConfigBuffer`) each chunk
+  is written to it instead and nothing is kept.
+"""
+
+import re
+import socket
+import time
+from typing import Dict, List, Optional, Pattern
+
+# Prompt on the last line of output, matched against the stripped line
+DEFAULT_PROMPT_PATTERN = re.compile(rb"[\w.\-/:()@\[\]~]+[>#]")
+PROMPT_PATTERNS: Dict[str, Pattern] = {
+    # user@host> (operational) / user@host# (configuration)
+    "juniper_junos": re.compile(rb"[\w.\-]+@[\w.\-]+[>#%]"),
+    "juniper": re.compile(rb"[\w.\-]+@[\w.\-]+[>#%]"),
+    "paloalto_panos": re.compile(rb"[\w.\-]+@[\w.\-()]+[>#]"),
+}
+
+# Pager prompts: Cisco/Arista " --More-- ", Junos "---(more 42%)---", others
+PAGER_PATTERN = re.compile(rb"--\s?More\s?--|---\(more(?: \d+%)?\)---|<--- More --->|Press any key to continue", re.IGNORECASE)
+# Pager prompt plus the backspace/space/backspace sequence devices send to erase it
+PAGER_CLEANUP_PATTERN = re.compile(rb" ?(?:" + PAGER_PATTERN.pattern + rb") ?(?:\x08+ *\x08*)?", re.IGNORECASE)
+
+# Bytes kept from earlier chunks when looking for the echo, prompt or pager
+TAIL_BYTES = 512
+
+
+def get_prompt_pattern(device_type: Optional[str]) -> Pattern:
+    """Compiled prompt pattern for a device type (the default covers Cisco, Arista and similar)."""
+    return PROMPT_PATTERNS.get(device_type or "default", DEFAULT_PROMPT_PATTERN)
+
+
+class PromptReader:
+    """Reads a Paramiko shell channel until the device prompt returns.
+
+    Args:
+        channel: Interactive shell channel (``Channel.invoke_shell``)
+        device_type: Netmiko-style device type, selects the prompt pattern
+        timeout: Seconds allowed for one command's output
+        chunk_size: Maximum bytes per ``recv``
+    """
+
+    def __init__(self, channel, device_type: Optional[str], timeout: float, chunk_size: int = 65535):
+        self.channel = channel
+        self.prompt_pattern = get_prompt_pattern(device_type)
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.pages = 0
+
+    def at_prompt(self, tail: bytes) -> bool:
+        """Whether the output so far ends with the device prompt."""
+        last_line = tail.rsplit(b"\n", 1)[-1].strip()
+        return bool(last_line) and self.prompt_pattern.fullmatch(last_line) is not None
+
+    def read_until_prompt(self, echo: Optional[str] = None, sink=None) -> Optional[str]:
+        """Collect output until the prompt returns after the command echo.
+
+        Args:
+            echo: The command just sent; the prompt only counts once it has been echoed
+            sink: Buffer to stream the raw chunks into (``write_bytes``); it is
+                told to remove pager prompts if any were answered
+
+        Returns:
+            The raw output (echo and prompt included) with pager prompts
+            removed, or None when streaming into ``sink``
+
+        Raises:
+            socket.timeout: If the prompt does not return within the timeout
+            ConnectionError: If the device closes the channel
+        """
+        echo_bytes = echo.encode() if echo else None
+        echo_seen = echo_bytes is None
+        chunks: List[bytes] = []
+        tail = b""
+        start_time = time.monotonic()
+        deadline = start_time + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout(f"Command execution timed out after {time.monotonic() - start_time:.2f}s")
+            self.channel.settimeout(remaining)
+            try:
+                chunk = self.channel.recv(self.chunk_size)
+            except socket.timeout:
+                raise socket.timeout(f"Command execution timed out after {time.monotonic() - start_time:.2f}s") from None
+            if not chunk:
+                raise ConnectionError("Channel closed by the device before the prompt returned")
+            if sink is not None:
+                sink.write_bytes(chunk)
+            else:
+                chunks.append(chunk)
+            window = tail + chunk
+            tail = window[-TAIL_BYTES:]
+
+            if not echo_seen:
+                echo_seen = echo_bytes in window
+                if not echo_seen:
+                    continue
+            if PAGER_PATTERN.search(tail.rsplit(b"\n", 1)[-1]):
+                self.pages += 1
+                self.channel.send(" ")
+                # Don't match the same pager prompt again once the next page arrives
+                tail = b""
+                continue
+            if self.at_prompt(tail):
+                break
+
+        if sink is not None:
+            if self.pages:
+                sink.strip_pager_prompts()
+            return None
+        output = b"".join(chunks)
+        if self.pages:
+            output = PAGER_CLEANUP_PATTERN.sub(b"", output)
+        return output.decode("utf-8", errors="replace")
@@ -0,0 +1,138 @@
+"""Replay backend driver: serves recorded cassettes instead of real devices.
+
+Selecting ``worker.driver: replay`` makes every ``run_command`` call answer
+from the cassettes in ``worker.replay.path`` (see
+:mod:`netraven.worker.backends.cassette`). This reproduces parsing,
+redaction and storage behaviour against real-world configs and vendor
+quirks without network access.
+
+Settings (``worker.replay``):
+
+- path: Cassette directory (defaults to ``worker.cassette.path``)
+- speed: ``1.0`` replays at recorded speed, ``2.0`` twice as fast, and
+  ``0`` as fast as possible
+- strict: When true, devices without their own cassette fail with a
+  ``ConnectionException``; otherwise they are mapped deterministically onto
+  the recorded devices so one capture can drive a fleet of any size
+
+Recorded failures are replayed as the same exception types, so retry and
+circuit breaker behaviour matches the original session.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from netmiko.exceptions import (
+    NetmikoTimeoutException,
+    NetmikoAuthenticationException,
+    ConnectionException,
+)
+from netraven.worker.backends import cassette
+from netraven.utils import tracing
+
+# Define standard command to run (matches the netmiko driver default)
+COMMAND_SHOW_RUN = "show running-config"
+
+REPLAYED_EXCEPTIONS = {
+    "NetmikoTimeoutException": NetmikoTimeoutException,
+    "NetmikoAuthenticationException": NetmikoAuthenticationException,
+    "ConnectionException": ConnectionException,
+    "ValueError": ValueError,
+}
+
+# Loaded cassettes per directory, and per-(hostname, command) positions so
+# repeated calls cycle through every recorded interaction in order.
+_cassettes: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+_positions: Dict[Tuple[str, str], int] = {}
+_lock = threading.Lock()
+
+
+def get_replay_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    """Return the ``worker.replay`` config section with defaults applied."""
+    settings = {"path": cassette.get_cassette_settings(config)["path"], "speed": 1.0, "strict": False}
+    if config and isinstance(config.get("worker"), dict):
+        replay_cfg = config["worker"].get("replay")
+        if isinstance(replay_cfg, dict):
+            settings.update({k: v for k, v in replay_cfg.items() if v is not None})
+    settings["speed"] = float(settings["speed"])
+    if isinstance(settings["strict"], str):
+        settings["strict"] = settings["strict"].strip().lower() in ("1", "true", "yes", "on")
+    return settings
+
+
+def _load(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    with _lock:
+        if path not in _cassettes:
+            _cassettes[path] = cassette.load_cassette_dir(path)
+        return _cassettes[path]
+
+
+def reset_replay_state() -> None:
+    """Drop loaded cassettes and replay positions (e.g. after re-recording)."""
+    with _lock:
+        _cassettes.clear()
+        _positions.clear()
+
+
+def _select_recording(device: Any, cassettes: Dict[str, List[Dict[str, Any]]], strict: bool) -> str:
+    hostname = getattr(device, "hostname", None)
+    if hostname in cassettes:
+        return hostname
+    if strict or not cassettes:
+        raise ConnectionException(f"No cassette recorded for device {hostname}")
+    recorded = sorted(cassettes)
+    key = getattr(device, "id", None) or sum(map(ord, hostname or ""))
+    return recorded[key % len(recorded)]
+
+
+def _next_interaction(recorded_host: str, interactions: List[Dict[str, Any]], command: str) -> Dict[str, Any]:
+    matches = [i for i in interactions if i.get("command") == command]
+    if not matches:
+        raise ValueError(f"No recorded output for command '{command}' on {recorded_host}")
+    with _lock:
+        position = _positions.get((recorded_host, command), 0)
+        _positions[(recorded_host, command)] = position + 1
+    return matches[position % len(matches)]
+
+
+@tracing.traced("driver.replay.run_command")
+def run_command(
+    device: Any,
+    job_id: Optional[int] = None,
+    command: Optional[str] = None,
+    config: Optional[Dict] = None
+) -> str:
+    """Replay a recorded interaction for the device and command.
+
+    Args:
+        device (Any): Device object (hostname and id select the recording)
+        job_id (Optional[int]): Job ID for correlation in logs
+        command (Optional[str]): Command to replay. If not specified,
+                               'show running-config' is used as the default.
+        config (Optional[Dict]): Configuration dictionary; ``worker.replay``
+                               selects the cassette directory and speed
+
+    Returns:
+        str: The recorded (redacted) command output
+
+    Raises:
+        ConnectionException: If no cassette matches the device in strict mode
+        ValueError: If the command was never recorded for the device
+        Exception: The recorded exception type, if the original call failed
+    """
+    settings = get_replay_settings(config)
+    if command is None:
+        command = COMMAND_SHOW_RUN
+
+    cassettes = _load(settings["path"])
+    recorded_host = _select_recording(device, cassettes, settings["strict"])
+    interaction = _next_interaction(recorded_host, cassettes[recorded_host], command)
+
+    if settings["speed"] > 0:
+        time.sleep((interaction.get("connect_seconds", 0) + interaction.get("command_seconds", 0)) / settings["speed"])
+
+    if interaction.get("error_type"):
+        exc_class = REPLAYED_EXCEPTIONS.get(interaction["error_type"], Exception)
+        raise exc_class(interaction.get("error") or "Replayed failure")
+    return interaction.get("output") or ""
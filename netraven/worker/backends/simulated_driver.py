@@ -0,0 +1,266 @@
+"""Simulated backend driver for load testing without real devices.
+
+This module implements the standard driver contract (``run_command``) without
+opening any network connection. Instead it produces synthetic device output,
+which allows the complete ``run_job`` -> ``dispatch_tasks`` -> job handler ->
+database path to be exercised against tens of thousands of devices on a
+single workstation.
+
+The simulator is selected by setting ``worker.driver: simulated`` and is tuned
+through the ``worker.simulator`` configuration section:
+
+- config_size_bytes: Approximate size of the generated running-config
+- latency_distribution: One of ``fixed``, ``uniform``, ``normal`` or ``lognormal``
+- latency_mean_ms / latency_stddev_ms: Parameters of the latency distribution
+- failure_rate: Probability (0.0-1.0) that a session fails to connect
+- timeout_rate: Probability (0.0-1.0) that a session times out
+- change_probability: Probability (0.0-1.0) that a device's config changed
+  since the previous retrieval
+- seed: Optional random seed for reproducible runs
+
+Values may be supplied through environment overrides (e.g.
+``NETRAVEN_WORKER__SIMULATOR__FAILURE_RATE=0.05``), so every setting is
+coerced to its numeric type before use.
+
+Failures are raised as the same Netmiko exceptions the real driver produces,
+so error classification, retries and circuit breaking behave exactly as they
+would against real equipment.
+"""
+
+import math
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from netmiko.exceptions import NetmikoTimeoutException, ConnectionException
+from netraven.worker import timings
+from netraven.utils import tracing
+
+# Define standard command to run (matches the netmiko driver default)
+COMMAND_SHOW_RUN = "show running-config"
+
+DEFAULT_SIMULATOR_SETTINGS: Dict[str, Any] = {
+    "config_size_bytes": 20000,
+    "latency_distribution": "lognormal",
+    "latency_mean_ms": 250,
+    "latency_stddev_ms": 100,
+    "failure_rate": 0.0,
+    "timeout_rate": 0.0,
+    "change_probability": 0.05,
+    "seed": None,
+}
+
+# Per-device revision counters, so a change persists for later retrievals
+# within the same process instead of flapping back to the base config.
+_device_revisions: Dict[Any, int] = {}
+_revisions_lock = threading.Lock()
+
+_rng = random.Random()
+_rng_seed = None
+_rng_lock = threading.Lock()
+
+
+def get_simulator_settings(config: Optional[Dict] = None) -> Dict[str, Any]:
+    """Merge the ``worker.simulator`` config section over the defaults.
+
+    Args:
+        config: Application configuration dictionary
+
+    Returns:
+        Dict[str, Any]: Simulator settings with numeric values coerced
+    """
+    settings = dict(DEFAULT_SIMULATOR_SETTINGS)
+    if config and isinstance(config.get("worker"), dict):
+        sim_cfg = config["worker"].get("simulator")
+        if isinstance(sim_cfg, dict):
+            settings.update({k: v for k, v in sim_cfg.items() if v is not None})
+
+    settings["config_size_bytes"] = int(settings["config_size_bytes"])
+    for key in ("latency_mean_ms", "latency_stddev_ms", "failure_rate", "timeout_rate", "change_probability"):
+        settings[key] = float(settings[key])
+    settings["latency_distribution"] = str(settings["latency_distribution"]).lower()
+    if settings["seed"] is not None:
+        settings["seed"] = int(settings["seed"])
+    return settings
+
+
+def _random(seed: Optional[int]) -> random.Random:
+    """Return the shared random generator, reseeding it if the seed changed."""
+    global _rng_seed
+    with _rng_lock:
+        if seed is not None and seed != _rng_seed:
+            _rng.seed(seed)
+            _rng_seed = seed
+    return _rng
+
+
+def sample_latency(settings: Dict[str, Any], rng: random.Random) -> float:
+    """Draw a simulated session latency in seconds.
+
+    Args:
+        settings: Simulator settings from :func:`get_simulator_settings`
+        rng: Random generator to draw from
+
+    Returns:
+        float: Non-negative latency in seconds
+    """
+    mean = settings["latency_mean_ms"]
+    stddev = settings["latency_stddev_ms"]
+    distribution = settings["latency_distribution"]
+
+    if mean <= 0:
+        return 0.0
+    if distribution == "fixed":
+        latency_ms = mean
+    elif distribution == "uniform":
+        latency_ms = rng.uniform(max(mean - stddev, 0.0), mean + stddev)
+    elif distribution == "normal":
+        latency_ms = rng.gauss(mean, stddev)
+    else:
+        # Lognormal parameterised so the result has the requested mean/stddev
+        variance = stddev ** 2
+        sigma2 = math.log(1 + variance / (mean ** 2))
+        mu = math.log(mean) - sigma2 / 2
+        latency_ms = rng.lognormvariate(mu, math.sqrt(sigma2))
+    return max(latency_ms, 0.0) / 1000.0
+
+
+@lru_cache(maxsize=32)
+def _config_body(size_bytes: int) -> str:
+    """Build (and cache) a shared interface section of roughly ``size_bytes``.
+
+    The body is shared between devices so generating configs for tens of
+    thousands of devices costs a string concatenation, not a rebuild.
+    """
+    blocks = []
+    total = 0
+    index = 0
+    while total < size_bytes:
+        block = (
+            f"interface GigabitEthernet1/0/{index + 1}\n"
+            f" description access-port-{index + 1}\n"
+            f" switchport access vlan {100 + index % 50}\n"
+            " switchport mode access\n"
+            " spanning-tree portfast\n"
+            "!\n"
+        )
+        blocks.append(block)
+        total += len(block)
+        index += 1
+    return "".join(blocks)
+
+
+def generate_config(device: Any, size_bytes: int, revision: int = 0) -> str:
+    """Generate a synthetic running-config for a device.
+
+    Args:
+        device: Device object (hostname and id are used for the header)
+        size_bytes: Approximate size of the config to generate
+        revision: Change counter included in the config so changes are
+                  visible to deduplication
+
+    Returns:
+        str: Synthetic configuration text
+    """
+    device_id = getattr(device, "id", 0)
+    hostname = getattr(device, "hostname", f"Device_{device_id}")
+    header = (
+        "Building configuration...\n\n"
+        f"hostname {hostname}\n"
+        f"! simulated-revision {revision}\n"
+        "enable secret 5 $1$simulated$secret\n"
+        "username admin privilege 15 password 0 simulated\n"
+        "snmp-server community public RO\n"
+        "!\n"
+    )
+    return header + _config_body(size_bytes) + "end\n"
+
+
+def _version_output(device: Any) -> str:
+    """Return synthetic ``show version`` output matching capability patterns."""
+    device_id = getattr(device, "id", 0)
+    return (
+        "Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version 15.2(4)E5, RELEASE SOFTWARE (fc2)\n"
+        f"ROM: Bootstrap program is C3750E boot loader\n"
+        f"cisco WS-C3750X-48P (PowerPC405) processor with 262144K bytes of memory.\n"
+        f"Processor board ID SIM{device_id:08d}\n"
+        f"System serial number            : SIM{device_id:08d}\n"
+    )
+
+
+def _next_revision(device: Any, change_probability: float, rng: random.Random) -> int:
+    """Return the device's config revision, bumping it with the change probability."""
+    key = getattr(device, "id", None) or getattr(device, "hostname", None)
+    with _revisions_lock:
+        revision = _device_revisions.get(key, 0)
+        if change_probability > 0 and rng.random() < change_probability:
+            revision += 1
+            _device_revisions[key] = revision
+        return revision
+
+
+def reset_simulator_state() -> None:
+    """Forget all per-device revisions (used between load test runs)."""
+    with _revisions_lock:
+        _device_revisions.clear()
+
+
+@tracing.traced("driver.simulated.run_command")
+def run_command(
+    device: Any,
+    job_id: Optional[int] = None,
+    command: Optional[str] = None,
+    config: Optional[Dict] = None
+) -> str:
+    """Simulate connecting to a device and executing a command.
+
+    Sleeps for a latency drawn from the configured distribution, then either
+    raises a simulated failure or returns synthetic output for the command.
+
+    Args:
+        device (Any): Device object (id, hostname and device_type are used)
+        job_id (Optional[int]): Job ID for correlation in logs
+        command (Optional[str]): Command to execute. If not specified,
+                               'show running-config' is used as the default.
+        config (Optional[Dict]): Configuration dictionary; the
+                               ``worker.simulator`` section tunes behaviour
+
+    Returns:
+        str: Synthetic command output
+
+    Raises:
+        NetmikoTimeoutException: With probability ``timeout_rate``
+        ConnectionException: With probability ``failure_rate``
+    """
+    settings = get_simulator_settings(config)
+    rng = _random(settings["seed"])
+    device_id = getattr(device, "id", None)
+    device_name = getattr(device, "hostname", f"Device_{device_id}")
+
+    if command is None:
+        command = COMMAND_SHOW_RUN
+
+    latency = sample_latency(settings, rng)
+    roll = rng.random()
+
+    if roll < settings["timeout_rate"]:
+        time.sleep(latency)
+        raise NetmikoTimeoutException(f"Simulated timeout connecting to {device_name}")
+    if roll < settings["timeout_rate"] + settings["failure_rate"]:
+        time.sleep(latency)
+        raise ConnectionException(f"Simulated connection failure for {device_name}")
+
+    with timings.stage("command"):
+        time.sleep(latency)
+
+    if "version" in command:
+        output = _version_output(device)
+    elif "running" in command or "configuration" in command:
+        revision = _next_revision(device, settings["change_probability"], rng)
+        output = generate_config(device, settings["config_size_bytes"], revision)
+    else:
+        output = f"{device_name}# {command}\nsimulated output for '{command}'\n"
+    timings.add_count("bytes_received", len(output))
+    return output
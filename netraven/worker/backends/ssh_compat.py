@@ -1,60 +1,153 @@
 """
-Utility for enabling legacy SSH KEX and MAC algorithms for Paramiko/Netmiko.
+Utility for offering legacy SSH KEX and MAC algorithms with Paramiko/Netmiko,
+and for pinning a connection to a device's recorded transport profile.
+
+Both are applied per connection, on the connection's own Paramiko transport.
 """
 
-def enable_legacy_kex(kex_list=None, mac_list=None, logger=None, job_id=None, device_id=None):
+# Default legacy KEX and MACs added when ssh.legacy_kex / ssh.legacy_macs are not set
+DEFAULT_LEGACY_KEX = (
+    'diffie-hellman-group14-sha1',
+    'diffie-hellman-group1-sha1',
+    'diffie-hellman-group-exchange-sha1'
+)
+DEFAULT_LEGACY_MACS = (
+    'hmac-sha1',
+    'hmac-md5'
+)
+
+def get_legacy_algorithms(config):
     """
-    Patch Paramiko's preferred KEX and MACs at runtime to allow legacy algorithms.
+    Return the legacy (kex_list, mac_list) to offer for the ``ssh:`` config section,
+    or None when legacy algorithms are not allowed.
+    """
+    if not config or not isinstance(config, dict):
+        return None
+    ssh_cfg = config.get('ssh', {}) if isinstance(config.get('ssh'), dict) else {}
+    if not (config.get('allow_legacy_ssh_kex') or ssh_cfg.get('allow_legacy_kex')):
+        return None
+    return (
+        list(ssh_cfg.get('legacy_kex') or DEFAULT_LEGACY_KEX),
+        list(ssh_cfg.get('legacy_macs') or DEFAULT_LEGACY_MACS),
+    )
+
+
+# Profile field -> (Transport SecurityOptions attribute, supported-algorithm table, preference attribute)
+PROFILE_ALGORITHM_CATEGORIES = (
+    ('kex', 'kex', '_kex_info', '_preferred_kex'),
+    ('cipher', 'ciphers', '_cipher_info', '_preferred_ciphers'),
+    ('mac', 'digests', '_mac_info', '_preferred_macs'),
+    ('host_key_type', 'key_types', '_key_info', '_preferred_keys'),
+)
+
+
+def _same_kex_names(transport_cls, kex):
+    """All KEX names handled by the same Paramiko engine as ``kex`` (e.g. both curve25519 aliases)."""
+    kex_info = getattr(transport_cls, '_kex_info', {})
+    engine = kex_info.get(kex)
+    if engine is None:
+        return {kex}
+    return {name for name, cls in kex_info.items() if cls is engine}
+
+
+def transport_preferences(profile=None, legacy=None):
+    """
+    Build the algorithm offer for one connection.
+
+    Starts from Paramiko's default preference lists, appends the legacy KEX
+    and MACs returned by :func:`get_legacy_algorithms` (skipping names this
+    Paramiko does not implement), then narrows each category to the algorithm
+    recorded in ``profile`` when it is part of that offer. The result is set
+    on the connection's own transport, so Paramiko's class-level lists are
+    never modified and other connections in the process are unaffected.
+
     Args:
-        kex_list: List of KEX algorithms to add (or None for default legacy set)
-        mac_list: List of MAC algorithms to add (or None for default legacy set)
-        logger: Optional logger for warnings
-        job_id: Optional job ID for logging
-        device_id: Optional device ID for logging
+        profile: Dict with kex, cipher, mac and host_key_type (any may be None)
+        legacy: (kex_list, mac_list) from :func:`get_legacy_algorithms`, or None
+
+    Returns:
+        dict or None: SecurityOptions attribute -> algorithms to offer, or
+        None if Paramiko's defaults apply unchanged
     """
     try:
         import paramiko
-        # Default legacy KEX and MACs if not provided
-        default_kex = [
-            'diffie-hellman-group14-sha1',
-            'diffie-hellman-group1-sha1',
-            'diffie-hellman-group-exchange-sha1'
-        ]
-        default_macs = [
-            'hmac-sha1',
-            'hmac-md5'
-        ]
-        kex_to_add = kex_list if kex_list else default_kex
-        macs_to_add = mac_list if mac_list else default_macs
-        # Patch KEX
-        for kex in kex_to_add:
-            if kex not in paramiko.transport.Transport._preferred_kex:
-                paramiko.transport.Transport._preferred_kex = (
-                    paramiko.transport.Transport._preferred_kex + (kex,)
-                )
-        # Patch MACs
-        for mac in macs_to_add:
-            if mac not in paramiko.transport.Transport._preferred_macs:
-                paramiko.transport.Transport._preferred_macs = (
-                    paramiko.transport.Transport._preferred_macs + (mac,)
-                )
-        if logger:
-            logger.log(
-                "Legacy SSH security algorithms have been enabled! See NetRaven docs for details.",
-                level="WARNING",
-                destinations=["stdout", "file", "db"],
-                log_type="job",
-                job_id=job_id,
-                device_id=device_id
-            )
-    except Exception:
-        if logger:
-            logger.log(
-                "Failed to patch Paramiko for legacy SSH algorithms.",
-                level="WARNING",
-                destinations=["stdout", "file", "db"],
-                log_type="job",
-                job_id=job_id,
-                device_id=device_id
-            )
-        pass  # If paramiko is not available or patch fails, ignore
+    except ImportError:
+        return None
+    transport_cls = paramiko.transport.Transport
+    kex_list, mac_list = legacy or ((), ())
+    extra = {'kex': kex_list, 'mac': mac_list}
+    profile = profile or {}
+    preferences = {}
+    for field, option, supported, attribute in PROFILE_ALGORITHM_CATEGORIES:
+        default = tuple(getattr(transport_cls, attribute, ()))
+        known = getattr(transport_cls, supported, {})
+        offer = default + tuple(
+            alg for alg in extra.get(field, ()) if alg in known and alg not in default
+        )
+        recorded = profile.get(field)
+        if recorded and recorded in offer:
+            keep = _same_kex_names(transport_cls, recorded) if field == 'kex' else {recorded}
+            offer = tuple(alg for alg in offer if alg in keep)
+        if offer != default:
+            preferences[option] = offer
+    return preferences or None
+
+
+def apply_transport_preferences(transport, preferences):
+    """Set the :func:`transport_preferences` offer on a not yet started Paramiko transport."""
+    if preferences:
+        options = transport.get_security_options()
+        for option, algorithms in preferences.items():
+            setattr(options, option, algorithms)
+    return transport
+
+
+def transport_factory(preferences):
+    """
+    Return a ``transport_factory`` for ``paramiko.SSHClient.connect`` that
+    builds the client's transport with ``preferences`` applied.
+    """
+    import paramiko
+
+    def build(sock, **kwargs):
+        return apply_transport_preferences(paramiko.Transport(sock, **kwargs), preferences)
+    return build
+
+
+def negotiated_profile(transport):
+    """
+    Read the algorithms a connected Paramiko transport negotiated.
+
+    Paramiko has no public accessor for the KEX name, so it is recovered from
+    the KEX engine class; versions that discard the engine after the handshake
+    report ``kex`` as None.
+
+    Returns:
+        dict: kex, cipher, mac, host_key_type and legacy_required
+    """
+    def name(attribute):
+        value = getattr(transport, attribute, None)
+        return value if isinstance(value, str) else None
+
+    kex = None
+    engine = getattr(transport, 'kex_engine', None)
+    kex_info = getattr(transport, '_kex_info', None)
+    if engine is not None and isinstance(kex_info, dict):
+        for candidate in getattr(transport, '_preferred_kex', ()):
+            if kex_info.get(candidate) is type(engine):
+                kex = candidate
+                break
+    mac = name('local_mac')
+    return {
+        'kex': kex,
+        'cipher': name('local_cipher'),
+        'mac': mac,
+        'host_key_type': name('host_key_type'),
+        'legacy_required': kex in DEFAULT_LEGACY_KEX or mac in DEFAULT_LEGACY_MACS,
+    }
+
+
+def is_negotiation_failure(error):
+    """True if an SSH error means client and device had no algorithm in common."""
+    message = str(error)
+    return "Incompatible ssh" in message or "no acceptable" in message
@@ -28,6 +28,7 @@ import threading
 from enum import Enum
 from typing import Dict, Any, Optional, List
 from netraven.utils.unified_logger import get_unified_logger
+from netraven.utils import metrics
 
 logger = get_unified_logger()
 
@@ -126,6 +127,7 @@ class CircuitBreaker:
                     "last_state_change": time.time(),
                     "success_count": 0,
                 }
+                metrics.CIRCUIT_BREAKER_CIRCUITS.labels(state=CircuitState.CLOSED.value).inc()
             return self._device_circuits[device_id]
     
     def record_success(self, device_id: int) -> None:
@@ -161,6 +163,7 @@ class CircuitBreaker:
                     circuit["failure_count"] = 0
                     circuit["success_count"] = 0
                     circuit["last_state_change"] = time.time()
+                    self._publish_state_counts()
     
     def record_failure(self, device_id: int) -> None:
         """Record a connection failure for a device.
@@ -194,6 +197,7 @@ class CircuitBreaker:
                     )
                     circuit["state"] = CircuitState.OPEN
                     circuit["last_state_change"] = current_time
+                    self._publish_state_counts()
             
             # In half-open state, any failure sends us back to open
             elif circuit["state"] == CircuitState.HALF_OPEN:
@@ -205,6 +209,7 @@ class CircuitBreaker:
                 circuit["state"] = CircuitState.OPEN
                 circuit["success_count"] = 0
                 circuit["last_state_change"] = current_time
+                self._publish_state_counts()
     
     def can_connect(self, device_id: int) -> bool:
         """Check if a device connection is allowed based on circuit state.
@@ -246,6 +251,7 @@ class CircuitBreaker:
                     circuit["state"] = CircuitState.HALF_OPEN
                     circuit["success_count"] = 0
                     circuit["last_state_change"] = current_time
+                    self._publish_state_counts()
                     return True
                 else:
                     logger.log(
@@ -336,7 +342,19 @@ class CircuitBreaker:
                     }
             else:
                 self._device_circuits.clear()
+            self._publish_state_counts()
     
+    def _publish_state_counts(self) -> None:
+        """Update the circuit-state gauge with the number of circuits in each state.
+
+        Must be called with the lock held, after any state transition.
+        """
+        counts = {state: 0 for state in CircuitState}
+        for circuit in self._device_circuits.values():
+            counts[circuit["state"]] += 1
+        for state, count in counts.items():
+            metrics.CIRCUIT_BREAKER_CIRCUITS.labels(state=state.value).set(count)
+
     def get_troubled_devices(self) -> List[int]:
         """Get a list of devices with circuits in non-CLOSED state.
         
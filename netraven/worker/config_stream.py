@@ -0,0 +1,193 @@
+"""Streaming redaction, hashing and buffering of large command outputs.
+
+Holding a running-config as one ``str`` and passing it through
+:func:`~netraven.worker.redactor.redact` (split into lines, redact, join),
+``sha256_hex`` (encode) and the ORM makes several full copies per device.
+With tens of megabytes per config and a thread per device, that adds up.
+
+:class:`StreamingConfigBuffer` takes the raw output as bytes and spools it
+to a :class:`tempfile.SpooledTemporaryFile`, which stays in memory up to
+``worker.config_chunk_size`` bytes and spills to disk beyond that. Sessions
+that can stream (``send_to``, e.g. the paramiko driver's prompt reader)
+write each received chunk straight into it, so the output is never held as
+one string; for the others :func:`read_command_output` feeds the returned
+string in slices of at most ``config_chunk_size`` bytes.
+
+:meth:`StreamingConfigBuffer.finish` then reads the raw spool back one chunk
+at a time: complete lines are redacted, hashed incrementally and written to
+a second spool. If redaction fails, :meth:`~StreamingConfigBuffer.process`
+rebuilds the result unredacted from the same raw spool. The text is
+materialised once, by :meth:`StreamingConfigBuffer.getvalue`, when the
+snapshot is stored, and not at all when the hash shows it is unchanged.
+
+The output and hash are identical to ``redact()`` followed by ``sha256_hex``,
+so deduplication against snapshots stored before streaming keeps working.
+"""
+
+import codecs
+import hashlib
+import mmap
+import re
+import tempfile
+from typing import Any, Dict, Optional
+
+from netraven.worker.backends.prompt_reader import PAGER_CLEANUP_PATTERN
+from netraven.worker.redactor import get_redaction_keywords, redact_line
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # bytes
+# Characters str.splitlines() treats as line boundaries
+LINE_BOUNDARIES = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+# Pager prompt and erase sequence, for decoded lines
+PAGER_CLEANUP_TEXT_PATTERN = re.compile(PAGER_CLEANUP_PATTERN.pattern.decode(), re.IGNORECASE)
+# UTF-8 uses at most 4 bytes per character
+MAX_BYTES_PER_CHAR = 4
+
+
+def get_chunk_size(config: Optional[Dict[str, Any]]) -> int:
+    """Chunk size (and in-memory spool limit) from ``worker.config_chunk_size``."""
+    worker_cfg = (config or {}).get("worker") or {}
+    return int(worker_cfg.get("config_chunk_size") or DEFAULT_CHUNK_SIZE)
+
+
+class StreamingConfigBuffer:
+    """Spools raw command output, then redacts and hashes it chunk by chunk.
+
+    Args:
+        config: Application config (redaction keywords and chunk size)
+        redact: Set to False to store the output unredacted
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, redact: bool = True):
+        self.chunk_size = get_chunk_size(config)
+        self.redact = redact
+        self._keywords = [keyword.lower() for keyword in get_redaction_keywords(config)]
+        self._raw = tempfile.SpooledTemporaryFile(max_size=self.chunk_size, mode="w+b")
+        self._file = None
+        self._hash = None
+        self._lines = 0
+        self.raw_size = 0
+        self.size = 0
+        self.strip_pager = False
+        self.finished = False
+
+    def write_bytes(self, data: bytes) -> None:
+        """Add raw output as received from the device."""
+        if self.finished:
+            raise ValueError("Buffer already finished")
+        self._raw.write(data)
+        self.raw_size += len(data)
+
+    def write(self, text: str) -> None:
+        """Add output text."""
+        self.write_bytes(text.encode("utf-8"))
+
+    def write_all(self, output: str) -> None:
+        """Feed a complete output in slices of at most ``chunk_size`` bytes."""
+        step = max(1, self.chunk_size // MAX_BYTES_PER_CHAR)
+        for start in range(0, len(output), step):
+            self.write(output[start:start + step])
+
+    def strip_pager_prompts(self) -> None:
+        """Remove pager prompts from the output (the reader answered at least one)."""
+        self.strip_pager = True
+
+    def finish(self) -> "StreamingConfigBuffer":
+        """Redact and hash the spooled output; no more writes after this."""
+        if not self.finished:
+            self.process(self.redact)
+        return self
+
+    def process(self, redact: bool) -> None:
+        """(Re)build the result from the raw spool, redacted or not."""
+        self.finished = True
+        self.redact = redact
+        if self._file is not None:
+            self._file.close()
+        self._file = tempfile.SpooledTemporaryFile(max_size=self.chunk_size, mode="w+b")
+        self._hash = hashlib.sha256()
+        self._lines = 0
+        self.size = 0
+        keywords = self._keywords if redact else []
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._raw.seek(0)
+        pending = ""
+        while True:
+            data = self._raw.read(self.chunk_size)
+            text = pending + decoder.decode(data, final=not data)
+            if not data:
+                break
+            pending = ""
+            if not text:
+                continue
+            lines = text.splitlines()
+            if text[-1] == "\r":
+                # May be the first half of a "\r\n" split across chunks
+                pending = lines.pop() + "\r"
+            elif text[-1] not in LINE_BOUNDARIES:
+                pending = lines.pop()
+            self._emit(lines, keywords)
+        if text:
+            self._emit(text.splitlines(), keywords)
+
+    def _emit(self, lines, keywords) -> None:
+        if not lines:
+            return
+        if self.strip_pager:
+            lines = [PAGER_CLEANUP_TEXT_PATTERN.sub("", line) for line in lines]
+        if keywords:
+            lines = [redact_line(line, keywords) for line in lines]
+        text = "\n".join(lines)
+        if self._lines:
+            text = "\n" + text
+        self._lines += len(lines)
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._file.write(data)
+        self.size += len(data)
+
+    def hexdigest(self) -> str:
+        """SHA-256 of the redacted output (same as ``sha256_hex(redact(output))``)."""
+        self.finish()
+        return self._hash.hexdigest()
+
+    def getvalue(self) -> str:
+        """Materialise the redacted output as one string.
+
+        Once the result has spilled to disk it is decoded straight from a
+        memory map of the file, without a bytes copy in between.
+        """
+        self.finish()
+        self._file.flush()
+        if not self.size:
+            return ""
+        if self._file._rolled:
+            with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, "utf-8")
+        # Still in memory, so at most chunk_size bytes
+        self._file.seek(0)
+        return self._file.read().decode("utf-8")
+
+    def close(self) -> None:
+        self._raw.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "StreamingConfigBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def read_command_output(session: Any, buffer: StreamingConfigBuffer, command: Optional[str] = None) -> None:
+    """Run a command on an open session and feed its output into ``buffer``.
+
+    Sessions whose class defines ``send_to`` stream the output chunk by
+    chunk; for the others the string returned by ``send`` is written in
+    slices. (``send_to`` is looked up on the class so that mocks, which
+    answer every attribute, use ``send``.)
+    """
+    if getattr(type(session), "send_to", None) is not None:
+        session.send_to(buffer, command)
+    else:
+        buffer.write_all(session.send(command))
@@ -440,7 +440,7 @@ def parse_device_capabilities(device_type: str, version_output: str) -> Dict[str
             result[capability] = match.group(1)
         else:
             result[capability] = ""
-            logger.log(f"[Job: {job_id}] Could not parse {capability} from output for {device_name}", level="WARNING", destinations=["stdout", "file", "db"], source="device_capabilities", job_id=job_id)
+            logger.log(f"Could not parse {capability} from output for device type {device_type}", level="WARNING", destinations=["stdout", "file", "db"], source="device_capabilities")
     
     return result
 
@@ -642,8 +642,9 @@ def detect_error_from_output(device_type: str, command_output: str) -> Optional[
 
 def execute_capability_detection(
     device: Any, 
-    run_command_func: Callable, 
-    job_id: Optional[int] = None
+    run_command_func: Optional[Callable] = None, 
+    job_id: Optional[int] = None,
+    session: Any = None
 ) -> Dict[str, Any]:
     """Execute comprehensive device capability detection.
     
@@ -657,9 +658,12 @@ def execute_capability_detection(
     
     Args:
         device (Any): Device object with required connection attributes
-        run_command_func (Callable): Function to run commands on the device,
+        run_command_func (Optional[Callable]): Function to run commands on the device,
                                    with signature run_command(device, job_id, command, config)
         job_id (Optional[int]): Job ID for correlation and logging
+        session (Any): Open device session (see ``backends.open_session``). When
+                       given, commands are sent over it instead of calling
+                       run_command_func, so detection reuses the job's login.
     
     Returns:
         Dict[str, Any]: Complete capabilities dictionary with:
@@ -692,7 +696,10 @@ def execute_capability_detection(
         
         # Run the command
         logger.log(f"[Job: {job_id}] Detecting capabilities for {device_name} using '{version_cmd}'", level="INFO", destinations=["stdout", "file", "db"], source="device_capabilities", job_id=job_id)
-        version_output = run_command_func(device, job_id, command=version_cmd)
+        if session is not None:
+            version_output = session.send(version_cmd)
+        else:
+            version_output = run_command_func(device, job_id, command=version_cmd)
         
         if version_output:
             # Parse the output for capabilities
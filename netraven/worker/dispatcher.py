@@ -34,18 +34,22 @@ from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timezone
 
 from netraven.worker.executor import handle_device
+from netraven.worker import timings, profiling
 from netraven.worker.error_handler import ErrorCategory, ErrorInfo, classify_exception
 from netraven.utils.unified_logger import get_unified_logger
+from netraven.utils import metrics, tracing
 from netraven.db.models import JobResult
 
 # Default thread pool size if not specified in config
 DEFAULT_THREAD_POOL_SIZE = 5
 
+@tracing.traced("dispatch_tasks")
 def dispatch_tasks(
     devices: List[Any],
     job_id: int,
     config: Optional[Dict[str, Any]] = None,
-    db: Optional[Session] = None
+    db: Optional[Session] = None,
+    unreachable: Optional[Dict[Any, ErrorInfo]] = None
 ) -> List[Dict[str, Any]]:
     """Dispatch device tasks to a thread pool for parallel execution.
     
@@ -73,6 +77,9 @@ def dispatch_tasks(
                                          - Additional options passed to handle_device()
         db (Optional[Session]): SQLAlchemy session for database operations,
                                passed to device handlers
+        unreachable (Optional[Dict[Any, ErrorInfo]]): Devices that failed the runner's
+                               TCP pre-probe, by device ID; they get a failure result
+                               without being connected to
     
     Returns:
         List[Dict[str, Any]]: List of task result dictionaries, one per device, each containing:
@@ -108,6 +115,7 @@ def dispatch_tasks(
         if 'retry_backoff' in config['worker']:
             retry_config['retry_delay'] = config['worker']['retry_backoff']
 
+    tracing.set_attributes({"job.id": job_id, "thread_pool_size": thread_pool_size})
     logger = get_unified_logger()
     logger.log(
         f"Job '{job_id}' started: dispatching tasks to devices",
@@ -159,6 +167,18 @@ def dispatch_tasks(
                     source="dispatcher",
                 )
                 continue
+            if unreachable and device_id in unreachable:
+                logger.log(
+                    f"Skipping device '{device_name}' in job '{job_id}': {unreachable[device_id].message}",
+                    level="WARNING",
+                    destinations=["stdout", "file", "db"],
+                    job_id=job_id,
+                    device_id=device_id,
+                    source="dispatcher",
+                )
+                # Goes through the same result handling as the device tasks
+                future_to_device[executor.submit(unreachable_result, device, unreachable[device_id])] = device
+                continue
             print(f"[DEBUG dispatcher] Submitting device_id={device_id} device_name={device_name} job_id={job_id}")
             logger.log(
                 f"Submitting task for device '{device_name}' in job '{job_id}'",
@@ -171,7 +191,8 @@ def dispatch_tasks(
             
             # Submit the task to the executor, capturing the Future
             future = executor.submit(
-                task_with_retry,
+                tracing.bind_context(timed_task),
+                time.perf_counter(),
                 device=device,
                 job_id=job_id,
                 config=config,
@@ -319,6 +340,56 @@ def dispatch_tasks(
     
     return results
 
+def unreachable_result(device: Any, error_info: ErrorInfo) -> Dict[str, Any]:
+    """Failure result for a device that failed the TCP pre-probe.
+
+    Args:
+        device (Any): The device that could not be reached
+        error_info (ErrorInfo): The pre-probe failure
+
+    Returns:
+        Dict[str, Any]: Task result in the same shape as task_with_retry() failures
+    """
+    device_id = getattr(device, 'id', 0)
+    return {
+        "device_id": device_id,
+        "device_name": getattr(device, 'hostname', f"Device_{device_id}"),
+        "success": False,
+        "error": error_info.message,
+        "error_info": error_info.to_dict(),
+        "retries": 0,
+    }
+
+def timed_task(submitted_at: float, **task_kwargs) -> Dict[str, Any]:
+    """Run task_with_retry with a per-task StageTimer bound to the worker thread.
+
+    Records how long the task waited in the pool queue, lets the drivers and
+    job handlers record their stages into the same timer, and attaches the
+    result as ``result["timings"]`` so it is persisted in JobResult.details.
+
+    Args:
+        submitted_at (float): time.perf_counter() value when the task was submitted
+        **task_kwargs: Keyword arguments passed through to task_with_retry()
+
+    Returns:
+        Dict[str, Any]: The task_with_retry() result with "timings" (and
+                        "trace_id" when tracing is enabled) added
+    """
+    timer = timings.start_timer()
+    timer.add("queue_wait", time.perf_counter() - submitted_at)
+    try:
+        with profiling.thread_profile():
+            result = task_with_retry(**task_kwargs)
+    finally:
+        timings.clear_timer()
+    if isinstance(result, dict):
+        result["timings"] = timer.to_dict()
+        trace_id = tracing.current_span().trace_id
+        if trace_id:
+            result["trace_id"] = trace_id
+    return result
+
+@tracing.traced("task_with_retry")
 def task_with_retry(
     device: Any,
     job_id: int,
@@ -381,12 +452,14 @@ def task_with_retry(
     
     device_id = getattr(device, 'id', 0)
     device_name = getattr(device, 'hostname', f"Device_{device_id}")
+    tracing.set_attributes({"job.id": job_id, **tracing.device_attributes(device)})
     print(f"[DEBUG dispatcher] task_with_retry ENTRY: device_id={device_id} device_name={device_name} job_id={job_id}")
     
     # First attempt
     try:
         # Execute the main device handling logic
-        result = handle_device(device, job_id, config, db)
+        with tracing.span("attempt", {"attempt": 0}):
+            result = handle_device(device, job_id, config, db)
         
         # If success, return immediately
         if result.get('success', False):
@@ -454,6 +527,8 @@ def task_with_retry(
                 source="dispatcher",
             )
             
+            metrics.TASK_RETRIES.labels(category=error_info.category.name).inc()
+
             # Wait before retry
             time.sleep(backoff_time)
             
@@ -462,7 +537,8 @@ def task_with_retry(
             
             # Try again
             try:
-                retry_result = handle_device(device, job_id, config, db)
+                with tracing.span("attempt", {"attempt": retry_count}):
+                    retry_result = handle_device(device, job_id, config, db)
                 
                 # If success, return immediately with retry info
                 if retry_result.get('success', False):
@@ -61,6 +61,7 @@ from netraven.services.credential_metrics import record_credential_attempt
 
 # Import unified logger
 from netraven.utils.unified_logger import get_unified_logger
+from netraven.utils import metrics, tracing
 
 # Import job registry
 from netraven.worker.job_registry import JOB_TYPE_REGISTRY
@@ -76,6 +77,35 @@ def get_job_type_for_job(job_id, db):
     job = db.query(Job).filter(Job.id == job_id).first()
     return getattr(job, "job_type", "backup")  # Default to backup
 
+def record_login_outcome(device: Any, job_id: int, result: Any, db: Optional[Session]) -> None:
+    """Record the login outcome a handler reported against the device's credential.
+
+    Only handlers that log in report ``authenticated``; devices whose
+    credentials didn't come from the resolver have no ``credential_id``.
+    """
+    credential_id = getattr(device, "credential_id", None)
+    if not isinstance(result, dict) or result.get("authenticated") is None or not credential_id or db is None:
+        return
+    try:
+        record_credential_attempt(
+            db,
+            getattr(device, "id", None),
+            credential_id,
+            job_id,
+            success=bool(result["authenticated"]),
+            error=(result.get("details") or {}).get("error"),
+        )
+    except Exception as e:
+        db.rollback()
+        logger.log(
+            f"Failed to record credential attempt for device {getattr(device, 'hostname', None)}: {e}",
+            level="WARNING",
+            destinations=["stdout", "file"],
+            job_id=job_id,
+            source="worker_executor",
+        )
+
+@tracing.traced("handle_device")
 def handle_device(
     device: Any,
     job_id: int,
@@ -108,4 +138,18 @@ def handle_device(
         job_id=job_id,
         source="worker_executor",
     )
-    return handler(device, job_id, config, db)
+    tracing.set_attributes({"job.type": job_type})
+    start = time.perf_counter()
+    success = False
+    try:
+        with tracing.span(f"job_handler.{job_type}", {"handler": handler.__name__}):
+            result = handler(device, job_id, config, db)
+        success = bool(isinstance(result, dict) and result.get("success"))
+        record_login_outcome(device, job_id, result, db)
+        return result
+    finally:
+        metrics.DEVICE_SESSION_SECONDS.labels(
+            device_type=getattr(device, "device_type", None) or "unknown",
+            job_type=job_type or "unknown",
+            success=str(success).lower(),
+        ).observe(time.perf_counter() - start)
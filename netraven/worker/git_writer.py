@@ -12,9 +12,11 @@ import os
 from typing import Optional
 from git import Repo, GitCommandError
 from netraven.utils.unified_logger import get_unified_logger
+from netraven.worker import timings
 
 logger = get_unified_logger()
 
+@timings.timed("git_write")
 def commit_configuration_to_git(
     device_id: int, # Consider using hostname or IP if available for filename
     config_data: str,
@@ -1,8 +1,10 @@
 from netraven.utils.unified_logger import get_unified_logger
-from netraven.worker.backends import netmiko_driver
-from netraven.worker import redactor
-from netraven.utils.hash_utils import sha256_hex
+from netraven.worker.backends import open_session
+from netraven.worker.device_capabilities import execute_capability_detection
+from netraven.worker import timings
+from netraven.worker.config_stream import StreamingConfigBuffer, read_command_output
 from netraven.db.models.device_config import DeviceConfiguration
+from netraven.services import config_history
 from sqlalchemy.orm import Session
 from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
 
@@ -15,9 +17,42 @@ JOB_META = {
 
 logger = get_unified_logger()
 
+# Capability fields copied into the snapshot metadata when detection is enabled
+CAPABILITY_METADATA_FIELDS = ("model", "version", "serial")
+
+
+def capability_detection_enabled(config) -> bool:
+    """Whether ``worker.detect_capabilities`` is set (env overrides arrive as strings)."""
+    worker_cfg = (config or {}).get("worker") or {}
+    return str(worker_cfg.get("detect_capabilities", False)).lower() in ("1", "true", "yes", "on")
+
+
+def store_previous_as_delta(session, previous, new_snapshot, keyframe_interval, job_id):
+    """Rewrite the superseded snapshot as a reverse delta (``worker.delta_history``).
+
+    Failures only leave the previous snapshot stored in full.
+    """
+    previous_id, device_id = previous.id, previous.device_id
+    try:
+        with timings.stage("db_write"):
+            config_history.encode_as_delta(session, previous, new_snapshot, keyframe_interval)
+    except Exception as e:
+        session.rollback()
+        logger.log(
+            f"Could not store snapshot {previous_id} as a delta: {e}",
+            level="WARNING",
+            destinations=["stdout", "file"],
+            source="worker.job.config_backup",
+            job_id=job_id,
+            device_id=device_id
+        )
+
+
 def run(device, job_id, config, db):
     """
     Job contract: Must return a dict with at least 'success' (bool) and 'device_id' (int) in all code paths.
+    'authenticated' (bool) is added once the login outcome is known; the
+    executor records it against the device's credential.
     """
     device_id = getattr(device, 'id', None)
     device_name = getattr(device, 'hostname', None)
@@ -32,10 +67,17 @@ def run(device, job_id, config, db):
         device_id=device_id
     )
 
+    config_buffer = None
     try:
-        # 1. Retrieve running config
+        # 1. Retrieve running config (and capabilities) over a single session;
+        # the output goes straight into a spooled buffer, not one big string
+        capabilities = {}
         try:
-            config_output = netmiko_driver.run_command(device, job_id=job_id, command=None, config=config)
+            config_buffer = StreamingConfigBuffer(config)
+            with open_session(device, job_id, config) as device_session:
+                if capability_detection_enabled(config):
+                    capabilities = execute_capability_detection(device, job_id=job_id, session=device_session)
+                read_command_output(device_session, config_buffer)
             logger.log(
                 "Successfully retrieved running-config from device.",
                 level="INFO",
@@ -55,7 +97,10 @@ def run(device, job_id, config, db):
                 job_id=job_id,
                 device_id=device_id
             )
-            return {"success": False, "device_id": device_id, "details": {"error": str(e)}}
+            result = {"success": False, "device_id": device_id, "details": {"error": str(e)}}
+            if isinstance(e, NetmikoAuthenticationException):
+                result["authenticated"] = False
+            return result
         except Exception as e:
             # Detect legacy SSH KEX error and report clearly
             err_msg = str(e)
@@ -86,9 +131,11 @@ def run(device, job_id, config, db):
                 device_id=device_id
             )
             return {"success": False, "device_id": device_id, "details": {"error": str(e)}}
-        # 2. Redact sensitive info
+        # 2. Redact sensitive info and hash, chunk by chunk from the spool,
+        # so large configs aren't copied whole at every step
         try:
-            redacted_config = redactor.redact(config_output, config)
+            with timings.stage("redaction"):
+                config_buffer.finish()
             logger.log(
                 "Redacted sensitive information from config.",
                 level="INFO",
@@ -108,11 +155,13 @@ def run(device, job_id, config, db):
                 job_id=job_id,
                 device_id=device_id
             )
-            redacted_config = config_output
+            config_buffer.process(redact=False)
         # 3. Compute hash and deduplicate
-        config_hash = sha256_hex(redacted_config)
+        with timings.stage("hashing"):
+            config_hash = config_buffer.hexdigest()
         session: Session = db
-        latest = session.query(DeviceConfiguration).filter_by(device_id=device_id).order_by(DeviceConfiguration.retrieved_at.desc()).first()
+        with timings.stage("db_lookup"):
+            latest = session.query(DeviceConfiguration).filter_by(device_id=device_id).order_by(DeviceConfiguration.retrieved_at.desc()).first()
         if latest and latest.data_hash == config_hash:
             logger.log(
                 "No change in configuration. Snapshot skipped (deduplicated).",
@@ -123,20 +172,24 @@ def run(device, job_id, config, db):
                 job_id=job_id,
                 device_id=device_id
             )
-            return {"success": True, "device_id": device_id, "details": {"deduplicated": True}}
+            return {"success": True, "device_id": device_id, "authenticated": True, "details": {"deduplicated": True}}
         # 4. Store in database
         try:
             new_snapshot = DeviceConfiguration(
                 device_id=device_id,
-                config_data=redacted_config,
                 data_hash=config_hash,
                 config_metadata={
                     "job_id": job_id,
-                    "hostname": getattr(device, 'hostname', None)  # Always include device hostname
+                    "hostname": getattr(device, 'hostname', None),  # Always include device hostname
+                    **{k: capabilities[k] for k in CAPABILITY_METADATA_FIELDS if capabilities.get(k)}
                 }
             )
-            session.add(new_snapshot)
-            session.commit()
+            with timings.stage("db_write"):
+                # Identical configs (from other devices, or this device's
+                # earlier history) share one stored blob; the flush upserts it
+                new_snapshot.config_data = config_buffer.getvalue()  # materialised once, at storage time
+                session.add(new_snapshot)
+                session.commit()
             logger.log(
                 "Configuration snapshot stored in database.",
                 level="INFO",
@@ -146,7 +199,10 @@ def run(device, job_id, config, db):
                 job_id=job_id,
                 device_id=device_id
             )
-            return {"success": True, "device_id": device_id, "details": {"db_snapshot_id": new_snapshot.id}}
+            delta_settings = config_history.get_delta_settings(config)
+            if latest and delta_settings["enabled"]:
+                store_previous_as_delta(session, latest, new_snapshot, delta_settings["keyframe_interval"], job_id)
+            return {"success": True, "device_id": device_id, "authenticated": True, "details": {"db_snapshot_id": new_snapshot.id}}
         except Exception as e:
             session.rollback()
             logger.log(
@@ -158,7 +214,7 @@ def run(device, job_id, config, db):
                 job_id=job_id,
                 device_id=device_id
             )
-            return {"success": False, "device_id": device_id, "details": {"error": str(e)}}
+            return {"success": False, "device_id": device_id, "authenticated": True, "details": {"error": str(e)}}
     except Exception as e:
         logger.log(
             f"Unexpected error in config backup: {e}",
@@ -169,4 +225,7 @@ def run(device, job_id, config, db):
             job_id=job_id,
             device_id=device_id
         )
-        return {"success": False, "device_id": device_id, "details": {"error": str(e)}}
\ No newline at end of file
+        return {"success": False, "device_id": device_id, "details": {"error": str(e)}}
+    finally:
+        if config_buffer is not None:
+            config_buffer.close()
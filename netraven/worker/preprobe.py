@@ -0,0 +1,140 @@
+"""TCP pre-probe of a job's devices before dispatch.
+
+An unreachable device otherwise costs a full ``connection_timeout`` in the
+SSH driver, once per retry attempt, while holding a dispatcher thread. With
+``worker.preprobe.enabled`` the runner first sweeps all devices with
+non-blocking TCP connects to their SSH port from a single thread, with a
+short timeout. Devices that don't answer are failed straight away with
+:attr:`~netraven.worker.error_handler.ErrorCategory.UNREACHABLE` (or
+``CONNECTION_REFUSED`` if the port is closed) and never reach the driver.
+
+The probe only applies to the SSH drivers, and devices reached through a
+bastion are not probed since the worker can't connect to them directly.
+"""
+
+import errno
+import os
+import selectors
+import socket
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+from netraven.worker.backends import get_driver_name
+from netraven.worker.error_handler import ErrorCategory, ErrorInfo
+
+DEFAULT_TIMEOUT = 2.0  # seconds
+DEFAULT_CONCURRENCY = 256  # sockets in flight at once
+PROBED_DRIVERS = ("netmiko", "paramiko", "asyncssh")
+
+_CONNECT_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN)
+
+
+def get_preprobe_settings(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pre-probe settings from ``worker.preprobe`` with defaults applied."""
+    worker_cfg = (config or {}).get("worker") or {}
+    probe_cfg = worker_cfg.get("preprobe") or {}
+    return {
+        "enabled": str(probe_cfg.get("enabled", False)).lower() in ("1", "true", "yes", "on"),
+        "timeout": float(probe_cfg.get("timeout") or DEFAULT_TIMEOUT),
+        "concurrency": int(probe_cfg.get("concurrency") or DEFAULT_CONCURRENCY),
+    }
+
+
+def preprobe_enabled(config: Optional[Dict[str, Any]]) -> bool:
+    """Whether the pre-probe is enabled and applies to the configured driver."""
+    return get_preprobe_settings(config)["enabled"] and get_driver_name(config) in PROBED_DRIVERS
+
+
+def _failure(device: Any, category: ErrorCategory, message: str) -> ErrorInfo:
+    return ErrorInfo(
+        category=category,
+        message=message,
+        is_retriable=False,
+        context={"device_id": getattr(device, "id", None), "stage": "preprobe"},
+    )
+
+
+def _connect_failure(device: Any, target: str, error: int) -> ErrorInfo:
+    category = ErrorCategory.CONNECTION_REFUSED if error == errno.ECONNREFUSED else ErrorCategory.UNREACHABLE
+    return _failure(device, category, f"TCP pre-probe to {target} failed: {os.strerror(error)}")
+
+
+def probe_devices(devices: Iterable[Any], timeout: float = DEFAULT_TIMEOUT, concurrency: int = DEFAULT_CONCURRENCY) -> Dict[Any, ErrorInfo]:
+    """Try a TCP connect to every device's SSH port, all at once.
+
+    Args:
+        devices: Devices with ``id``, ``ip_address`` and optional ``port``
+        timeout: Seconds each connect may take
+        concurrency: Maximum connects in flight at once
+
+    Returns:
+        ErrorInfo per ID of each device that could not be connected to
+    """
+    failures: Dict[Any, ErrorInfo] = {}
+    pending = deque(devices)
+    selector = selectors.DefaultSelector()
+    in_flight = 0
+    try:
+        while pending or in_flight:
+            # Start connects up to the concurrency limit
+            while pending and in_flight < concurrency:
+                device = pending.popleft()
+                port = getattr(device, "port", None) or 22
+                target = f"{device.ip_address}:{port}"
+                try:
+                    family, sock_type, proto, _, address = socket.getaddrinfo(device.ip_address, port, type=socket.SOCK_STREAM)[0]
+                except socket.gaierror as e:
+                    failures[device.id] = _failure(device, ErrorCategory.UNREACHABLE, f"TCP pre-probe to {target} failed: {e}")
+                    continue
+                sock = socket.socket(family, sock_type, proto)
+                sock.setblocking(False)
+                error = sock.connect_ex(address)
+                if error in _CONNECT_IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE, (device, target, time.monotonic() + timeout))
+                    in_flight += 1
+                    continue
+                sock.close()
+                if error not in (0, errno.EISCONN):
+                    failures[device.id] = _connect_failure(device, target, error)
+
+            if not in_flight:
+                continue
+            next_deadline = min(key.data[2] for key in selector.get_map().values())
+            for key, _ in selector.select(max(0.0, next_deadline - time.monotonic())):
+                device, target, _ = key.data
+                error = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                in_flight -= 1
+                if error:
+                    failures[device.id] = _connect_failure(device, target, error)
+
+            now = time.monotonic()
+            for key in list(selector.get_map().values()):
+                device, target, deadline = key.data
+                if deadline <= now:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    in_flight -= 1
+                    failures[device.id] = _failure(
+                        device, ErrorCategory.UNREACHABLE, f"TCP pre-probe to {target} timed out after {timeout:.1f}s"
+                    )
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+    return failures
+
+
+def probe_job_devices(devices: Iterable[Any], config: Optional[Dict[str, Any]]) -> Dict[Any, ErrorInfo]:
+    """Pre-probe a job's devices if enabled; devices behind a bastion are skipped.
+
+    Returns:
+        ErrorInfo per ID of each unreachable device (empty when disabled)
+    """
+    if not preprobe_enabled(config):
+        return {}
+    settings = get_preprobe_settings(config)
+    direct = [device for device in devices if not getattr(device, "bastion", None)]
+    return probe_devices(direct, timeout=settings["timeout"], concurrency=settings["concurrency"])
@@ -0,0 +1,143 @@
+"""On-demand profiling of individual job runs.
+
+When a job has ``profile_next_run`` set, the runner wraps the run in a
+:class:`JobProfiler`. Before Python 3.12 cProfile only sees the thread it
+was enabled in, so the runner thread gets one profile and the dispatcher
+enables a separate profile inside every pool thread via
+:func:`thread_profile`. When the run finishes, all profiles are merged into a
+single pstats report. tracemalloc runs for the whole job, and its top
+allocation sites are stored with the report as a
+:class:`~netraven.db.models.JobProfile` row. The artifact can be downloaded
+through ``/jobs/{job_id}/profiles``.
+
+Only one job runs per RQ work horse, so the active profiler is a module
+global.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from netraven.db.models import JobProfile
+
+TOP_FUNCTIONS = 60
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 10
+
+_active_profiler: Optional["JobProfiler"] = None
+
+
+class JobProfiler:
+    """Collects cProfile data from every thread of a job run plus tracemalloc stats."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main_profile = cProfile.Profile()
+        self._started_tracemalloc = False
+        self._wall_start = None
+        self._start = None
+
+    def start(self) -> None:
+        self._wall_start = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._main_profile.enable()
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling and build the artifact fields.
+
+        Returns:
+            Dict with run_started_at, duration_seconds, stats_text,
+            allocations_text and pstats_data (marshalled pstats)
+        """
+        self._main_profile.disable()
+        duration = time.perf_counter() - self._start
+
+        allocations_text = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            allocations_text = "\n".join(str(stat) for stat in top)
+
+        stats = pstats.Stats(self._main_profile)
+        with self._lock:
+            for profile in self._profiles:
+                stats.add(profile)
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+        return {
+            "run_started_at": self._wall_start,
+            "duration_seconds": duration,
+            "stats_text": report.getvalue(),
+            "allocations_text": allocations_text,
+            # Same format as Stats.dump_stats(), so the download loads with pstats.Stats(path)
+            "pstats_data": marshal.dumps(stats.stats),
+        }
+
+
+def start_job_profiler(job_id: int) -> JobProfiler:
+    """Create, start and activate a profiler for a job run."""
+    global _active_profiler
+    profiler = JobProfiler(job_id)
+    profiler.start()
+    _active_profiler = profiler
+    return profiler
+
+
+def stop_job_profiler(profiler: JobProfiler) -> Dict[str, Any]:
+    """Deactivate and stop a profiler, returning the artifact fields."""
+    global _active_profiler
+    _active_profiler = None
+    return profiler.stop()
+
+
+@contextmanager
+def thread_profile() -> Iterator[None]:
+    """Profile the current (dispatcher pool) thread when a job profiler is active."""
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Python 3.12+ profiles through sys.monitoring, which is process-wide:
+        # the runner's profile already covers this thread and a second one
+        # can't be enabled.
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        profiler.add_profile(profile)
+
+
+def save_job_profile(job_id: int, artifact: Dict[str, Any], device_count: int, db: Session) -> JobProfile:
+    """Store a profiling artifact for a job run (the caller commits)."""
+    job_profile = JobProfile(job_id=job_id, device_count=device_count, **artifact)
+    db.add(job_profile)
+    db.flush()
+    return job_profile
@@ -49,6 +49,21 @@ def redact(output: str, config: Optional[Dict[str, Any]] = None) -> str:
     if not output:
         return ""
 
+    keywords = get_redaction_keywords(config)
+    lines = []
+    # Simple case-insensitive check
+    if keywords: # Only redact if there are keywords
+        lowered = [keyword.lower() for keyword in keywords]
+        for line in output.splitlines():
+            lines.append(redact_line(line, lowered))
+    else: # If no keywords defined, return original output split/joined
+        lines = output.splitlines()
+
+    return "\n".join(lines)
+
+
+def get_redaction_keywords(config: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Return the redaction keywords from ``worker.redaction.patterns`` or the defaults."""
     keywords = DEFAULT_REDACTION_KEYWORDS
     if config and isinstance(config.get("worker", {}).get("redaction", {}).get("patterns"), list):
         loaded_keywords = config["worker"]["redaction"]["patterns"]
@@ -59,17 +74,12 @@ def redact(output: str, config: Optional[Dict[str, Any]] = None) -> str:
              print("Config provided empty redaction keywords list, using defaults.")
     else:
         print(f"Using default redaction keywords: {keywords}")
+    return keywords
 
 
-    lines = []
-    # Simple case-insensitive check
-    if keywords: # Only redact if there are keywords
-        for line in output.splitlines():
-            if any(keyword.lower() in line.lower() for keyword in keywords):
-                lines.append(REDACTED_LINE_MARKER)
-            else:
-                lines.append(line)
-    else: # If no keywords defined, return original output split/joined
-        lines = output.splitlines()
-
-    return "\n".join(lines)
+def redact_line(line: str, lowered_keywords: List[str]) -> str:
+    """Redact a single line (no line ending) given lower-cased keywords."""
+    lowered_line = line.lower()
+    if any(keyword in lowered_line for keyword in lowered_keywords):
+        return REDACTED_LINE_MARKER
+    return line
@@ -12,7 +12,9 @@ ensure robust device operations even in the face of network issues or device fai
 from typing import List, Any, Dict, Optional, Set
 import time
 
-from netraven.worker import dispatcher
+from netraven.worker import dispatcher, preprobe, profiling, transport_profiles
+from netraven.worker.backends import bastion
+from netraven.worker.timings import aggregate_timings
 # Assume these imports will work once the db module is built
 from netraven.db.session import get_db
 from netraven.db.models import Job, Device, Log, Tag
@@ -21,8 +23,10 @@ from sqlalchemy.orm import Session, joinedload, selectinload
 
 from netraven.config.loader import load_config
 from netraven.services.device_credential_resolver import resolve_device_credentials_batch
+from netraven.services.credential_metrics import flush_credential_attempts
 from netraven.db import log_utils
 from netraven.utils.unified_logger import get_unified_logger
+from netraven.utils import tracing
 
 # Setup basic logging for the runner
 # TODO: Integrate with structlog if used elsewhere
@@ -195,6 +199,120 @@ def record_credential_resolution_metrics(
     # For example, storing these metrics in a database table
     # or updating job metadata
 
+def log_job_timings(job_id: int, results: List[Dict]) -> None:
+    """Log per-job p50/p95/max of the per-device stage timings.
+
+    Each device result carries the ``timings`` recorded by the dispatcher
+    (also stored in ``JobResult.details.timings``). The aggregate is logged
+    with the summary in ``extra`` so it lands in the job log's meta column.
+
+    Args:
+        job_id: ID of the job
+        results: Device results returned by the dispatcher
+    """
+    summary = aggregate_timings(r.get("timings") for r in results)
+    if not summary:
+        return
+    stage_summary = ", ".join(
+        f"{name} p50={stats['p50']} p95={stats['p95']} max={stats['max']}"
+        for name, stats in sorted(summary.items())
+    )
+    logger.log(
+        f"[Job: {job_id}] Stage timings: {stage_summary}",
+        level="INFO",
+        destinations=["stdout", "file", "db"],
+        source="runner",
+        job_id=job_id,
+        log_type="job",
+        extra={"timings": summary}
+    )
+
+def finish_job_profile(job_id: int, profiler: "profiling.JobProfiler", device_count: int, db: Session) -> None:
+    """Stop the job's profiler and store the artifact for this run.
+
+    Failures are logged and never affect the job outcome.
+
+    Args:
+        job_id: ID of the job
+        profiler: Profiler started for this run
+        device_count: Number of devices dispatched in the run
+        db: SQLAlchemy session (the caller commits)
+    """
+    try:
+        artifact = profiling.stop_job_profiler(profiler)
+        job_profile = profiling.save_job_profile(job_id, artifact, device_count, db)
+        logger.log(
+            f"[Job: {job_id}] Profile stored (ID: {job_profile.id}, {artifact['duration_seconds']:.2f}s). "
+            f"Download via /jobs/{job_id}/profiles/{job_profile.id}/download",
+            level="INFO",
+            destinations=["stdout", "file", "db"],
+            source="runner",
+            job_id=job_id,
+            log_type="job",
+            extra={"job_profile_id": job_profile.id}
+        )
+    except Exception as e:
+        db.rollback()
+        logger.log(f"[Job: {job_id}] Failed to store job profile: {e}", level="ERROR", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+
+def load_transport_profiles(job_id: int, devices: List[Any], db: Session) -> None:
+    """Load the stored SSH transport profiles of the job's devices in one query.
+
+    Failures are logged; devices are then connected with the full algorithm offer.
+    """
+    try:
+        count = transport_profiles.load_profiles([getattr(d, 'id', None) for d in devices], db)
+        logger.log(f"[Job: {job_id}] Loaded SSH transport profiles for {count} of {len(devices)} device(s)", level="DEBUG", destinations=["stdout", "file"], source="runner", job_id=job_id)
+    except Exception as e:
+        db.rollback()
+        logger.log(f"[Job: {job_id}] Failed to load SSH transport profiles: {e}", level="WARNING", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+
+def save_transport_profiles(job_id: int, db: Session) -> None:
+    """Store the SSH transport profiles that changed during the run (the caller commits).
+
+    Failures are logged and never affect the job outcome.
+    """
+    try:
+        count = transport_profiles.save_changed_profiles(db)
+        if count:
+            logger.log(f"[Job: {job_id}] Stored {count} updated SSH transport profile(s)", level="INFO", destinations=["stdout", "file"], source="runner", job_id=job_id)
+    except Exception as e:
+        db.rollback()
+        logger.log(f"[Job: {job_id}] Failed to store SSH transport profiles: {e}", level="ERROR", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+
+def attach_device_bastions(job_id: int, devices: List[Any], db: Session) -> None:
+    """Attach each device's bastion (own or via its tags), loaded in one query.
+
+    Failures are logged; devices are then connected directly.
+    """
+    try:
+        count = bastion.attach_bastions(devices, db)
+        if count:
+            logger.log(f"[Job: {job_id}] {count} of {len(devices)} device(s) connect through a bastion", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+    except Exception as e:
+        db.rollback()
+        logger.log(f"[Job: {job_id}] Failed to load bastions: {e}", level="ERROR", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+
+def preprobe_devices(job_id: int, devices: List[Any], config: Optional[Dict[str, Any]]) -> Dict[Any, Any]:
+    """TCP pre-probe of the job's devices (if enabled), so dead ones skip the SSH timeout.
+
+    Failures of the probe itself are logged; all devices are then dispatched.
+
+    Returns:
+        ErrorInfo per ID of each unreachable device
+    """
+    if not preprobe.preprobe_enabled(config):
+        return {}
+    start = time.perf_counter()
+    try:
+        unreachable = preprobe.probe_job_devices(devices, config)
+    except Exception as e:
+        logger.log(f"[Job: {job_id}] TCP pre-probe failed, dispatching all devices: {e}", level="ERROR", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+        return {}
+    level = "WARNING" if unreachable else "INFO"
+    logger.log(f"[Job: {job_id}] TCP pre-probe: {len(unreachable)} of {len(devices)} device(s) unreachable ({time.perf_counter() - start:.2f}s)", level=level, destinations=["stdout", "file", "db"], source="runner", job_id=job_id, log_type="job")
+    return unreachable
+
 # --- Main Job Runner --- 
 
 def run_job(job_id: int, db: Optional[Session] = None) -> None:
@@ -226,6 +344,7 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
         - Sets appropriate final status based on task results
     """
     start_time = time.time()
+    job_span = tracing.start_span("run_job", {"job.id": job_id})
     logger.log(f"[Job: {job_id}] Received job request. Starting...", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id, log_type="job")
     
     # Determine if we need to manage the session lifecycle
@@ -242,6 +361,8 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
 
     job_failed = False # Flag to track if *any* device task failed
     final_status = "UNKNOWN"
+    profiler = None
+    device_count = 0
 
     try:
         # Update status using the determined session
@@ -270,6 +391,14 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
             job_failed = True
             raise Exception("Job not found")
 
+        # Profile this run if requested (flag is one-shot)
+        if job_obj.profile_next_run:
+            job_obj.profile_next_run = False
+            if session_managed:
+                db_to_use.commit()
+            profiler = profiling.start_job_profiler(job_id)
+            logger.log(f"[Job: {job_id}] Profiling this run (cProfile + tracemalloc).", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id, log_type="job")
+
         if job_obj.device_id is not None:
             # Single-device job
             device = db_to_use.query(Device).filter(Device.id == job_obj.device_id).first()
@@ -320,13 +449,19 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
                     device_count = len(devices_with_credentials)
                     logger.log(f"[Job: {job_id}] Handing off {device_count} device(s) with credentials to dispatcher...", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id, log_type="job")
                     
+                    load_transport_profiles(job_id, devices_with_credentials, db_to_use)
+                    attach_device_bastions(job_id, devices_with_credentials, db_to_use)
+                    unreachable = preprobe_devices(job_id, devices_with_credentials, config)
+
                     # Pass devices with credentials instead of original devices
                     results: List[Dict] = dispatcher.dispatch_tasks(
                         devices_with_credentials,
                         job_id, 
                         config=config, 
-                        db=db_to_use
+                        db=db_to_use,
+                        unreachable=unreachable
                     )
+                    save_transport_profiles(job_id, db_to_use)
 
                     # 3. Process results
                     if not results or len(results) != device_count:
@@ -346,6 +481,7 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
                         success_count = sum(1 for r in results if r.get("success"))
                         failure_count = device_count - success_count
                         logger.log(f"[Job: {job_id}] Dispatcher finished. Success: {success_count}, Failure: {failure_count}", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id, log_type="job")
+                        log_job_timings(job_id, results)
 
                         if failure_count == 0:
                             final_status = JobStatus.COMPLETED_SUCCESS
@@ -421,6 +557,10 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
     finally:
         # Always update job status, even if an exception occurred
         end_time = time.time()
+        bastion.close_all()
+        flush_credential_attempts(db_to_use, job_id)
+        if profiler is not None:
+            finish_job_profile(job_id, profiler, device_count, db_to_use)
         try:
             update_job_status(job_id, final_status, db_to_use, start_time=start_time, end_time=end_time)
             
@@ -436,7 +576,11 @@ def run_job(job_id: int, db: Optional[Session] = None) -> None:
     # Final logging
     execution_time = end_time - start_time
     success_msg = "completed" if not job_failed else "failed"
-    logger.log(f"[Job: {job_id}] Job {success_msg} with status '{final_status}' in {execution_time:.2f}s", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id)
+    logger.log(f"[Job: {job_id}] Job {success_msg} with status '{final_status}' in {execution_time:.2f}s", level="INFO", destinations=["stdout", "file", "db"], source="runner", job_id=job_id, extra={"trace_id": job_span.trace_id})
+
+    job_span.set_attributes({"job.status": str(final_status), "job.failed": job_failed})
+    job_span.end()
+    tracing.flush()
 
 # Example of how this might be called (e.g., from setup/dev_runner.py)
 # if __name__ == "__main__":
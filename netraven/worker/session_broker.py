@@ -0,0 +1,464 @@
+"""Long-lived SSH session broker for frequently polled devices.
+
+Hourly show-command jobs against the same core devices pay the full TCP,
+SSH and login setup on every run. The broker is an optional separate process
+that keeps authenticated Netmiko sessions to opted-in devices open between
+runs, so a job costs a command round trip instead of a new login.
+
+Running it::
+
+    python -m netraven.worker.session_broker
+
+Workers talk to it over a Unix socket (``worker.session_broker.socket_path``)
+that must be shared with the worker processes. Each worker connection leases
+one device session exclusively:
+
+1. ``{"op": "lease", "device": {...}, "job_id": 1}``: reuse an idle session for
+   the device and credentials, or log in if the device is below
+   ``max_sessions_per_device``, or wait up to ``lease_timeout`` for one
+   to be returned.
+2. ``{"op": "send", "command": "show version"}``: run a command on the leased
+   session. Netmiko errors come back with their type and are re-raised
+   by the client.
+3. ``{"op": "release"}`` (or closing the connection): the session goes back
+   to the idle pool, unless a command failed in a way that may have left it
+   unusable, in which case it is closed.
+
+Messages are single-line JSON. Idle sessions get SSH keepalives every
+``keepalive_interval`` seconds. Sessions unused for ``idle_timeout`` seconds,
+or whose transport has died, are closed by a sweeper thread.
+
+Devices opt in through tags. ``backends.open_session`` leases a brokered
+session for any device carrying one of ``worker.session_broker.tags``, and
+falls back to a direct login when the broker is not running.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from netmiko.exceptions import (
+    ConnectionException,
+    NetmikoAuthenticationException,
+    NetmikoTimeoutException,
+    ReadTimeout,
+)
+
+from netraven.utils.unified_logger import get_unified_logger
+
+logger = get_unified_logger()
+
+DEFAULT_SOCKET_PATH = "/tmp/netraven-session-broker.sock"
+DEFAULT_MAX_SESSIONS_PER_DEVICE = 2
+DEFAULT_IDLE_TIMEOUT = 900  # seconds
+DEFAULT_KEEPALIVE_INTERVAL = 30  # seconds
+DEFAULT_LEASE_TIMEOUT = 30  # seconds
+SWEEP_INTERVAL = 10  # seconds
+
+# Device attributes sent to the broker to open a session
+DEVICE_FIELDS = ("id", "hostname", "ip_address", "port", "device_type", "username", "password")
+
+# Errors re-raised by the client with their original type
+ERROR_TYPES = {
+    cls.__name__: cls
+    for cls in (NetmikoTimeoutException, NetmikoAuthenticationException, ReadTimeout, ConnectionException, ValueError)
+}
+
+
+def get_broker_settings(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Broker settings from ``worker.session_broker`` with defaults applied."""
+    worker_cfg = (config or {}).get("worker") or {}
+    broker_cfg = worker_cfg.get("session_broker") or {}
+    tags = broker_cfg.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    return {
+        "enabled": str(broker_cfg.get("enabled", False)).lower() in ("1", "true", "yes", "on"),
+        "socket_path": broker_cfg.get("socket_path") or DEFAULT_SOCKET_PATH,
+        "tags": set(tags),
+        "max_sessions_per_device": int(broker_cfg.get("max_sessions_per_device") or DEFAULT_MAX_SESSIONS_PER_DEVICE),
+        "idle_timeout": float(broker_cfg.get("idle_timeout") or DEFAULT_IDLE_TIMEOUT),
+        "keepalive_interval": int(broker_cfg.get("keepalive_interval") or DEFAULT_KEEPALIVE_INTERVAL),
+        "lease_timeout": float(broker_cfg.get("lease_timeout") or DEFAULT_LEASE_TIMEOUT),
+    }
+
+
+def _session_key(device: Dict[str, Any]) -> Tuple:
+    """Sessions are shared only between leases with the same target and credentials."""
+    password_hash = hashlib.sha256(str(device.get("password") or "").encode()).hexdigest()
+    return (device.get("id"), device.get("ip_address"), device.get("port") or 22, device.get("username"), password_hash)
+
+
+def _send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+# --- Broker process ---
+
+class _PooledSession:
+    def __init__(self, key: Tuple, session: Any):
+        self.key = key
+        self.session = session
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """Authenticated sessions per device, with a per-device limit.
+
+    Args:
+        session_factory: ``(device, job_id) -> open session`` (``send``/``close``)
+        max_sessions_per_device: Open sessions allowed per device (idle + leased)
+        idle_timeout: Seconds an idle session is kept open
+    """
+
+    def __init__(self, session_factory: Callable, max_sessions_per_device: int, idle_timeout: float):
+        self.session_factory = session_factory
+        self.max_sessions_per_device = max_sessions_per_device
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[Tuple, List[_PooledSession]] = {}
+        self._open_counts: Dict[Tuple, int] = {}
+        self._condition = threading.Condition()
+
+    def lease(self, device: Dict[str, Any], job_id: Optional[int], timeout: float) -> Tuple[_PooledSession, bool]:
+        """Return ``(pooled_session, reused)`` for exclusive use until :meth:`release`.
+
+        The lock only guards the pool's bookkeeping: idle sessions are probed
+        and logins happen after it is released, so one slow device doesn't
+        hold up leases and releases for the others.
+
+        Raises:
+            NetmikoTimeoutException: If no session frees up within the timeout
+            Exception: Connection errors from the session factory
+        """
+        key = _session_key(device)
+        deadline = time.monotonic() + timeout
+        while True:
+            pooled = None
+            with self._condition:
+                while True:
+                    idle = self._idle.get(key)
+                    if idle:
+                        pooled = idle.pop()
+                        break
+                    if self._open_counts.get(key, 0) < self.max_sessions_per_device:
+                        # Reserve the slot, then log in without holding the lock
+                        self._open_counts[key] = self._open_counts.get(key, 0) + 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise NetmikoTimeoutException(
+                            f"No brokered session to {device.get('hostname')} became free within {timeout}s "
+                            f"({self.max_sessions_per_device} in use)"
+                        )
+                    self._condition.wait(remaining)
+            if pooled is None:
+                break
+            if _is_alive(pooled.session):
+                pooled.session.job_id = job_id
+                return pooled, True
+            self._discard(pooled)
+        try:
+            session = self.session_factory(SimpleNamespace(**device), job_id)
+        except Exception:
+            with self._condition:
+                self._open_counts[key] -= 1
+                self._condition.notify()
+            raise
+        return _PooledSession(key, session), False
+
+    def release(self, pooled: _PooledSession, reusable: bool = True) -> None:
+        """Return a leased session to the idle pool, or close it."""
+        if not reusable:
+            self._discard(pooled)
+            return
+        with self._condition:
+            pooled.last_used = time.monotonic()
+            self._idle.setdefault(pooled.key, []).append(pooled)
+            self._condition.notify_all()
+
+    def evict_idle(self) -> int:
+        """Close sessions idle for longer than the idle timeout or no longer alive.
+
+        The remaining idle sessions are taken out of the pool while they are
+        probed, outside the lock, and put back if still alive.
+        """
+        now = time.monotonic()
+        expired, to_probe = [], []
+        with self._condition:
+            for idle in self._idle.values():
+                for pooled in idle:
+                    (expired if now - pooled.last_used > self.idle_timeout else to_probe).append(pooled)
+                idle.clear()
+        alive = [pooled for pooled in to_probe if _is_alive(pooled.session)]
+        evicted = expired + [pooled for pooled in to_probe if pooled not in alive]
+        with self._condition:
+            for pooled in alive:
+                self._idle.setdefault(pooled.key, []).append(pooled)
+            if alive:
+                self._condition.notify_all()
+        for pooled in evicted:
+            self._discard(pooled)
+        return len(evicted)
+
+    def close_all(self) -> None:
+        with self._condition:
+            pooled_sessions = [pooled for idle in self._idle.values() for pooled in idle]
+            self._idle.clear()
+        for pooled in pooled_sessions:
+            self._discard(pooled)
+
+    def _discard(self, pooled: _PooledSession) -> None:
+        """Free a session's slot and close it (call without holding the lock)."""
+        with self._condition:
+            self._open_counts[pooled.key] = max(0, self._open_counts.get(pooled.key, 1) - 1)
+            self._condition.notify_all()
+        try:
+            pooled.session.close()
+        except Exception:
+            pass
+
+
+def _is_alive(session: Any) -> bool:
+    connection = getattr(session, "connection", None)
+    if connection is None or not hasattr(connection, "is_alive"):
+        return True
+    try:
+        return bool(connection.is_alive())
+    except Exception:
+        return False
+
+
+def netmiko_session_factory(config: Dict[str, Any], keepalive_interval: int) -> Callable:
+    """Open Netmiko sessions with SSH keepalives enabled."""
+    from netraven.worker.backends.netmiko_driver import NetmikoSession
+
+    def factory(device: Any, job_id: Optional[int]) -> Any:
+        session = NetmikoSession(device, job_id=job_id, config=config).open()
+        client = getattr(session.connection, "remote_conn_pre", None)
+        transport = client.get_transport() if hasattr(client, "get_transport") else None
+        if transport is not None:
+            transport.set_keepalive(keepalive_interval)
+        return session
+
+    return factory
+
+
+class _LeaseHandler(socketserver.StreamRequestHandler):
+    """Serves one worker connection: one lease, any number of sends."""
+
+    def handle(self) -> None:
+        pool: SessionPool = self.server.pool
+        pooled = None
+        reusable = True
+        try:
+            for line in self.rfile:
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "lease" and pooled is None:
+                    try:
+                        pooled, reused = pool.lease(request["device"], request.get("job_id"), self.server.lease_timeout)
+                    except Exception as e:
+                        self._reply_error(e)
+                        return
+                    _send_message(self.connection, {"ok": True, "reused": reused})
+                elif op == "send" and pooled is not None:
+                    try:
+                        output = pooled.session.send(request.get("command"))
+                    except Exception as e:
+                        # No output leaves the session usable; anything else may not
+                        reusable = reusable and isinstance(e, ValueError)
+                        self._reply_error(e)
+                        continue
+                    _send_message(self.connection, {"ok": True, "output": output})
+                elif op == "release":
+                    break
+                else:
+                    _send_message(self.connection, {"ok": False, "error_type": "ValueError", "error": f"Unexpected op {op!r}"})
+        except (OSError, ValueError):
+            reusable = False
+        finally:
+            if pooled is not None:
+                pool.release(pooled, reusable=reusable)
+
+    def _reply_error(self, error: Exception) -> None:
+        try:
+            _send_message(self.connection, {"ok": False, "error_type": type(error).__name__, "error": str(error)})
+        except OSError:
+            pass
+
+
+class SessionBroker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server leasing pooled device sessions to workers."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, pool: SessionPool, lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.pool = pool
+        self.lease_timeout = lease_timeout
+        self._stop = threading.Event()
+        super().__init__(socket_path, _LeaseHandler)
+        os.chmod(socket_path, 0o600)  # Leases carry device credentials
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL) -> threading.Thread:
+        def sweep():
+            while not self._stop.wait(interval):
+                evicted = self.pool.evict_idle()
+                if evicted:
+                    logger.log(f"Session broker closed {evicted} idle session(s)", level="DEBUG", destinations=["stdout"], source="session_broker")
+
+        thread = threading.Thread(target=sweep, name="session-broker-sweeper", daemon=True)
+        thread.start()
+        return thread
+
+    def server_close(self) -> None:
+        self._stop.set()
+        super().server_close()
+        self.pool.close_all()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def serve(config: Optional[Dict[str, Any]] = None) -> None:
+    """Run the broker until interrupted."""
+    if config is None:
+        from netraven.config.loader import load_config
+        config = load_config()
+    settings = get_broker_settings(config)
+    pool = SessionPool(
+        netmiko_session_factory(config, settings["keepalive_interval"]),
+        settings["max_sessions_per_device"],
+        settings["idle_timeout"],
+    )
+    broker = SessionBroker(settings["socket_path"], pool, settings["lease_timeout"])
+    broker.start_sweeper()
+    logger.log(
+        f"Session broker listening on {settings['socket_path']} "
+        f"(max {settings['max_sessions_per_device']} sessions/device, idle timeout {settings['idle_timeout']:.0f}s)",
+        level="INFO",
+        destinations=["stdout", "file"],
+        source="session_broker"
+    )
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.server_close()
+
+
+# --- Worker side ---
+
+class BrokerSession:
+    """A device session leased from the broker, with the driver session API."""
+
+    def __init__(self, device: Any, job_id: Optional[int], socket_path: str, timeout: float):
+        self.device = device
+        self.job_id = job_id
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.reused = False
+        self._sock = None
+        self._reader = None
+
+    def open(self) -> "BrokerSession":
+        """Connect to the broker and lease a session.
+
+        Raises:
+            OSError: If the broker is not reachable
+            NetmikoTimeoutException, NetmikoAuthenticationException, ...: If
+                the broker could not open a session to the device
+        """
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(self.timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError:
+            self.close()
+            raise
+        self._reader = self._sock.makefile("rb")
+        device = {field: getattr(self.device, field, None) for field in DEVICE_FIELDS}
+        try:
+            reply = self._request({"op": "lease", "device": device, "job_id": self.job_id})
+        except Exception:
+            self.close()
+            raise
+        self.reused = reply.get("reused", False)
+        return self
+
+    def send(self, command: Optional[str] = None) -> str:
+        return self._request({"op": "send", "command": command})["output"]
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        if self._sock is None:
+            raise RuntimeError(f"Brokered session to {getattr(self.device, 'hostname', None)} is not open")
+        _send_message(self._sock, message)
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionException("Session broker closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            error_cls = ERROR_TYPES.get(reply.get("error_type"), ConnectionException)
+            raise error_cls(reply.get("error"))
+        return reply
+
+    def close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+        try:
+            _send_message(sock, {"op": "release"})
+        except OSError:
+            pass
+        if self._reader is not None:
+            self._reader.close()
+        sock.close()
+
+    def __enter__(self) -> "BrokerSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def uses_broker(device: Any, config: Optional[Dict[str, Any]]) -> bool:
+    """Whether a device's sessions should be leased from the broker.
+
+    Devices reached through a bastion always connect from the worker.
+    """
+    settings = get_broker_settings(config)
+    if not settings["enabled"] or not settings["tags"] or getattr(device, "bastion", None):
+        return False
+    tag_names = {getattr(tag, "name", tag) for tag in (getattr(device, "tags", None) or [])}
+    return bool(tag_names & settings["tags"])
+
+
+def open_broker_session(device: Any, job_id: Optional[int], config: Optional[Dict[str, Any]]) -> Optional[BrokerSession]:
+    """Lease a brokered session, or return None if the broker isn't running."""
+    settings = get_broker_settings(config)
+    # Allow for a full login plus waiting for a free session
+    worker_cfg = (config or {}).get("worker") or {}
+    timeout = settings["lease_timeout"] + float(worker_cfg.get("connection_timeout") or 60) + float(worker_cfg.get("command_timeout") or 120)
+    try:
+        return BrokerSession(device, job_id, settings["socket_path"], timeout).open()
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        logger.log(
+            f"[Job: {job_id}] Session broker unavailable ({e}), connecting directly",
+            level="WARNING",
+            destinations=["stdout", "file"],
+            source="session_broker",
+            job_id=job_id,
+            device_id=getattr(device, "id", None)
+        )
+        return None
+
+
+if __name__ == "__main__":
+    serve()
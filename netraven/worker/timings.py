@@ -0,0 +1,169 @@
+"""Per-stage timing instrumentation for device runs.
+
+Every device task gets its own :class:`StageTimer`, bound to the worker thread
+running it. Code anywhere in the call chain (dispatcher, drivers, job
+handlers) records into the current timer without threading it through
+function signatures:
+
+    from netraven.worker import timings
+
+    with timings.stage("redaction"):
+        redacted = redactor.redact(output, config)
+    timings.add_count("bytes_received", len(output))
+
+When no timer is active (e.g. a handler called directly from a test) these
+calls are no-ops. Each ``stage`` block is also a tracing span (see
+:mod:`netraven.utils.tracing`). The dispatcher stores ``timer.to_dict()`` under
+``JobResult.details.timings`` and the runner logs per-job percentiles built
+with :func:`aggregate_timings`.
+
+Stage names used across the worker:
+
+- queue_wait: Time between task submission and a pool thread picking it up
+- tcp_connect: TCP connection to the device
+- ssh_handshake: SSH version exchange and key exchange (paramiko driver)
+- auth: SSH authentication (paramiko driver)
+- ssh_handshake_auth: SSH handshake, key exchange, authentication and
+  session preparation as one stage, for the netmiko and asyncssh drivers
+  (Netmiko's connection open and asyncssh's ``connect`` run them as one call)
+- enable: Entering privileged mode
+- paging: Disabling terminal paging (drivers that send the command themselves)
+- command: Command execution and output read
+- redaction / hashing / db_write / git_write: Post-processing of the output
+- db_lookup: Reading the latest stored snapshot to deduplicate against
+"""
+
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from netraven.utils import tracing
+
+_local = threading.local()
+
+
+class StageTimer:
+    """Accumulates stage durations and counters for one device task."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block and add its duration to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add a duration (in seconds) to the named stage."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_count(self, name: str, value: int) -> None:
+        """Add to a named counter (e.g. bytes received)."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialise as ``{"<stage>_ms": float, ..., "<counter>": int}`` for JSONB storage."""
+        data: Dict[str, Any] = {f"{name}_ms": round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+        data.update(self.counters)
+        return data
+
+
+def start_timer() -> StageTimer:
+    """Bind a fresh timer to the current thread and return it."""
+    timer = StageTimer()
+    _local.timer = timer
+    return timer
+
+
+def current_timer() -> Optional[StageTimer]:
+    """Return the timer bound to the current thread, if any."""
+    return getattr(_local, "timer", None)
+
+
+def clear_timer() -> None:
+    """Unbind the current thread's timer."""
+    _local.timer = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block into the current thread's timer and trace it as a span.
+
+    The timer part is a no-op without a timer; the span is a no-op when
+    tracing is disabled.
+    """
+    timer = current_timer()
+    with tracing.span(name):
+        if timer is None:
+            yield
+            return
+        with timer.stage(name):
+            yield
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of a function into the named stage."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add(name: str, seconds: float) -> None:
+    """Add a duration to the current thread's timer (no-op without one)."""
+    timer = current_timer()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def add_count(name: str, value: int) -> None:
+    """Add to a counter on the current thread's timer (no-op without one)."""
+    timer = current_timer()
+    if timer is not None:
+        timer.add_count(name, value)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(int(math.ceil(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def aggregate_timings(timings: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Dict[str, float]]:
+    """Aggregate per-device timing dicts into p50/p95/max per metric.
+
+    Args:
+        timings: Iterable of ``StageTimer.to_dict()`` results (None entries are skipped)
+
+    Returns:
+        Dict mapping each metric name to ``{"count", "p50", "p95", "max"}``
+    """
+    values: Dict[str, List[float]] = {}
+    for entry in timings:
+        if not entry:
+            continue
+        for name, value in entry.items():
+            if isinstance(value, (int, float)):
+                values.setdefault(name, []).append(value)
+
+    summary = {}
+    for name, samples in values.items():
+        samples.sort()
+        summary[name] = {
+            "count": len(samples),
+            "p50": _percentile(samples, 50),
+            "p95": _percentile(samples, 95),
+            "max": samples[-1],
+        }
+    return summary
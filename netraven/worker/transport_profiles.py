@@ -0,0 +1,104 @@
+"""Per-device SSH transport profiles for the current job run.
+
+After a successful login the SSH drivers record what was negotiated with the
+device (KEX, cipher, MAC, host key type) and whether enable mode had to be
+entered. On the next run the recorded algorithms are offered first and only,
+per connection, on the connection's own Paramiko transport, so a device that
+only speaks legacy KEX is no longer hit with a full modern handshake that
+fails. If the device no longer accepts the recorded algorithms the driver
+drops the profile and reconnects once with the full offer.
+
+The runner loads the profiles of all job devices in one query before
+dispatch (:func:`load_profiles`) and writes back only the profiles that
+changed in one batch afterwards (:func:`save_changed_profiles`). Only one
+job runs per RQ work horse, so the loaded profiles live in a module global;
+the dispatcher threads access it under a lock.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from netraven.db.models import DeviceTransportProfile
+
+ALGORITHM_FIELDS = ("kex", "cipher", "mac", "host_key_type")
+PROFILE_FIELDS = ALGORITHM_FIELDS + ("legacy_required", "enable_required")
+
+_lock = threading.Lock()
+_profiles: Dict[int, Dict[str, Any]] = {}
+_changed = set()
+
+
+def load_profiles(device_ids: Iterable[int], db: Session) -> int:
+    """Load the stored profiles for a job's devices, replacing any previous run's.
+
+    Returns:
+        Number of devices with a stored profile
+    """
+    device_ids = [device_id for device_id in set(device_ids) if device_id]
+    rows = []
+    if device_ids:
+        rows = db.query(DeviceTransportProfile).filter(DeviceTransportProfile.device_id.in_(device_ids)).all()
+    with _lock:
+        _profiles.clear()
+        _changed.clear()
+        for row in rows:
+            _profiles[row.device_id] = {field: getattr(row, field) for field in PROFILE_FIELDS}
+    return len(rows)
+
+
+def get_profile(device_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Profile to offer when connecting to a device, or None if none is known."""
+    with _lock:
+        profile = _profiles.get(device_id)
+        return dict(profile) if profile else None
+
+
+def record_profile(device_id: Optional[int], negotiated: Dict[str, Any]) -> None:
+    """Record what a connection negotiated; the profile is saved only if it changed.
+
+    Connections that report no algorithms (telnet, for example) are ignored.
+    """
+    if not device_id or not any(negotiated.get(field) for field in ALGORITHM_FIELDS):
+        return
+    profile = {field: negotiated.get(field) for field in PROFILE_FIELDS}
+    profile["legacy_required"] = bool(profile["legacy_required"])
+    with _lock:
+        if _profiles.get(device_id) != profile:
+            _profiles[device_id] = profile
+            _changed.add(device_id)
+
+
+def discard_profile(device_id: Optional[int]) -> None:
+    """Stop offering a profile the device rejected (a new one is recorded on success)."""
+    with _lock:
+        _profiles.pop(device_id, None)
+
+
+def save_changed_profiles(db: Session) -> int:
+    """Upsert the profiles recorded during the run that differ from the stored ones.
+
+    The caller commits.
+
+    Returns:
+        Number of profiles written
+    """
+    with _lock:
+        changed = {device_id: _profiles[device_id] for device_id in _changed if device_id in _profiles}
+        _changed.clear()
+    if not changed:
+        return 0
+    existing = {
+        row.device_id: row
+        for row in db.query(DeviceTransportProfile).filter(DeviceTransportProfile.device_id.in_(list(changed))).all()
+    }
+    for device_id, profile in changed.items():
+        row = existing.get(device_id)
+        if row is None:
+            db.add(DeviceTransportProfile(device_id=device_id, **profile))
+        else:
+            for field, value in profile.items():
+                setattr(row, field, value)
+    db.flush()
+    return len(changed)
@@ -1,6 +1,8 @@
 import logging
 from redis import Redis
 from rq import Worker
+from netraven.config.loader import load_config
+from netraven.utils import metrics
 from netraven.utils.unified_logger import get_unified_logger
 
 ## Entry point file for starting worker process.
@@ -29,10 +31,25 @@ logging.getLogger('rq.worker').setLevel(logging.DEBUG)
 logging.getLogger('rq').propagate = False
 logging.getLogger('rq.worker').propagate = False
 
+# --- Metrics exporter ---
+class MetricsWorker(Worker):
+    """RQ worker that clears live gauge samples of each finished work horse."""
+
+    def monitor_work_horse(self, job, queue):
+        horse_pid = self.horse_pid
+        try:
+            return super().monitor_work_horse(job, queue)
+        finally:
+            metrics.mark_process_dead(horse_pid)
+
+metrics_port = load_config().get("metrics", {}).get("worker_port")
+if metrics.start_metrics_server(metrics_port):
+    logger.log(f"Metrics exporter listening on port {metrics_port}", level="INFO", destinations=["stdout", "file", "db"], source="worker")
+
 # --- Start the RQ worker ---
 redis_conn = Redis.from_url("redis://redis:6379/0")
 logger.log(f"[INFO] Starting rq worker process...", level="INFO", destinations=["stdout", "file", "db"], source="worker")
     
 redis_conn = Redis.from_url("redis://redis:6379/0")
-worker = Worker(['default', 'high', 'low'], connection=redis_conn)
+worker = MetricsWorker(['default', 'high', 'low'], connection=redis_conn)
 worker.work()
\ No newline at end of file
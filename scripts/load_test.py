@@ -0,0 +1,215 @@
+"""End-to-end load test using the simulated device driver.
+
+Seeds N synthetic devices (tagged ``loadtest``) plus a credential and a
+config_backup job for that tag, then runs the job through the normal
+``run_job`` -> ``dispatch_tasks`` -> job handler -> database path with the
+``simulated`` backend driver. Reports throughput (jobs/hour, devices/sec),
+database writes/sec and peak memory.
+
+Usage:
+    python scripts/load_test.py --devices 10000 --threads 50
+    python scripts/load_test.py --devices 50000 --latency-mean-ms 100 --failure-rate 0.02
+    python scripts/load_test.py --cleanup
+
+Only runs against the development environment (NETRAVEN_ENV=dev).
+"""
+
+import argparse
+import ipaddress
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import func, insert
+
+from netraven.config.loader import load_config, merge_dicts
+from netraven.db.session import get_db
+from netraven.db.models import Device, Tag, Job, Log, JobResult, DeviceConfiguration, Credential
+from netraven.db.models.tag import device_tag_association
+from netraven.services import credential_index
+from netraven.worker import runner
+from netraven.worker.backends import simulated_driver
+
+# Environment guard: Only run in dev
+if os.environ.get("NETRAVEN_ENV", "dev") != "dev":
+    print("Load test script only runs in development environment.")
+    exit(1)
+
+LOADTEST_TAG = "loadtest"
+HOSTNAME_PREFIX = "loadtest-"
+# Synthetic devices are numbered from this network so they never collide
+# with real device addresses in a development database.
+BASE_NETWORK = ipaddress.IPv4Address("100.64.0.0")
+INSERT_BATCH_SIZE = 5000
+
+
+def get_or_create_tag(db):
+    tag = db.query(Tag).filter(Tag.name == LOADTEST_TAG).first()
+    if not tag:
+        tag = Tag(name=LOADTEST_TAG, type="custom", description="Synthetic devices for load testing")
+        db.add(tag)
+        db.commit()
+    return tag
+
+
+def seed_devices(db, tag, count):
+    """Ensure ``count`` synthetic devices exist and are attached to the tag."""
+    existing = db.query(func.count(Device.id)).filter(Device.hostname.like(f"{HOSTNAME_PREFIX}%")).scalar()
+    if existing >= count:
+        print(f"{existing} synthetic devices already present.")
+        return
+
+    print(f"Seeding {count - existing} synthetic devices...")
+    for start in range(existing, count, INSERT_BATCH_SIZE):
+        end = min(start + INSERT_BATCH_SIZE, count)
+        rows = [
+            {
+                "hostname": f"{HOSTNAME_PREFIX}{i:06d}",
+                "ip_address": str(BASE_NETWORK + i + 1),
+                "device_type": "cisco_ios",
+                "port": 22,
+                "description": "Simulated load-test device",
+            }
+            for i in range(start, end)
+        ]
+        device_ids = db.execute(insert(Device.__table__).returning(Device.__table__.c.id), rows).scalars().all()
+        db.execute(
+            insert(device_tag_association),
+            [{"device_id": device_id, "tag_id": tag.id} for device_id in device_ids],
+        )
+        db.commit()
+        print(f"  {end}/{count} devices")
+    credential_index.bump_version()
+
+
+def get_or_create_job(db, tag):
+    if not db.query(Credential).filter(Credential.username == "loadtest").first():
+        cred = Credential.create_with_encrypted_password(
+            username="loadtest", password="loadtest", description="Load test credential", tags=[tag]
+        )
+        db.add(cred)
+    job = db.query(Job).filter(Job.name == "Load test backup").first()
+    if not job:
+        job = Job(name="Load test backup", job_type="config_backup", description="Simulated load test", tags=[tag], is_enabled=False)
+        db.add(job)
+    db.commit()
+    return job
+
+
+def count_writes(db):
+    """Return row counts of the tables written during a job run."""
+    return {
+        "device_configurations": db.query(func.count(DeviceConfiguration.id)).scalar(),
+        "job_results": db.query(func.count(JobResult.id)).scalar(),
+        "logs": db.query(func.count(Log.id)).scalar(),
+    }
+
+
+def cleanup(db):
+    """Delete all synthetic devices, the load test job, credential and tag."""
+    deleted = db.query(Device).filter(Device.hostname.like(f"{HOSTNAME_PREFIX}%")).delete(synchronize_session=False)
+    db.query(Job).filter(Job.name == "Load test backup").delete(synchronize_session=False)
+    cred = db.query(Credential).filter(Credential.username == "loadtest").first()
+    if cred:
+        db.delete(cred)
+    tag = db.query(Tag).filter(Tag.name == LOADTEST_TAG).first()
+    if tag:
+        db.delete(tag)
+    db.commit()
+    credential_index.bump_version()
+    print(f"Removed {deleted} synthetic devices and load test fixtures.")
+
+
+def build_overrides(args):
+    """Build the configuration overrides that select and tune the simulator."""
+    return {
+        "worker": {
+            "driver": "simulated",
+            "thread_pool_size": args.threads,
+            "retry_attempts": args.retries,
+            "retry_backoff": 0,
+            "simulator": {
+                "config_size_bytes": args.config_size,
+                "latency_distribution": args.latency_distribution,
+                "latency_mean_ms": args.latency_mean_ms,
+                "latency_stddev_ms": args.latency_stddev_ms,
+                "failure_rate": args.failure_rate,
+                "timeout_rate": args.timeout_rate,
+                "change_probability": args.change_probability,
+                "seed": args.seed,
+            },
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a config_backup job against simulated devices.")
+    parser.add_argument("--devices", type=int, default=1000, help="Number of synthetic devices to seed")
+    parser.add_argument("--threads", type=int, default=50, help="Dispatcher thread pool size")
+    parser.add_argument("--retries", type=int, default=0, help="Retry attempts per device")
+    parser.add_argument("--config-size", type=int, default=20000, help="Approximate config size in bytes")
+    parser.add_argument("--latency-distribution", default="lognormal", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--latency-mean-ms", type=float, default=250)
+    parser.add_argument("--latency-stddev-ms", type=float, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--change-probability", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--runs", type=int, default=1, help="Number of consecutive job runs")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report peak Python heap usage")
+    parser.add_argument("--cleanup", action="store_true", help="Remove synthetic devices and exit")
+    args = parser.parse_args()
+
+    db = next(get_db())
+    try:
+        if args.cleanup:
+            cleanup(db)
+            return 0
+
+        tag = get_or_create_tag(db)
+        seed_devices(db, tag, args.devices)
+        job = get_or_create_job(db, tag)
+        job_id = job.id
+
+        # run_job loads its own configuration; layer the simulator settings
+        # over it so typed values (ints/floats) reach the dispatcher intact.
+        overrides = build_overrides(args)
+        runner.load_config = lambda: merge_dicts(overrides, load_config())
+        simulated_driver.reset_simulator_state()
+
+        if args.tracemalloc:
+            tracemalloc.start()
+
+        for run in range(1, args.runs + 1):
+            before = count_writes(db)
+            db.commit()
+            start = time.time()
+            runner.run_job(job_id)
+            elapsed = time.time() - start
+            after = count_writes(db)
+            db.commit()
+
+            writes = {table: after[table] - before[table] for table in after}
+            total_writes = sum(writes.values())
+            print(f"\nRun {run}/{args.runs}: {args.devices} devices in {elapsed:.1f}s")
+            print(f"  jobs/hour:       {3600 / elapsed:.2f}")
+            print(f"  devices/sec:     {args.devices / elapsed:.1f}")
+            print(f"  db writes/sec:   {total_writes / elapsed:.1f} ({writes})")
+
+        # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+        print(f"\nPeak RSS: {peak_rss_mb:.1f} MB")
+        if args.tracemalloc:
+            _, peak = tracemalloc.get_traced_memory()
+            print(f"Peak Python heap: {peak / (1024 * 1024):.1f} MB")
+            tracemalloc.stop()
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Move stored configuration texts into the config_blobs table.
+
+Databases created before config_blobs existed keep the text of every
+snapshot in ``device_configurations.config_data``. This script copies each
+distinct text into ``config_blobs`` (keyed by the snapshot's ``data_hash``),
+then points the snapshots at their blob and drops the old column.
+
+Usage:
+    python scripts/migrate_config_blobs.py            # migrate
+    python scripts/migrate_config_blobs.py --dry-run  # only report how much is shared
+
+Snapshots are copied in batches, one commit per batch, so the copy can be
+interrupted and run again. The final schema change (index, delta history
+columns, dropping ``config_data``) runs in one transaction at the end.
+Databases that already have config_blobs only get the delta history
+columns, and lose the foreign key from ``data_hash`` to config_blobs
+(snapshots stored as deltas keep their hash after their blob is dropped).
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import inspect, text
+
+from netraven.db.session import engine
+
+CREATE_BLOBS = """
+    CREATE TABLE IF NOT EXISTS config_blobs (
+        data_hash TEXT PRIMARY KEY,
+        config_data TEXT NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+"""
+
+COPY_BATCH = """
+    INSERT INTO config_blobs (data_hash, config_data)
+    SELECT DISTINCT ON (data_hash) data_hash, config_data
+    FROM device_configurations
+    WHERE id > :after AND id <= :upto
+    ORDER BY data_hash, id
+    ON CONFLICT (data_hash) DO NOTHING
+"""
+
+DELTA_HISTORY = [
+    "ALTER TABLE device_configurations DROP CONSTRAINT IF EXISTS device_configurations_data_hash_fkey",
+    "ALTER TABLE device_configurations ADD COLUMN IF NOT EXISTS delta_base_id INTEGER "
+    "REFERENCES device_configurations (id)",
+    "ALTER TABLE device_configurations ADD COLUMN IF NOT EXISTS delta TEXT",
+]
+
+FINALIZE = [
+    "CREATE INDEX IF NOT EXISTS idx_config_blobs_fts ON config_blobs USING gin (to_tsvector('english', config_data))",
+    "DROP INDEX IF EXISTS idx_device_configurations_fts",
+    "CREATE INDEX IF NOT EXISTS ix_device_configurations_data_hash ON device_configurations (data_hash)",
+    *DELTA_HISTORY,
+    "ALTER TABLE device_configurations DROP COLUMN config_data",
+]
+
+
+def report(connection):
+    total, distinct, total_bytes, distinct_bytes = connection.execute(text("""
+        SELECT count(*), count(DISTINCT data_hash),
+               coalesce(sum(octet_length(config_data)), 0),
+               coalesce((SELECT sum(octet_length(config_data)) FROM
+                   (SELECT DISTINCT ON (data_hash) config_data FROM device_configurations ORDER BY data_hash) d), 0)
+        FROM device_configurations
+    """)).one()
+    print(f"{total} snapshots, {distinct} distinct configs")
+    print(f"{total_bytes} bytes of config text, {distinct_bytes} after deduplication")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move configuration texts into config_blobs.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Snapshots per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how much would be deduplicated")
+    args = parser.parse_args()
+
+    columns = {column["name"] for column in inspect(engine).get_columns("device_configurations")}
+    if "config_data" not in columns:
+        print("device_configurations has no config_data column; nothing to copy")
+        if not args.dry_run:
+            with engine.begin() as connection:
+                for statement in DELTA_HISTORY:
+                    connection.execute(text(statement))
+            print("delta history columns are in place")
+        return 0
+
+    with engine.connect() as connection:
+        report(connection)
+    if args.dry_run:
+        return 0
+
+    with engine.begin() as connection:
+        connection.execute(text(CREATE_BLOBS))
+        max_id = connection.execute(text("SELECT coalesce(max(id), 0) FROM device_configurations")).scalar()
+
+    after = 0
+    while after < max_id:
+        upto = after + args.batch_size
+        with engine.begin() as connection:
+            copied = connection.execute(text(COPY_BATCH), {"after": after, "upto": upto}).rowcount
+        print(f"snapshots {after + 1}-{min(upto, max_id)}: {copied} new blob(s)")
+        after = upto
+
+    with engine.begin() as connection:
+        # Snapshots stored while the copy ran
+        connection.execute(text(COPY_BATCH), {"after": max_id, "upto": 2 ** 31 - 1})
+        for statement in FINALIZE:
+            connection.execute(text(statement))
+    print("device_configurations now references config_blobs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Re-encrypt stored passwords with the current encryption key.
+
+Run after changing the master key: set the new key as
+``NETRAVEN_SECURITY__ENCRYPTION_KEY`` and the old one(s) in
+``NETRAVEN_SECURITY__PREVIOUS_ENCRYPTION_KEYS`` (comma-separated), run this
+script, then remove the previous keys.
+
+Usage:
+    python scripts/rotate_encryption_key.py            # re-encrypt credentials and bastions
+    python scripts/rotate_encryption_key.py --dry-run  # only check every password decrypts
+
+Rows are processed in batches, one commit per batch. Passwords that no
+configured key can decrypt are reported and left unchanged; the script exits
+non-zero if there were any.
+"""
+
+import argparse
+import sys
+
+from cryptography.fernet import InvalidToken
+
+from netraven.db.models import Bastion, Credential
+from netraven.db.session import SessionLocal
+from netraven.services import crypto
+
+ENCRYPTED_MODELS = (Credential, Bastion)
+
+
+def rotate_model(db, model, batch_size, dry_run):
+    """Re-encrypt the passwords of one model; returns (rotated, failed ids)."""
+    rotated = 0
+    failed = []
+    last_id = 0
+    while True:
+        rows = (
+            db.query(model)
+            .filter(model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            try:
+                new_password = crypto.rotate_password(row.password)
+            except InvalidToken:
+                failed.append(row.id)
+                continue
+            if not dry_run:
+                row.password = new_password
+            rotated += 1
+        last_id = rows[-1].id
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    return rotated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encrypt stored passwords with the current encryption key.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Only check that every password can be decrypted")
+    args = parser.parse_args()
+
+    print(f"Previous keys configured: {len(crypto.get_previous_keys())}")
+    db = SessionLocal()
+    any_failed = False
+    try:
+        for model in ENCRYPTED_MODELS:
+            rotated, failed = rotate_model(db, model, args.batch_size, args.dry_run)
+            action = "decryptable" if args.dry_run else "re-encrypted"
+            print(f"{model.__tablename__}: {rotated} {action}, {len(failed)} failed")
+            if failed:
+                any_failed = True
+                print(f"  no configured key decrypts IDs: {failed}")
+    finally:
+        db.close()
+    return 1 if any_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
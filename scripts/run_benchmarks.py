@@ -0,0 +1,47 @@
+"""Save and compare pytest-benchmark baselines for the worker hot paths.
+
+Usage:
+    python scripts/run_benchmarks.py save                 # run and save a new baseline
+    python scripts/run_benchmarks.py compare              # compare against the latest baseline
+    python scripts/run_benchmarks.py compare --threshold 10 -k redact
+
+``compare`` exits non-zero when any benchmark's mean regresses by more than
+the threshold percentage relative to the latest saved run, so it can be used
+as a local pre-push check. Baselines are stored under ``.benchmarks/``.
+Extra arguments after the options are passed through to pytest.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BENCHMARK_PATH = "tests/benchmarks"
+STORAGE = ".benchmarks"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run worker benchmarks and flag regressions.")
+    parser.add_argument("action", choices=["save", "compare"])
+    parser.add_argument("--threshold", type=float, default=15.0, help="Allowed mean regression in percent")
+    args, pytest_args = parser.parse_known_args()
+
+    cmd = [
+        sys.executable, "-m", "pytest", BENCHMARK_PATH,
+        "--benchmark-only",
+        f"--benchmark-storage={STORAGE}",
+        "--benchmark-columns=min,mean,median,max,rounds",
+    ]
+    if args.action == "save":
+        cmd.append("--benchmark-autosave")
+    else:
+        cmd += ["--benchmark-compare", f"--benchmark-compare-fail=mean:{args.threshold:g}%"]
+    cmd += pytest_args
+
+    print("Running:", " ".join(cmd))
+    # The benchmarks skip themselves in plain pytest runs
+    return subprocess.call(cmd, env={**os.environ, "NETRAVEN_BENCHMARKS": "1"})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
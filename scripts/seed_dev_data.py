@@ -9,6 +9,7 @@ from netraven.db.models.device_config import DeviceConfiguration
 from netraven.config.loader import load_config
 from git import Repo
 from netraven.db.models import Log
+from netraven.services import credential_index
 
 # Environment guard: Only run in dev
 if os.environ.get("NETRAVEN_ENV", "dev") != "dev":
@@ -103,6 +104,7 @@ def seed():
     )
     db.add(dev_conf2)
     db.commit()
+    credential_index.bump_version()
 
     print("Development data seeded, including device config versions for diffview.")
 
@@ -0,0 +1,79 @@
+"""Render a job-run trace written by the JSON trace exporter.
+
+Prints the span tree with durations and key attributes. Spans on the
+critical path (at each level, the child that finished last) are marked
+with ``*``, so the devices and stages that determined the job's wall time
+stand out.
+
+Usage:
+    python scripts/show_trace.py /data/traces/<trace_id>.jsonl
+    python scripts/show_trace.py /data/traces/<trace_id>.jsonl --min-ms 500 --critical-only
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+
+ATTRIBUTES_SHOWN = ("job.id", "device.hostname", "attempt", "job.type", "job.status")
+
+
+def load_spans(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _end(span):
+    return datetime.fromisoformat(span["start"]).timestamp() + (span["duration_ms"] or 0) / 1000
+
+
+def critical_path(children, root):
+    """Span ids of the chain of last-finishing children starting at root."""
+    path = {root["span_id"]}
+    node = root
+    while children.get(node["span_id"]):
+        node = max(children[node["span_id"]], key=_end)
+        path.add(node["span_id"])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a NetRaven job trace as a tree.")
+    parser.add_argument("path", help="Trace file (<trace_id>.jsonl)")
+    parser.add_argument("--min-ms", type=float, default=0.0, help="Hide spans shorter than this")
+    parser.add_argument("--critical-only", action="store_true", help="Only show the critical path")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    if not spans:
+        print("No spans in trace")
+        return 1
+    ids = {s["span_id"] for s in spans}
+    children = {}
+    roots = []
+    for s in sorted(spans, key=lambda s: s["start"]):
+        if s["parent_id"] in ids:
+            children.setdefault(s["parent_id"], []).append(s)
+        else:
+            roots.append(s)
+
+    def show(span, depth, critical):
+        on_path = span["span_id"] in critical
+        if (span["duration_ms"] or 0) < args.min_ms or (args.critical_only and not on_path):
+            return
+        attrs = " ".join(
+            f"{k}={span['attributes'][k]}" for k in ATTRIBUTES_SHOWN if span["attributes"].get(k) is not None
+        )
+        error = f" ERROR {span['error']}" if span["status"] == "error" else ""
+        marker = "*" if on_path else " "
+        print(f"{marker} {'  ' * depth}{span['name']} {span['duration_ms']:.1f}ms {attrs}{error}".rstrip())
+        for child in children.get(span["span_id"], []):
+            show(child, depth + 1, critical)
+
+    for root in roots:
+        show(root, 0, critical_path(children, root))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,25 @@ def test_search_configs_empty(monkeypatch, db_session, auth_token):
     response = client.get("/api/configs/search?q=test", headers=headers)
     assert response.status_code == 200
     assert response.json() == []
+    assert "X-NetRaven-Search-Scope" not in response.headers
+
+@pytest.mark.usefixtures("db_session", "create_test_device")
+def test_search_configs_flags_delta_history(monkeypatch, db_session, auth_token):
+    from fastapi.testclient import TestClient
+    from netraven.api.main import app
+    client = TestClient(app)
+    class DummyResult:
+        def fetchall(self):
+            return []
+    monkeypatch.setattr("sqlalchemy.orm.Session.execute", lambda *args, **kwargs: DummyResult())
+    monkeypatch.setattr(
+        "netraven.api.routers.configs.load_config",
+        lambda: {"worker": {"delta_history": {"enabled": True}}},
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/api/configs/search?q=test", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["X-NetRaven-Search-Scope"] == "full-snapshots"
 
 def test_list_configs_empty(db_session, create_test_device, auth_token):
     from fastapi.testclient import TestClient
@@ -110,6 +129,24 @@ def test_config_crud_flow(db_session, create_test_device, auth_token):
     assert resp.status_code == 200
     assert resp.json() == []
 
+def test_diff_configs_with_missing_text(db_session, create_test_device, auth_token):
+    from netraven.db.models.config_blob import ConfigBlob
+    from netraven.db.models.device_config import DeviceConfiguration
+    from fastapi.testclient import TestClient
+    from netraven.api.main import app
+    client = TestClient(app)
+    device = create_test_device()
+    config_a = DeviceConfiguration(device_id=int(device.id), config_data="hostname a")
+    config_b = DeviceConfiguration(device_id=int(device.id), config_data="hostname b")
+    db_session.add_all([config_a, config_b])
+    db_session.commit()
+    # Blob dropped while the snapshot was still stored in full
+    db_session.query(ConfigBlob).filter_by(data_hash=config_b.data_hash).delete()
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    resp = client.get(f"/api/configs/diff?config_id_a={config_a.id}&config_id_b={config_b.id}", headers=headers)
+    assert resp.status_code == 409
+
 def test_list_configs_pagination_and_filter(db_session, create_test_device, auth_token):
     from netraven.db.models.device_config import DeviceConfiguration
     from netraven.db.models.device import Device
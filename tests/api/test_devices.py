@@ -90,6 +90,17 @@ class TestDevicesAPI(BaseAPITest):
         response = client.post("/devices/", json=test_device_data, headers=admin_headers)
         self.assert_error_response(response, 400, "already registered")
 
+    def test_create_device_unknown_bastion(self, client: TestClient, admin_headers: Dict, test_device_data: Dict):
+        """Test creating a device with a bastion that doesn't exist."""
+        response = client.post("/devices/", json={**test_device_data, "bastion_id": 9999}, headers=admin_headers)
+        self.assert_error_response(response, 404, "Bastion not found")
+
+    def test_update_device_unknown_bastion(self, client: TestClient, admin_headers: Dict, create_test_device):
+        """Test updating a device with a bastion that doesn't exist."""
+        device = create_test_device(hostname="update-bastion", ip_address="192.168.206.1")
+        response = client.put(f"/devices/{device.id}", json={"bastion_id": 9999}, headers=admin_headers)
+        self.assert_error_response(response, 404, "Bastion not found")
+
     def test_get_device_list(self, client: TestClient, admin_headers: Dict, db_session: Session, create_test_device):
         """Test getting the list of devices."""
         # Create test devices
@@ -303,6 +303,43 @@ class TestJobsAPI(BaseAPITest):
         get_response = client.get(f"/jobs/{job.id}", headers=admin_headers)
         self.assert_error_response(get_response, 404, "not found")
 
+    def test_profile_next_run_and_download(self, client: TestClient, admin_headers: Dict, db_session: Session):
+        """Test flagging a job for profiling and downloading a stored profile."""
+        job = models.Job(name="profile-test", job_type="backup", status="pending")
+        db_session.add(job)
+        db_session.commit()
+        db_session.refresh(job)
+
+        response = client.post(f"/jobs/{job.id}/profile", headers=admin_headers)
+        self.assert_successful_response(response)
+        assert response.json()["profile_next_run"] is True
+
+        import datetime
+        job_profile = models.JobProfile(
+            job_id=job.id,
+            run_started_at=datetime.datetime.utcnow(),
+            duration_seconds=1.5,
+            device_count=2,
+            stats_text="ncalls tottime",
+            allocations_text=None,
+            pstats_data=b"\x00\x01",
+        )
+        db_session.add(job_profile)
+        db_session.commit()
+
+        response = client.get(f"/jobs/{job.id}/profiles", headers=admin_headers)
+        self.assert_successful_response(response)
+        assert [p["id"] for p in response.json()] == [job_profile.id]
+
+        base_url = f"/jobs/{job.id}/profiles/{job_profile.id}/download"
+        response = client.get(base_url, headers=admin_headers)
+        self.assert_successful_response(response)
+        assert response.content == b"\x00\x01"
+        response = client.get(f"{base_url}?format=stats", headers=admin_headers)
+        assert response.text == "ncalls tottime"
+        response = client.get(f"{base_url}?format=allocations", headers=admin_headers)
+        self.assert_error_response(response, 404, "no allocations")
+
     @patch('netraven.api.routers.jobs.rq_queue')
     def test_run_job(self, mock_queue, client: TestClient, admin_headers: Dict, db_session: Session):
         """Test triggering a job to run."""
@@ -48,6 +48,11 @@ class TestTagsEndpoints(BaseAPITest):
         # Assert failure
         self.assert_error_response(response, 400, "Tag name already exists")
     
+    def test_create_tag_unknown_bastion(self, client, admin_headers, test_tag_data):
+        """Test that creating a tag with a bastion that doesn't exist fails."""
+        response = client.post("/tags/", json={**test_tag_data, "bastion_id": 9999}, headers=admin_headers)
+        self.assert_error_response(response, 404, "Bastion not found")
+    
     def test_get_tags(self, client, db_session, admin_headers):
         """Test listing tags with pagination."""
         # Create some test tags
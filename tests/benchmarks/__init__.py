@@ -0,0 +1,19 @@
+"""Benchmark suite for worker hot paths and backend drivers.
+
+Benchmarks are opt-in: a plain ``pytest`` run skips them unless
+``NETRAVEN_BENCHMARKS=1`` is set (``scripts/run_benchmarks.py`` sets it).
+"""
+
+import os
+
+import pytest
+
+requires_opt_in = pytest.mark.skipif(
+    os.environ.get("NETRAVEN_BENCHMARKS") != "1",
+    reason="benchmarks only run with NETRAVEN_BENCHMARKS=1",
+)
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer benchmark knob from the environment."""
+    return int(os.environ.get(name, default))
@@ -0,0 +1,59 @@
+"""Fixtures for the benchmark suite.
+
+Benchmarks run against in-process simulators and an in-memory SQLite
+database, so they don't need the Postgres test database. The session-wide
+``apply_migrations`` fixture from the root conftest is overridden with a
+no-op, and DB log delivery is switched off so timings measure the code under
+test rather than failed log inserts.
+
+Benchmarks are skipped unless ``NETRAVEN_BENCHMARKS=1`` is set. Run with
+``NETRAVEN_BENCHMARKS=1 pytest tests/benchmarks -s`` to see the throughput reports, or use
+``scripts/run_benchmarks.py`` to save and compare pytest-benchmark baselines.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from netraven.db.base import Base
+from netraven.db import models  # noqa: F401 - registers all models on Base
+from netraven.utils.unified_logger import get_unified_logger
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    """Store JSONB columns as JSON so the schema can be created in SQLite."""
+    return "JSON"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def apply_migrations():
+    """Benchmarks don't touch the database; skip the Alembic upgrade."""
+    yield
+
+
+@pytest.fixture(autouse=True)
+def disable_db_logging(monkeypatch):
+    monkeypatch.setattr(get_unified_logger(), "db_enabled", False)
+
+
+@pytest.fixture
+def memory_db():
+    """In-memory SQLite session with the full NetRaven schema.
+
+    A single shared connection (StaticPool) lets dispatcher worker threads use
+    the same session as the test body.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
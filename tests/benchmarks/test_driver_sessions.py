@@ -0,0 +1,95 @@
+"""Per-driver session throughput against the local SSH simulator farm.
+
+Each case starts one simulated device per session on its own localhost port,
+runs ``show running-config`` through the real backend driver for every
+device concurrently, and reports sessions/sec and bytes/sec. Skipped unless
+``NETRAVEN_BENCHMARKS=1`` is set.
+
+Tunable via environment variables:
+    NETRAVEN_BENCH_SESSIONS     Sessions (and simulated devices) per case (default 50)
+    NETRAVEN_BENCH_CONCURRENCY  Concurrent sessions (default 10)
+    NETRAVEN_BENCH_CONFIG_SIZE  running-config size in bytes (default 20000)
+
+``test_asyncssh_vs_netmiko`` runs the same farm through the asyncssh driver,
+with every session in flight at once on one event loop, and through netmiko
+on CONCURRENCY threads. It reports both runs side by side (requires the
+optional ``asyncssh`` package).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from netraven.worker.backends import netmiko_driver, paramiko_driver
+from tests.benchmarks import env_int, requires_opt_in
+from tests.simulators.ssh_device import SSHSimulatorFarm, PLATFORM_PROFILES
+
+pytestmark = requires_opt_in
+
+SESSIONS = env_int("NETRAVEN_BENCH_SESSIONS", 50)
+CONCURRENCY = env_int("NETRAVEN_BENCH_CONCURRENCY", 10)
+CONFIG_SIZE = env_int("NETRAVEN_BENCH_CONFIG_SIZE", 20000)
+
+
+def _run_sessions(driver, devices, config):
+    """Run one session per device and return (elapsed, outputs)."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        outputs = list(pool.map(lambda d: driver.run_command(d, config=config), devices))
+    return time.perf_counter() - start, outputs
+
+
+def _report(label, elapsed, outputs):
+    total_bytes = sum(len(o) for o in outputs)
+    print(
+        f"\n[bench] {label}: {len(outputs)} sessions in {elapsed:.2f}s -> "
+        f"{len(outputs) / elapsed:.1f} sessions/sec, {total_bytes / elapsed / 1024:.1f} KiB/sec"
+    )
+
+
+@pytest.mark.parametrize("platform", sorted(PLATFORM_PROFILES))
+def test_netmiko_session_throughput(platform):
+    config = {"worker": {"connection_timeout": 10, "command_timeout": 30}}
+    with SSHSimulatorFarm(count=SESSIONS, platform=platform, config_size_bytes=CONFIG_SIZE) as farm:
+        elapsed, outputs = _run_sessions(netmiko_driver, farm.devices, config)
+    _report(f"netmiko/{platform}", elapsed, outputs)
+    assert all("hostname sim-" in output for output in outputs)
+
+
+@pytest.mark.parametrize("platform", sorted(PLATFORM_PROFILES))
+def test_paramiko_session_throughput(platform):
+    # The paramiko driver doesn't enter enable mode, so the farm starts
+    # sessions privileged. Paging stays on: the prompt reader answers
+    # the pager prompts.
+    config = {"worker": {"connection_timeout": 10, "command_timeout": 30}}
+    with SSHSimulatorFarm(
+        count=SESSIONS,
+        platform=platform,
+        config_size_bytes=CONFIG_SIZE,
+        start_in_enable=True,
+    ) as farm:
+        elapsed, outputs = _run_sessions(paramiko_driver, farm.devices, config)
+    _report(f"paramiko/{platform}", elapsed, outputs)
+    assert all("hostname sim-" in output for output in outputs)
+
+
+@pytest.mark.parametrize("platform", sorted(PLATFORM_PROFILES))
+def test_asyncssh_vs_netmiko(platform):
+    pytest.importorskip("asyncssh")
+    from netraven.worker.backends import asyncssh_driver
+
+    config = {"worker": {"connection_timeout": 10, "command_timeout": 30}}
+    with SSHSimulatorFarm(count=SESSIONS, platform=platform, config_size_bytes=CONFIG_SIZE) as farm:
+        start = time.perf_counter()
+        results = asyncio.run(asyncssh_driver.run_many(farm.devices, config=config, concurrency=SESSIONS))
+        async_elapsed = time.perf_counter() - start
+        errors = [r for r in results if isinstance(r, BaseException)]
+        assert not errors, errors[:3]
+        _report(f"asyncssh/{platform} (1 event loop)", async_elapsed, results)
+
+        netmiko_elapsed, outputs = _run_sessions(netmiko_driver, farm.devices, config)
+        _report(f"netmiko/{platform} ({CONCURRENCY} threads)", netmiko_elapsed, outputs)
+    print(f"[bench] asyncssh/netmiko speedup on {platform}: {netmiko_elapsed / async_elapsed:.2f}x")
+    assert all("hostname sim-" in output for output in results)
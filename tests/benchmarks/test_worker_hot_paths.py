@@ -0,0 +1,183 @@
+"""pytest-benchmark suite for worker hot paths.
+
+Inputs are sized like production: running-configs from 1 KB to 20 MB and
+device batches from 10 to 10k. Large cases run a fixed small number of rounds
+via ``benchmark.pedantic`` so the whole suite stays runnable on a laptop.
+
+Skipped unless ``NETRAVEN_BENCHMARKS=1`` is set. Save a baseline and compare
+against it with ``scripts/run_benchmarks.py``, which sets it.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
+
+from netraven.db.models import Device, Tag, Credential
+from netraven.services import crypto
+from netraven.services.device_credential_resolver import resolve_device_credentials_batch
+from netraven.utils.hash_utils import sha256_hex
+from netraven.worker import redactor, dispatcher
+from netraven.worker.backends.simulated_driver import generate_config
+from netraven.worker.device_capabilities import parse_device_capabilities, detect_error_from_output
+from netraven.worker.error_handler import classify_exception
+from netraven.worker.jobs import config_backup
+from tests.benchmarks import requires_opt_in
+
+pytestmark = requires_opt_in
+
+KB = 1024
+MB = 1024 * KB
+CONFIG_SIZES = [KB, 100 * KB, MB, 20 * MB]
+DEVICE_COUNTS = [10, 1000, 10000]
+
+VERSION_OUTPUT = (
+    "Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version 15.2(4)E5, RELEASE SOFTWARE (fc2)\n"
+    "ROM: Bootstrap program is C3750E boot loader\n"
+    "cisco WS-C3750X-48P (PowerPC405) processor with 262144K bytes of memory.\n"
+    "Processor board ID FDO1234X5YZ\n"
+    "System serial number            : FDO1234X5YZ\n"
+) * 20
+
+
+def _rounds(size_or_count, large):
+    """Use few rounds for large inputs so the suite finishes in minutes."""
+    return 3 if size_or_count >= large else 20
+
+
+def _config_text(size):
+    return generate_config(SimpleNamespace(id=1, hostname="bench-sw1"), size)
+
+
+@pytest.mark.parametrize("size", CONFIG_SIZES, ids=lambda s: f"{s // KB}KB")
+def test_redact(benchmark, size):
+    text = _config_text(size)
+    result = benchmark.pedantic(redactor.redact, args=(text, None), rounds=_rounds(size, MB))
+    assert redactor.REDACTED_LINE_MARKER in result
+
+
+@pytest.mark.parametrize("size", CONFIG_SIZES, ids=lambda s: f"{s // KB}KB")
+def test_sha256_hex(benchmark, size):
+    text = _config_text(size)
+    result = benchmark.pedantic(sha256_hex, args=(text,), rounds=_rounds(size, MB))
+    assert len(result) == 64
+
+
+def test_parse_device_capabilities(benchmark):
+    result = benchmark(parse_device_capabilities, "cisco_ios", VERSION_OUTPUT)
+    assert result
+
+
+@pytest.mark.parametrize("size", [KB, MB], ids=lambda s: f"{s // KB}KB")
+def test_detect_error_from_output_clean(benchmark, size):
+    # Clean output is the worst case: every pattern scans the whole text
+    text = _config_text(size)
+    result = benchmark.pedantic(detect_error_from_output, args=("cisco_ios", text), rounds=_rounds(size, MB))
+    assert result is None
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        NetmikoTimeoutException("Connection timed out"),
+        NetmikoAuthenticationException("Authentication failed"),
+        ConnectionRefusedError("Connection refused"),
+        RuntimeError("Something unexpected"),
+    ],
+    ids=lambda e: type(e).__name__,
+)
+def test_classify_exception(benchmark, exc):
+    result = benchmark(classify_exception, exc, job_id=1, device_id=1)
+    assert result.category is not None
+
+
+@pytest.mark.parametrize("count", DEVICE_COUNTS)
+def test_dispatch_tasks_noop_handler(benchmark, monkeypatch, count):
+    def noop_handler(device, job_id, config, db):
+        return {"success": True, "device_id": device.id}
+
+    monkeypatch.setattr(dispatcher, "handle_device", noop_handler)
+    devices = [
+        SimpleNamespace(id=i + 1, hostname=f"bench-{i + 1}", device_type="cisco_ios")
+        for i in range(count)
+    ]
+    config = {"worker": {"thread_pool_size": 20, "retry_attempts": 0, "retry_backoff": 0}}
+    results = benchmark.pedantic(
+        dispatcher.dispatch_tasks, args=(devices, 1), kwargs={"config": config, "db": None},
+        rounds=_rounds(count, 1000),
+    )
+    assert len(results) == count
+
+
+@pytest.fixture
+def credential_fleet(memory_db, monkeypatch):
+    """Factory seeding ``count`` tagged devices and three matching credentials."""
+    monkeypatch.setattr(crypto, "SECRET_KEY", "benchmark-key")
+
+    def _seed(count):
+        tag = Tag(name="bench", type="custom")
+        memory_db.add(tag)
+        memory_db.add_all([
+            Credential.create_with_encrypted_password(
+                username=f"user{p}", password=f"pass{p}", priority=p, tags=[tag]
+            )
+            for p in (10, 20, 30)
+        ])
+        devices = [
+            Device(hostname=f"bench-{i}", ip_address=f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                   device_type="cisco_ios", tags=[tag])
+            for i in range(count)
+        ]
+        memory_db.add_all(devices)
+        memory_db.commit()
+        return devices
+
+    return _seed
+
+
+@pytest.mark.parametrize("count", DEVICE_COUNTS)
+def test_resolve_device_credentials_batch(benchmark, memory_db, credential_fleet, count):
+    devices = credential_fleet(count)
+    resolved = benchmark.pedantic(
+        resolve_device_credentials_batch, args=(devices, memory_db, 1),
+        kwargs={"skip_if_has_credentials": False}, rounds=_rounds(count, 1000),
+    )
+    assert len(resolved) == count
+    assert resolved[0].username == "user10"
+
+
+@pytest.mark.parametrize("key_cache", [True, False], ids=["cached-key", "derived-key"])
+def test_decrypt_password(benchmark, monkeypatch, key_cache):
+    # Per-credential cost of resolution; "derived-key" is the pre-cache behaviour
+    # (PBKDF2 on every call), so 10k devices cost 10k times the difference
+    monkeypatch.setattr(crypto, "SECRET_KEY", "benchmark-key")
+    if not key_cache:
+        monkeypatch.setattr(crypto, "_derive_key", crypto._derive_key.__wrapped__)
+    encrypted = crypto.encrypt_password("pass10")
+    if key_cache:
+        result = benchmark(crypto.decrypt_password, encrypted)
+    else:
+        result = benchmark.pedantic(crypto.decrypt_password, args=(encrypted,), rounds=3)
+    assert result == "pass10"
+
+
+@pytest.mark.parametrize("size", CONFIG_SIZES, ids=lambda s: f"{s // KB}KB")
+@pytest.mark.parametrize("changed", [True, False], ids=["changed", "deduplicated"])
+def test_config_backup_run(benchmark, memory_db, size, changed):
+    device = Device(hostname="bench-sw1", ip_address="10.0.0.1", device_type="cisco_ios")
+    memory_db.add(device)
+    memory_db.commit()
+    config = {
+        "worker": {
+            "driver": "simulated",
+            "simulator": {
+                "latency_mean_ms": 0,
+                "config_size_bytes": size,
+                "change_probability": 1.0 if changed else 0.0,
+            },
+        }
+    }
+    result = benchmark.pedantic(
+        config_backup.run, args=(device, 1, config, memory_db), rounds=_rounds(size, MB)
+    )
+    assert result["success"] is True
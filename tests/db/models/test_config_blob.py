@@ -0,0 +1,52 @@
+"""Unit tests for the content-addressed config blob storage."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from netraven.db.base import Base
+from netraven.db.models import ConfigBlob, Device, DeviceConfiguration
+from netraven.db.models.config_blob import _insert_missing, hash_config
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Device(id=1, hostname="dev1", ip_address="10.0.0.1", device_type="cisco_ios"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_identical_texts_share_one_blob_and_text_is_released_after_flush(session):
+    first = DeviceConfiguration(device_id=1, config_data="hostname dev1")
+    session.add(first)
+    session.commit()
+    second = DeviceConfiguration(device_id=1, config_data="hostname dev1")
+    session.add(second)
+    session.flush()
+
+    assert second.pending_config_data is None
+    assert second.config_data == "hostname dev1"
+    assert second.data_hash == first.data_hash == hash_config("hostname dev1")
+    assert session.query(ConfigBlob).count() == 1
+
+
+def test_changed_text_points_at_new_blob(session):
+    snapshot = DeviceConfiguration(device_id=1, config_data="v1")
+    session.add(snapshot)
+    session.commit()
+    assert snapshot.blob.config_data == "v1"
+
+    snapshot.config_data = "v2"
+    session.flush()
+    assert snapshot.config_data == "v2"
+
+
+def test_postgres_upsert_locks_existing_blob():
+    sql = str(_insert_missing("postgresql").compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (data_hash) DO UPDATE SET created_at = config_blobs.created_at" in sql
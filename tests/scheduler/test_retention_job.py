@@ -55,3 +55,15 @@ def test_prune_old_device_configs_handles_multiple_devices(in_memory_db, monkeyp
     configs2 = session.query(DeviceConfiguration).filter_by(device_id=2).all()
     assert len(configs1) == 10
     assert len(configs2) == 8
+
+def test_prune_deletes_only_unshared_config_blobs(in_memory_db, monkeypatch):
+    from netraven.db.models import ConfigBlob
+    session = in_memory_db
+    add_device_with_configs(session, 1, 12)
+    add_device_with_configs(session, 2, 8)
+    # Both devices store "config 0".."config 7" under the same hashes
+    assert session.query(ConfigBlob).count() == 12
+    monkeypatch.setattr("netraven.scheduler.job_definitions.get_db", lambda: iter([session]))
+    prune_old_device_configs(retain_count=8)
+    remaining = {blob.data_hash for blob in session.query(ConfigBlob).all()}
+    assert remaining == {f"hash{i}" for i in range(8)}
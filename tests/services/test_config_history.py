@@ -0,0 +1,115 @@
+"""Unit tests for the delta-compressed config snapshot history."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from netraven.db.base import Base
+from netraven.db.models import ConfigBlob, Device, DeviceConfiguration
+from netraven.services import config_history
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Device(id=1, hostname="dev1", ip_address="10.0.0.1", device_type="cisco_ios"))
+    session.commit()
+    config_history.clear_cache()
+    yield session
+    config_history.clear_cache()
+    session.close()
+    engine.dispose()
+
+
+def version_text(i):
+    lines = [f"interface Gi0/{n}\n description port {n}\n" for n in range(20)]
+    lines[i % 20] = f"interface Gi0/{i % 20}\n description changed in version {i}\n"
+    return "hostname dev1\n" + "".join(lines) + f"! version {i}"
+
+
+def store_history(session, count, keyframe_interval):
+    """Store ``count`` versions oldest first, as the backup job does."""
+    start = datetime.utcnow() - timedelta(days=count)
+    previous = None
+    for i in range(count):
+        snapshot = DeviceConfiguration(device_id=1, config_data=version_text(i), retrieved_at=start + timedelta(days=i))
+        session.add(snapshot)
+        session.commit()
+        if previous is not None:
+            config_history.encode_as_delta(session, previous, snapshot, keyframe_interval)
+        previous = snapshot
+    return session.query(DeviceConfiguration).order_by(DeviceConfiguration.retrieved_at).all()
+
+
+@pytest.mark.parametrize("base, target", [
+    ("a\nb\nc\n", "a\nc\nd\n"),
+    ("a\nb", "x\na\nb\ny"),
+    ("a\nb\n", ""),
+    ("", "new\n"),
+])
+def test_delta_round_trip(base, target):
+    assert config_history.apply_delta(base, config_history.make_delta(base, target)) == target
+
+
+def test_older_snapshots_become_deltas_with_keyframes(session):
+    snapshots = store_history(session, 8, keyframe_interval=3)
+
+    # Newest in full; going back, every third snapshot is a keyframe
+    assert [s.delta is None for s in snapshots] == [False, False, True, False, False, True, False, True]
+    assert session.query(ConfigBlob).count() == 3
+
+    config_history.clear_cache()
+    for i, snapshot in enumerate(snapshots):
+        assert config_history.get_config_text(session, snapshot.id) == version_text(i)
+
+
+def test_reconstructed_versions_are_cached(session):
+    snapshots = store_history(session, 5, keyframe_interval=10)
+    config_history.clear_cache()
+    statements = []
+    event.listen(session.bind, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert config_history.get_config_text(session, snapshots[0].id) == version_text(0)
+    assert len(statements) == 5  # walked to the newest snapshot
+    assert config_history.get_config_text(session, snapshots[2].id) == version_text(2)
+    assert len(statements) == 5
+
+
+def test_deleting_a_base_rebases_its_dependents(session):
+    snapshots = store_history(session, 4, keyframe_interval=10)
+    ids = [s.id for s in snapshots]
+
+    config_history.delete_snapshot(session, ids[2])
+    session.commit()
+    config_history.delete_snapshot(session, ids[3])  # the newest, stored in full
+    session.commit()
+
+    config_history.clear_cache()
+    remaining = session.query(DeviceConfiguration).order_by(DeviceConfiguration.retrieved_at).all()
+    assert [s.id for s in remaining] == ids[:2]
+    assert remaining[1].delta is None
+    assert remaining[0].delta_base_id == ids[1]
+    assert [s.config_data for s in remaining] == [version_text(0), version_text(1)]
+    assert session.query(ConfigBlob).count() == 1
+
+
+def test_snapshot_whose_blob_was_dropped_is_left_alone(session):
+    snapshots = store_history(session, 2, keyframe_interval=10)
+    previous = snapshots[1]
+    session.query(ConfigBlob).filter_by(data_hash=previous.data_hash).delete()
+    session.commit()
+
+    newer = DeviceConfiguration(device_id=1, config_data=version_text(2), retrieved_at=datetime.utcnow())
+    session.add(newer)
+    session.commit()
+    assert not config_history.encode_as_delta(session, previous, newer, keyframe_interval=10)
+    assert previous.delta is None
+
+    # The next backup with the same content stores the blob again
+    session.add(DeviceConfiguration(device_id=1, config_data=version_text(1), retrieved_at=datetime.utcnow()))
+    session.commit()
+    session.expire_all()
+    assert previous.config_data == version_text(1)
@@ -0,0 +1,103 @@
+"""Unit tests for the in-process credential index."""
+
+import pytest
+from unittest.mock import MagicMock
+
+from netraven.services import credential_index
+from netraven.services.credential_index import CredentialIndex
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis down")
+        return self.values.get(key)
+
+    def incr(self, key):
+        if self.down:
+            raise ConnectionError("redis down")
+        self.values[key] = int(self.values.get(key) or 0) + 1
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(credential_index, "_redis", fake)
+    credential_index.reset()
+    yield fake
+    credential_index.reset()
+
+
+def make_index():
+    # Credential 3 has no priority, 1 and 2 share tag 10
+    priorities = {1: 50, 2: 10, 3: None, 4: 20}
+    credential_tags = [(1, 10), (2, 10), (2, 11), (3, 11), (4, 12), (99, 10)]
+    device_tags = [(100, 10), (101, 10), (101, 11), (102, 13)]
+    return CredentialIndex(priorities, credential_tags, device_tags)
+
+
+def test_index_matches_by_shared_tag_in_priority_order():
+    index = make_index()
+    assert index.credential_ids_for_device(100) == [2, 1]
+    assert index.credential_ids_for_device(101) == [2, 1, 3]
+    assert index.credential_ids_for_device(102) == []
+    assert index.credential_ids_for_device(999) == []
+    assert index.count_for_devices([100, 101, 102, 999]) == {100: 2, 101: 3, 102: 0, 999: 0}
+
+
+def test_index_is_rebuilt_only_after_a_version_bump(redis, monkeypatch):
+    build = MagicMock(side_effect=lambda db: make_index())
+    monkeypatch.setattr(credential_index, "build_index", build)
+    db = MagicMock()
+
+    assert credential_index.get_matching_credential_ids(db, 100) == [2, 1]
+    assert credential_index.count_matching_credentials(db, [101]) == {101: 3}
+    assert build.call_count == 1
+
+    # A mutation in another process bumps the shared version
+    redis.incr(credential_index.VERSION_KEY)
+    credential_index.count_matching_credentials(db, [100])
+    assert build.call_count == 2
+
+    credential_index.bump_version()
+    credential_index.count_matching_credentials(db, [100])
+    assert build.call_count == 3
+    db.execute.assert_not_called()
+
+
+def test_index_is_rebuilt_once_it_is_too_old(redis, monkeypatch):
+    build = MagicMock(side_effect=lambda db: make_index())
+    monkeypatch.setattr(credential_index, "build_index", build)
+    db = MagicMock()
+
+    credential_index.count_matching_credentials(db, [100])
+    credential_index.count_matching_credentials(db, [100])
+    assert build.call_count == 1
+
+    # Devices or tags changed directly in the database without a bump
+    monkeypatch.setattr(credential_index, "_index_built_at", credential_index._index_built_at - credential_index.MAX_AGE)
+    credential_index.count_matching_credentials(db, [100])
+    assert build.call_count == 2
+
+
+def test_counts_fall_back_to_aggregate_query_without_redis(redis, monkeypatch):
+    build = MagicMock(side_effect=lambda db: make_index())
+    aggregate = MagicMock(return_value={100: 2})
+    monkeypatch.setattr(credential_index, "build_index", build)
+    monkeypatch.setattr(credential_index, "count_matching_credentials_for_devices", aggregate)
+    redis.down = True
+    db = MagicMock()
+
+    assert credential_index.count_matching_credentials(db, [100]) == {100: 2}
+    aggregate.assert_called_once_with(db, [100])
+    build.assert_not_called()
+
+    # Redis isn't retried on every lookup while it is down
+    redis.down = False
+    credential_index.count_matching_credentials(db, [100])
+    assert aggregate.call_count == 2
+    build.assert_not_called()
@@ -0,0 +1,85 @@
+"""Unit tests for the buffered credential metrics."""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+
+from netraven.services import credential_metrics
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer(monkeypatch):
+    monkeypatch.setattr(credential_metrics, "_last_flush", time.monotonic())
+    credential_metrics.discard_pending_attempts()
+    yield
+    credential_metrics.discard_pending_attempts()
+
+
+def sequential_rate(rate, outcomes):
+    """Success rate after applying outcomes one at a time, as the per-row updates do."""
+    for success in outcomes:
+        if rate is None:
+            rate = 1.0 if success else 0.0
+        else:
+            rate = rate * 0.9 + (0.1 if success else 0.0)
+    return rate
+
+
+@pytest.mark.parametrize("outcomes", [[True], [False], [False, False, True], [True, False, True, True, False]])
+def test_folded_rate_matches_sequential_updates(outcomes):
+    decay, gain, initial = credential_metrics.fold_success_rate(outcomes)
+    assert 0.5 * decay + gain == pytest.approx(sequential_rate(0.5, outcomes))
+    assert initial == pytest.approx(sequential_rate(None, outcomes))
+
+
+def test_flush_applies_buffered_attempts_in_two_statements():
+    db = MagicMock()
+    for device_id, credential_id, success in [(1, 5, False), (1, 6, True), (2, 5, True)]:
+        credential_metrics.record_credential_attempt(db, device_id, credential_id, job_id=3, success=success)
+    db.execute.assert_not_called()
+
+    assert credential_metrics.flush_credential_attempts(db, job_id=3) == 3
+    assert db.execute.call_count == 2
+    db.commit.assert_called_once()
+    update_sql = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "UPDATE credentials SET" in update_sql
+    assert "FROM (VALUES" in update_sql
+    upsert_sql = str(db.execute.call_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT ON CONSTRAINT uq_device_credential_status DO UPDATE" in upsert_sql
+
+    # The buffer is empty after a flush
+    assert credential_metrics.flush_credential_attempts(db) == 0
+
+
+def test_status_upsert_counts_failures_after_last_success():
+    now = datetime.now(timezone.utc)
+    attempts = [(1, 5, False, now), (1, 5, True, now), (1, 5, False, now), (1, 5, False, now)]
+    stmt = credential_metrics.build_status_upsert(attempts)
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert params["consecutive_failures_m0"] == 2
+    assert params["last_success_m0"] == now
+
+
+def test_attempt_flushes_in_own_session_once_interval_has_passed(monkeypatch):
+    job_db, flush_db = MagicMock(), MagicMock()
+    monkeypatch.setattr(credential_metrics, "SessionLocal", MagicMock(return_value=flush_db))
+    monkeypatch.setattr(credential_metrics, "_last_flush", time.monotonic() - credential_metrics.FLUSH_INTERVAL)
+    credential_metrics.record_credential_attempt(job_db, 1, 5, success=True)
+    flush_db.commit.assert_called_once()
+    flush_db.close.assert_called_once()
+    job_db.commit.assert_not_called()
+
+    # The next attempt waits for the next interval
+    credential_metrics.record_credential_attempt(job_db, 1, 5, success=True)
+    flush_db.commit.assert_called_once()
+
+
+def test_failed_flush_rolls_back():
+    db = MagicMock()
+    db.execute.side_effect = RuntimeError("database gone")
+    credential_metrics.record_credential_attempt(db, 1, 5, success=True)
+    assert credential_metrics.flush_credential_attempts(db) == 0
+    db.rollback.assert_called_once()
@@ -76,4 +76,34 @@ class TestCryptoService:
     def test_invalid_encrypted_value(self):
         """Test handling of invalid encrypted values."""
         with pytest.raises(Exception):
-            decrypt_password("not_a_valid_encrypted_value") 
\ No newline at end of file
+            decrypt_password("not_a_valid_encrypted_value") 
+
+class TestKeyCacheAndRotation:
+    """Tests for the derived key cache and MultiFernet key rotation."""
+
+    def test_key_is_derived_once_per_master_key(self):
+        from netraven.services import crypto
+
+        crypto._derive_key.cache_clear()
+        key = get_encryption_key("cache-test-key")
+        assert get_encryption_key("cache-test-key") == key
+        assert get_encryption_key("other-key") != key
+        info = crypto._derive_key.cache_info()
+        assert (info.hits, info.misses) == (1, 2)
+
+    def test_rotation_to_new_key(self):
+        from cryptography.fernet import InvalidToken
+        from netraven.services import crypto
+
+        with patch.object(crypto, 'SECRET_KEY', 'old-key'), patch.object(crypto, 'PREVIOUS_KEYS', None):
+            old_token = encrypt_password("secret")
+
+        with patch.object(crypto, 'SECRET_KEY', 'new-key'), patch.object(crypto, 'PREVIOUS_KEYS', 'older-key, old-key'):
+            assert crypto.get_previous_keys() == ['older-key', 'old-key']
+            assert decrypt_password(old_token) == "secret"
+            new_token = crypto.rotate_password(old_token)
+
+        with patch.object(crypto, 'SECRET_KEY', 'new-key'), patch.object(crypto, 'PREVIOUS_KEYS', []):
+            assert decrypt_password(new_token) == "secret"
+            with pytest.raises(InvalidToken):
+                decrypt_password(old_token)
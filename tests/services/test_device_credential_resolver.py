@@ -248,70 +248,129 @@ class TestResolveDeviceCredential:
 
 
 class TestResolveDeviceCredentialsBatch:
+    @staticmethod
+    def _credential(cred_id, username, priority):
+        credential = MagicMock()
+        credential.id = cred_id
+        credential.username = username
+        credential.priority = priority
+        credential.get_password = f"{username}-pass"
+        return credential
+
     def test_batch_resolution(self, monkeypatch):
-        """Test that batch function processes all devices."""
-        mock_device1 = MagicMock()
-        mock_device1.id = 1
-        mock_device1.hostname = "device1"
-        
-        mock_device2 = MagicMock()
-        mock_device2.id = 2
-        mock_device2.hostname = "device2"
-        
-        # Setup mock with side effect
-        mock_resolve = MagicMock(side_effect=lambda d, *args, **kwargs: d)
-        
-        # Apply monkeypatching
-        monkeypatch.setattr(
-            "netraven.services.device_credential_resolver.resolve_device_credential", 
-            mock_resolve
-        )
-        
+        """Test that the batch resolves all devices from one lookup and one bulk update."""
+        shared = self._credential(5, "shared-user", 10)
+        fallback = self._credential(6, "fallback-user", 50)
+        devices = []
+        for device_id in (1, 2, 3):
+            device = MagicMock()
+            device.id = device_id
+            device.hostname = f"device{device_id}"
+            device.username = None
+            device.password = None
+            devices.append(device)
+
+        mock_match = MagicMock(return_value={1: [shared, fallback], 2: [shared], 3: [fallback]})
+        mock_track = MagicMock()
+        mock_password = MagicMock(side_effect=lambda credential: credential.get_password)
+        monkeypatch.setattr("netraven.services.device_credential_resolver.get_matching_credentials_for_devices", mock_match)
+        monkeypatch.setattr("netraven.services.device_credential_resolver.track_credential_selections", mock_track)
+        monkeypatch.setattr("netraven.services.device_credential_resolver.get_device_password", mock_password)
+
         mock_db = MagicMock(spec=Session)
-        
-        results = resolve_device_credentials_batch([mock_device1, mock_device2], mock_db)
-        
-        # Should return both devices
-        assert len(results) == 2
-        assert mock_device1 in results
-        assert mock_device2 in results
-        
-        # Should have called resolve_device_credential for each device
-        assert mock_resolve.call_count == 2
-    
+        results = resolve_device_credentials_batch(devices, mock_db, job_id=10, skip_if_has_credentials=False)
+
+        assert [(r.id, r.username, r.password) for r in results] == [
+            (1, "shared-user", "shared-user-pass"),
+            (2, "shared-user", "shared-user-pass"),
+            (3, "fallback-user", "fallback-user-pass"),
+        ]
+        mock_match.assert_called_once_with(mock_db, [1, 2, 3])
+        # Each distinct credential is decrypted once
+        assert mock_password.call_count == 2
+        mock_track.assert_called_once_with(mock_db, {5, 6}, 10)
+
     def test_batch_with_errors(self, monkeypatch):
-        """Test that batch function handles errors for individual devices."""
-        mock_device1 = MagicMock()
-        mock_device1.id = 1
-        mock_device1.hostname = "device1"
-        
-        mock_device2 = MagicMock()
-        mock_device2.id = 2
-        mock_device2.hostname = "device2"
-        
-        # Setup mock with side effect
-        def side_effect(device, *args, **kwargs):
-            if device.id == 1:
-                return device
-            else:
-                raise ValueError("Test error")
-                
-        mock_resolve = MagicMock(side_effect=side_effect)
-        
-        # Apply monkeypatching
+        """Test that devices without usable credentials are skipped, not fatal."""
+        good = self._credential(5, "good-user", 10)
+        broken = self._credential(6, "broken-user", 10)
+        devices = []
+        for device_id in (1, 2, 3, 4):
+            device = MagicMock()
+            device.id = device_id
+            device.hostname = f"device{device_id}"
+            device.username = "existing-user" if device_id == 4 else None
+            device.password = "existing-pass" if device_id == 4 else None
+            devices.append(device)
+
+        def decrypt(credential):
+            if credential is broken:
+                raise ValueError("Invalid token")
+            return credential.get_password
+
         monkeypatch.setattr(
-            "netraven.services.device_credential_resolver.resolve_device_credential", 
-            mock_resolve
+            "netraven.services.device_credential_resolver.get_matching_credentials_for_devices",
+            MagicMock(return_value={1: [good], 2: [], 3: [broken], 4: []}),
         )
-        
+        monkeypatch.setattr("netraven.services.device_credential_resolver.track_credential_selections", MagicMock())
+        monkeypatch.setattr("netraven.services.device_credential_resolver.get_device_password", decrypt)
+
+        results = resolve_device_credentials_batch(devices, MagicMock(spec=Session), skip_if_has_credentials=False)
+
+        # Device 2 has no match, device 3's credential can't be decrypted,
+        # device 4 keeps its existing credentials
+        assert [r.id for r in results] == [1, 4]
+        assert results[1] is devices[3]
+
+    def test_batch_prefers_last_good_and_demotes_failed_credentials(self, monkeypatch):
+        """Test that login history overrides the static priority order."""
+        from datetime import datetime, timedelta, timezone
+        from types import SimpleNamespace
+
+        first = self._credential(1, "first-user", 10)
+        second = self._credential(2, "second-user", 20)
+        third = self._credential(3, "third-user", 30)
+        devices = []
+        for device_id in (1, 2, 3):
+            device = MagicMock()
+            device.id = device_id
+            device.hostname = f"device{device_id}"
+            devices.append(device)
+
+        now = datetime.now(timezone.utc)
+        statuses = {
+            # Third credential worked last time
+            1: {1: SimpleNamespace(last_success=None, last_failure=now - timedelta(hours=1)),
+                3: SimpleNamespace(last_success=now - timedelta(hours=1), last_failure=None)},
+            # First credential was refused recently, second one never tried
+            2: {1: SimpleNamespace(last_success=now - timedelta(days=3), last_failure=now - timedelta(hours=2))},
+            # Refused long ago: back in priority order
+            3: {1: SimpleNamespace(last_success=None, last_failure=now - timedelta(days=3))},
+        }
+        monkeypatch.setattr(
+            "netraven.services.device_credential_resolver.get_matching_credentials_for_devices",
+            MagicMock(return_value={device_id: [first, second, third] for device_id in (1, 2, 3)}),
+        )
+        monkeypatch.setattr("netraven.services.device_credential_resolver.get_device_credential_statuses", MagicMock(return_value=statuses))
+        monkeypatch.setattr("netraven.services.device_credential_resolver.track_credential_selections", MagicMock())
+        monkeypatch.setattr("netraven.services.device_credential_resolver.get_device_password", lambda credential: credential.get_password)
+
+        results = resolve_device_credentials_batch(devices, MagicMock(spec=Session), skip_if_has_credentials=False)
+
+        assert [(r.id, r.credential_id) for r in results] == [(1, 3), (2, 2), (3, 1)]
+
+    def test_bulk_tracking_is_one_update(self):
+        """Test that last_used is updated for all selected credentials in one statement."""
+        from netraven.services.device_credential_resolver import track_credential_selections
+
         mock_db = MagicMock(spec=Session)
-        
-        results = resolve_device_credentials_batch([mock_device1, mock_device2], mock_db)
-        
-        # Should return only the successful device
-        assert len(results) == 1
-        assert mock_device1 in results
-        assert mock_device2 not in results
+        track_credential_selections(mock_db, [6, 5, 6], 10)
+        mock_db.query.return_value.filter.return_value.update.assert_called_once()
+        mock_db.commit.assert_called_once()
+
+        mock_db.reset_mock()
+        track_credential_selections(mock_db, [], 10)
+        mock_db.query.assert_not_called()
 
 
 class TestTrackCredentialSelection:
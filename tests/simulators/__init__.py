@@ -0,0 +1 @@
+"""In-repo device simulators used by driver benchmarks and integration tests."""
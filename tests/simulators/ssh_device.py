@@ -0,0 +1,458 @@
+"""Local SSH device simulator farm built on paramiko's ``ServerInterface``.
+
+The farm listens on any number of localhost ports (one per simulated device)
+and speaks just enough of each platform's CLI for the real backend drivers to
+run unmodified against it:
+
+- ``cisco_ios`` / ``arista_eos``: ``host>`` / ``host#`` prompts, ``enable``
+  with a password prompt, `` --More-- `` paging until ``terminal length 0``
+- ``juniper_junos``: ``user@host>`` prompt, ``---(more)---`` paging until
+  ``set cli screen-length 0``, and the session preparation replies Netmiko
+  waits for
+
+``show running-config`` (and ``show configuration``) returns a synthetic
+configuration of ``config_size_bytes``, generated by the simulated driver so
+the simulator and the in-process backend produce the same payloads.
+
+A single acceptor thread multiplexes every listening socket with
+``selectors``, so hundreds of simulated devices cost one thread plus one
+thread per active session.
+
+Example:
+    with SSHSimulatorFarm(count=100, platform="cisco_ios") as farm:
+        for device in farm.devices:
+            netmiko_driver.run_command(device)
+"""
+
+import selectors
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import paramiko
+
+from netraven.worker.backends.simulated_driver import generate_config
+
+
+@dataclass(frozen=True)
+class PlatformProfile:
+    """CLI behaviour of one simulated platform."""
+    name: str
+    user_prompt: str
+    enable_prompt: str
+    more_prompt: str
+    paging_off_commands: Tuple[str, ...]
+    config_commands: Tuple[str, ...]
+    requires_enable: bool
+    invalid_input: str
+    responses: Dict[str, str] = field(default_factory=dict)
+
+
+PLATFORM_PROFILES: Dict[str, PlatformProfile] = {
+    "cisco_ios": PlatformProfile(
+        name="cisco_ios",
+        user_prompt="{hostname}>",
+        enable_prompt="{hostname}#",
+        more_prompt=" --More-- ",
+        paging_off_commands=("terminal length 0",),
+        config_commands=("show running-config", "show run"),
+        requires_enable=True,
+        invalid_input="% Invalid input detected at '^' marker.",
+        responses={"terminal width 511": ""},
+    ),
+    "arista_eos": PlatformProfile(
+        name="arista_eos",
+        user_prompt="{hostname}>",
+        enable_prompt="{hostname}#",
+        more_prompt=" --More-- ",
+        paging_off_commands=("terminal length 0",),
+        config_commands=("show running-config", "show run"),
+        requires_enable=True,
+        invalid_input="% Invalid input",
+        responses={
+            "terminal width 511": "Width set to 511 columns.",
+            "terminal length 0": "Pagination disabled.",
+        },
+    ),
+    "juniper_junos": PlatformProfile(
+        name="juniper_junos",
+        user_prompt="{username}@{hostname}> ",
+        enable_prompt="{username}@{hostname}> ",
+        more_prompt="---(more)---",
+        paging_off_commands=("set cli screen-length 0",),
+        config_commands=("show configuration", "show running-config"),
+        requires_enable=False,
+        invalid_input="syntax error.",
+        responses={
+            "set cli complete-on-space off": "Disabling complete-on-space",
+            "set cli screen-length 0": "Screen length set to 0",
+            "set cli screen-width 511": "Screen width set to 511",
+        },
+    ),
+}
+
+VERSION_OUTPUT = {
+    "cisco_ios": "Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version 15.2(4)E5, RELEASE SOFTWARE (fc2)\n"
+                 "cisco WS-C3750X-48P (PowerPC405) processor with 262144K bytes of memory.\n"
+                 "Processor board ID {serial}",
+    "arista_eos": "Arista DCS-7050SX-64-R\nSoftware image version: 4.27.3F\nSerial number: {serial}",
+    "juniper_junos": "Hostname: {hostname}\nModel: ex4300-48t\nJunos: 21.4R3-S1.5\nChassis serial: {serial}",
+}
+
+
+@lru_cache(maxsize=1)
+def _host_key() -> paramiko.RSAKey:
+    """Generate the farm host key once per process (RSA generation is slow)."""
+    return paramiko.RSAKey.generate(2048)
+
+
+@dataclass
+class SimulatedDevice:
+    """Device-like object pointing at one simulator port.
+
+    Exposes the attributes the backend drivers read from ``Device`` /
+    ``DeviceWithCredentials`` objects.
+    """
+    id: int
+    hostname: str
+    device_type: str
+    ip_address: str
+    port: int
+    username: str
+    password: str
+
+
+class _DeviceServer(paramiko.ServerInterface):
+    """Authentication and channel policy for a single SSH connection."""
+
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        self.shell_requested = threading.Event()
+        self.exec_command: Optional[str] = None
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if username == self.username and password == self.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        self.exec_command = command.decode("utf-8", errors="replace") if isinstance(command, bytes) else command
+        self.shell_requested.set()
+        return True
+
+
+class SimulatedShell:
+    """Interactive CLI state machine for one channel."""
+
+    def __init__(self, device: SimulatedDevice, profile: PlatformProfile, farm: "SSHSimulatorFarm"):
+        self.device = device
+        self.profile = profile
+        self.farm = farm
+        self.enabled = farm.start_in_enable or not profile.requires_enable
+        self.paging = farm.paging
+        self.awaiting_enable_password = False
+
+    @property
+    def prompt(self) -> str:
+        template = self.profile.enable_prompt if self.enabled else self.profile.user_prompt
+        return template.format(hostname=self.device.hostname, username=self.device.username)
+
+    def execute(self, line: str) -> Optional[str]:
+        """Run one command line and return its output (``None`` closes the session)."""
+        command = " ".join(line.split())
+        if command in ("exit", "quit", "logout"):
+            return None
+        if not command:
+            return ""
+        if command in self.profile.paging_off_commands:
+            self.paging = False
+        if command in self.profile.responses:
+            return self.profile.responses[command]
+        if command in self.profile.paging_off_commands:
+            return ""
+        if command in self.profile.config_commands:
+            if self.profile.requires_enable and not self.enabled:
+                return self.profile.invalid_input
+            return generate_config(self.device, self.farm.config_size_bytes).rstrip("\n")
+        if command == "show version":
+            return VERSION_OUTPUT[self.profile.name].format(
+                hostname=self.device.hostname, serial=f"SIM{self.device.id:08d}"
+            )
+        if command == "disable":
+            self.enabled = not self.profile.requires_enable
+            return ""
+        return self.profile.invalid_input
+
+
+class SSHSimulatorFarm:
+    """A set of simulated SSH devices listening on localhost ports.
+
+    Args:
+        count: Number of simulated devices (one listening port each)
+        platform: Platform profile name (see ``PLATFORM_PROFILES``)
+        config_size_bytes: Approximate size of ``show running-config`` output
+        username / password: Credentials accepted by every device
+        enable_secret: Password accepted by ``enable`` (any value if None)
+        page_lines: Lines per page while paging is enabled
+        paging: Whether sessions start with paging enabled
+        start_in_enable: Whether sessions start in privileged mode
+        initial_prompt: Whether to send the prompt as soon as the shell opens
+        response_delay: Seconds to wait before answering each command
+        host: Address to bind listening sockets to
+    """
+
+    def __init__(
+        self,
+        count: int = 1,
+        platform: str = "cisco_ios",
+        config_size_bytes: int = 20000,
+        username: str = "admin",
+        password: str = "admin",
+        enable_secret: Optional[str] = None,
+        page_lines: int = 24,
+        paging: bool = True,
+        start_in_enable: bool = False,
+        initial_prompt: bool = True,
+        response_delay: float = 0.0,
+        host: str = "127.0.0.1",
+    ):
+        if platform not in PLATFORM_PROFILES:
+            raise ValueError(f"Unknown platform '{platform}'. Available: {sorted(PLATFORM_PROFILES)}")
+        self.count = count
+        self.profile = PLATFORM_PROFILES[platform]
+        self.config_size_bytes = config_size_bytes
+        self.username = username
+        self.password = password
+        self.enable_secret = enable_secret
+        self.page_lines = page_lines
+        self.paging = paging
+        self.start_in_enable = start_in_enable
+        self.initial_prompt = initial_prompt
+        self.response_delay = response_delay
+        self.host = host
+        self.devices: List[SimulatedDevice] = []
+        self._listeners: Dict[socket.socket, SimulatedDevice] = {}
+        self._transports: List[paramiko.Transport] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._acceptor: Optional[threading.Thread] = None
+        self.sessions_served = 0
+
+    # --- Lifecycle ---
+
+    def start(self) -> "SSHSimulatorFarm":
+        """Bind all listening ports and start the acceptor thread."""
+        _host_key()
+        for index in range(self.count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, 0))
+            sock.listen(128)
+            sock.setblocking(False)
+            device = SimulatedDevice(
+                id=index + 1,
+                hostname=f"sim-{self.profile.name.replace('_', '-')}-{index + 1:04d}",
+                device_type=self.profile.name,
+                ip_address=self.host,
+                port=sock.getsockname()[1],
+                username=self.username,
+                password=self.password,
+            )
+            self._listeners[sock] = device
+            self.devices.append(device)
+        self._acceptor = threading.Thread(target=self._accept_loop, name="ssh-sim-acceptor", daemon=True)
+        self._acceptor.start()
+        return self
+
+    def stop(self) -> None:
+        """Close listening sockets and any active transports."""
+        self._stop.set()
+        if self._acceptor:
+            self._acceptor.join(timeout=2)
+        for sock in self._listeners:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        with self._lock:
+            transports = list(self._transports)
+        for transport in transports:
+            try:
+                transport.close()
+            except Exception:
+                pass
+
+    def __enter__(self) -> "SSHSimulatorFarm":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    # --- Connection handling ---
+
+    def _accept_loop(self) -> None:
+        selector = selectors.DefaultSelector()
+        for sock in self._listeners:
+            selector.register(sock, selectors.EVENT_READ)
+        try:
+            while not self._stop.is_set():
+                for key, _ in selector.select(timeout=0.2):
+                    try:
+                        client, _addr = key.fileobj.accept()
+                    except (BlockingIOError, OSError):
+                        continue
+                    client.setblocking(True)
+                    device = self._listeners[key.fileobj]
+                    threading.Thread(
+                        target=self._serve_connection, args=(client, device), daemon=True
+                    ).start()
+        finally:
+            selector.close()
+
+    def _serve_connection(self, client: socket.socket, device: SimulatedDevice) -> None:
+        transport = paramiko.Transport(client)
+        transport.add_server_key(_host_key())
+        with self._lock:
+            self._transports.append(transport)
+        server = _DeviceServer(self.username, self.password)
+        try:
+            transport.start_server(server=server)
+            channel = transport.accept(timeout=10)
+            if channel is None or not server.shell_requested.wait(timeout=10):
+                return
+            with self._lock:
+                self.sessions_served += 1
+            if server.exec_command is not None:
+                self._serve_exec(channel, device, server.exec_command)
+            else:
+                self._serve_shell(channel, device)
+        except Exception:
+            # Clients disconnecting mid-session is expected during benchmarks
+            pass
+        finally:
+            transport.close()
+            with self._lock:
+                if transport in self._transports:
+                    self._transports.remove(transport)
+
+    def _serve_exec(self, channel: paramiko.Channel, device: SimulatedDevice, command: str) -> None:
+        shell = SimulatedShell(device, self.profile, self)
+        shell.enabled = True
+        output = shell.execute(command) or ""
+        if self.response_delay:
+            time.sleep(self.response_delay)
+        channel.sendall(output.replace("\n", "\r\n").encode() + b"\r\n")
+        channel.send_exit_status(0)
+        channel.close()
+
+    def _serve_shell(self, channel: paramiko.Channel, device: SimulatedDevice) -> None:
+        shell = SimulatedShell(device, self.profile, self)
+        if self.initial_prompt:
+            channel.sendall(f"\r\n{shell.prompt}".encode())
+
+        line = []
+        previous = ""
+        while not self._stop.is_set():
+            data = channel.recv(4096)
+            if not data:
+                break
+            echo = []
+            for char in data.decode("utf-8", errors="replace"):
+                if char == "\n" and previous == "\r":
+                    previous = char
+                    continue
+                previous = char
+                if char in "\r\n":
+                    echo.append("\r\n")
+                    if not shell.awaiting_enable_password:
+                        channel.sendall("".join(echo).encode())
+                    echo = []
+                    if not self._handle_line(channel, shell, "".join(line)):
+                        channel.close()
+                        return
+                    line = []
+                elif char in "\x08\x7f":
+                    if line:
+                        line.pop()
+                        echo.append("\x08 \x08")
+                else:
+                    line.append(char)
+                    if not shell.awaiting_enable_password:
+                        echo.append(char)
+            if echo:
+                channel.sendall("".join(echo).encode())
+
+    def _handle_line(self, channel: paramiko.Channel, shell: SimulatedShell, line: str) -> bool:
+        """Process one entered line; returns False when the session should end."""
+        if shell.awaiting_enable_password:
+            shell.awaiting_enable_password = False
+            if self.enable_secret is None or line == self.enable_secret:
+                shell.enabled = True
+                channel.sendall(f"\r\n{shell.prompt}".encode())
+            else:
+                channel.sendall(f"\r\n% Access denied\r\n\r\n{shell.prompt}".encode())
+            return True
+
+        if " ".join(line.split()) == "enable" and shell.profile.requires_enable and not shell.enabled:
+            channel.sendall(b"Password: ")
+            shell.awaiting_enable_password = True
+            return True
+
+        if self.response_delay:
+            time.sleep(self.response_delay)
+        output = shell.execute(line)
+        if output is None:
+            return False
+        if output:
+            if not self._send_paged(channel, shell, output):
+                return False
+            channel.sendall(b"\r\n")
+        channel.sendall(shell.prompt.encode())
+        return True
+
+    def _send_paged(self, channel: paramiko.Channel, shell: SimulatedShell, output: str) -> bool:
+        """Send output, pausing at the platform's more-prompt while paging is on."""
+        lines = output.split("\n")
+        if not shell.paging or len(lines) <= self.page_lines:
+            channel.sendall("\r\n".join(lines).encode())
+            return True
+
+        more = shell.profile.more_prompt
+        erase = ("\x08" * len(more) + " " * len(more) + "\x08" * len(more)).encode()
+        position = 0
+        page_size = self.page_lines
+        while position < len(lines):
+            page = lines[position:position + page_size]
+            position += len(page)
+            channel.sendall("\r\n".join(page).encode())
+            if position >= len(lines):
+                break
+            channel.sendall(b"\r\n" + more.encode())
+            key = channel.recv(1)
+            if not key:
+                return False
+            channel.sendall(erase)
+            if key in (b"q", b"Q"):
+                break
+            # Enter advances a single line, anything else a full page
+            page_size = 1 if key in (b"\r", b"\n") else self.page_lines
+        return True
@@ -0,0 +1,69 @@
+"""
+Tests for the Prometheus metrics helpers.
+
+These tests cover:
+- Exposition of worker metrics through the default registry
+- Circuit-breaker state gauge updates
+- SQLAlchemy pool checkout metrics (through engine connect/close)
+- RQ queue length/lag collection (mocked queues)
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from netraven.utils import metrics
+from netraven.worker.circuit_breaker import CircuitBreaker
+
+
+def test_render_latest_exposes_retry_counter():
+    metrics.TASK_RETRIES.labels(category="TIMEOUT").inc()
+    payload, content_type = metrics.render_latest()
+    assert b'netraven_task_retries_total{category="TIMEOUT"}' in payload
+    assert content_type.startswith("text/plain")
+
+
+def test_circuit_breaker_publishes_state_counts():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure(1)
+    breaker.record_success(2)
+    registry = prometheus_client.REGISTRY
+    assert registry.get_sample_value("netraven_circuit_breaker_circuits", {"state": "open"}) == 1
+
+
+def test_rq_queue_collector_reports_lag():
+    now = datetime.now(timezone.utc)
+    queue = mock.Mock(count=3)
+    queue.get_jobs.return_value = [SimpleNamespace(enqueued_at=now - timedelta(seconds=30))]
+    with mock.patch("rq.Queue", return_value=queue):
+        families = {f.name: f for f in metrics.RQQueueCollector(mock.Mock(), ["default"]).collect()}
+    assert families["netraven_rq_queue_jobs"].samples[0].value == 3
+    assert families["netraven_rq_queue_lag_seconds"].samples[0].value >= 30
+
+
+def _sample(name):
+    return prometheus_client.REGISTRY.get_sample_value(name) or 0.0
+
+
+def test_pool_metrics_follow_checkout_and_checkin():
+    engine = create_engine("sqlite://", poolclass=QueuePool)
+    metrics.instrument_engine(engine)
+    checkouts = _sample("netraven_db_pool_checkouts_total")
+    checked_out = _sample("netraven_db_pool_checked_out")
+    waits = _sample("netraven_db_pool_checkout_wait_seconds_count")
+
+    first, second = engine.connect(), engine.connect()
+    assert _sample("netraven_db_pool_checked_out") == checked_out + 2
+    first.close()
+    assert _sample("netraven_db_pool_checked_out") == checked_out + 1
+    second.detach()
+    second.close()
+    assert _sample("netraven_db_pool_checked_out") == checked_out
+    assert _sample("netraven_db_pool_checkouts_total") == checkouts + 2
+    assert _sample("netraven_db_pool_checkout_wait_seconds_count") == waits + 2
+    engine.dispose()
@@ -0,0 +1,65 @@
+"""
+Tests for the job-run tracing helpers.
+
+These tests cover:
+- Parent/child linkage across dispatcher threads (bind_context)
+- Error recording on spans
+- No-op behaviour when tracing is disabled
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from netraven.utils import tracing
+
+
+@pytest.fixture
+def trace_dir(tmp_path):
+    tracing.configure({"tracing": {"enabled": True, "exporter": "json", "path": str(tmp_path)}})
+    yield tmp_path
+    tracing.configure({"tracing": {"enabled": False}})
+
+
+def _load(trace_dir):
+    files = os.listdir(trace_dir)
+    assert len(files) == 1
+    with open(os.path.join(trace_dir, files[0])) as f:
+        return {s["name"]: s for s in map(json.loads, f)}
+
+
+def test_spans_propagate_into_pool_threads(trace_dir):
+    @tracing.traced("device_task")
+    def task(device_id):
+        tracing.set_attributes({"device.id": device_id})
+        with tracing.span("command"):
+            pass
+
+    with tracing.span("run_job", {"job.id": 7}) as root:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(tracing.bind_context(task), [1]))
+
+    spans = _load(trace_dir)
+    assert spans["run_job"]["parent_id"] is None
+    assert spans["device_task"]["parent_id"] == root.span_id
+    assert spans["command"]["parent_id"] == spans["device_task"]["span_id"]
+    assert {s["trace_id"] for s in spans.values()} == {root.trace_id}
+    assert spans["device_task"]["attributes"]["device.id"] == 1
+    assert tracing.current_span() is tracing.NOOP_SPAN
+
+
+def test_span_records_exception(trace_dir):
+    with pytest.raises(ValueError):
+        with tracing.span("driver.netmiko.run_command"):
+            raise ValueError("boom")
+    span = _load(trace_dir)["driver.netmiko.run_command"]
+    assert span["status"] == "error"
+    assert span["error"] == "ValueError: boom"
+
+
+def test_disabled_tracing_is_noop(tmp_path):
+    tracing.configure({"tracing": {"enabled": "false", "path": str(tmp_path)}})
+    with tracing.span("run_job") as span:
+        assert span is tracing.NOOP_SPAN
+    assert os.listdir(tmp_path) == []
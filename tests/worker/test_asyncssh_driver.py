@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+from netraven.worker.backends import asyncssh_driver
+
+
+def _session():
+    device = SimpleNamespace(id=1, hostname="core-sw1", device_type="cisco_ios", ip_address="10.0.0.1")
+    return asyncssh_driver.AsyncSSHSession(device, config={"worker": {"command_timeout": "30"}})
+
+
+def test_legacy_algorithms_are_offered_per_connection():
+    assert asyncssh_driver.get_algorithm_options({}) == {}
+    options = asyncssh_driver.get_algorithm_options(
+        {"ssh": {"allow_legacy_kex": True, "legacy_kex": ["diffie-hellman-group14-sha1"]}}
+    )
+    assert options["kex_algs"] == "+diffie-hellman-group14-sha1"
+    assert options["mac_algs"].startswith("+hmac-sha1")
+
+
+def test_prompt_is_learnt_then_matched_exactly():
+    session = _session()
+    assert session.command_timeout == 30.0
+    assert session._at_prompt("Banner\r\ncore-sw1>")
+    assert session.prompt == "core-sw1>"
+    # A '>' at the end of an output line is not the device prompt
+    assert not session._at_prompt("interface Gi0/1\r\n description uplink->core")
+    assert session._at_prompt("enable\r\ncore-sw1#", echo="enable")
+    assert session.prompt == "core-sw1#"
+
+
+def test_prompt_requires_command_echo():
+    session = _session()
+    session.prompt = "core-sw1#"
+    assert not session._at_prompt("core-sw1#", echo="show version")
+    assert session._at_prompt("core-sw1#show version\r\nCisco IOS\r\ncore-sw1#", echo="show version")
+
+
+def test_run_commands_uses_one_blocking_session(monkeypatch):
+    opened, sent = [], []
+
+    async def fake_open(self):
+        opened.append(self.timer)
+        return self
+
+    async def fake_send(self, command=None):
+        sent.append(command)
+        if command == "show inventory":
+            raise ValueError("Received no output")
+        return f"output of {command}"
+
+    async def fake_close(self):
+        pass
+
+    monkeypatch.setattr(asyncssh_driver, "asyncssh", object())
+    monkeypatch.setattr(asyncssh_driver.AsyncSSHSession, "open", fake_open)
+    monkeypatch.setattr(asyncssh_driver.AsyncSSHSession, "send", fake_send)
+    monkeypatch.setattr(asyncssh_driver.AsyncSSHSession, "close", fake_close)
+
+    results = asyncssh_driver.run_commands(_session().device, ["show version", "show inventory", "show clock"])
+    assert len(opened) == 1
+    assert sent == ["show version", "show inventory", "show clock"]
+    assert results["show version"]["output"] == "output of show version"
+    assert results["show inventory"]["error"] == "Received no output"
+    assert results["show clock"]["output"] == "output of show clock"
+
+
+class FakeStdout:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def read(self, size):
+        return self.chunks.pop(0) if self.chunks else ""
+
+
+def test_read_until_returns_large_output_at_prompt():
+    session = _session()
+    session.prompt = "core-sw1#"
+    body = ["interface Gi0/%d\r\n description core-sw1#\r\n" % n for n in range(2000)]
+    chunks = ["show run", "ning-config\r\n"] + body + ["core-sw1", "#"]
+    session._process = SimpleNamespace(stdout=FakeStdout(chunks))
+    output = asyncio.run(session._read_until(session._at_prompt, 5, echo="show running-config"))
+    assert output == "".join(chunks)
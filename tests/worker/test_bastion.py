@@ -0,0 +1,67 @@
+import socket
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from netraven.worker.backends import bastion, connect_socket
+
+BASTION = {"id": 3, "name": "dc1-jump", "host": "10.0.0.5", "port": 22, "username": "jump",
+           "password": "pw", "max_channels": 2}
+
+
+@pytest.fixture(autouse=True)
+def no_tunnels():
+    bastion.close_all()
+    yield
+    bastion.close_all()
+
+
+@pytest.fixture
+def fake_transport():
+    transport = MagicMock()
+    transport.is_active.return_value = True
+    with patch.object(bastion.BastionTunnel, "_get_transport", return_value=transport):
+        yield transport
+
+
+def test_device_bastion_takes_precedence_over_tags():
+    tags = [SimpleNamespace(id=9, bastion_id=5), SimpleNamespace(id=2, bastion_id=4), SimpleNamespace(id=1, bastion_id=None)]
+    assert bastion.resolve_bastion_id(SimpleNamespace(bastion_id=3, tags=tags)) == 3
+    assert bastion.resolve_bastion_id(SimpleNamespace(bastion_id=None, tags=tags)) == 4
+    assert bastion.resolve_bastion_id(SimpleNamespace(bastion_id=None, tags=[])) is None
+
+    row = SimpleNamespace(get_password="pw", **{field: BASTION[field] for field in bastion.BASTION_FIELDS})
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [row]
+    devices = [SimpleNamespace(bastion_id=3, tags=[]), SimpleNamespace(bastion_id=None, tags=[])]
+    assert bastion.attach_bastions(devices, db) == 1
+    assert devices[0].bastion == BASTION
+    assert devices[1].bastion is None
+
+
+def test_sessions_share_one_transport_within_channel_limit(fake_transport):
+    first = connect_socket("10.1.1.1", 22, timeout=0.2, bastion=BASTION)
+    second = connect_socket("10.1.1.2", 22, timeout=0.2, bastion=BASTION)
+    assert fake_transport.open_channel.call_count == 2
+    fake_transport.open_channel.assert_called_with("direct-tcpip", ("10.1.1.2", 22), ("127.0.0.1", 0), timeout=0.2)
+
+    with pytest.raises(socket.timeout, match="channels of bastion dc1-jump"):
+        connect_socket("10.1.1.3", 22, timeout=0.1, bastion=BASTION)
+
+    # A closed channel frees its slot for a waiting session
+    threading.Timer(0.05, first.close).start()
+    third = connect_socket("10.1.1.3", 22, timeout=2, bastion=BASTION)
+    second.close()
+    third.close()
+    third.close()  # closing twice releases the slot once
+
+
+def test_failed_channel_open_releases_its_slot(fake_transport):
+    import paramiko
+
+    fake_transport.open_channel.side_effect = paramiko.ChannelException(2, "Connect failed")
+    for _ in range(3):
+        with pytest.raises(ConnectionError, match="10.1.1.1:22"):
+            connect_socket("10.1.1.1", 22, timeout=0.1, bastion=BASTION)
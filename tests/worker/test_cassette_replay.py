@@ -0,0 +1,94 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from netmiko.exceptions import NetmikoTimeoutException, ConnectionException
+from netraven.worker.backends import cassette, replay_driver, netmiko_driver
+
+
+@pytest.fixture
+def cassette_config(tmp_path):
+    replay_driver.reset_replay_state()
+    yield {"worker": {"cassette": {"record": True, "path": str(tmp_path)}, "replay": {"speed": 0}}}
+    replay_driver.reset_replay_state()
+
+
+def _device(hostname="core-sw1", device_id=1):
+    return SimpleNamespace(id=device_id, hostname=hostname, device_type="cisco_ios", ip_address="10.0.0.1")
+
+
+def test_recorded_output_is_redacted(cassette_config, tmp_path):
+    output = "hostname core-sw1\nenable secret 5 abc\ninterface Gi0/1"
+    cassette.record_interaction(_device(), "show running-config", output, 1.0, 2.0, cassette_config)
+    interactions = cassette.load_cassette(cassette.cassette_file(str(tmp_path), "core-sw1"))
+    assert len(interactions) == 1
+    assert "abc" not in interactions[0]["output"]
+    assert "10.0.0.1" not in str(interactions[0])
+    assert interactions[0]["connect_seconds"] == 1.0
+
+
+def test_replay_cycles_recorded_outputs(cassette_config):
+    cassette.record_interaction(_device(), "show running-config", "hostname v1", 0.1, 0.1, cassette_config)
+    cassette.record_interaction(_device(), "show running-config", "hostname v2", 0.1, 0.1, cassette_config)
+    first = replay_driver.run_command(_device(), config=cassette_config)
+    second = replay_driver.run_command(_device(), config=cassette_config)
+    third = replay_driver.run_command(_device(), config=cassette_config)
+    assert (first, second, third) == ("hostname v1", "hostname v2", "hostname v1")
+
+
+def test_replay_raises_recorded_error(cassette_config):
+    error = NetmikoTimeoutException("timed out")
+    cassette.record_interaction(_device(), "show running-config", None, 5.0, 0.0, cassette_config, error=error)
+    with pytest.raises(NetmikoTimeoutException):
+        replay_driver.run_command(_device(), config=cassette_config)
+
+
+def test_replay_maps_unknown_devices_unless_strict(cassette_config):
+    cassette.record_interaction(_device(), "show running-config", "hostname core-sw1", 0.1, 0.1, cassette_config)
+    other = _device(hostname="edge-sw9", device_id=9)
+    assert replay_driver.run_command(other, config=cassette_config) == "hostname core-sw1"
+
+    cassette_config["worker"]["replay"]["strict"] = True
+    with pytest.raises(ConnectionException):
+        replay_driver.run_command(other, config=cassette_config)
+
+
+def test_replay_at_recorded_speed(cassette_config):
+    cassette.record_interaction(_device(), "show running-config", "hostname core-sw1", 1.5, 0.5, cassette_config)
+    cassette_config["worker"]["replay"]["speed"] = 2.0
+    with patch("netraven.worker.backends.replay_driver.time.sleep") as mock_sleep:
+        replay_driver.run_command(_device(), config=cassette_config)
+    mock_sleep.assert_called_once_with(pytest.approx(1.0))
+
+
+def test_netmiko_driver_records_when_enabled(cassette_config, tmp_path):
+    device = _device()
+    device.username = "admin"
+    device.password = "pw"
+    connection = MagicMock()
+    connection.check_enable_mode.return_value = True
+    connection.send_command.return_value = "hostname core-sw1\nusername admin password 0 pw"
+    with patch("netraven.worker.backends.netmiko_driver.ConnectHandler", return_value=connection), \
+            patch("netraven.worker.backends.netmiko_driver.connect_socket"):
+        netmiko_driver.run_command(device, job_id=1, config=cassette_config)
+    interactions = cassette.load_cassette(cassette.cassette_file(str(tmp_path), "core-sw1"))
+    assert interactions[0]["output"].startswith("hostname core-sw1")
+    assert "pw" not in interactions[0]["output"].split("\n")[1]
+
+
+def test_netmiko_session_runs_commands_over_one_connection(cassette_config, tmp_path):
+    device = _device()
+    device.username = "admin"
+    device.password = "pw"
+    connection = MagicMock()
+    connection.check_enable_mode.return_value = True
+    connection.send_command.side_effect = ["Cisco IOS Software, Version 15.1", "hostname core-sw1"]
+    with patch("netraven.worker.backends.netmiko_driver.ConnectHandler", return_value=connection) as handler, \
+            patch("netraven.worker.backends.netmiko_driver.connect_socket"):
+        with netmiko_driver.open_session(device, job_id=1, config=cassette_config) as session:
+            assert session.send("show version").startswith("Cisco IOS")
+            assert session.send() == "hostname core-sw1"
+    handler.assert_called_once()
+    connection.disconnect.assert_called_once()
+    interactions = cassette.load_cassette(cassette.cassette_file(str(tmp_path), "core-sw1"))
+    assert [i["command"] for i in interactions] == ["show version", "show running-config"]
+    assert interactions[1]["connect_seconds"] == 0.0
@@ -4,6 +4,18 @@ from netraven.db.models.device import Device
 from netraven.db.models.device_config import DeviceConfiguration
 from netraven.worker.jobs import config_backup
 from datetime import datetime
+from unittest.mock import MagicMock, patch
+from netraven.worker.backends import CommandSession
+
+
+def patch_device_output(**mock_kwargs):
+    """Patch the netmiko session so each send() returns/raises per mock_kwargs."""
+    send = MagicMock(**mock_kwargs)
+    patcher = patch(
+        "netraven.worker.backends.netmiko_driver.open_session",
+        side_effect=lambda device, job_id=None, config=None: CommandSession(send, device, job_id, config),
+    )
+    return patcher
 
 @pytest.fixture
 def test_device(db_session: Session):
@@ -18,9 +30,8 @@ def test_config_backup_creates_db_record(db_session: Session, test_device):
     Test that running the config backup job stores a configuration in the database.
     """
     # Patch the network call to return a known config
-    from unittest.mock import patch
     test_config = "hostname test-device\ninterface eth0"
-    with patch("netraven.worker.backends.netmiko_driver.run_command", return_value=test_config):
+    with patch_device_output(return_value=test_config):
         with patch("netraven.worker.redactor.redact", side_effect=lambda c, _: c):
             result = config_backup.run(test_device, job_id=123, config={}, db=db_session)
     assert result["success"] is True
@@ -34,9 +45,8 @@ def test_config_backup_deduplication(db_session: Session, test_device):
     """
     Test that running the backup job twice with the same config only stores one record (deduplication).
     """
-    from unittest.mock import patch
     test_config = "hostname test-device\ninterface eth0"
-    with patch("netraven.worker.backends.netmiko_driver.run_command", return_value=test_config):
+    with patch_device_output(return_value=test_config):
         with patch("netraven.worker.redactor.redact", side_effect=lambda c, _: c):
             # First run: should store config
             result1 = config_backup.run(test_device, job_id=1, config={}, db=db_session)
@@ -51,9 +61,8 @@ def test_config_backup_stores_metadata(db_session: Session, test_device):
     """
     Test that the backup job stores correct metadata (job_id, timestamp).
     """
-    from unittest.mock import patch
     test_config = "hostname test-device\ninterface eth0"
-    with patch("netraven.worker.backends.netmiko_driver.run_command", return_value=test_config):
+    with patch_device_output(return_value=test_config):
         with patch("netraven.worker.redactor.redact", side_effect=lambda c, _: c):
             result = config_backup.run(test_device, job_id=555, config={}, db=db_session)
     assert result["success"] is True
@@ -66,9 +75,8 @@ def test_config_backup_handles_network_error(db_session: Session, test_device):
     """
     Test that the backup job handles network errors gracefully and does not store a config.
     """
-    from unittest.mock import patch
     from netmiko.exceptions import NetmikoTimeoutException
-    with patch("netraven.worker.backends.netmiko_driver.run_command", side_effect=NetmikoTimeoutException("timeout")):
+    with patch_device_output(side_effect=NetmikoTimeoutException("timeout")):
         result = config_backup.run(test_device, job_id=999, config={}, db=db_session)
     assert result["success"] is False
     configs = db_session.query(DeviceConfiguration).filter_by(device_id=test_device.id).all()
@@ -78,10 +86,9 @@ def test_config_backup_stores_multiple_versions(db_session: Session, test_device
     """
     Test that running the backup job with different configs stores multiple versions.
     """
-    from unittest.mock import patch
     config1 = "hostname test-device\ninterface eth0"
     config2 = "hostname test-device\ninterface eth1"
-    with patch("netraven.worker.backends.netmiko_driver.run_command", side_effect=[config1, config2]):
+    with patch_device_output(side_effect=[config1, config2]):
         with patch("netraven.worker.redactor.redact", side_effect=lambda c, _: c):
             result1 = config_backup.run(test_device, job_id=1, config={}, db=db_session)
             result2 = config_backup.run(test_device, job_id=2, config={}, db=db_session)
@@ -90,3 +97,23 @@ def test_config_backup_stores_multiple_versions(db_session: Session, test_device
     configs = db_session.query(DeviceConfiguration).filter_by(device_id=test_device.id).all()
     assert len(configs) == 2
     assert {c.config_metadata["job_id"] for c in configs} == {1, 2}
+
+def test_config_backup_reuses_session_for_capability_detection(db_session: Session, test_device):
+    """
+    Test that capability detection and the backup share one device session.
+    """
+    outputs = {"show version": "Cisco IOS Software, Version 15.1(4)M4\ncisco CISCO2911/K9 (revision 1.0)"}
+    session = MagicMock()
+    session.__enter__.return_value = session
+    session.send.side_effect = lambda command=None: outputs.get(command, "hostname test-device")
+    config = {"worker": {"detect_capabilities": "true"}}
+    with patch("netraven.worker.backends.netmiko_driver.open_session", return_value=session) as mock_open:
+        with patch("netraven.worker.redactor.redact", side_effect=lambda c, _: c):
+            result = config_backup.run(test_device, job_id=7, config=config, db=db_session)
+    assert result["success"] is True
+    mock_open.assert_called_once()
+    assert [c.args for c in session.send.call_args_list] == [("show version",), ()]
+    session.__exit__.assert_called_once()
+    record = db_session.query(DeviceConfiguration).filter_by(device_id=test_device.id).first()
+    assert record.config_data == "hostname test-device"
+    assert record.config_metadata["version"] == "15.1(4)M4"
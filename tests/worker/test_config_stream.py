@@ -0,0 +1,51 @@
+from netraven.utils.hash_utils import sha256_hex
+from netraven.worker import redactor
+from netraven.worker.config_stream import StreamingConfigBuffer
+
+OUTPUT = (
+    "hostname core-sw1\r\n"
+    "enable secret 5 $1$abc\r\n"
+    "username admin password 7 0822455D0A16\r\n"
+    "interface Vlan1\r\n ip address 10.0.0.1 255.255.255.0\r\n"
+    "end"
+) * 50
+
+
+def test_matches_redact_and_hash_for_any_chunk_size():
+    expected = redactor.redact(OUTPUT, None)
+    for chunk_size in (1, 2, 7, 64, 1024 * 1024):
+        with StreamingConfigBuffer({"worker": {"config_chunk_size": chunk_size}}) as buffer:
+            buffer.write_all(OUTPUT)
+            assert buffer.hexdigest() == sha256_hex(expected)
+            assert buffer.getvalue() == expected
+
+
+def test_large_output_spills_to_disk():
+    with StreamingConfigBuffer({"worker": {"config_chunk_size": 256}}) as buffer:
+        buffer.write_all(OUTPUT)
+        buffer.finish()
+        assert buffer._file._rolled
+        assert redactor.REDACTED_LINE_MARKER in buffer.getvalue()
+
+
+def test_unredacted_buffer_keeps_secrets():
+    with StreamingConfigBuffer({}, redact=False) as buffer:
+        buffer.write_all("enable secret 5 $1$abc\r\nend\r\n")
+        assert buffer.getvalue() == "enable secret 5 $1$abc\nend"
+
+
+def test_byte_chunks_split_inside_characters_and_line_endings():
+    data = ("name caf\u00e9\r\n" * 20).encode("utf-8")
+    with StreamingConfigBuffer({"worker": {"config_chunk_size": 3}}, redact=False) as buffer:
+        for start in range(0, len(data), 3):
+            buffer.write_bytes(data[start:start + 3])
+        assert buffer.getvalue() == "\n".join(["name caf\u00e9"] * 20)
+
+
+def test_unredacted_result_is_rebuilt_from_the_spool():
+    with StreamingConfigBuffer({"worker": {"config_chunk_size": 64}}) as buffer:
+        buffer.write_all(OUTPUT)
+        assert redactor.REDACTED_LINE_MARKER in buffer.getvalue()
+        buffer.process(redact=False)
+        assert buffer.getvalue() == "\n".join(OUTPUT.splitlines())
+
@@ -41,4 +41,19 @@ def test_reachability_handler_logs_failure(fake_device):
         # Call handler
         reachability_handler = JOB_TYPE_REGISTRY["reachability"]
         result = reachability_handler(fake_device, job_id=123, config=None, db=MagicMock())
-        assert result["success"] is False
\ No newline at end of file
+        assert result["success"] is False
+
+
+def test_login_outcome_is_recorded_against_the_credential(fake_device):
+    from netraven.worker import executor
+
+    fake_device.credential_id = 7
+    db = MagicMock()
+    with patch.object(executor, "record_credential_attempt") as record:
+        executor.record_login_outcome(fake_device, 123, {"success": False, "authenticated": False, "details": {"error": "Authentication failed"}}, db)
+        record.assert_called_once_with(db, 42, 7, 123, success=False, error="Authentication failed")
+
+        # Results without a login outcome (e.g. reachability) are not recorded
+        record.reset_mock()
+        executor.record_login_outcome(fake_device, 123, {"success": True, "details": {}}, db)
+        record.assert_not_called()
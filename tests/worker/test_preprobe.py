@@ -0,0 +1,62 @@
+import socket
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from netraven.worker import preprobe
+from netraven.worker.error_handler import ErrorCategory
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_probe_reports_only_dead_devices(listener, closed_port):
+    devices = [
+        SimpleNamespace(id=1, hostname="up", ip_address="127.0.0.1", port=listener),
+        SimpleNamespace(id=2, hostname="closed", ip_address="127.0.0.1", port=closed_port),
+        SimpleNamespace(id=3, hostname="bad-name", ip_address="no-such-host.invalid", port=22),
+        SimpleNamespace(id=4, hostname="also-up", ip_address="127.0.0.1", port=listener),
+    ]
+    failures = preprobe.probe_devices(devices, timeout=1, concurrency=2)
+    assert set(failures) == {2, 3}
+    assert failures[2].category == ErrorCategory.CONNECTION_REFUSED
+    assert failures[3].category == ErrorCategory.UNREACHABLE
+    assert not failures[2].is_retriable
+    assert failures[2].context["stage"] == "preprobe"
+
+
+def test_silent_devices_time_out_together():
+    # TEST-NET-1 addresses are never routed; the connects either hang or fail at once
+    devices = [SimpleNamespace(id=i, hostname=f"dead{i}", ip_address=f"192.0.2.{i}", port=22) for i in range(1, 21)]
+    start = time.monotonic()
+    failures = preprobe.probe_devices(devices, timeout=0.3)
+    assert time.monotonic() - start < 2
+    assert set(failures) == set(range(1, 21))
+
+
+def test_probe_is_opt_in_and_skips_bastion_devices(closed_port):
+    devices = [
+        SimpleNamespace(id=1, hostname="direct", ip_address="127.0.0.1", port=closed_port, bastion=None),
+        SimpleNamespace(id=2, hostname="tunnelled", ip_address="127.0.0.1", port=closed_port, bastion={"id": 1}),
+    ]
+    assert preprobe.probe_job_devices(devices, {"worker": {}}) == {}
+    config = {"worker": {"preprobe": {"enabled": "true", "timeout": 1}}}
+    assert set(preprobe.probe_job_devices(devices, config)) == {1}
+    config["worker"]["driver"] = "simulated"
+    assert preprobe.probe_job_devices(devices, config) == {}
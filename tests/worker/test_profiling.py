@@ -0,0 +1,32 @@
+import marshal
+from concurrent.futures import ThreadPoolExecutor
+
+from netraven.worker import profiling
+
+
+def busy_device_task():
+    return sum(i * i for i in range(20000))
+
+
+def test_profiler_merges_pool_thread_profiles():
+    profiler = profiling.start_job_profiler(job_id=1)
+
+    def task():
+        with profiling.thread_profile():
+            return busy_device_task()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda _: task(), range(4)))
+    artifact = profiling.stop_job_profiler(profiler)
+
+    assert "busy_device_task" in artifact["stats_text"]
+    assert artifact["allocations_text"]
+    assert artifact["duration_seconds"] > 0
+    stats = marshal.loads(artifact["pstats_data"])
+    assert any(func[2] == "busy_device_task" for func in stats)
+
+
+def test_thread_profile_is_noop_without_active_profiler():
+    with profiling.thread_profile():
+        busy_device_task()
+    assert profiling._active_profiler is None
@@ -0,0 +1,67 @@
+import socket
+
+import pytest
+
+from netraven.worker.backends.prompt_reader import PromptReader
+from netraven.worker.config_stream import StreamingConfigBuffer
+
+
+class FakeChannel:
+    """Replays scripted chunks; a pager answer releases the next page."""
+
+    def __init__(self, chunks, pages=()):
+        self.chunks = list(chunks)
+        self.pages = list(pages)
+        self.sent = []
+
+    def settimeout(self, timeout):
+        pass
+
+    def send(self, data):
+        self.sent.append(data)
+        if data == " " and self.pages:
+            self.chunks.extend(self.pages.pop(0))
+
+    def recv(self, size):
+        if not self.chunks:
+            raise socket.timeout()
+        return self.chunks.pop(0)
+
+
+def test_stops_at_prompt_after_echo():
+    channel = FakeChannel([b"\r\nrtr1#", b"show clock\r\n", b"10:00:00 UTC\r\nrt", b"r1#"])
+    output = PromptReader(channel, "cisco_ios", timeout=5).read_until_prompt(echo="show clock")
+    assert output.endswith("10:00:00 UTC\r\nrtr1#")
+
+
+def test_answers_pager_and_removes_it():
+    erase = b"\x08" * 10 + b" " * 10 + b"\x08" * 10
+    channel = FakeChannel(
+        [b"show run\r\nhostname rtr1\r\n --More-- "],
+        pages=[[erase + b" ip address 10.0.0.1\r\nrtr1#"]],
+    )
+    reader = PromptReader(channel, "cisco_ios", timeout=5)
+    output = reader.read_until_prompt(echo="show run")
+    assert channel.sent == [" "]
+    assert reader.pages == 1
+    assert output == "show run\r\nhostname rtr1\r\n ip address 10.0.0.1\r\nrtr1#"
+
+
+def test_junos_prompt_and_timeout():
+    channel = FakeChannel([b"show configuration\r\n", b"version 21.4;\r\n", b"admin@mx1> "])
+    output = PromptReader(channel, "juniper_junos", timeout=5).read_until_prompt(echo="show configuration")
+    assert "version 21.4;" in output
+    with pytest.raises(socket.timeout):
+        PromptReader(FakeChannel([b"show version\r\npartial"]), "juniper_junos", timeout=5).read_until_prompt(echo="show version")
+
+
+def test_prompt_reader_streams_into_buffer_without_pager_text():
+    erase = b"\x08" * 10 + b" " * 10 + b"\x08" * 10
+    channel = FakeChannel(
+        [b"show run\r\nhostname rtr1\r\n --More-- "],
+        pages=[[erase + b" ip address 10.0.0.1\r\nrtr1#"]],
+    )
+    reader = PromptReader(channel, "cisco_ios", timeout=5)
+    with StreamingConfigBuffer({}, redact=False) as buffer:
+        assert reader.read_until_prompt(echo="show run", sink=buffer) is None
+        assert buffer.getvalue() == "show run\nhostname rtr1\n ip address 10.0.0.1\nrtr1#"
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from netraven.worker.backends import run_session_commands, netmiko_driver
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.sent = []
+
+    def send(self, command=None):
+        self.sent.append(command)
+        response = self.responses[command]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_results_are_ordered_with_timings():
+    session = FakeSession({"show version": "IOS 15.2", "show inventory": "PID: WS-C3750X"})
+    results = run_session_commands(session, ["show version", "show inventory", "show version"])
+    assert list(results) == ["show version", "show inventory"]
+    assert session.sent == ["show version", "show inventory"]
+    assert results["show inventory"]["output"] == "PID: WS-C3750X"
+    assert results["show version"]["error"] is None
+    assert all(r["elapsed"] >= 0 for r in results.values())
+
+
+def test_empty_output_continues_but_session_errors_skip_the_rest():
+    session = FakeSession({
+        "show clock": ValueError("Received no output for command 'show clock'"),
+        "show version": "IOS 15.2",
+        "show inventory": TimeoutError("read timed out"),
+        "show vlan": "VLAN0001",
+    })
+    results = run_session_commands(session, ["show clock", "show version", "show inventory", "show vlan"])
+    assert results["show clock"]["output"] is None
+    assert results["show version"]["output"] == "IOS 15.2"
+    assert results["show inventory"]["error"] == "TimeoutError: read timed out"
+    assert results["show vlan"]["error"].startswith("Skipped after earlier failure")
+    assert "show vlan" not in session.sent
+
+
+def test_netmiko_run_commands_uses_one_connection():
+    device = SimpleNamespace(id=1, hostname="core-sw1", device_type="cisco_ios", ip_address="10.0.0.1",
+                             username="admin", password="pw")
+    connection = MagicMock()
+    connection.check_enable_mode.return_value = True
+    connection.send_command.side_effect = lambda command, read_timeout=None: f"output of {command}"
+    with patch("netraven.worker.backends.netmiko_driver.ConnectHandler", return_value=connection) as handler, \
+            patch("netraven.worker.backends.netmiko_driver.connect_socket"):
+        results = netmiko_driver.run_commands(device, ["show version", "show ip int brief"], config={})
+    handler.assert_called_once()
+    connection.disconnect.assert_called_once()
+    assert [r["output"] for r in results.values()] == ["output of show version", "output of show ip int brief"]
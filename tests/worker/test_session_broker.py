@@ -0,0 +1,97 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from netmiko.exceptions import NetmikoTimeoutException, ReadTimeout
+
+from netraven.worker import session_broker
+
+DEVICE = SimpleNamespace(id=1, hostname="core-sw1", ip_address="10.0.0.1", port=22, device_type="cisco_ios",
+                         username="admin", password="pw", tags=[SimpleNamespace(name="core")])
+
+
+class FakeSession:
+    logins = 0
+
+    def __init__(self, device, job_id):
+        FakeSession.logins += 1
+        self.job_id = job_id
+        self.closed = False
+
+    def send(self, command=None):
+        if command == "show slow":
+            raise ReadTimeout("Pattern not detected")
+        return f"output of {command}"
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def broker(tmp_path):
+    FakeSession.logins = 0
+    path = str(tmp_path / "broker.sock")
+    pool = session_broker.SessionPool(FakeSession, max_sessions_per_device=1, idle_timeout=60)
+    server = session_broker.SessionBroker(path, pool, lease_timeout=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path, pool
+    server.shutdown()
+    server.server_close()
+
+
+def test_sessions_are_reused_across_leases(broker):
+    path, _ = broker
+    for _ in range(3):
+        with session_broker.BrokerSession(DEVICE, 1, path, timeout=5).open() as session:
+            assert session.send("show version") == "output of show version"
+    assert FakeSession.logins == 1
+
+
+def test_per_device_limit_and_failed_sessions_are_discarded(broker):
+    path, pool = broker
+    with session_broker.BrokerSession(DEVICE, 1, path, timeout=5).open() as session:
+        with pytest.raises(NetmikoTimeoutException):
+            session_broker.BrokerSession(DEVICE, 2, path, timeout=5).open()
+        with pytest.raises(ReadTimeout):
+            session.send("show slow")
+    with session_broker.BrokerSession(DEVICE, 3, path, timeout=5).open() as session:
+        assert not session.reused
+    assert FakeSession.logins == 2
+
+
+def test_opt_in_by_tag_and_fallback_when_broker_is_down(tmp_path):
+    config = {"worker": {"session_broker": {"enabled": "true", "tags": ["core"], "socket_path": str(tmp_path / "none.sock")}}}
+    assert session_broker.uses_broker(DEVICE, config)
+    assert not session_broker.uses_broker(SimpleNamespace(tags=[]), config)
+    assert session_broker.open_broker_session(DEVICE, 1, config) is None
+
+
+def test_hung_probe_does_not_block_other_devices():
+    probing, unblock = threading.Event(), threading.Event()
+
+    class HungConnection:
+        def is_alive(self):
+            probing.set()
+            unblock.wait(5)
+            return False
+
+    pool = session_broker.SessionPool(FakeSession, max_sessions_per_device=1, idle_timeout=60)
+    device = {"id": 1, "hostname": "core-sw1", "ip_address": "10.0.0.1", "username": "admin", "password": "pw"}
+    other = dict(device, id=2, hostname="core-sw2", ip_address="10.0.0.2")
+    pooled, _ = pool.lease(device, 1, timeout=1)
+    pooled.session.connection = HungConnection()
+    pool.release(pooled)
+
+    sweep = threading.Thread(target=pool.evict_idle)
+    sweep.start()
+    assert probing.wait(5)
+    leased = []
+    lease = threading.Thread(target=lambda: leased.append(pool.lease(other, 2, timeout=1)))
+    lease.start()
+    lease.join(2)
+    assert leased, "lease waited for the probe of another device"
+    unblock.set()
+    sweep.join(5)
+    assert pooled.session.closed
+    assert pool.lease(device, 3, timeout=1)[1] is False
@@ -0,0 +1,72 @@
+import pytest
+from types import SimpleNamespace
+from netmiko.exceptions import NetmikoTimeoutException, ConnectionException
+from netraven.worker.backends import get_driver, simulated_driver, netmiko_driver
+
+
+def _config(**simulator):
+    settings = {"latency_mean_ms": 0, "seed": 42}
+    settings.update(simulator)
+    return {"worker": {"driver": "simulated", "simulator": settings}}
+
+
+@pytest.fixture
+def device():
+    return SimpleNamespace(id=7, hostname="sim-device", device_type="cisco_ios")
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    simulated_driver.reset_simulator_state()
+    yield
+    simulated_driver.reset_simulator_state()
+
+
+def test_get_driver_selects_backend():
+    assert get_driver({}) is netmiko_driver
+    assert get_driver({"worker": {"driver": "Simulated"}}) is simulated_driver
+    with pytest.raises(ValueError):
+        get_driver({"worker": {"driver": "telnet"}})
+
+
+def test_generates_config_of_requested_size(device):
+    output = simulated_driver.run_command(device, config=_config(config_size_bytes=5000, change_probability=0))
+    assert "hostname sim-device" in output
+    assert 5000 <= len(output) < 6000
+
+
+def test_config_stable_without_changes(device):
+    cfg = _config(change_probability=0)
+    first = simulated_driver.run_command(device, config=cfg)
+    second = simulated_driver.run_command(device, config=cfg)
+    assert first == second
+
+
+def test_config_changes_with_probability_one(device):
+    cfg = _config(change_probability=1.0)
+    first = simulated_driver.run_command(device, config=cfg)
+    second = simulated_driver.run_command(device, config=cfg)
+    assert first != second
+
+
+def test_failure_and_timeout_rates(device):
+    with pytest.raises(ConnectionException):
+        simulated_driver.run_command(device, config=_config(failure_rate=1.0))
+    with pytest.raises(NetmikoTimeoutException):
+        simulated_driver.run_command(device, config=_config(timeout_rate=1.0))
+
+
+def test_settings_coerce_env_strings():
+    settings = simulated_driver.get_simulator_settings(
+        {"worker": {"simulator": {"failure_rate": "0.25", "config_size_bytes": "1024", "seed": "3"}}}
+    )
+    assert settings["failure_rate"] == 0.25
+    assert settings["config_size_bytes"] == 1024
+    assert settings["seed"] == 3
+
+
+def test_fixed_latency_sample():
+    settings = simulated_driver.get_simulator_settings(
+        {"worker": {"simulator": {"latency_distribution": "fixed", "latency_mean_ms": 150}}}
+    )
+    assert simulated_driver.sample_latency(settings, simulated_driver._rng) == pytest.approx(0.15)
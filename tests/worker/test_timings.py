@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch
+from netraven.worker import timings
+from netraven.worker.dispatcher import timed_task
+
+
+class MockDevice:
+    def __init__(self, id, hostname):
+        self.id = id
+        self.hostname = hostname
+        self.device_type = "cisco_ios"
+
+
+@pytest.fixture(autouse=True)
+def no_timer():
+    timings.clear_timer()
+    yield
+    timings.clear_timer()
+
+
+def test_stage_is_noop_without_timer():
+    with timings.stage("command"):
+        pass
+    timings.add_count("bytes_received", 10)
+    assert timings.current_timer() is None
+
+
+def test_timer_accumulates_stages_and_counters():
+    timer = timings.start_timer()
+    timer.add("command", 0.5)
+    with timings.stage("command"):
+        pass
+    timings.add_count("bytes_received", 100)
+    timings.add_count("bytes_received", 50)
+    data = timer.to_dict()
+    assert data["command_ms"] >= 500
+    assert data["bytes_received"] == 150
+
+
+def test_timed_decorator_records_stage():
+    @timings.timed("git_write")
+    def commit():
+        return "sha"
+
+    timer = timings.start_timer()
+    assert commit() == "sha"
+    assert "git_write" in timer.stages
+
+
+def test_aggregate_timings_percentiles():
+    entries = [{"command_ms": float(v)} for v in range(1, 101)] + [None]
+    summary = timings.aggregate_timings(entries)
+    assert summary["command_ms"] == {"count": 100, "p50": 50.0, "p95": 95.0, "max": 100.0}
+
+
+@patch("netraven.worker.dispatcher.task_with_retry")
+def test_timed_task_attaches_timings(mock_task):
+    def fake_task(**kwargs):
+        timings.add("command", 0.25)
+        return {"success": True, "device_id": 1}
+
+    mock_task.side_effect = fake_task
+    result = timed_task(0.0, device=MockDevice(1, "dev1"), job_id=1)
+    assert "queue_wait_ms" in result["timings"]
+    assert result["timings"]["command_ms"] == 250.0
+    assert timings.current_timer() is None
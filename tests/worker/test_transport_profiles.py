@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from paramiko.ssh_exception import SSHException
+from paramiko.transport import Transport
+
+from netraven.worker import transport_profiles
+from netraven.worker.backends import netmiko_driver
+from netraven.worker.backends.ssh_compat import apply_transport_preferences, transport_preferences
+
+DEVICE = SimpleNamespace(id=7, hostname="old-rtr", device_type="cisco_ios", ip_address="10.0.0.7",
+                         username="admin", password="pw")
+LEGACY_PROFILE = {
+    "kex": "diffie-hellman-group14-sha256",
+    "cipher": "aes128-ctr",
+    "mac": "hmac-sha1",
+    "host_key_type": "rsa-sha2-256",
+    "legacy_required": True,
+    "enable_required": True,
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    transport_profiles.load_profiles([], db=None)
+    yield
+    transport_profiles.load_profiles([], db=None)
+
+
+def test_profile_pins_every_recorded_algorithm():
+    preferences = transport_preferences(LEGACY_PROFILE)
+    assert preferences == {
+        "kex": ("diffie-hellman-group14-sha256",),
+        "ciphers": ("aes128-ctr",),
+        "digests": ("hmac-sha1",),
+        "key_types": ("rsa-sha2-256",),
+    }
+
+
+def test_unknown_algorithms_are_not_pinned():
+    assert transport_preferences({"kex": "no-such-kex"}) is None
+    assert transport_preferences(None) is None
+
+
+def test_legacy_algorithms_are_offered_per_transport(monkeypatch):
+    # Paramiko versions differ in which legacy MACs they offer by default
+    modern_macs = tuple(mac for mac in Transport._preferred_macs if mac != "hmac-md5")
+    monkeypatch.setattr(Transport, "_preferred_macs", modern_macs)
+    legacy = (["no-such-kex"], ["hmac-md5"])
+    preferences = transport_preferences(legacy=legacy)
+    assert preferences == {"digests": modern_macs + ("hmac-md5",)}
+    transport = apply_transport_preferences(Transport(MagicMock()), preferences)
+    assert transport._preferred_macs == modern_macs + ("hmac-md5",)
+    assert Transport._preferred_macs == modern_macs
+    legacy_profile = {"kex": None, "mac": "hmac-md5"}
+    assert transport_preferences(legacy_profile, legacy)["digests"] == ("hmac-md5",)
+    assert transport_preferences(legacy_profile) is None
+
+
+def test_only_changed_profiles_are_saved():
+    transport_profiles.record_profile(7, LEGACY_PROFILE)
+    transport_profiles.record_profile(8, {"kex": None, "cipher": None})
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = []
+    assert transport_profiles.save_changed_profiles(db) == 1
+    assert db.add.call_args.args[0].device_id == 7
+    transport_profiles.record_profile(7, LEGACY_PROFILE)
+    assert transport_profiles.save_changed_profiles(db) == 0
+
+
+def test_rejected_profile_falls_back_to_full_offer():
+    transport_profiles.record_profile(7, LEGACY_PROFILE)
+    connection = MagicMock()
+    connection.check_enable_mode.return_value = False
+    connection._open.side_effect = [SSHException("Incompatible ssh peer (no acceptable kex algorithm)"), None]
+    attempts = []
+
+    def offer_on_transport(conn, preferences):
+        attempts.append(preferences)
+
+    with patch("netraven.worker.backends.netmiko_driver.ConnectHandler", return_value=connection), \
+            patch("netraven.worker.backends.netmiko_driver._offer_on_transport", side_effect=offer_on_transport), \
+            patch("netraven.worker.backends.netmiko_driver.connect_socket"):
+        with netmiko_driver.open_session(DEVICE, config={}):
+            pass
+    assert attempts == [transport_preferences(LEGACY_PROFILE)]
+    assert connection._open.call_count == 2
+    connection.enable.assert_called_once()